@@ -18,6 +18,8 @@ import requests
 from pathlib import Path
 import subprocess
 import sys
+from sqlite_manager import get_db
+from app.services.llm_cache import cached_generate
 
 # Add MCP client support
 try:
@@ -33,13 +35,17 @@ except ImportError:
 class AIService:
     def __init__(self, db_path='spinalsurgery_research.db'):
         self.db_path = db_path
+        self.db = get_db(db_path)
         self.init_ai_tables()
         self.ollama_base_url = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
         self.claude_api_key = os.getenv('CLAUDE_API_KEY', '')
         
     def init_ai_tables(self):
         """AI 관련 테이블 초기화"""
-        conn = sqlite3.connect(self.db_path)
+        self.db.write(self._create_ai_tables)
+    
+    def _create_ai_tables(self, conn: sqlite3.Connection):
+        """쓰기 스레드에서 실행되는 테이블 생성"""
         c = conn.cursor()
         
         # AI 세션 테이블
@@ -90,9 +96,6 @@ class AIService:
         
         # 기본 MCP 서버 추가
         self._insert_default_mcp_servers(c)
-        
-        conn.commit()
-        conn.close()
     
     def _insert_default_mcp_servers(self, cursor):
         """기본 MCP 서버 설정 추가"""
@@ -122,12 +125,7 @@ class AIService:
     
     async def create_mcp_session(self, server_id: str) -> Optional[ClientSession]:
         """MCP 서버와 연결"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('SELECT * FROM mcp_servers WHERE id = ? AND enabled = 1', (server_id,))
-        server = c.fetchone()
-        conn.close()
+        server = self.db.query_one('SELECT * FROM mcp_servers WHERE id = ? AND enabled = 1', (server_id,))
         
         if not server:
             return None
@@ -230,16 +228,10 @@ class AIService:
         """새 AI 세션 생성"""
         session_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''INSERT INTO ai_sessions 
-                    (id, project_id, session_type, model_name)
-                    VALUES (?, ?, ?, ?)''',
-                 (session_id, project_id, session_type, model_name))
-        
-        conn.commit()
-        conn.close()
+        self.db.execute('''INSERT INTO ai_sessions 
+                           (id, project_id, session_type, model_name)
+                           VALUES (?, ?, ?, ?)''',
+                        (session_id, project_id, session_type, model_name))
         
         return session_id
     
@@ -248,22 +240,16 @@ class AIService:
         """대화 기록 저장"""
         conv_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''INSERT INTO ai_conversations 
-                    (id, session_id, role, content, metadata)
-                    VALUES (?, ?, ?, ?, ?)''',
-                 (conv_id, session_id, role, content, 
-                  json.dumps(metadata) if metadata else None))
-        
-        conn.commit()
-        conn.close()
+        self.db.execute('''INSERT INTO ai_conversations 
+                           (id, session_id, role, content, metadata)
+                           VALUES (?, ?, ?, ?, ?)''',
+                        (conv_id, session_id, role, content, 
+                         json.dumps(metadata) if metadata else None))
     
     async def analyze_documents(self, project_id: str, document_paths: List[str],
                                analysis_type: str = 'summary', 
-                               model: str = 'llama2') -> Dict:
-        """문서 분석 (NotebookLM 스타일)"""
+                               model: str = 'llama2', bypass_cache: bool = False) -> Dict:
+        """문서 분석 (NotebookLM 스타일) - 같은 문서 / 분석 종류면 캐시된 결과 사용"""
         all_content = []
         
         # 문서 읽기 (MCP 사용)
@@ -314,27 +300,21 @@ Generate a hierarchical outline with:
             prompt = combined_content
         
         # Ollama로 분석
-        result = await self.query_ollama(
-            prompt=prompt,
-            model=model,
-            system_prompt="You are an expert research assistant analyzing medical documents."
+        result = await self._cached_query(
+            'document_analysis', prompt, model,
+            "You are an expert research assistant analyzing medical documents.",
+            bypass_cache
         )
         
         if 'error' not in result:
             # 결과 저장
             analysis_id = str(uuid.uuid4())
             
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            c.execute('''INSERT INTO document_analyses 
-                        (id, project_id, document_path, analysis_type, result, model_used)
-                        VALUES (?, ?, ?, ?, ?, ?)''',
-                     (analysis_id, project_id, json.dumps(document_paths),
-                      analysis_type, json.dumps(result), model))
-            
-            conn.commit()
-            conn.close()
+            self.db.execute('''INSERT INTO document_analyses 
+                               (id, project_id, document_path, analysis_type, result, model_used)
+                               VALUES (?, ?, ?, ?, ?, ?)''',
+                            (analysis_id, project_id, json.dumps(document_paths),
+                             analysis_type, json.dumps(result), model))
             
             result['analysis_id'] = analysis_id
         
@@ -342,8 +322,9 @@ Generate a hierarchical outline with:
     
     async def generate_paper_draft(self, project_id: str, title: str, 
                                   keywords: List[str], outline: Dict,
-                                  references: List[Dict], model: str = 'llama2') -> Dict:
-        """논문 초안 생성"""
+                                  references: List[Dict], model: str = 'llama2',
+                                  bypass_cache: bool = False) -> Dict:
+        """논문 초안 생성 - 같은 입력이면 캐시된 초안 사용"""
         # 참고문헌 포맷팅
         refs_text = "\n".join([
             f"{i+1}. {ref.get('title', 'Unknown')} - {ref.get('authors', 'Unknown')} ({ref.get('year', 'Unknown')})"
@@ -371,41 +352,40 @@ Please generate:
 
 Follow standard medical research paper format."""
         
-        result = await self.query_ollama(
-            prompt=prompt,
-            model=model,
-            system_prompt="You are an expert medical researcher and paper writer."
+        result = await self._cached_query(
+            'paper_draft', prompt, model,
+            "You are an expert medical researcher and paper writer.",
+            bypass_cache
         )
         
         return result
     
+    async def _cached_query(self, namespace: str, prompt: str, model: str,
+                            system_prompt: str, bypass_cache: bool) -> Dict:
+        """query_ollama 결과를 LLM 응답 캐시를 거쳐 반환 (오류 응답은 저장하지 않음)"""
+        return await cached_generate(
+            namespace,
+            f"ollama/{model}",
+            prompt,
+            lambda: self.query_ollama(prompt=prompt, model=model, system_prompt=system_prompt),
+            system=system_prompt,
+            bypass=bypass_cache,
+            cacheable=lambda result: 'error' not in result
+        )
+    
     def get_ai_sessions(self, project_id: str) -> List[Dict]:
         """프로젝트의 AI 세션 목록"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute('''SELECT * FROM ai_sessions 
-                    WHERE project_id = ? 
-                    ORDER BY created_at DESC''', (project_id,))
-        
-        sessions = [dict(row) for row in c.fetchall()]
-        conn.close()
+        sessions = [dict(row) for row in self.db.query('''SELECT * FROM ai_sessions 
+                                                           WHERE project_id = ? 
+                                                           ORDER BY created_at DESC''', (project_id,))]
         
         return sessions
     
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """세션의 대화 기록"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute('''SELECT * FROM ai_conversations 
-                    WHERE session_id = ? 
-                    ORDER BY created_at''', (session_id,))
-        
-        conversations = [dict(row) for row in c.fetchall()]
-        conn.close()
+        conversations = [dict(row) for row in self.db.query('''SELECT * FROM ai_conversations 
+                                                                WHERE session_id = ? 
+                                                                ORDER BY created_at''', (session_id,))]
         
         return conversations
 
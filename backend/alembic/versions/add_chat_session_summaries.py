@@ -0,0 +1,55 @@
+"""add denormalized message summary columns and list index to chat sessions
+
+Revision ID: add_chat_session_summaries
+Revises: add_chat_sessions
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_chat_session_summaries'
+down_revision = 'add_chat_sessions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chat_sessions', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('chat_sessions', sa.Column('last_message_role', sa.String(), nullable=True))
+    op.add_column('chat_sessions', sa.Column('last_message_preview', sa.String(), nullable=True))
+    op.add_column('chat_sessions', sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+    
+    # Backfill from existing messages (same preview format as ChatSession.record_message)
+    op.execute('''
+        UPDATE chat_sessions SET
+            message_count = (
+                SELECT COUNT(*) FROM chat_messages m WHERE m.session_id = chat_sessions.id
+            ),
+            last_message_role = (
+                SELECT m.role FROM chat_messages m WHERE m.session_id = chat_sessions.id
+                ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+            ),
+            last_message_preview = (
+                SELECT CASE WHEN length(m.content) > 100
+                            THEN substr(m.content, 1, 100) || '...'
+                            ELSE m.content END
+                FROM chat_messages m WHERE m.session_id = chat_sessions.id
+                ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+            ),
+            last_message_at = (
+                SELECT MAX(m.timestamp) FROM chat_messages m WHERE m.session_id = chat_sessions.id
+            )
+    ''')
+    
+    op.create_index('ix_chat_sessions_user_active_updated', 'chat_sessions',
+                    ['user_id', 'is_active', 'updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_sessions_user_active_updated', table_name='chat_sessions')
+    op.drop_column('chat_sessions', 'last_message_at')
+    op.drop_column('chat_sessions', 'last_message_preview')
+    op.drop_column('chat_sessions', 'last_message_role')
+    op.drop_column('chat_sessions', 'message_count')
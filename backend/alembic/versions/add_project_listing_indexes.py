@@ -0,0 +1,32 @@
+"""add indexes for project listing and per-project counts
+
+Revision ID: add_project_listing_indexes
+Revises: add_chat_session_summaries
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_project_listing_indexes'
+down_revision = 'add_chat_session_summaries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Project list keyset order
+    op.create_index('ix_research_projects_user_created', 'research_projects',
+                    ['user_id', 'created_at', 'id'], unique=False, if_not_exists=True)
+    
+    # Correlated COUNT(*) per project (PostgreSQL does not index foreign keys)
+    op.create_index(op.f('ix_papers_project_id'), 'papers', ['project_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_patients_project_id'), 'patients', ['project_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_collaborators_project_id'), 'collaborators', ['project_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_collaborators_project_id'), table_name='collaborators')
+    op.drop_index(op.f('ix_patients_project_id'), table_name='patients')
+    op.drop_index(op.f('ix_papers_project_id'), table_name='papers')
+    op.drop_index('ix_research_projects_user_created', table_name='research_projects')
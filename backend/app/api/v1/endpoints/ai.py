@@ -6,6 +6,9 @@ from app.api import deps
 from app.core.database import get_db
 from app.models.user import User
 from app.services.ai_service import ai_service
+from app.services.llm_cache import get_llm_cache
+from app.services.ollama_client import ollama_client
+from app.services.paper_vectors import paper_vectors
 from app.services.scraper_service import scraper_service
 
 router = APIRouter()
@@ -32,7 +35,8 @@ async def generate_paper_draft(
             field=data['field'],
             keywords=data['keywords'],
             details=data['details'],
-            references=search_results
+            references=search_results,
+            bypass_cache=data.get('bypass_cache', False)
         )
         
         return draft
@@ -58,7 +62,8 @@ async def generate_informed_consent(
             field=data.get('field', 'Medical Research'),
             procedures=data['procedures'],
             risks=data['risks'],
-            benefits=data['benefits']
+            benefits=data['benefits'],
+            bypass_cache=data.get('bypass_cache', False)
         )
         
         return {"content": consent}
@@ -78,7 +83,8 @@ async def generate_statistics_analysis(
         analysis = await ai_service.analyze_statistics(
             data_description=data['data_description'],
             analysis_type=data['analysis_type'],
-            variables=data['variables']
+            variables=data['variables'],
+            bypass_cache=data.get('bypass_cache', False)
         )
         
         return analysis
@@ -105,4 +111,51 @@ async def search_papers(
         
         return {"results": results, "total": len(results)}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/similar-papers")
+async def search_similar_papers(
+    *,
+    current_user: User = Depends(deps.get_current_user),
+    data: dict
+) -> Any:
+    """Papers most similar to a title / abstract from the paper vector index"""
+    try:
+        results = await ai_service.search_similar_papers(
+            title=data.get('title', ''),
+            abstract=data.get('abstract', ''),
+            limit=data.get('limit', 10),
+            sources=data.get('sources')
+        )
+        
+        return {"results": results, "total": len(results)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/similar-papers/stats")
+async def get_paper_vector_stats(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """Size of the paper vector index and the result of the last sync"""
+    return paper_vectors.stats()
+
+
+@router.get("/cache/stats")
+async def get_llm_cache_stats(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """Hit rate and size of the LLM response cache"""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/dispatch/stats")
+async def get_llm_dispatch_stats(
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """Per-model queue depth, slot usage and queue wait times of Ollama requests"""
+    return ollama_client.dispatch_stats()
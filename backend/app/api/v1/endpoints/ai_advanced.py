@@ -199,7 +199,9 @@ async def import_memory(
     current_user: User = Depends(deps.get_current_user)
 ):
     """Import AI memory"""
-    await advanced_ollama_service.import_memory(str(current_user.id), memory_import.data)
+    await advanced_ollama_service.import_memory(
+        str(current_user.id), memory_import.data, merge=memory_import.merge
+    )
     return {"message": "Memory imported successfully"}
 
 @router.delete("/memory")
@@ -212,13 +214,7 @@ async def clear_memory(
         advanced_ollama_service.short_term_memory.clear()
     
     if memory_type in ["all", "long_term"]:
-        advanced_ollama_service.long_term_memory = {
-            "facts": {},
-            "conversations": {},
-            "insights": {},
-            "user_preferences": {}
-        }
-        advanced_ollama_service._save_long_term_memory()
+        advanced_ollama_service.memory_store.partition(str(current_user.id)).clear()
     
     return {"message": f"Cleared {memory_type} memory"}
 
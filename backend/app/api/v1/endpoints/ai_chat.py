@@ -5,25 +5,36 @@ from typing import Any, Dict, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_
+from sqlalchemy import select, delete, and_, or_
 from sqlalchemy.orm import selectinload
 import uuid
+import base64
+import asyncio
 from datetime import datetime
 import json
 import csv
+import zipfile
 from io import StringIO
 from fastapi.responses import StreamingResponse
 
 from app.api import deps
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.models.user import User
 from app.models.chat_session import ChatSession, ChatMessage as ChatMessageModel
 from app.services.ai_service import ai_service
+from app.services.chat_store import chat_store, SessionNotFound
 from app.services.ollama_chat_service import ollama_chat_service
 from app.services.superclaude_ai_service import superclaude_ai_service
 
 router = APIRouter()
 
+async def _sync_chat_writes():
+    """Make queued chat writes visible to the DB queries that follow"""
+    try:
+        await chat_store.flush(timeout=5)
+    except asyncio.TimeoutError:
+        print("Chat write-behind flush timed out; reading committed state")
+
 class ChatMessageRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
@@ -67,50 +78,22 @@ async def chat_with_ai(
         session_id = chat_data.session_id or str(uuid.uuid4())
         user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
         
-        # Check if session exists in database
-        result = await db.execute(
-            select(ChatSession).where(
-                and_(
-                    ChatSession.id == session_id,
-                    ChatSession.user_id == user_id
-                )
-            )
-        )
-        session = result.scalar_one_or_none()
+        # Recent messages come from the in-process window (DB only on first access)
+        try:
+            history = await chat_store.get_context(session_id, user_id)
+        except SessionNotFound:
+            raise HTTPException(status_code=404, detail="Session not found")
         
-        # Create new session if doesn't exist
-        if not session:
-            session = ChatSession(
-                id=session_id,
-                user_id=user_id,
-                model=chat_data.model or "llama2",
-                title=chat_data.message[:50] + "..." if len(chat_data.message) > 50 else chat_data.message
-            )
-            db.add(session)
-            await db.flush()
+        title = None
+        if history is None:
+            history = []
+            title = chat_data.message[:50] + "..." if len(chat_data.message) > 50 else chat_data.message
         
-        # Add user message to database
-        user_message = ChatMessageModel(
-            session_id=session_id,
-            role="user",
-            content=chat_data.message,
-            timestamp=datetime.utcnow()
-        )
-        db.add(user_message)
-        await db.flush()
-        
-        # Get recent messages for context
-        recent_messages_result = await db.execute(
-            select(ChatMessageModel)
-            .where(ChatMessageModel.session_id == session_id)
-            .order_by(ChatMessageModel.timestamp.desc())
-            .limit(10)
-        )
-        recent_messages = recent_messages_result.scalars().all()
-        context_messages = [{
-            "role": msg.role,
-            "content": msg.content
-        } for msg in reversed(recent_messages)]
+        user_timestamp = datetime.utcnow()
+        context_messages = (history + [{
+            "role": "user",
+            "content": chat_data.message
+        }])[-chat_store.window:]
         
         # Get AI response
         enhanced_response = None
@@ -173,21 +156,17 @@ async def chat_with_ai(
                 )
                 model_used = "mock-llm"
         
-        # Add AI response to database
-        ai_message = ChatMessageModel(
+        # Persist both messages and the session update in the background
+        chat_store.record_exchange(
             session_id=session_id,
-            role="assistant",
-            content=response,
-            timestamp=datetime.utcnow(),
-            model=model_used
+            user_id=user_id,
+            title=title,
+            model=model_used,
+            messages=[
+                ("user", chat_data.message, user_timestamp, None),
+                ("assistant", response, datetime.utcnow(), model_used)
+            ]
         )
-        db.add(ai_message)
-        
-        # Update session
-        session.updated_at = datetime.utcnow()
-        session.model = model_used
-        
-        await db.commit()
         
         return ChatResponse(
             response=response,
@@ -199,61 +178,100 @@ async def chat_with_ai(
             thinking_steps=thinking_steps_count
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+def _encode_session_cursor(updated_at: datetime, session_id: str) -> str:
+    raw = f"{updated_at.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_session_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, session_id = raw.split("|", 1)
+        return datetime.fromisoformat(updated_at), session_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/chat/sessions")
 async def get_chat_sessions(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user),
+    cursor: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100)
 ) -> Any:
-    """Get user's chat sessions"""
+    """Get user's chat sessions (newest first; pass next_cursor back as cursor for the next page)"""
     user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
+    await _sync_chat_writes()
     
-    # Get sessions with message count
-    result = await db.execute(
-        select(ChatSession)
+    # Summary columns only - messages are not loaded
+    query = (
+        select(
+            ChatSession.id,
+            ChatSession.title,
+            ChatSession.created_at,
+            ChatSession.updated_at,
+            ChatSession.message_count,
+            ChatSession.last_message_role,
+            ChatSession.last_message_preview,
+            ChatSession.last_message_at,
+            ChatSession.is_active,
+            ChatSession.model
+        )
         .where(
             and_(
                 ChatSession.user_id == user_id,
                 ChatSession.is_active == True
             )
         )
-        .options(selectinload(ChatSession.messages))
-        .order_by(ChatSession.updated_at.desc())
-        .offset(skip)
-        .limit(limit)
+        .order_by(ChatSession.updated_at.desc(), ChatSession.id.desc())
+        .limit(limit + 1)
     )
-    sessions = result.scalars().all()
+    if cursor:
+        cursor_updated_at, cursor_id = _decode_session_cursor(cursor)
+        query = query.where(
+            or_(
+                ChatSession.updated_at < cursor_updated_at,
+                and_(ChatSession.updated_at == cursor_updated_at, ChatSession.id < cursor_id)
+            )
+        )
+    elif skip:
+        # Legacy offset pagination
+        query = query.offset(skip)
+    
+    rows = (await db.execute(query)).all()
     
     user_sessions = []
-    for session in sessions:
-        messages = sorted(session.messages, key=lambda x: x.timestamp)
+    for row in rows[:limit]:
         last_message = None
-        if messages:
-            last_msg = messages[-1]
+        if row.last_message_at is not None:
             last_message = {
-                "role": last_msg.role,
-                "content": last_msg.content[:100] + "..." if len(last_msg.content) > 100 else last_msg.content,
-                "timestamp": last_msg.timestamp.isoformat()
+                "role": row.last_message_role,
+                "content": row.last_message_preview,
+                "timestamp": row.last_message_at.isoformat()
             }
         
         user_sessions.append(ChatSessionResponse(
-            session_id=session.id,
-            title=session.title,
-            created_at=session.created_at.isoformat(),
-            updated_at=session.updated_at.isoformat(),
-            message_count=len(messages),
+            session_id=row.id,
+            title=row.title,
+            created_at=row.created_at.isoformat(),
+            updated_at=row.updated_at.isoformat(),
+            message_count=row.message_count,
             last_message=last_message,
-            is_active=session.is_active,
-            model=session.model
+            is_active=row.is_active,
+            model=row.model
         ))
     
-    return {"sessions": user_sessions}
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_session_cursor(last.updated_at, last.id)
+    
+    return {"sessions": user_sessions, "next_cursor": next_cursor}
 
 @router.get("/chat/sessions/{session_id}")
 async def get_chat_history(
@@ -264,6 +282,7 @@ async def get_chat_history(
 ) -> Any:
     """Get chat history for a session"""
     user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
+    await _sync_chat_writes()
     
     # Get session with messages
     result = await db.execute(
@@ -372,6 +391,7 @@ async def delete_chat_session(
 ) -> Any:
     """Delete a chat session and all its messages"""
     user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
+    await _sync_chat_writes()
     
     # Check if session exists and belongs to user
     result = await db.execute(
@@ -390,9 +410,107 @@ async def delete_chat_session(
     # Delete session (messages will be cascade deleted)
     await db.delete(session)
     await db.commit()
+    chat_store.forget(session_id)
     
     return {"status": "success", "message": f"Session {session_id} deleted successfully"}
 
+# Rows fetched per round trip while streaming exports
+EXPORT_BATCH_SIZE = 500
+# Approximate size of each chunk sent to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+async def _stream_messages(session_id: str):
+    """Messages of a session in timestamp order, fetched in batches from a server-side cursor
+
+    Uses its own DB session because the request's session is closed before
+    the streaming response body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(
+                ChatMessageModel.role,
+                ChatMessageModel.content,
+                ChatMessageModel.timestamp,
+                ChatMessageModel.model
+            )
+            .where(ChatMessageModel.session_id == session_id)
+            .order_by(ChatMessageModel.timestamp, ChatMessageModel.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for row in result:
+            yield row
+
+async def _chunked(parts):
+    """Join small text parts into chunks of about EXPORT_CHUNK_SIZE bytes"""
+    buffer, size = [], 0
+    async for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+async def _export_json(session):
+    header = json.dumps({
+        "session_id": session.id,
+        "title": session.title,
+        "created_at": _iso(session.created_at),
+        "model": session.model
+    }, indent=2, ensure_ascii=False)
+    yield header[:-2] + ',\n  "messages": ['
+    separator = "\n    "
+    async for msg in _stream_messages(session.id):
+        yield separator + json.dumps({
+            "role": msg.role,
+            "content": msg.content,
+            "timestamp": _iso(msg.timestamp),
+            "model": msg.model
+        }, ensure_ascii=False)
+        separator = ",\n    "
+    yield "\n  ]\n}\n"
+
+async def _export_csv(session):
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["Timestamp", "Role", "Content", "Model"])
+    async for msg in _stream_messages(session.id):
+        writer.writerow([
+            _iso(msg.timestamp),
+            msg.role,
+            msg.content,
+            msg.model or ""
+        ])
+        if output.tell() >= EXPORT_CHUNK_SIZE:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+async def _export_markdown(session):
+    yield f"# Chat Session: {session.title or session.id}\n\n"
+    yield f"**Created:** {_iso(session.created_at)}\n"
+    yield f"**Model:** {session.model}\n\n"
+    yield "---\n\n"
+    
+    async for msg in _stream_messages(session.id):
+        timestamp = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if msg.timestamp else ""
+        if msg.role == "user":
+            yield f"### 👤 User ({timestamp})\n\n"
+        else:
+            yield f"### 🤖 Assistant ({timestamp})\n\n"
+        yield f"{msg.content}\n\n"
+
+EXPORT_FORMATS = {
+    "json": (_export_json, "application/json", "json"),
+    "csv": (_export_csv, "text/csv", "csv"),
+    "markdown": (_export_markdown, "text/markdown", "md"),
+}
+
 @router.post("/chat/sessions/{session_id}/export")
 async def export_chat_session(
     *,
@@ -401,92 +519,130 @@ async def export_chat_session(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
-    """Export chat session in various formats"""
+    """Export chat session in various formats (streamed; messages are never all in memory)"""
     user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
+    await _sync_chat_writes()
     
-    # Get session with messages
+    # Session header only - messages are streamed by the response body
     result = await db.execute(
-        select(ChatSession)
+        select(ChatSession.id, ChatSession.title, ChatSession.created_at, ChatSession.model)
         .where(
             and_(
                 ChatSession.id == session_id,
                 ChatSession.user_id == user_id
             )
         )
-        .options(selectinload(ChatSession.messages))
     )
-    session = result.scalar_one_or_none()
+    session = result.one_or_none()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Sort messages by timestamp
-    messages = sorted(session.messages, key=lambda x: x.timestamp)
-    
-    if format == "json":
-        # Export as JSON
-        export_data = {
-            "session_id": session.id,
-            "title": session.title,
-            "created_at": session.created_at.isoformat(),
-            "model": session.model,
-            "messages": [{
-                "role": msg.role,
-                "content": msg.content,
-                "timestamp": msg.timestamp.isoformat(),
-                "model": msg.model
-            } for msg in messages]
+    exporter, media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        _chunked(exporter(session)),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=chat_session_{session_id}.{extension}"
         }
-        return StreamingResponse(
-            io=StringIO(json.dumps(export_data, indent=2, ensure_ascii=False)),
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f"attachment; filename=chat_session_{session_id}.json"
-            }
-        )
+    )
+
+class _ZipStream:
+    """Write-only, non-seekable file object for zipfile; drain() returns bytes written so far"""
     
-    elif format == "csv":
-        # Export as CSV
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Timestamp", "Role", "Content", "Model"])
-        for msg in messages:
-            writer.writerow([
-                msg.timestamp.isoformat(),
-                msg.role,
-                msg.content,
-                msg.model or ""
-            ])
-        output.seek(0)
-        return StreamingResponse(
-            io=output,
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=chat_session_{session_id}.csv"
-            }
-        )
+    def __init__(self):
+        self._parts = []
+        self._position = 0
     
-    else:  # markdown
-        # Export as Markdown
-        markdown_content = f"# Chat Session: {session.title or session_id}\n\n"
-        markdown_content += f"**Created:** {session.created_at.isoformat()}\n"
-        markdown_content += f"**Model:** {session.model}\n\n"
-        markdown_content += "---\n\n"
-        
-        for msg in messages:
-            if msg.role == "user":
-                markdown_content += f"### 👤 User ({msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')})\n\n"
-            else:
-                markdown_content += f"### 🤖 Assistant ({msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')})\n\n"
-            markdown_content += f"{msg.content}\n\n"
-        
-        return StreamingResponse(
-            io=StringIO(markdown_content),
-            media_type="text/markdown",
-            headers={
-                "Content-Disposition": f"attachment; filename=chat_session_{session_id}.md"
-            }
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+async def _export_all_ndjson(user_id: str):
+    """All sessions of a user as NDJSON: a "session" line followed by its "message" lines"""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(
+                ChatSession.id,
+                ChatSession.title,
+                ChatSession.created_at,
+                ChatSession.updated_at,
+                ChatSession.model,
+                ChatSession.is_active,
+                ChatMessageModel.role,
+                ChatMessageModel.content,
+                ChatMessageModel.timestamp,
+                ChatMessageModel.model.label("message_model")
+            )
+            .outerjoin(ChatMessageModel, ChatMessageModel.session_id == ChatSession.id)
+            .where(ChatSession.user_id == user_id)
+            .order_by(ChatSession.created_at, ChatSession.id, ChatMessageModel.timestamp, ChatMessageModel.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
         )
+        current_session = None
+        async for row in result:
+            if row.id != current_session:
+                current_session = row.id
+                yield json.dumps({
+                    "type": "session",
+                    "session_id": row.id,
+                    "title": row.title,
+                    "created_at": _iso(row.created_at),
+                    "updated_at": _iso(row.updated_at),
+                    "model": row.model,
+                    "is_active": row.is_active
+                }, ensure_ascii=False) + "\n"
+            if row.role is not None:
+                yield json.dumps({
+                    "type": "message",
+                    "session_id": row.id,
+                    "role": row.role,
+                    "content": row.content,
+                    "timestamp": _iso(row.timestamp),
+                    "model": row.message_model
+                }, ensure_ascii=False) + "\n"
+
+async def _zip_single_file(name: str, chunks):
+    """Stream a zip archive holding one file whose content comes from chunks"""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(name, mode="w", force_zip64=True) as entry:
+            async for chunk in chunks:
+                entry.write(chunk)
+                data = stream.drain()
+                if data:
+                    yield data
+    yield stream.drain()
+
+@router.post("/chat/sessions/export")
+async def export_all_chat_sessions(
+    *,
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """Export all of the user's chat sessions as a zipped NDJSON stream"""
+    user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
+    await _sync_chat_writes()
+    filename = f"chat_sessions_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    
+    return StreamingResponse(
+        _zip_single_file(f"{filename}.ndjson", _chunked(_export_all_ndjson(user_id))),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}.zip"
+        }
+    )
 
 @router.put("/chat/sessions/{session_id}")
 async def update_chat_session(
@@ -498,6 +654,7 @@ async def update_chat_session(
 ) -> Any:
     """Update chat session title"""
     user_id = str(current_user.id) if hasattr(current_user, 'id') else "mock-user"
+    await _sync_chat_writes()
     
     # Get session
     result = await db.execute(
@@ -1,7 +1,7 @@
 """
 File browser API endpoints for managing research papers
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query, Request, Response
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 import shutil
@@ -9,12 +9,63 @@ import json
 import os
 from datetime import datetime
 from pydantic import BaseModel
+import asyncio
+import mimetypes
+
+from app.core.config import settings
+from app.services.directory_cache import get_directory_cache
+from app.services.file_search_index import get_file_search_index
+from app.services.file_transfer import (
+    TEXT_WINDOW_SIZE, MAX_WINDOW_LINES, RangeFileResponse, UploadTooLarge,
+    read_text_lines, read_text_window, save_upload
+)
 
 router = APIRouter()
 
 # Base directory for research papers
 PAPERS_BASE_DIR = Path("/home/drjang00/DevEnvironments/spinalsurgery-research/data/papers")
 
+
+# Default page size for lazy directory expansion
+TREE_PAGE_SIZE = 200
+
+# Types that may be shown in the browser (inline=true); anything else, e.g. HTML
+# or SVG that could run script on the API origin, is sent as an attachment
+INLINE_MEDIA_TYPES = frozenset({
+    'application/pdf', 'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/bmp',
+})
+
+
+async def _reindex(*paths: Path):
+    """Refresh the search index and tree cache for paths changed by this API"""
+    cache = get_directory_cache(PAPERS_BASE_DIR)
+    index = await asyncio.to_thread(get_file_search_index, PAPERS_BASE_DIR)
+    for path in paths:
+        cache.invalidate(path)
+        await asyncio.to_thread(index.update_path, path)
+
+
+async def _unindex(*paths: Path):
+    """Drop removed paths from the search index and tree cache"""
+    cache = get_directory_cache(PAPERS_BASE_DIR)
+    index = await asyncio.to_thread(get_file_search_index, PAPERS_BASE_DIR)
+    for path in paths:
+        cache.invalidate(path)
+        await asyncio.to_thread(index.remove_path, path)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against a weak ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 class FileNode(BaseModel):
     name: str
     path: str
@@ -38,8 +89,41 @@ class SearchQuery(BaseModel):
     path: Optional[str] = None
     extensions: Optional[List[str]] = None
 
+class DirectoryPage(BaseModel):
+    path: str
+    items: List[FileNode]
+    next_cursor: Optional[str] = None
+    total: int
+
+def _node(entry: Dict[str, Any]) -> FileNode:
+    """FileNode from a cached directory entry"""
+    return FileNode(
+        name=entry['name'],
+        path=entry['path'],
+        type=entry['type'],
+        size=entry['size'],
+        modified=entry['modified'],
+        extension=entry['extension']
+    )
+
+def _tree_children(directory: Path, max_depth: int, current_depth: int) -> List[FileNode]:
+    """Children of a directory at current_depth, built from cached listings"""
+    children = []
+    if current_depth + 1 >= max_depth:
+        return children
+    cache = get_directory_cache(PAPERS_BASE_DIR)
+    for entry in cache.listing(directory).entries:
+        child = _node(entry)
+        if entry['type'] == 'directory':
+            try:
+                child.children = _tree_children(directory / entry['name'], max_depth, current_depth + 1)
+            except OSError:
+                continue
+        children.append(child)
+    return children
+
 def get_file_tree(path: Path, max_depth: int = 5, current_depth: int = 0) -> FileNode:
-    """Recursively build file tree structure"""
+    """Build file tree structure (directory listings come from the stat cache)"""
     if current_depth >= max_depth:
         return None
     
@@ -55,20 +139,20 @@ def get_file_tree(path: Path, max_depth: int = 5, current_depth: int = 0) -> Fil
         )
         
         if path.is_dir():
-            children = []
-            for child in sorted(path.iterdir()):
-                child_node = get_file_tree(child, max_depth, current_depth + 1)
-                if child_node:
-                    children.append(child_node)
-            node.children = children
+            node.children = _tree_children(path, max_depth, current_depth)
             
         return node
     except Exception as e:
         return None
 
 @router.get("/tree")
-async def get_directory_tree(path: str = "") -> FileNode:
-    """Get directory tree structure"""
+async def get_directory_tree(
+    request: Request,
+    response: Response,
+    path: str = "",
+    depth: int = Query(5, ge=1, le=10)
+) -> FileNode:
+    """Get directory tree structure (use depth=1 with /tree/children for lazy expansion)"""
     try:
         target_path = PAPERS_BASE_DIR / path if path else PAPERS_BASE_DIR
         if not target_path.exists():
@@ -77,7 +161,59 @@ async def get_directory_tree(path: str = "") -> FileNode:
         if not target_path.is_relative_to(PAPERS_BASE_DIR):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        return get_file_tree(target_path)
+        cache = get_directory_cache(PAPERS_BASE_DIR)
+        if target_path.is_dir():
+            version = await asyncio.to_thread(cache.subtree_version, target_path, depth)
+        else:
+            version = f"{target_path.stat().st_mtime_ns:x}"
+        etag = f'W/"{version}"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return await asyncio.to_thread(get_file_tree, target_path, depth)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tree/children")
+async def get_directory_children(
+    request: Request,
+    response: Response,
+    path: str = "",
+    cursor: Optional[str] = None,
+    limit: int = Query(TREE_PAGE_SIZE, ge=1, le=5000)
+) -> DirectoryPage:
+    """One page of a directory's children, sorted by name (cursor = last name of the previous page)"""
+    try:
+        target_path = PAPERS_BASE_DIR / path if path else PAPERS_BASE_DIR
+        if not target_path.exists():
+            raise HTTPException(status_code=404, detail="Path not found")
+        
+        if not target_path.is_relative_to(PAPERS_BASE_DIR):
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        if not target_path.is_dir():
+            raise HTTPException(status_code=400, detail="Path is not a directory")
+        
+        listing = await asyncio.to_thread(get_directory_cache(PAPERS_BASE_DIR).listing, target_path)
+        etag = f'W/"{listing.version}"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        items, next_cursor = listing.page(cursor, limit)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return DirectoryPage(
+            path=str(target_path.relative_to(PAPERS_BASE_DIR)),
+            items=[_node(entry) for entry in items],
+            next_cursor=next_cursor,
+            total=len(listing.entries)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -92,25 +228,58 @@ async def list_files(path: str = "") -> List[FileNode]:
         if not target_path.is_relative_to(PAPERS_BASE_DIR):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        files = []
-        for item in sorted(target_path.iterdir()):
-            stat = item.stat()
-            files.append(FileNode(
-                name=item.name,
-                path=str(item.relative_to(PAPERS_BASE_DIR)),
-                type="directory" if item.is_dir() else "file",
-                size=stat.st_size if item.is_file() else None,
-                modified=datetime.fromtimestamp(stat.st_mtime),
-                extension=item.suffix if item.is_file() else None
-            ))
-        
-        return files
+        listing = await asyncio.to_thread(get_directory_cache(PAPERS_BASE_DIR).listing, target_path)
+        return [_node(entry) for entry in listing.entries]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _looks_binary(path: Path) -> bool:
+    with open(path, 'rb') as f:
+        head = f.read(8192)
+    if b'\0' in head:
+        return True
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is fine
+        return e.start < len(head) - 3
+    return False
+
+def _read_content(target_path: Path, path: str, offset: Optional[int], length: int,
+                  start_line: Optional[int], max_lines: int) -> Dict[str, Any]:
+    """Read file content; large or explicitly windowed text is returned one window at a time"""
+    if target_path.suffix in ['.pdf']:
+        return {"type": "pdf", "path": str(path)}
+    
+    windowed = offset is not None or start_line is not None
+    small = target_path.stat().st_size <= TEXT_WINDOW_SIZE
+    
+    # Handle different file types
+    if target_path.suffix in ['.json'] and small and not windowed:
+        with open(target_path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        return {"type": "json", "content": content}
+    if target_path.suffix not in ['.json', '.txt', '.md'] and _looks_binary(target_path):
+        return {"type": "binary", "path": str(path)}
+    
+    if start_line is not None:
+        return {"type": "text", **read_text_lines(target_path, start_line, max_lines)}
+    if windowed or not small:
+        return {"type": "text", **read_text_window(target_path, offset or 0, length)}
+    
+    with open(target_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return {"type": "text", "content": content}
+
 @router.get("/content")
-async def get_file_content(path: str) -> Dict[str, Any]:
-    """Get file content"""
+async def get_file_content(
+    path: str,
+    offset: Optional[int] = Query(None, ge=0),
+    length: int = Query(TEXT_WINDOW_SIZE, ge=1, le=16 * TEXT_WINDOW_SIZE),
+    start_line: Optional[int] = Query(None, ge=1),
+    max_lines: int = Query(1000, ge=1, le=MAX_WINDOW_LINES)
+) -> Dict[str, Any]:
+    """Get file content (pass offset/length or start_line/max_lines to read a window)"""
     try:
         target_path = PAPERS_BASE_DIR / path
         if not target_path.exists():
@@ -122,26 +291,9 @@ async def get_file_content(path: str) -> Dict[str, Any]:
         if not target_path.is_file():
             raise HTTPException(status_code=400, detail="Path is not a file")
         
-        # Handle different file types
-        if target_path.suffix in ['.json']:
-            with open(target_path, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-            return {"type": "json", "content": content}
-        elif target_path.suffix in ['.txt', '.md']:
-            with open(target_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return {"type": "text", "content": content}
-        elif target_path.suffix in ['.pdf']:
-            return {"type": "pdf", "path": str(path)}
-        else:
-            # Try to read as text
-            try:
-                with open(target_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return {"type": "text", "content": content}
-            except:
-                return {"type": "binary", "path": str(path)}
-                
+        return await asyncio.to_thread(_read_content, target_path, path, offset, length, start_line, max_lines)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -167,6 +319,8 @@ async def update_file_content(file_content: FileContent) -> Dict[str, str]:
         with open(target_path, 'w', encoding='utf-8') as f:
             f.write(file_content.content)
         
+        await _reindex(target_path, backup_path)
+        
         return {"message": "File updated successfully", "backup": str(backup_path)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -209,6 +363,7 @@ async def perform_file_operation(operation: FileOperation) -> Dict[str, str]:
         
         if operation.operation == "move":
             shutil.move(str(source_path), str(dest_path))
+            await _unindex(source_path)
             message = "File moved successfully"
         elif operation.operation == "copy":
             if source_path.is_file():
@@ -219,6 +374,8 @@ async def perform_file_operation(operation: FileOperation) -> Dict[str, str]:
         else:
             raise HTTPException(status_code=400, detail="Invalid operation")
         
+        await _reindex(dest_path)
+        
         return {"message": message, "destination": str(dest_path.relative_to(PAPERS_BASE_DIR))}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -239,6 +396,8 @@ async def delete_file(path: str) -> Dict[str, str]:
         else:
             shutil.rmtree(target_path)
         
+        await _unindex(target_path)
+        
         return {"message": "File deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -247,52 +406,26 @@ async def delete_file(path: str) -> Dict[str, str]:
 async def search_files(query: SearchQuery) -> List[Dict[str, Any]]:
     """Search for files by name or content"""
     try:
-        search_path = PAPERS_BASE_DIR / query.path if query.path else PAPERS_BASE_DIR
+        # Resolved so "." or "a/../b" give the same prefix as the index's stored paths
+        base_dir = PAPERS_BASE_DIR.resolve()
+        search_path = (PAPERS_BASE_DIR / query.path).resolve() if query.path else base_dir
         if not search_path.exists():
             raise HTTPException(status_code=404, detail="Search path not found")
         
-        if not search_path.is_relative_to(PAPERS_BASE_DIR):
+        if not search_path.is_relative_to(base_dir):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        results = []
-        
-        def search_recursive(path: Path):
-            for item in path.iterdir():
-                if item.is_dir():
-                    search_recursive(item)
-                elif item.is_file():
-                    # Check file name
-                    if query.query.lower() in item.name.lower():
-                        results.append({
-                            "path": str(item.relative_to(PAPERS_BASE_DIR)),
-                            "name": item.name,
-                            "type": "filename_match",
-                            "size": item.stat().st_size
-                        })
-                    
-                    # Check file content for text files
-                    elif item.suffix in ['.txt', '.json', '.md'] and (not query.extensions or item.suffix in query.extensions):
-                        try:
-                            with open(item, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                if query.query.lower() in content.lower():
-                                    # Find line with match
-                                    lines = content.split('\n')
-                                    for i, line in enumerate(lines):
-                                        if query.query.lower() in line.lower():
-                                            results.append({
-                                                "path": str(item.relative_to(PAPERS_BASE_DIR)),
-                                                "name": item.name,
-                                                "type": "content_match",
-                                                "line": i + 1,
-                                                "preview": line.strip()[:100]
-                                            })
-                                            break
-                        except:
-                            pass
-        
-        search_recursive(search_path)
-        return results[:100]  # Limit results
+        # Ranked name/content matches from the trigram index (no file reads)
+        index = await asyncio.to_thread(get_file_search_index, PAPERS_BASE_DIR)
+        return await asyncio.to_thread(
+            index.search,
+            query.query,
+            '' if search_path == base_dir else str(search_path.relative_to(base_dir)),
+            query.extensions,
+            100  # Limit results
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -307,22 +440,24 @@ async def upload_file(path: str, file: UploadFile = File(...)) -> Dict[str, str]
         if not target_dir.is_relative_to(PAPERS_BASE_DIR):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        file_path = target_dir / file.filename
+        file_path = target_dir / Path(file.filename).name
+        
+        # Stream to a temp file next to the target, then rename into place
+        await save_upload(file.file, file_path, settings.MAX_UPLOAD_SIZE)
         
-        # Save uploaded file
-        with open(file_path, 'wb') as f:
-            content = await file.read()
-            f.write(content)
+        await _reindex(file_path)
         
         return {"message": "File uploaded successfully", "path": str(file_path.relative_to(PAPERS_BASE_DIR))}
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/download")
-async def download_file(path: str):
-    """Download a file"""
-    from fastapi.responses import FileResponse
-    
+async def download_file(request: Request, path: str, inline: bool = False):
+    """Download a file (supports Range requests; inline=true shows PDFs and images in the browser)"""
     try:
         target_path = PAPERS_BASE_DIR / path
         if not target_path.exists():
@@ -334,11 +469,23 @@ async def download_file(path: str):
         if not target_path.is_file():
             raise HTTPException(status_code=400, detail="Path is not a file")
         
-        return FileResponse(
-            path=str(target_path),
+        media_type = 'application/octet-stream'
+        if inline:
+            guessed = mimetypes.guess_type(target_path.name)[0]
+            if guessed in INLINE_MEDIA_TYPES:
+                media_type = guessed
+            else:
+                inline = False
+        
+        return RangeFileResponse(
+            path=target_path,
+            headers=request.headers,
             filename=target_path.name,
-            media_type='application/octet-stream'
+            media_type=media_type,
+            inline=inline
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
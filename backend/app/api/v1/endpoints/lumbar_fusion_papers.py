@@ -8,6 +8,7 @@ import json
 
 from app.api import deps
 from app.models.user import User
+from app.services.paper_catalog import get_paper_catalog
 
 router = APIRouter()
 
@@ -19,30 +20,21 @@ async def list_lumbar_fusion_papers(
     """
     List all downloaded lumbar fusion papers
     """
-    papers_path = Path("/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2025")
     papers_list = []
     
-    if papers_path.exists():
-        for folder in papers_path.iterdir():
-            if folder.is_dir():
-                metadata_file = folder / "metadata.json"
-                if metadata_file.exists():
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                        papers_list.append({
-                            'pmid': metadata['pmid'],
-                            'title': metadata['title'],
-                            'korean_title': metadata.get('korean_translation', {}).get('title'),
-                            'authors': metadata['authors'],
-                            'journal': metadata['journal'],
-                            'year': metadata['year'],
-                            'doi': metadata['doi'],
-                            'folder': str(folder),
-                            'has_korean': bool(metadata.get('korean_translation'))
-                        })
-    
-    # Sort by year (newest first)
-    papers_list.sort(key=lambda x: x['year'], reverse=True)
+    # 논문 카탈로그 색인 조회 (연도 내림차순)
+    for entry in get_paper_catalog().list_papers(sources=('lumbar_fusion',)):
+        papers_list.append({
+            'pmid': entry['pmid'],
+            'title': entry['title'],
+            'korean_title': entry['korean_title'],
+            'authors': entry['authors'],
+            'journal': entry['journal'],
+            'year': entry['year'],
+            'doi': entry['doi'],
+            'folder': entry['folder'],
+            'has_korean': bool(entry['korean_title'])
+        })
     
     return papers_list
 
@@ -55,37 +47,32 @@ async def get_lumbar_fusion_paper(
     """
     Get detailed information about a specific lumbar fusion paper
     """
-    papers_path = Path("/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2025")
-    
     # Find the paper folder
-    for folder in papers_path.iterdir():
-        if folder.is_dir() and folder.name.startswith(pmid):
-            metadata_file = folder / "metadata.json"
-            summary_file = folder / "summary_korean.txt"
-            
-            if metadata_file.exists():
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                # Read Korean summary if exists
-                korean_summary = None
-                if summary_file.exists():
-                    with open(summary_file, 'r', encoding='utf-8') as f:
-                        korean_summary = f.read()
-                
-                return {
-                    'pmid': metadata['pmid'],
-                    'title': metadata['title'],
-                    'authors': metadata['authors'],
-                    'journal': metadata['journal'],
-                    'year': metadata['year'],
-                    'doi': metadata['doi'],
-                    'abstract': metadata['abstract'],
-                    'korean_translation': metadata.get('korean_translation'),
-                    'korean_summary': korean_summary,
-                    'folder': str(folder),
-                    'download_date': metadata.get('download_date')
-                }
+    entry = get_paper_catalog().find_paper(pmid, sources=('lumbar_fusion',))
+    if entry is not None:
+        with open(entry['metadata_path'], 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        
+        # Read Korean summary if exists
+        korean_summary = None
+        summary_file = Path(entry['folder']) / "summary_korean.txt"
+        if summary_file.exists():
+            with open(summary_file, 'r', encoding='utf-8') as f:
+                korean_summary = f.read()
+        
+        return {
+            'pmid': metadata['pmid'],
+            'title': metadata['title'],
+            'authors': metadata['authors'],
+            'journal': metadata['journal'],
+            'year': metadata['year'],
+            'doi': metadata['doi'],
+            'abstract': metadata['abstract'],
+            'korean_translation': metadata.get('korean_translation'),
+            'korean_summary': korean_summary,
+            'folder': entry['folder'],
+            'download_date': metadata.get('download_date')
+        }
     
     raise HTTPException(status_code=404, detail=f"Paper with PMID {pmid} not found")
 
@@ -103,17 +90,13 @@ async def get_downloaded_papers_summary(
     other_papers_count = 0
     total_korean_translations = 0
     
-    # Count lumbar fusion papers
+    # Count lumbar fusion papers (translations come from the paper catalog index)
     if papers_path.exists():
         for folder in papers_path.iterdir():
             if folder.is_dir():
                 lumbar_fusion_count += 1
-                metadata_file = folder / "metadata.json"
-                if metadata_file.exists():
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                        if metadata.get('korean_translation'):
-                            total_korean_translations += 1
+        stats = get_paper_catalog().source_stats().get('lumbar_fusion', {})
+        total_korean_translations = stats.get('korean_titles', 0)
     
     # Count other downloaded papers
     if downloaded_path.exists():
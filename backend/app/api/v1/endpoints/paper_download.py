@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 from app.api import deps
 from app.models.user import User
+from app.services.paper_catalog import get_paper_catalog
 from app.services.paper_downloader_service import paper_downloader_service
 
 router = APIRouter()
@@ -63,49 +64,30 @@ async def search_and_download_papers(
 async def list_downloaded_papers(
     current_user: User = Depends(deps.get_current_user)
 ):
-    """다운로드된 논문 목록 조회 - 모든 저장 위치에서"""
+    """다운로드된 논문 목록 조회 - 모든 저장 위치에서 (논문 카탈로그 색인 조회)"""
     try:
-        papers = []
-        
-        # 경로 1: 기본 다운로드 폴더
+        catalog = get_paper_catalog()
         storage_path = paper_downloader_service.storage_path
+        lumbar_fusion_path = catalog.source_path('lumbar_fusion')
         
-        # 경로 2: Lumbar fusion 논문 폴더
-        lumbar_fusion_path = storage_path.parent / "research_papers" / "lumbar_fusion_2025"
-        
-        # 모든 경로 목록
-        paths_to_check = [storage_path]
-        if lumbar_fusion_path.exists():
-            paths_to_check.append(lumbar_fusion_path)
-        
-        # 각 경로에서 논문 검색
-        for path in paths_to_check:
-            for folder in path.iterdir():
-                if folder.is_dir():
-                    metadata_file = folder / "metadata.json"
-                    if metadata_file.exists():
-                        import json
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                            
-                        paper_info = {
-                            'pmid': metadata.get('pmid'),
-                            'title': metadata.get('title'),
-                            'year': metadata.get('year'),
-                            'folder': str(folder),
-                            'has_pdf': (folder / f"{metadata.get('pmid')}.pdf").exists(),
-                            'has_translation': 'korean_translation' in metadata,
-                            'source': 'lumbar_fusion' if path == lumbar_fusion_path else 'general'
-                        }
-                        
-                        # 한글 제목이 있으면 추가
-                        if 'korean_translation' in metadata and metadata['korean_translation']:
-                            paper_info['korean_title'] = metadata['korean_translation'].get('title')
-                        
-                        papers.append(paper_info)
-                    
-        # 연도별로 정렬 (최신 순)
-        papers.sort(key=lambda x: x.get('year', ''), reverse=True)
+        papers = []
+        # 연도별로 정렬됨 (최신 순)
+        for entry in catalog.list_papers(sources=('general', 'lumbar_fusion')):
+            paper_info = {
+                'pmid': entry['pmid'],
+                'title': entry['title'],
+                'year': entry['year'],
+                'folder': entry['folder'],
+                'has_pdf': entry['has_pdf'],
+                'has_translation': entry['has_translation'],
+                'source': entry['source']
+            }
+            
+            # 한글 제목이 있으면 추가
+            if entry['korean_title']:
+                paper_info['korean_title'] = entry['korean_title']
+            
+            papers.append(paper_info)
         
         return {
             'papers': papers,
@@ -129,48 +111,31 @@ async def get_paper_details(
 ):
     """특정 논문의 상세 정보 조회 - 모든 저장 위치에서"""
     try:
-        storage_path = paper_downloader_service.storage_path
-        lumbar_fusion_path = storage_path.parent / "research_papers" / "lumbar_fusion_2025"
-        
-        # 모든 경로 목록
-        paths_to_check = [storage_path]
-        if lumbar_fusion_path.exists():
-            paths_to_check.append(lumbar_fusion_path)
+        entry = get_paper_catalog().find_paper(pmid, sources=('general', 'lumbar_fusion'))
+        if entry is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Paper with PMID {pmid} not found in any storage location"
+            )
         
-        # 각 경로에서 PMID로 폴더 찾기
-        for path in paths_to_check:
-            for folder in path.iterdir():
-                if folder.is_dir() and folder.name.startswith(pmid):
-                    metadata_file = folder / "metadata.json"
-                    if metadata_file.exists():
-                        import json
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                            
-                        # 요약 파일 읽기 (일반 요약 또는 한글 요약)
-                        summary_text = ""
-                        summary_file = folder / "summary.txt"
-                        korean_summary_file = folder / "summary_korean.txt"
-                        
-                        if korean_summary_file.exists():
-                            with open(korean_summary_file, 'r', encoding='utf-8') as f:
-                                summary_text = f.read()
-                        elif summary_file.exists():
-                            with open(summary_file, 'r', encoding='utf-8') as f:
-                                summary_text = f.read()
-                                
-                        return {
-                            'metadata': metadata,
-                            'summary': summary_text,
-                            'folder': str(folder),
-                            'files': [f.name for f in folder.iterdir()],
-                            'source': 'lumbar_fusion' if path == lumbar_fusion_path else 'general'
-                        }
-                    
-        raise HTTPException(
-            status_code=404,
-            detail=f"Paper with PMID {pmid} not found in any storage location"
-        )
+        import json
+        with open(entry['metadata_path'], 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+            
+        # 요약 파일 읽기 (일반 요약 또는 한글 요약)
+        summary_text = ""
+        summary_file = entry['korean_summary_path'] or entry['summary_path']
+        if summary_file:
+            with open(summary_file, 'r', encoding='utf-8') as f:
+                summary_text = f.read()
+                
+        return {
+            'metadata': metadata,
+            'summary': summary_text,
+            'folder': entry['folder'],
+            'files': entry['files'],
+            'source': entry['source']
+        }
         
     except HTTPException:
         raise
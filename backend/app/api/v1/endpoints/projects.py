@@ -1,51 +1,139 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, List, Optional
+import base64
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_, or_
 from sqlalchemy.orm import selectinload
 
 from app.api import deps
 from app.core.database import get_db
 from app.models.user import User
 from app.models.project import ResearchProject
-from app.schemas.project import Project, ProjectCreate, ProjectUpdate
+from app.models.paper import Paper
+from app.models.patient import Patient
+from app.models.collaborator import Collaborator
+from app.schemas.project import Project, ProjectCreate, ProjectDetail, ProjectUpdate
 
 router = APIRouter()
 
+# include= name -> (relationship, related model)
+PROJECT_RELATIONSHIPS = {
+    "papers": (ResearchProject.papers, Paper),
+    "patients": (ResearchProject.patients, Patient),
+    "collaborators": (ResearchProject.collaborators, Collaborator),
+}
 
-@router.get("/", response_model=List[Project])
+
+def _parse_include(include: Optional[str]) -> List[str]:
+    names = [name.strip() for name in include.split(",") if name.strip()] if include else []
+    unknown = set(names) - PROJECT_RELATIONSHIPS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include: {', '.join(sorted(unknown))} (allowed: {', '.join(PROJECT_RELATIONSHIPS)})"
+        )
+    return names
+
+
+def _project_query(include: List[str]):
+    """Projects with related row counts as correlated COUNT subqueries (uses the project_id indexes)"""
+    counts = [
+        select(func.count())
+        .select_from(model)
+        .where(model.project_id == ResearchProject.id)
+        .correlate(ResearchProject)
+        .scalar_subquery()
+        .label(f"{name}_count")
+        for name, (_, model) in PROJECT_RELATIONSHIPS.items()
+    ]
+    query = select(ResearchProject, *counts)
+    for name in include:
+        query = query.options(selectinload(PROJECT_RELATIONSHIPS[name][0]))
+    return query
+
+
+def _to_schema(row, include: List[str]) -> ProjectDetail:
+    project = row[0]
+    project_dict = project.__dict__.copy()
+    for name in PROJECT_RELATIONSHIPS:
+        project_dict[f"{name}_count"] = row._mapping[f"{name}_count"]
+        if name not in include:
+            project_dict.pop(name, None)
+    return ProjectDetail.model_validate(project_dict, from_attributes=True)
+
+
+async def _get_project(db: AsyncSession, project_id: str, user_id, include: List[str]) -> ProjectDetail:
+    result = await db.execute(
+        _project_query(include).where(
+            ResearchProject.id == project_id,
+            ResearchProject.user_id == user_id
+        )
+    )
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    return _to_schema(row, include)
+
+
+def _encode_cursor(created_at: datetime, project_id) -> str:
+    raw = f"{created_at.isoformat()}|{project_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, project_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(project_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=List[ProjectDetail])
 async def read_projects(
+    response: Response,
     db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=100),
+    limit: int = Query(100, ge=1, le=100),
+    include: Optional[str] = Query(None, description="Comma separated: papers, patients, collaborators"),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    """Get list of user's research projects"""
+    """Get list of user's research projects (newest first)
+
+    Counts are always returned; relationship rows only for names in `include`.
+    When more projects exist, the X-Next-Cursor header holds the cursor for the next page.
+    """
+    include = _parse_include(include)
     query = (
-        select(ResearchProject)
+        _project_query(include)
         .where(ResearchProject.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .options(
-            selectinload(ResearchProject.papers),
-            selectinload(ResearchProject.patients),
-            selectinload(ResearchProject.collaborators)
-        )
+        .order_by(ResearchProject.created_at.desc(), ResearchProject.id.desc())
+        .limit(limit + 1)
     )
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            or_(
+                ResearchProject.created_at < cursor_created_at,
+                and_(ResearchProject.created_at == cursor_created_at, ResearchProject.id < cursor_id)
+            )
+        )
+    elif skip:
+        query = query.offset(skip)
     
     result = await db.execute(query)
-    projects = result.scalars().all()
+    rows = result.all()
     
-    # Add counts
-    projects_with_counts = []
-    for project in projects:
-        project_dict = project.__dict__.copy()
-        project_dict["papers_count"] = len(project.papers)
-        project_dict["patients_count"] = len(project.patients)
-        project_dict["collaborators_count"] = len(project.collaborators)
-        projects_with_counts.append(Project(**project_dict))
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        response.headers["X-Next-Cursor"] = _encode_cursor(last.created_at, last.id)
     
-    return projects_with_counts
+    return [_to_schema(row, include) for row in rows[:limit]]
 
 
 @router.post("/", response_model=Project)
@@ -73,42 +161,19 @@ async def create_project(
     return Project(**project_dict)
 
 
-@router.get("/{project_id}", response_model=Project)
+@router.get("/{project_id}", response_model=ProjectDetail)
 async def read_project(
     *,
     db: AsyncSession = Depends(get_db),
     project_id: str,
+    include: Optional[str] = Query(None, description="Comma separated: papers, patients, collaborators"),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Get project by ID"""
-    query = (
-        select(ResearchProject)
-        .where(
-            ResearchProject.id == project_id,
-            ResearchProject.user_id == current_user.id
-        )
-        .options(
-            selectinload(ResearchProject.papers),
-            selectinload(ResearchProject.patients),
-            selectinload(ResearchProject.collaborators)
-        )
-    )
-    
-    result = await db.execute(query)
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    project_dict = project.__dict__.copy()
-    project_dict["papers_count"] = len(project.papers)
-    project_dict["patients_count"] = len(project.patients)
-    project_dict["collaborators_count"] = len(project.collaborators)
-    
-    return Project(**project_dict)
+    return await _get_project(db, project_id, current_user.id, _parse_include(include))
 
 
-@router.put("/{project_id}", response_model=Project)
+@router.put("/{project_id}", response_model=ProjectDetail)
 async def update_project(
     *,
     db: AsyncSession = Depends(get_db),
@@ -133,25 +198,8 @@ async def update_project(
         setattr(project, field, value)
     
     await db.commit()
-    await db.refresh(project)
     
-    # Load relationships
-    await db.execute(
-        select(ResearchProject)
-        .where(ResearchProject.id == project_id)
-        .options(
-            selectinload(ResearchProject.papers),
-            selectinload(ResearchProject.patients),
-            selectinload(ResearchProject.collaborators)
-        )
-    )
-    
-    project_dict = project.__dict__.copy()
-    project_dict["papers_count"] = len(project.papers)
-    project_dict["patients_count"] = len(project.patients)
-    project_dict["collaborators_count"] = len(project.collaborators)
-    
-    return Project(**project_dict)
+    return await _get_project(db, project_id, current_user.id, [])
 
 
 @router.delete("/{project_id}")
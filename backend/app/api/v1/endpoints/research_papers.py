@@ -5,9 +5,9 @@ from sqlalchemy import select, or_
 from app.api import deps
 from app.models.user import User
 from app.models.research_paper import ResearchPaper
+from app.services.paper_catalog import get_paper_catalog
+from app.services.research_paper_repository import get_research_paper_repository
 from app.services.sample_papers_generator import sample_generator
-import json
-import os
 
 router = APIRouter()
 
@@ -25,41 +25,22 @@ async def get_research_papers(
 ):
     """Get research papers with optional filtering"""
     
-    # For now, load from generated sample papers
-    papers_metadata_path = "/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2year_outcomes/papers_metadata.json"
+    # For now, load from generated sample papers (indexed in memory, reloaded on file change)
+    repository = get_research_paper_repository()
     
-    if os.path.exists(papers_metadata_path):
-        with open(papers_metadata_path, 'r', encoding='utf-8') as f:
-            all_papers = json.load(f)
-    else:
+    if not repository.exists():
         # Generate papers if not exist
-        folder_path, papers = sample_generator.save_papers_to_folder()
-        all_papers = papers
-    
-    # Apply filters
-    filtered_papers = all_papers
-    
-    if fusion_type:
-        filtered_papers = [p for p in filtered_papers if fusion_type.lower() in p['fusion_type'].lower()]
-    
-    if year:
-        filtered_papers = [p for p in filtered_papers if p['year'] == year]
-    
-    if has_full_text is not None:
-        filtered_papers = [p for p in filtered_papers if p['has_full_text'] == has_full_text]
-    
-    if search_query:
-        search_lower = search_query.lower()
-        filtered_papers = [
-            p for p in filtered_papers 
-            if search_lower in p['title'].lower() or 
-               search_lower in p['abstract'].lower() or
-               any(search_lower in author.lower() for author in p['authors']) or
-               any(search_lower in keyword.lower() for keyword in p.get('keywords', []))
-        ]
-    
-    # Apply pagination
-    papers = filtered_papers[skip:skip + limit]
+        sample_generator.save_papers_to_folder()
+    
+    # Filters are answered from the repository's secondary indexes, then paginated
+    papers = repository.query(
+        skip=skip,
+        limit=limit,
+        fusion_type=fusion_type,
+        year=year,
+        has_full_text=has_full_text,
+        search_query=search_query
+    ) or []
     
     return papers
 
@@ -72,39 +53,29 @@ async def get_research_paper(
 ):
     """Get a specific research paper by PMID"""
     
-    # Load papers
-    papers_metadata_path = "/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2year_outcomes/papers_metadata.json"
+    # Find paper by PMID
+    repository = get_research_paper_repository()
     
-    if os.path.exists(papers_metadata_path):
-        with open(papers_metadata_path, 'r', encoding='utf-8') as f:
-            all_papers = json.load(f)
-        
-        # Find paper by PMID
-        paper = next((p for p in all_papers if p['pmid'] == paper_id), None)
+    if repository.exists():
+        paper = repository.get(paper_id)
         
         if not paper:
             raise HTTPException(status_code=404, detail="Paper not found")
         
-        # Add file content if requested
-        paper_folder = "/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2year_outcomes"
-        fusion_folder = os.path.join(paper_folder, paper['fusion_type'].replace('/', '_'))
+        # Add file content if requested (file paths come from the paper catalog index)
+        catalog = get_paper_catalog()
         
-        # Find abstract file
-        for file in os.listdir(fusion_folder):
-            if paper_id in file and "_abstract.txt" in file:
-                abstract_path = os.path.join(fusion_folder, file)
-                with open(abstract_path, 'r', encoding='utf-8') as f:
-                    paper['abstract_content'] = f.read()
-                break
+        abstract_path = catalog.find_file(paper_id, 'abstract', source='fusion_2year')
+        if abstract_path:
+            with open(abstract_path, 'r', encoding='utf-8') as f:
+                paper['abstract_content'] = f.read()
         
         # Find full text file if available
         if paper['has_full_text']:
-            for file in os.listdir(fusion_folder):
-                if paper_id in file and "_full_text.txt" in file:
-                    full_text_path = os.path.join(fusion_folder, file)
-                    with open(full_text_path, 'r', encoding='utf-8') as f:
-                        paper['full_text_content'] = f.read()
-                    break
+            full_text_path = catalog.find_file(paper_id, 'full_text', source='fusion_2year')
+            if full_text_path:
+                with open(full_text_path, 'r', encoding='utf-8') as f:
+                    paper['full_text_content'] = f.read()
         
         return paper
     
@@ -118,16 +89,7 @@ async def get_fusion_types(
 ):
     """Get list of available fusion types"""
     
-    papers_metadata_path = "/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2year_outcomes/papers_metadata.json"
-    
-    if os.path.exists(papers_metadata_path):
-        with open(papers_metadata_path, 'r', encoding='utf-8') as f:
-            all_papers = json.load(f)
-        
-        fusion_types = sorted(list(set(p['fusion_type'] for p in all_papers)))
-        return fusion_types
-    
-    return []
+    return get_research_paper_repository().fusion_types()
 
 
 @router.get("/years/list", response_model=List[str])
@@ -137,16 +99,7 @@ async def get_years(
 ):
     """Get list of available years"""
     
-    papers_metadata_path = "/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2year_outcomes/papers_metadata.json"
-    
-    if os.path.exists(papers_metadata_path):
-        with open(papers_metadata_path, 'r', encoding='utf-8') as f:
-            all_papers = json.load(f)
-        
-        years = sorted(list(set(p['year'] for p in all_papers)), reverse=True)
-        return years
-    
-    return []
+    return get_research_paper_repository().years()
 
 
 @router.post("/import-from-pubmed")
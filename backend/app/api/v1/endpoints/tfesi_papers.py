@@ -8,6 +8,8 @@ from pathlib import Path
 import json
 import os
 
+from app.services.paper_catalog import get_paper_catalog
+
 router = APIRouter()
 
 # Base path for TFESI papers
@@ -20,24 +22,18 @@ async def list_tfesi_papers():
     try:
         papers = []
         
-        # 다운로드된 논문들
-        if TFESI_BASE_PATH.exists():
-            for folder in TFESI_BASE_PATH.iterdir():
-                if folder.is_dir() and folder.name.startswith("PMC"):
-                    metadata_file = folder / "metadata.json"
-                    if metadata_file.exists():
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                            papers.append({
-                                "id": folder.name,
-                                "type": "published",
-                                "title": metadata.get("title", "Unknown Title"),
-                                "journal": metadata.get("journal", ""),
-                                "year": metadata.get("year", ""),
-                                "pmid": metadata.get("pmid", ""),
-                                "pmc_id": metadata.get("pmc_id", ""),
-                                "folder": str(folder)
-                            })
+        # 다운로드된 논문들 (논문 카탈로그 색인 조회)
+        for entry in get_paper_catalog().list_papers(sources=("tfesi",), name_prefix="PMC"):
+            papers.append({
+                "id": entry["name"],
+                "type": "published",
+                "title": entry["title"] or "Unknown Title",
+                "journal": entry["journal"] or "",
+                "year": entry["year"] or "",
+                "pmid": entry["pmid"] or "",
+                "pmc_id": entry["pmc_id"] or "",
+                "folder": entry["folder"]
+            })
         
         # 제안된 연구
         if PROPOSED_STUDY_PATH.exists():
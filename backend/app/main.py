@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -6,15 +8,27 @@ from app.api.v1.api import api_router
 from app.core.config import settings
 from app.core.database import engine
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.services.chat_store import chat_store
+from app.services.ollama_client import ollama_client
+from app.services.paper_vectors import paper_vectors
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting up...")
+    # Load the chat models in the background so startup does not wait for Ollama
+    warm_up = asyncio.create_task(ollama_client.warm_up())
+    # Embed new and changed papers for similar-paper search in the background
+    paper_vectors.start()
     yield
     # Shutdown
     print("Shutting down...")
+    warm_up.cancel()
+    await paper_vectors.stop()
+    await ollama_client.aclose()
+    # Write queued chat messages before the engine goes away
+    await chat_store.close()
     await engine.dispose()
 
 
@@ -1,138 +1,285 @@
 """
 Rate limiting middleware for API endpoints
+
+Uses GCRA (generic cell rate algorithm): each client is a single float, its
+theoretical arrival time (TAT). A request of cost c is allowed when
+max(TAT, now) + c * (period / calls) - now <= period, which gives the same
+limit as a sliding window of `calls` per `period` with O(1) state per client.
+
+The TAT lives in a pluggable backend so the limit can be shared across
+uvicorn workers:
+- "memory": per-process dict (default)
+- "sqlite": shared SQLite file, one atomic upsert per request
+- "redis":  Lua script against the existing REDIS_URL
 """
-from typing import Dict, Tuple
-from datetime import datetime, timedelta
-from fastapi import HTTPException, Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from collections import defaultdict
 import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+
+from sqlite_manager import get_db
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "rate_limits.db")
+
+# Path prefixes of rate limited endpoints
+RATE_LIMITED_PREFIXES = ("/api/v1/ai",)
 
+# (method or None, path prefix, cost) - first match wins, unmatched paths cost 1
+# Cheap listings the UI polls cost a fraction of a chat call, model pulls cost more.
+DEFAULT_ROUTE_COSTS: Tuple[Tuple[Optional[str], str, float], ...] = (
+    ("POST", "/api/v1/ai/models/pull", 10.0),
+    ("GET", "/api/v1/ai/models", 0.2),
+    ("GET", "/api/v1/ai-advanced/models", 0.2),
+    ("GET", "/api/v1/ai/chat/sessions", 0.2),
+    ("POST", "/api/v1/ai/chat", 1.0),
+    ("POST", "/api/v1/ai-advanced/chat", 1.0),
+)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, calls: int = 10, period: int = 60):
+# Memory backend: drop expired entries after this many calls
+PRUNE_EVERY = 1024
+
+
+class RateLimitBackend:
+    """Stores one TAT per key"""
+
+    name = "base"
+
+    async def acquire(self, key: str, cost: float, period: float,
+                      interval: float) -> Tuple[bool, float]:
+        """
+        Try to spend `cost` for key
+
+        Args:
+            key: Client key
+            cost: Request cost in units of one call
+            period: Window length in seconds (burst = period / interval calls)
+            interval: Seconds per call (period / calls)
+
+        Returns:
+            (allowed, retry_after seconds)
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process TATs (limits are per worker)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._tat: Dict[str, float] = {}
+        self._calls = 0
+
+    def acquire_sync(self, key: str, cost: float, period: float, interval: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        self._calls += 1
+        if self._calls >= PRUNE_EVERY:
+            self._calls = 0
+            expired = [k for k, tat in self._tat.items() if tat <= now]
+            for k in expired:
+                del self._tat[k]
+
+        tat = self._tat.get(key, now)
+        new_tat = (tat if tat > now else now) + cost * interval
+        if new_tat - now > period:
+            return False, new_tat - now - period
+        self._tat[key] = new_tat
+        return True, 0.0
+
+    async def acquire(self, key: str, cost: float, period: float, interval: float) -> Tuple[bool, float]:
+        return self.acquire_sync(key, cost, period, interval)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """TATs in a shared SQLite file (wall clock, shared by all workers on the host)"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = RATE_LIMIT_DB_PATH):
+        self.db = get_db(db_path)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+                           key TEXT PRIMARY KEY,
+                           tat REAL NOT NULL
+                       )''')
+
+    def _acquire(self, conn, key: str, cost: float, period: float, interval: float) -> Tuple[bool, float]:
+        now = time.time()
+        increment = cost * interval
+        row = conn.execute(
+            'INSERT INTO rate_limits (key, tat) VALUES (?1, ?2 + ?3) '
+            'ON CONFLICT(key) DO UPDATE SET tat = MAX(tat, ?2) + ?3 '
+            'WHERE MAX(tat, ?2) + ?3 - ?2 <= ?4 '
+            'RETURNING tat',
+            (key, now, increment, period)
+        ).fetchone()
+        if row is not None:
+            return True, 0.0
+        tat = conn.execute('SELECT tat FROM rate_limits WHERE key = ?', (key,)).fetchone()[0]
+        return False, max(tat, now) + increment - now - period
+
+    async def acquire(self, key: str, cost: float, period: float, interval: float) -> Tuple[bool, float]:
+        return await asyncio.to_thread(
+            self.db.write, lambda conn: self._acquire(conn, key, cost, period, interval)
+        )
+
+    def prune(self):
+        """Delete expired TATs"""
+        self.db.execute('DELETE FROM rate_limits WHERE tat < ?', (time.time(),))
+
+
+# KEYS[1] = key, ARGV = cost * interval, period
+_GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local increment = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + increment
+if new_tat - now > period then
+    return {0, tostring(new_tat - now - period)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """TATs in Redis (shared by all workers and hosts, expire on their own)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_GCRA_SCRIPT)
+
+    async def acquire(self, key: str, cost: float, period: float, interval: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[cost * interval, period])
+        return bool(int(allowed)), float(retry_after)
+
+
+def create_backend(name: Optional[str] = None) -> RateLimitBackend:
+    """Backend by name ("memory", "sqlite", "redis"); falls back to memory if unavailable"""
+    name = (name or RATE_LIMIT_BACKEND).lower()
+    try:
+        if name == "sqlite":
+            return SQLiteBackend()
+        if name == "redis":
+            from app.core.config import settings
+            return RedisBackend(settings.REDIS_URL)
+    except Exception as e:
+        print(f"Rate limit backend '{name}' unavailable, using memory: {e}")
+    return MemoryBackend()
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, calls: int = 10, period: int = 60,
+                 backend: Optional[RateLimitBackend] = None,
+                 prefixes: Sequence[str] = RATE_LIMITED_PREFIXES,
+                 route_costs: Sequence[Tuple[Optional[str], str, float]] = DEFAULT_ROUTE_COSTS):
         """
         Initialize rate limiter
-        
+
         Args:
-            app: FastAPI application
+            app: ASGI application
             calls: Number of allowed calls per period
             period: Time period in seconds
+            backend: TAT storage (default from RATE_LIMIT_BACKEND)
+            prefixes: Path prefixes to rate limit
+            route_costs: (method, path prefix, cost) weights, first match wins
         """
-        super().__init__(app)
+        self.app = app
         self.calls = calls
-        self.period = timedelta(seconds=period)
-        self.clients: Dict[str, list] = defaultdict(list)
-        self._cleanup_task = None
-        
-    async def dispatch(self, request: Request, call_next):
+        self.period = float(period)
+        self.interval = self.period / calls
+        self.backend = backend or create_backend()
+        self.prefixes = tuple(prefixes)
+        self.route_costs = tuple(route_costs)
+
+    async def __call__(self, scope, receive, send):
         # Skip rate limiting for non-AI endpoints
-        if not request.url.path.startswith("/api/v1/ai"):
-            return await call_next(request)
-            
-        # Get client identifier (IP address or user ID)
-        client_id = self._get_client_id(request)
-        
-        # Check rate limit
-        if not self._is_allowed(client_id):
-            raise HTTPException(
-                status_code=429,
-                detail="Rate limit exceeded. Please try again later."
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        cost = self._cost(scope["method"], scope["path"])
+        if cost > 0:
+            allowed, retry_after = await self.backend.acquire(
+                self._get_client_id(scope), cost, self.period, self.interval
             )
-        
-        # Record the request
-        self._record_request(client_id)
-        
-        # Process the request
-        response = await call_next(request)
-        
-        # Start cleanup task if not already running
-        if self._cleanup_task is None:
-            self._cleanup_task = asyncio.create_task(self._cleanup_old_requests())
-        
-        return response
-    
-    def _get_client_id(self, request: Request) -> str:
+            if not allowed:
+                await self._reject(send, retry_after)
+                return
+
+        await self.app(scope, receive, send)
+
+    def _cost(self, method: str, path: str) -> float:
+        for route_method, prefix, cost in self.route_costs:
+            if (route_method is None or route_method == method) and path.startswith(prefix):
+                # Requests costing more than the whole window could never pass
+                return min(cost, float(self.calls))
+        return 1.0
+
+    def _get_client_id(self, scope) -> str:
         """Get client identifier from request"""
         # Try to get user ID from authorization header
-        auth_header = request.headers.get("authorization")
-        if auth_header:
-            # Simple extraction, in production use proper JWT decoding
-            return f"user_{auth_header}"
-        
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                # Simple extraction, in production use proper JWT decoding
+                return f"user_{value.decode('latin-1')}"
+
         # Fallback to IP address
-        client_host = request.client.host if request.client else "unknown"
-        return f"ip_{client_host}"
-    
-    def _is_allowed(self, client_id: str) -> bool:
-        """Check if client is allowed to make request"""
-        now = datetime.now()
-        # Remove old requests
-        self.clients[client_id] = [
-            req_time for req_time in self.clients[client_id]
-            if now - req_time < self.period
-        ]
-        
-        # Check if under limit
-        return len(self.clients[client_id]) < self.calls
-    
-    def _record_request(self, client_id: str):
-        """Record a request from client"""
-        self.clients[client_id].append(datetime.now())
-    
-    async def _cleanup_old_requests(self):
-        """Periodically clean up old request records"""
-        while True:
-            await asyncio.sleep(60)  # Clean up every minute
-            now = datetime.now()
-            
-            # Remove old requests from all clients
-            for client_id in list(self.clients.keys()):
-                self.clients[client_id] = [
-                    req_time for req_time in self.clients[client_id]
-                    if now - req_time < self.period
-                ]
-                
-                # Remove client if no recent requests
-                if not self.clients[client_id]:
-                    del self.clients[client_id]
+        client = scope.get("client")
+        return f"ip_{client[0] if client else 'unknown'}"
+
+    async def _reject(self, send, retry_after: float):
+        body = json.dumps({"detail": "Rate limit exceeded. Please try again later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
 
 
 # Decorator for individual endpoint rate limiting
 def rate_limit(calls: int = 5, period: int = 60):
     """
     Rate limit decorator for individual endpoints
-    
+
     Args:
         calls: Number of allowed calls per period
         period: Time period in seconds
     """
-    clients: Dict[str, list] = defaultdict(list)
-    period_delta = timedelta(seconds=period)
-    
+    backend = MemoryBackend()
+    interval = period / calls
+
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
             # Get client identifier
             client_id = request.client.host if request.client else "unknown"
-            
+
             # Check rate limit
-            now = datetime.now()
-            clients[client_id] = [
-                req_time for req_time in clients[client_id]
-                if now - req_time < period_delta
-            ]
-            
-            if len(clients[client_id]) >= calls:
+            allowed, _ = backend.acquire_sync(client_id, 1.0, float(period), interval)
+            if not allowed:
                 raise HTTPException(
                     status_code=429,
                     detail=f"Rate limit exceeded. Maximum {calls} requests per {period} seconds."
                 )
-            
-            # Record request
-            clients[client_id].append(now)
-            
+
             # Call the original function
             return await func(request, *args, **kwargs)
-        
+
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -1,11 +1,14 @@
 """
 Chat session and message models for AI chat persistence
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
+# Length of the last message preview shown in the session list
+PREVIEW_LENGTH = 100
+
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
@@ -19,8 +22,29 @@ class ChatSession(Base):
     is_active = Column(Boolean, default=True)
     meta_data = Column(JSON, nullable=True)
     
+    # Denormalized summary of the messages, kept current by record_message()
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_role = Column(String, nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Relationships
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
+    
+    # Session list: WHERE user_id = ? AND is_active ORDER BY updated_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_chat_sessions_user_active_updated", "user_id", "is_active", "updated_at", "id"),
+    )
+    
+    def record_message(self, message: "ChatMessage"):
+        """Update the summary columns for a message added to this session"""
+        content = message.content or ""
+        self.message_count = (self.message_count or 0) + 1
+        self.last_message_role = message.role
+        self.last_message_preview = (
+            content[:PREVIEW_LENGTH] + "..." if len(content) > PREVIEW_LENGTH else content
+        )
+        self.last_message_at = message.timestamp
 
 
 class ChatMessage(Base):
@@ -60,7 +60,7 @@ class Paper(Base):
     __tablename__ = "papers"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("research_projects.id", ondelete="SET NULL"))
+    project_id = Column(UUID(as_uuid=True), ForeignKey("research_projects.id", ondelete="SET NULL"), index=True)
     source_id = Column(UUID(as_uuid=True), ForeignKey("paper_sources.id", ondelete="SET NULL"))
     title = Column(String(500), nullable=False)
     authors = Column(ARRAY(Text))
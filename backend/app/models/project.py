@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, DateTime, Enum, ForeignKey, Text
+from sqlalchemy import Column, String, Date, DateTime, Enum, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 import uuid
@@ -38,4 +38,9 @@ class ResearchProject(Base):
     collaborators = relationship("Collaborator", back_populates="project", cascade="all, delete-orphan")
     statistical_analyses = relationship("StatisticalAnalysis", back_populates="project", cascade="all, delete-orphan")
     informed_consents = relationship("InformedConsent", back_populates="project", cascade="all, delete-orphan")
-    ai_logs = relationship("AIGenerationLog", back_populates="project")
\ No newline at end of file
+    ai_logs = relationship("AIGenerationLog", back_populates="project")
+    
+    # Project list: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_research_projects_user_created", "user_id", "created_at", "id"),
+    )
\ No newline at end of file
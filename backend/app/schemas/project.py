@@ -2,6 +2,7 @@ from typing import Optional, List
 from pydantic import BaseModel, UUID4
 from datetime import date, datetime
 from app.models.project import ProjectStatus
+from app.schemas.paper import Paper
 
 
 class ProjectBase(BaseModel):
@@ -46,5 +47,36 @@ class Project(ProjectInDBBase):
     collaborators_count: int = 0
 
 
+class ProjectPatient(BaseModel):
+    id: UUID4
+    patient_code: str
+    age: Optional[int] = None
+    gender: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ProjectCollaborator(BaseModel):
+    id: UUID4
+    name: str
+    email: Optional[str] = None
+    institution: Optional[str] = None
+    department: Optional[str] = None
+    role: Optional[str] = None
+    order_index: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ProjectDetail(Project):
+    """Project with relationship rows requested through `include=`"""
+    papers: Optional[List[Paper]] = None
+    patients: Optional[List[ProjectPatient]] = None
+    collaborators: Optional[List[ProjectCollaborator]] = None
+
+
 class ProjectInDB(ProjectInDBBase):
     pass
\ No newline at end of file
@@ -13,15 +13,19 @@ import os
 import time
 from typing import List, Dict, Any, Optional, AsyncGenerator
 from datetime import datetime
-import httpx
 from collections import deque
-import pickle
 import hashlib
 import re
 
+from app.services.memory_store import MemoryStore
+from app.services.ollama_client import ollama_client
+
+# Partition read by every user: holds the memories of the legacy global pickle
+SHARED_MEMORY_PARTITION = "__shared__"
+
 class AdvancedOllamaService:
     def __init__(self):
-        self.base_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        self.base_url = ollama_client.base_url
         self.model = os.getenv("OLLAMA_MODEL", "mistral:7b")
         
         # Context management (C7 - 7 levels of context)
@@ -39,7 +43,11 @@ class AdvancedOllamaService:
         self.memory_dir = "/home/drjang00/DevEnvironments/spinalsurgery-research/ai_memory"
         os.makedirs(self.memory_dir, exist_ok=True)
         self.short_term_memory = deque(maxlen=100)  # Last 100 interactions
-        self.long_term_memory = self._load_long_term_memory()
+        # Long-term memory: append-only, keyword-indexed, one partition per user
+        self.memory_store = MemoryStore(os.path.join(self.memory_dir, "long_term"))
+        self.memory_store.import_legacy_pickle(
+            os.path.join(self.memory_dir, "long_term_memory.pkl"), SHARED_MEMORY_PARTITION
+        )
         
         # Persona system
         self.personas = {
@@ -106,57 +114,35 @@ class AdvancedOllamaService:
     async def initialize(self):
         """Initialize Ollama connection and pull required models"""
         try:
-            async with httpx.AsyncClient() as client:
-                # Check if Ollama is running
-                response = await client.get(f"{self.base_url}/api/version")
-                if response.status_code == 200:
-                    print("Ollama is running")
-                    
-                    # Pull required models
-                    models_to_pull = ["mistral:7b", "llama2:7b", "codellama:7b"]
-                    for model in models_to_pull:
-                        await self._pull_model(model)
-                        
-                    return True
+            # Check if Ollama is running
+            if await ollama_client.is_available():
+                print("Ollama is running")
+                
+                # Pull required models
+                models_to_pull = ["mistral:7b", "llama2:7b", "codellama:7b"]
+                for model in models_to_pull:
+                    await self._pull_model(model)
+                
+                # Load the chat model so the first message does not wait for it
+                await ollama_client.warm_up([self.model])
+                return True
         except Exception as e:
             print(f"Failed to initialize Ollama: {e}")
-            return False
+        return False
             
     async def _pull_model(self, model_name: str):
         """Pull a model if not already available"""
         try:
-            async with httpx.AsyncClient() as client:
-                # Check if model exists
-                response = await client.get(f"{self.base_url}/api/tags")
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    if not any(m["name"] == model_name for m in models):
-                        print(f"Pulling model {model_name}...")
-                        await client.post(
-                            f"{self.base_url}/api/pull",
-                            json={"name": model_name}
-                        )
+            # Check if model exists
+            if model_name not in await ollama_client.list_models():
+                print(f"Pulling model {model_name}...")
+                await ollama_client.pull_model(model_name)
         except Exception as e:
             print(f"Error pulling model {model_name}: {e}")
             
-    def _load_long_term_memory(self) -> Dict:
-        """Load long-term memory from disk"""
-        memory_file = os.path.join(self.memory_dir, "long_term_memory.pkl")
-        if os.path.exists(memory_file):
-            with open(memory_file, 'rb') as f:
-                return pickle.load(f)
-        return {
-            "facts": {},
-            "conversations": {},
-            "insights": {},
-            "user_preferences": {}
-        }
-        
-    def _save_long_term_memory(self):
-        """Save long-term memory to disk"""
-        memory_file = os.path.join(self.memory_dir, "long_term_memory.pkl")
-        with open(memory_file, 'wb') as f:
-            pickle.dump(self.long_term_memory, f)
+    def _memory(self, user_id: str):
+        """Long-term memory partition of a user"""
+        return self.memory_store.partition(str(user_id))
             
     async def process_message(self, message: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Process a message with full feature support"""
@@ -171,20 +157,22 @@ class AdvancedOllamaService:
             args = command_parts[1] if len(command_parts) > 1 else ""
             
             if command in self.magic_commands:
-                async for response in self.magic_commands[command](args):
+                # user_id is passed along explicitly: the shared context may be
+                # overwritten by another user's request while this one streams
+                async for response in self.magic_commands[command](args, user_id):
                     yield response
                 return
                     
         # Regular message processing with persona
-        async for response in self._chat_with_persona(message):
+        async for response in self._chat_with_persona(message, user_id):
             yield response
             
-    async def _chat_with_persona(self, message: str) -> AsyncGenerator[str, None]:
+    async def _chat_with_persona(self, message: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Chat using current persona"""
         persona = self.personas[self.current_persona]
         
         # Build context-aware prompt
-        prompt = self._build_contextual_prompt(message, persona)
+        prompt = self._build_contextual_prompt(message, persona, user_id)
         
         # Save to short-term memory
         self.short_term_memory.append({
@@ -194,43 +182,31 @@ class AdvancedOllamaService:
         })
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": True,
-                        "options": {
-                            "temperature": 0.7,
-                            "top_p": 0.9,
-                            "num_ctx": 4096
-                        }
-                    },
-                    timeout=60.0
-                )
+            full_response = ""
+            async for chunk in ollama_client.stream_generate(
+                self.model,
+                prompt,
+                options={
+                    "temperature": 0.7,
+                    "top_p": 0.9,
+                    "num_ctx": 4096
+                }
+            ):
+                full_response += chunk
+                yield chunk
                 
-                full_response = ""
-                async for line in response.aiter_lines():
-                    if line:
-                        data = json.loads(line)
-                        if "response" in data:
-                            chunk = data["response"]
-                            full_response += chunk
-                            yield chunk
-                            
-                # Save response to memory
-                self.short_term_memory.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "assistant": full_response,
-                    "persona": self.current_persona
-                })
+            # Save response to memory
+            self.short_term_memory.append({
+                "timestamp": datetime.now().isoformat(),
+                "assistant": full_response,
+                "persona": self.current_persona
+            })
                 
         except Exception as e:
             # Fallback to mock responses if Ollama is not available
             yield await self._get_mock_response(message, persona)
             
-    def _build_contextual_prompt(self, message: str, persona: Dict) -> str:
+    def _build_contextual_prompt(self, message: str, persona: Dict, user_id: str = "default") -> str:
         """Build a context-aware prompt"""
         # Gather relevant context
         context_parts = []
@@ -239,7 +215,7 @@ class AdvancedOllamaService:
         context_parts.append(persona["system_prompt"])
         
         # Add relevant memories
-        relevant_memories = self._get_relevant_memories(message)
+        relevant_memories = self._get_relevant_memories(message, user_id)
         if relevant_memories:
             context_parts.append("Relevant memories:")
             for memory in relevant_memories[:3]:
@@ -263,21 +239,19 @@ class AdvancedOllamaService:
         full_prompt = "\n".join(context_parts) + f"\n\nUser: {message}\nAssistant:"
         return full_prompt
         
-    def _get_relevant_memories(self, query: str) -> List[str]:
+    def _get_relevant_memories(self, query: str, user_id: str = "default") -> List[str]:
         """Get relevant memories based on query"""
-        memories = []
-        
-        # Simple keyword matching for now
-        keywords = set(query.lower().split())
-        
-        for category, items in self.long_term_memory.items():
-            for key, value in items.items():
-                if any(keyword in str(value).lower() for keyword in keywords):
-                    memories.append(f"{category}: {value}")
-                    
-        return memories[:5]  # Return top 5 relevant memories
-        
-    async def _sequential_thinking(self, topic: str) -> AsyncGenerator[str, None]:
+        # Keyword index lookup, top 5 relevant memories: the user's own first,
+        # then shared ones (a user's memory overrides a shared one with the same key)
+        memories, seen = [], set()
+        for partition in (self._memory(user_id), self._memory(SHARED_MEMORY_PARTITION)):
+            for item in partition.recall(query, limit=5):
+                if len(memories) < 5 and (item.category, item.key) not in seen:
+                    seen.add((item.category, item.key))
+                    memories.append(str(item))
+        return memories
+        
+    async def _sequential_thinking(self, topic: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Sequential thinking process"""
         yield "🤔 Initiating sequential thinking process...\n"
         
@@ -299,7 +273,7 @@ class AdvancedOllamaService:
             prompt = f"Think step by step about '{topic}'. Current step: {step}. Previous thoughts: {self.thinking_chain}"
             
             thought = ""
-            async for chunk in self._chat_with_persona(prompt):
+            async for chunk in self._chat_with_persona(prompt, user_id):
                 thought += chunk
                 yield chunk
                 
@@ -311,12 +285,11 @@ class AdvancedOllamaService:
             yield "\n"
             
         # Save thinking chain to memory
-        self.long_term_memory["insights"][topic] = self.thinking_chain
-        self._save_long_term_memory()
+        self._memory(user_id).put("insights", topic, self.thinking_chain)
         
         yield "\n✅ Sequential thinking complete. Insights saved to memory."
         
-    async def _save_to_memory(self, content: str) -> AsyncGenerator[str, None]:
+    async def _save_to_memory(self, content: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Save content to long-term memory"""
         # Parse content for category and data
         parts = content.split(":", 1)
@@ -326,17 +299,16 @@ class AdvancedOllamaService:
             
             if category in ["facts", "insights", "preferences"]:
                 key = hashlib.md5(data.encode()).hexdigest()[:8]
-                self.long_term_memory.setdefault(category, {})[key] = data.strip()
-                self._save_long_term_memory()
+                self._memory(user_id).put(category, key, data.strip())
                 yield f"✅ Saved to {category} memory with key: {key}"
             else:
                 yield "❌ Invalid category. Use: facts, insights, or preferences"
         else:
             yield "❌ Format: /remember category: content"
             
-    async def _recall_from_memory(self, query: str) -> AsyncGenerator[str, None]:
+    async def _recall_from_memory(self, query: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Recall from memory"""
-        memories = self._get_relevant_memories(query)
+        memories = self._get_relevant_memories(query, user_id)
         
         if memories:
             yield "📚 Found relevant memories:\n"
@@ -345,7 +317,7 @@ class AdvancedOllamaService:
         else:
             yield "🤷 No relevant memories found."
             
-    async def _deep_analysis(self, topic: str) -> AsyncGenerator[str, None]:
+    async def _deep_analysis(self, topic: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Perform deep analysis"""
         yield f"🔍 Performing deep analysis on: {topic}\n\n"
         
@@ -361,11 +333,11 @@ class AdvancedOllamaService:
         for aspect in analysis_aspects:
             yield f"**{aspect}:**\n"
             prompt = f"Analyze '{topic}' focusing on: {aspect}"
-            async for chunk in self._chat_with_persona(prompt):
+            async for chunk in self._chat_with_persona(prompt, user_id):
                 yield chunk
             yield "\n\n"
             
-    async def _data_visualization(self, data_description: str) -> AsyncGenerator[str, None]:
+    async def _data_visualization(self, data_description: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Generate data visualization suggestions"""
         yield "📊 Data Visualization Recommendations:\n\n"
         
@@ -379,10 +351,10 @@ class AdvancedOllamaService:
         5. Implementation code (Python/Plotly)
         """
         
-        async for chunk in self._chat_with_persona(prompt):
+        async for chunk in self._chat_with_persona(prompt, user_id):
             yield chunk
             
-    async def _research_mode(self, query: str) -> AsyncGenerator[str, None]:
+    async def _research_mode(self, query: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Research mode for academic queries"""
         self._switch_persona_sync("research_assistant")
         yield "🔬 Research mode activated. Dr. Serena at your service.\n\n"
@@ -397,18 +369,18 @@ class AdvancedOllamaService:
         5. Publication strategies
         """
         
-        async for chunk in self._chat_with_persona(research_prompt):
+        async for chunk in self._chat_with_persona(research_prompt, user_id):
             yield chunk
             
-    async def _writing_mode(self, context: str) -> AsyncGenerator[str, None]:
+    async def _writing_mode(self, context: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Academic writing mode"""
         self._switch_persona_sync("paper_writer")
         yield "✍️ Writing mode activated. Professor Write ready to assist.\n\n"
         
-        async for chunk in self._chat_with_persona(f"Help with academic writing: {context}"):
+        async for chunk in self._chat_with_persona(f"Help with academic writing: {context}", user_id):
             yield chunk
             
-    async def _code_mode(self, request: str) -> AsyncGenerator[str, None]:
+    async def _code_mode(self, request: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Code assistance mode"""
         self._switch_persona_sync("code_assistant")
         yield "💻 Code mode activated. Dev Helper ready.\n\n"
@@ -418,12 +390,12 @@ class AdvancedOllamaService:
         available_models = await self._get_available_models()
         self.model = "codellama:7b" if "codellama:7b" in available_models else self.model
         
-        async for chunk in self._chat_with_persona(f"Code request: {request}"):
+        async for chunk in self._chat_with_persona(f"Code request: {request}", user_id):
             yield chunk
             
         self.model = original_model
         
-    async def _switch_persona(self, persona_name: str) -> AsyncGenerator[str, None]:
+    async def _switch_persona(self, persona_name: str, user_id: str = "default") -> AsyncGenerator[str, None]:
         """Switch AI persona"""
         persona_name = persona_name.strip().lower().replace(" ", "_")
         
@@ -441,7 +413,7 @@ class AdvancedOllamaService:
         if persona_name in self.personas:
             self.current_persona = persona_name
             
-    async def _show_context(self, level: str = "") -> AsyncGenerator[str, None]:
+    async def _show_context(self, level: str = "", user_id: str = "default") -> AsyncGenerator[str, None]:
         """Show current context"""
         yield "🧠 Current Context:\n\n"
         
@@ -457,7 +429,7 @@ class AdvancedOllamaService:
                     yield f"**{level_name.title()}:**\n"
                     yield json.dumps(context, indent=2) + "\n\n"
                     
-    async def _show_help(self, command: str = "") -> AsyncGenerator[str, None]:
+    async def _show_help(self, command: str = "", user_id: str = "default") -> AsyncGenerator[str, None]:
         """Show help for magic commands"""
         if command:
             command = f"/{command}" if not command.startswith("/") else command
@@ -504,31 +476,33 @@ class AdvancedOllamaService:
     async def _get_available_models(self) -> List[str]:
         """Get list of available models"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    return [m["name"] for m in models]
-        except:
-            pass
-        return []
+            return await ollama_client.list_models()
+        except Exception:
+            return []
         
     async def export_memory(self, user_id: str) -> Dict:
         """Export user's memory"""
+        long_term = self._memory(SHARED_MEMORY_PARTITION).export()
+        for category, items in self._memory(user_id).export().items():
+            long_term.setdefault(category, {}).update(items)
         return {
             "short_term": list(self.short_term_memory),
-            "long_term": self.long_term_memory,
+            "long_term": long_term,
             "context": self.context_levels,
             "thinking_chains": self.thinking_chain
         }
         
-    async def import_memory(self, user_id: str, memory_data: Dict):
+    async def import_memory(self, user_id: str, memory_data: Dict, merge: bool = True):
         """Import user's memory"""
         if "short_term" in memory_data:
             self.short_term_memory = deque(memory_data["short_term"], maxlen=100)
         if "long_term" in memory_data:
-            self.long_term_memory = memory_data["long_term"]
-            self._save_long_term_memory()
+            partition = self.memory_store.partition(user_id)
+            if not merge:
+                partition.clear()
+            for category, items in memory_data["long_term"].items():
+                for key, value in items.items():
+                    partition.put(category, str(key), value)
         if "context" in memory_data:
             self.context_levels.update(memory_data["context"])
         if "thinking_chains" in memory_data:
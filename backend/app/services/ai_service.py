@@ -5,15 +5,15 @@ from datetime import datetime
 import os
 
 from app.core.config import settings
+from app.services.llm_cache import cached_generate
+from app.services.llm_dispatch import PRIORITY_BACKGROUND
+from app.services.ollama_client import ollama_client
+from app.services.paper_vectors import paper_vectors
 
 # Try to import Ollama, fallback to mock if not available
 try:
     from langchain_community.llms import Ollama
-    from langchain_community.embeddings import OllamaEmbeddings
     from langchain.prompts import PromptTemplate
-    from langchain.chains import LLMChain
-    import chromadb
-    from chromadb.config import Settings
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
@@ -35,11 +35,6 @@ class AIService:
                         base_url=settings.OLLAMA_BASE_URL,
                         model=self.model
                     )
-                    self.embeddings = OllamaEmbeddings(
-                        base_url=settings.OLLAMA_BASE_URL,
-                        model=self.model
-                    )
-                    self.chroma = chromadb.Client(Settings(anonymized_telemetry=False))
                     self.ollama_available = True
                     print(f"Connected to Ollama at {settings.OLLAMA_BASE_URL}")
             except Exception as e:
@@ -57,9 +52,10 @@ class AIService:
         field: str,
         keywords: List[str],
         details: str,
-        references: List[Dict] = None
+        references: List[Dict] = None,
+        bypass_cache: bool = False
     ) -> Dict:
-        """Generate paper draft using AI"""
+        """Generate paper draft using AI (bypass_cache=True forces a fresh generation)"""
         
         if not self.ollama_available:
             return await self.mock_service.generate_paper_draft(
@@ -94,14 +90,13 @@ class AIService:
             template=prompt_template
         )
         
-        chain = LLMChain(llm=self.ollama, prompt=prompt)
-        
-        result = await chain.arun(
-            field=field,
-            title=title,
-            keywords=", ".join(keywords),
-            details=details
-        )
+        inputs = {
+            "field": field,
+            "title": title,
+            "keywords": ", ".join(keywords),
+            "details": details
+        }
+        result = await self._generate_text("paper_draft", prompt, inputs, bypass_cache)
         
         # Structure the result
         sections = self._parse_paper_sections(result)
@@ -124,9 +119,10 @@ class AIService:
         field: str,
         procedures: str,
         risks: str,
-        benefits: str
+        benefits: str,
+        bypass_cache: bool = False
     ) -> str:
-        """Generate informed consent document"""
+        """Generate informed consent document (bypass_cache=True forces a fresh generation)"""
         
         if not self.ollama_available:
             return await self.mock_service.generate_informed_consent(
@@ -164,15 +160,14 @@ class AIService:
             template=prompt_template
         )
         
-        chain = LLMChain(llm=self.ollama, prompt=prompt)
-        
-        result = await chain.arun(
-            project_title=project_title,
-            field=field,
-            procedures=procedures,
-            risks=risks,
-            benefits=benefits
-        )
+        inputs = {
+            "project_title": project_title,
+            "field": field,
+            "procedures": procedures,
+            "risks": risks,
+            "benefits": benefits
+        }
+        result = await self._generate_text("informed_consent", prompt, inputs, bypass_cache)
         
         return result
     
@@ -180,9 +175,10 @@ class AIService:
         self,
         data_description: str,
         analysis_type: str,
-        variables: List[str]
+        variables: List[str],
+        bypass_cache: bool = False
     ) -> Dict:
-        """Generate statistical analysis plan"""
+        """Generate statistical analysis plan (bypass_cache=True forces a fresh generation)"""
         
         if not self.ollama_available:
             return await self.mock_service.analyze_statistics(
@@ -211,13 +207,12 @@ class AIService:
             template=prompt_template
         )
         
-        chain = LLMChain(llm=self.ollama, prompt=prompt)
-        
-        result = await chain.arun(
-            data_description=data_description,
-            analysis_type=analysis_type,
-            variables=", ".join(variables)
-        )
+        inputs = {
+            "data_description": data_description,
+            "analysis_type": analysis_type,
+            "variables": ", ".join(variables)
+        }
+        result = await self._generate_text("statistics", prompt, inputs, bypass_cache)
         
         return {
             "analysis_plan": result,
@@ -229,39 +224,44 @@ class AIService:
         self,
         title: str,
         abstract: str,
-        limit: int = 10
+        limit: int = 10,
+        sources: Optional[List[str]] = None
     ) -> List[Dict]:
-        """Search for similar papers using embeddings"""
+        """Search for similar papers in the persistent paper vector index
         
-        if not self.ollama_available:
-            return await self.mock_service.search_similar_papers(
-                title=title,
-                abstract=abstract,
-                limit=limit
-            )
+        The index covers research_papers rows, the paper catalog and
+        searched papers, and is kept up to date by paper_vectors' background sync.
+        """
         
-        # Create or get collection
-        collection = self.chroma.get_or_create_collection(
-            name="research_papers",
-            embedding_function=self.embeddings
-        )
+        try:
+            return await paper_vectors.search(f"{title}\n{abstract}", limit=limit, sources=sources)
+        except httpx.HTTPError as e:
+            print(f"Similar paper search failed, embedding model unavailable: {e}")
+            if self.ollama_available:
+                raise
         
-        # Search similar papers
-        results = collection.query(
-            query_texts=[f"{title} {abstract}"],
-            n_results=limit
+        return await self.mock_service.search_similar_papers(
+            title=title,
+            abstract=abstract,
+            limit=limit
         )
+    
+    async def _generate_text(self, namespace: str, prompt: "PromptTemplate", inputs: Dict,
+                         bypass_cache: bool) -> str:
+        """Generate from a prompt template, reusing the cached response for an identical rendered prompt
         
-        similar_papers = []
-        if results["ids"][0]:
-            for i, paper_id in enumerate(results["ids"][0]):
-                similar_papers.append({
-                    "id": paper_id,
-                    "similarity_score": 1 - results["distances"][0][i],
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {}
-                })
-        
-        return similar_papers
+        Goes through the shared Ollama client at background priority so
+        interactive chat is served first when the model is busy.
+        """
+        rendered = prompt.format(**inputs)
+        
+        return await cached_generate(
+            namespace,
+            f"ollama/{self.model}",
+            rendered,
+            lambda: ollama_client.generate(self.model, rendered, priority=PRIORITY_BACKGROUND),
+            bypass=bypass_cache
+        )
     
     def _parse_paper_sections(self, text: str) -> Dict[str, str]:
         """Parse AI-generated text into paper sections"""
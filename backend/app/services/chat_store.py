@@ -0,0 +1,264 @@
+"""
+Chat store: in-process recent-message windows with write-behind persistence
+
+The chat endpoint used to look up the session, insert and flush the user
+message and re-read the last messages before calling the model. Here:
+
+- Each session has a ring buffer of its most recent messages, seeded from
+  the DB on first access, which serves as the model's context window.
+- New sessions, messages and session summary updates are queued and written
+  by a background task in batched transactions.
+- flush() waits until everything queued so far is committed. Read endpoints
+  call it first so they always see their own writes; close() drains the
+  queue on shutdown.
+
+Windows are per process. With several workers a window can miss messages
+written by another worker, which only narrows the context; the DB stays
+the source of truth.
+"""
+import asyncio
+import os
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.chat_session import ChatSession, ChatMessage
+
+# Messages kept per session as model context
+CHAT_CONTEXT_WINDOW = int(os.getenv("CHAT_CONTEXT_WINDOW", "10"))
+# Sessions kept in memory (least recently used are dropped)
+CHAT_CACHED_SESSIONS = int(os.getenv("CHAT_CACHED_SESSIONS", "1000"))
+# Write-behind batching
+CHAT_FLUSH_INTERVAL = float(os.getenv("CHAT_FLUSH_INTERVAL", "0.05"))
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "200"))
+CHAT_FLUSH_RETRIES = 5
+
+
+class SessionNotFound(Exception):
+    """Session id exists but belongs to another user"""
+
+
+@dataclass
+class _SessionWindow:
+    user_id: str
+    messages: Deque[Dict[str, str]]
+
+
+@dataclass
+class _PendingWrite:
+    session_id: str
+    user_id: str
+    title: Optional[str]
+    model: str
+    updated_at: datetime
+    # (role, content, timestamp, model)
+    messages: List[Tuple[str, str, datetime, Optional[str]]] = field(default_factory=list)
+
+
+class ChatStore:
+    def __init__(self, window: int = CHAT_CONTEXT_WINDOW, max_sessions: int = CHAT_CACHED_SESSIONS):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._windows: "OrderedDict[str, _SessionWindow]" = OrderedDict()
+        self._pending: List[_PendingWrite] = []
+        self._pending_by_session: Dict[str, int] = defaultdict(int)
+        self._enqueued = 0
+        self._written = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._progress: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    # ------------------------------------------------------------------
+    # Context windows
+    # ------------------------------------------------------------------
+
+    async def get_context(self, session_id: str, user_id: str) -> Optional[List[Dict[str, str]]]:
+        """Recent messages of a session, oldest first (None for a new session)
+
+        Raises SessionNotFound if the session belongs to another user.
+        """
+        window = self._windows.get(session_id)
+        if window is None:
+            if self._pending_by_session.get(session_id):
+                # Evicted while writes were still queued: seed from committed state
+                await self.flush()
+            window = await self._load(session_id)
+            if window is None:
+                return None
+            self._remember(session_id, window)
+        else:
+            self._windows.move_to_end(session_id)
+
+        if window.user_id != user_id:
+            raise SessionNotFound(session_id)
+        return list(window.messages)
+
+    async def _load(self, session_id: str) -> Optional[_SessionWindow]:
+        async with AsyncSessionLocal() as db:
+            owner = (await db.execute(
+                select(ChatSession.user_id).where(ChatSession.id == session_id)
+            )).scalar_one_or_none()
+            if owner is None:
+                return None
+            rows = (await db.execute(
+                select(ChatMessage.role, ChatMessage.content)
+                .where(ChatMessage.session_id == session_id)
+                .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+                .limit(self.window)
+            )).all()
+        messages = deque(({"role": row.role, "content": row.content} for row in reversed(rows)),
+                         maxlen=self.window)
+        return _SessionWindow(user_id=owner, messages=messages)
+
+    def _remember(self, session_id: str, window: _SessionWindow):
+        self._windows[session_id] = window
+        self._windows.move_to_end(session_id)
+        while len(self._windows) > self.max_sessions:
+            self._windows.popitem(last=False)
+
+    def forget(self, session_id: str):
+        """Drop a session's window (e.g. after the session is deleted)"""
+        self._windows.pop(session_id, None)
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+
+    def record_exchange(self, session_id: str, user_id: str, title: Optional[str], model: str,
+                        messages: List[Tuple[str, str, datetime, Optional[str]]]):
+        """Append messages to the session window and queue them for the DB
+
+        `title` is used only when the session row does not exist yet.
+        """
+        if self._closing:
+            raise RuntimeError("Chat store is closed")
+
+        window = self._windows.get(session_id)
+        if window is None:
+            window = _SessionWindow(user_id=user_id, messages=deque(maxlen=self.window))
+            self._remember(session_id, window)
+        for role, content, _, _ in messages:
+            window.messages.append({"role": role, "content": content})
+
+        self._pending.append(_PendingWrite(
+            session_id=session_id,
+            user_id=user_id,
+            title=title,
+            model=model,
+            updated_at=datetime.utcnow(),
+            messages=list(messages)
+        ))
+        self._pending_by_session[session_id] += 1
+        self._enqueued += 1
+        self._ensure_writer()
+        self._wakeup.set()
+
+    def _ensure_writer(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._progress = asyncio.Condition()
+            self._task = asyncio.create_task(self._writer_loop())
+
+    async def _writer_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._closing:
+                # Let a few more writes arrive so they share a transaction
+                await asyncio.sleep(CHAT_FLUSH_INTERVAL)
+
+            while self._pending:
+                batch = self._pending[:CHAT_FLUSH_BATCH]
+                del self._pending[:len(batch)]
+                await self._write_with_retry(batch)
+                for write in batch:
+                    self._pending_by_session[write.session_id] -= 1
+                    if not self._pending_by_session[write.session_id]:
+                        del self._pending_by_session[write.session_id]
+                async with self._progress:
+                    self._written += len(batch)
+                    self._progress.notify_all()
+
+            if self._closing:
+                return
+
+    async def _write_with_retry(self, batch: List[_PendingWrite]):
+        delay = 0.1
+        for attempt in range(CHAT_FLUSH_RETRIES):
+            try:
+                await self._write(batch)
+                return
+            except Exception as e:
+                print(f"Chat write-behind flush failed (attempt {attempt + 1}, {len(batch)} writes): {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+
+        # Isolate the failing writes so the rest of the batch is not lost
+        for write in batch:
+            try:
+                await self._write([write])
+            except Exception as e:
+                print(f"Dropping chat write for session {write.session_id}: {e}")
+
+    async def _write(self, batch: List[_PendingWrite]):
+        async with AsyncSessionLocal() as db:
+            sessions: Dict[str, ChatSession] = {}
+            for write in batch:
+                session = sessions.get(write.session_id)
+                if session is None:
+                    session = await db.get(ChatSession, write.session_id)
+                    if session is None:
+                        session = ChatSession(
+                            id=write.session_id,
+                            user_id=write.user_id,
+                            model=write.model,
+                            title=write.title
+                        )
+                        db.add(session)
+                    sessions[write.session_id] = session
+
+                for role, content, timestamp, model in write.messages:
+                    message = ChatMessage(
+                        session_id=write.session_id,
+                        role=role,
+                        content=content,
+                        timestamp=timestamp,
+                        model=model
+                    )
+                    db.add(message)
+                    session.record_message(message)
+                session.updated_at = write.updated_at
+                session.model = write.model
+            await db.commit()
+
+    async def flush(self, timeout: Optional[float] = None):
+        """Wait until everything queued before this call is committed"""
+        target = self._enqueued
+        if self._written >= target or self._progress is None:
+            return
+        self._wakeup.set()
+
+        async def wait():
+            async with self._progress:
+                await self._progress.wait_for(lambda: self._written >= target)
+
+        await asyncio.wait_for(wait(), timeout)
+
+    async def close(self):
+        """Stop accepting writes and drain the queue (call on shutdown)"""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            self._wakeup.set()
+            await self._task
+        if self._pending:
+            # Writer task never started on this loop
+            batch, self._pending = self._pending, []
+            await self._write_with_retry(batch)
+
+
+chat_store = ChatStore()
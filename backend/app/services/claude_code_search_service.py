@@ -4,7 +4,7 @@ VS Code의 Claude Code가 직접 논문을 검색하고 다운로드하는 서
 """
 import os
 import asyncio
-import aiohttp
+import httpx
 from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime
 import json
@@ -13,9 +13,19 @@ import re
 import hashlib
 from urllib.parse import quote_plus
 import xml.etree.ElementTree as ET
-import PyPDF2
-import pdfplumber
-from deep_translator import GoogleTranslator
+from app.services.download_manager import PDF_MAGIC, get_download_manager
+from app.services.http_cache import cached_async_client
+from app.services.pdf_extractor import get_pdf_extractor
+from app.services.pubmed_harvester import NCBI_API_KEY, PubMedHarvester
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+from app.services.translation_service import get_translation_service
+
+# Maximum number of sites searched at the same time
+MAX_CONCURRENT_SITES = int(os.getenv("SEARCH_SITE_CONCURRENCY", "3"))
+
+# Shared connection pool (keep-alive) for the search APIs
+HTTP_POOL_SIZE = 20
+KEEPALIVE_TIMEOUT = 30
 
 class ClaudeCodeSearchService:
     def __init__(self):
@@ -29,12 +39,44 @@ class ClaudeCodeSearchService:
         self.storage_path.mkdir(exist_ok=True)
         
         # Translation service
-        self.translator = GoogleTranslator(source='en', target='ko')
+        self.translator = get_translation_service()
         
         # API keys (if available)
-        self.pubmed_api_key = os.getenv("PUBMED_API_KEY", "")
+        self.pubmed_api_key = os.getenv("PUBMED_API_KEY", "") or NCBI_API_KEY
         self.semantic_scholar_api_key = os.getenv("SEMANTIC_SCHOLAR_API_KEY", "")
         
+        # Long-lived cached HTTP client (keep-alive) for the search APIs,
+        # created lazily on the running event loop; PDFs go through the download manager
+        self._api_client: Optional[httpx.AsyncClient] = None
+        self._site_semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+    async def _ensure_clients(self):
+        """Create the shared client for the current event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._api_client is not None and not self._api_client.is_closed:
+            return
+        
+        await self.close()
+        self._api_client = cached_async_client(
+            timeout=60.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=HTTP_POOL_SIZE, keepalive_expiry=KEEPALIVE_TIMEOUT)
+        )
+        self._site_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SITES)
+        self._loop = loop
+        
+    async def close(self):
+        """Close the shared HTTP client"""
+        client, self._api_client, self._loop = self._api_client, None, None
+        
+        # Clients bound to a loop that is already closed cannot be closed cleanly
+        try:
+            if client is not None:
+                await client.aclose()
+        except RuntimeError:
+            pass
+        
     async def search_papers(
         self,
         query: str,
@@ -45,42 +87,45 @@ class ClaudeCodeSearchService:
         """
         Search papers across multiple academic sites
         """
-        all_results = []
+        await self._ensure_clients()
         results_per_site = max(1, max_results // len(sites))
+        found = 0
         
-        for site in sites:
-            if progress_callback:
-                await progress_callback({
-                    "type": "progress",
-                    "status": "searching",
-                    "current_site": site,
-                    "message": f"{site}에서 검색 중...",
-                    "papers_found": len(all_results)
-                })
+        async def search_site(site: str) -> List[Dict]:
+            nonlocal found
+            searcher = self._site_searchers().get(site)
+            if searcher is None:
+                return []
             
-            try:
-                if site == "pubmed":
-                    results = await self._search_pubmed(query, results_per_site)
-                elif site == "arxiv":
-                    results = await self._search_arxiv(query, results_per_site)
-                elif site == "google_scholar":
-                    results = await self._search_google_scholar(query, results_per_site)
-                elif site == "semantic_scholar":
-                    results = await self._search_semantic_scholar(query, results_per_site)
-                else:
-                    continue
-                    
-                all_results.extend(results)
-                
-            except Exception as e:
-                print(f"Error searching {site}: {e}")
+            async with self._site_semaphore:
                 if progress_callback:
                     await progress_callback({
-                        "type": "warning",
+                        "type": "progress",
                         "status": "searching",
                         "current_site": site,
-                        "message": f"{site} 검색 중 오류 발생: {str(e)}"
+                        "message": f"{site}에서 검색 중...",
+                        "papers_found": found
                     })
+                
+                try:
+                    results = await searcher(query, results_per_site)
+                except Exception as e:
+                    print(f"Error searching {site}: {e}")
+                    if progress_callback:
+                        await progress_callback({
+                            "type": "warning",
+                            "status": "searching",
+                            "current_site": site,
+                            "message": f"{site} 검색 중 오류 발생: {str(e)}"
+                        })
+                    return []
+            
+            found += len(results)
+            return results
+        
+        # Sites are searched concurrently; results keep the requested site order
+        site_results = await asyncio.gather(*(search_site(site) for site in sites))
+        all_results = [paper for results in site_results for paper in results]
         
         # Remove duplicates based on title similarity
         unique_results = self._deduplicate_results(all_results)
@@ -95,128 +140,65 @@ class ClaudeCodeSearchService:
         
         return unique_results[:max_results]
     
+    def _site_searchers(self) -> Dict[str, Callable]:
+        return {
+            "pubmed": self._search_pubmed,
+            "arxiv": self._search_arxiv,
+            "google_scholar": self._search_google_scholar,
+            "semantic_scholar": self._search_semantic_scholar,
+        }
+    
     async def _search_pubmed(self, query: str, max_results: int) -> List[Dict]:
         """Search PubMed database"""
-        papers = []
-        
-        # Search for PMIDs
-        search_url = f"{self.pubmed_base}/esearch.fcgi"
-        params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': max_results,
-            'retmode': 'json'
-        }
+        await self._ensure_clients()
+        async with self._pubmed_harvester() as harvester:
+            pmids = await harvester.search_ids(query, max_results)
         
-        if self.pubmed_api_key:
-            params['api_key'] = self.pubmed_api_key
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(search_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    pmids = data.get('esearchresult', {}).get('idlist', [])
-                    
-                    # Fetch details for each PMID
-                    for pmid in pmids:
-                        paper_details = await self._fetch_pubmed_details(pmid)
-                        if paper_details:
-                            papers.append(paper_details)
+        return await self.fetch_pubmed_papers(pmids)
+    
+    async def fetch_pubmed_papers(self, pmids: List[str]) -> List[Dict]:
+        """Fetch details for many PMIDs with batched efetch calls (up to 200 PMIDs per request)"""
+        if not pmids:
+            return []
         
+        await self._ensure_clients()
+        papers = []
+        async with self._pubmed_harvester() as harvester:
+            async for page in harvester.fetch_ids(pmids, parse_page=self._parse_pubmed_page):
+                papers.extend(page)
         return papers
     
     async def _fetch_pubmed_details(self, pmid: str) -> Optional[Dict]:
         """Fetch detailed information for a PubMed paper"""
-        fetch_url = f"{self.pubmed_base}/efetch.fcgi"
-        params = {
-            'db': 'pubmed',
-            'id': pmid,
-            'rettype': 'abstract',
-            'retmode': 'xml'
-        }
-        
-        if self.pubmed_api_key:
-            params['api_key'] = self.pubmed_api_key
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(fetch_url, params=params) as response:
-                if response.status == 200:
-                    xml_data = await response.text()
-                    return self._parse_pubmed_xml(xml_data, pmid)
-        
-        return None
+        papers = await self.fetch_pubmed_papers([pmid])
+        return papers[0] if papers else None
     
-    def _parse_pubmed_xml(self, xml_data: str, pmid: str) -> Dict:
-        """Parse PubMed XML response"""
-        root = ET.fromstring(xml_data)
-        article = root.find('.//PubmedArticle')
-        
-        if not article:
-            return {}
-        
-        paper = {
-            'id': f"pubmed_{pmid}",
+    def _pubmed_harvester(self) -> PubMedHarvester:
+        """Harvester over the shared keep-alive client and the process-wide NCBI rate limiter"""
+        return PubMedHarvester(api_key=self.pubmed_api_key, client=self._api_client)
+    
+    def _parse_pubmed_page(self, xml_data: bytes) -> List[Dict]:
+        """Parse one efetch page (runs in the harvester's thread pool)"""
+        return [self._pubmed_record_to_paper(record) for record in iter_pubmed_articles(xml_data)]
+    
+    def _pubmed_record_to_paper(self, record: Dict) -> Dict:
+        """Convert a normalized PubMed record to this service's paper format"""
+        pmc_id = record['pmc_id']
+        return {
+            'id': f"pubmed_{record['pmid']}",
             'source': 'pubmed',
-            'pmid': pmid,
-            'title': '',
-            'abstract': '',
-            'authors': [],
-            'journal': '',
-            'year': '',
-            'doi': '',
-            'pmc_id': '',
-            'keywords': [],
-            'pdf_url': None
+            'pmid': record['pmid'],
+            'title': record['title'],
+            'abstract': record['abstract'],
+            'authors': record['author_names'],
+            'journal': record['journal'],
+            'year': record['year'],
+            'doi': record['doi'],
+            'pmc_id': pmc_id,
+            'keywords': record['keywords'],
+            'mesh_terms': [term['descriptor'] for term in record['mesh_terms']],
+            'pdf_url': f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmc_id}/pdf/" if pmc_id else None
         }
-        
-        # Extract title
-        title = article.find('.//ArticleTitle')
-        if title is not None and title.text:
-            paper['title'] = title.text
-        
-        # Extract abstract
-        abstract_texts = []
-        for abstract in article.findall('.//AbstractText'):
-            if abstract.text:
-                label = abstract.get('Label', '')
-                if label:
-                    abstract_texts.append(f"{label}: {abstract.text}")
-                else:
-                    abstract_texts.append(abstract.text)
-        paper['abstract'] = '\n\n'.join(abstract_texts)
-        
-        # Extract authors
-        for author in article.findall('.//Author'):
-            last_name = author.find('LastName')
-            fore_name = author.find('ForeName')
-            if last_name is not None and fore_name is not None:
-                paper['authors'].append(f"{fore_name.text} {last_name.text}")
-        
-        # Extract journal info
-        journal = article.find('.//Journal/Title')
-        if journal is not None and journal.text:
-            paper['journal'] = journal.text
-        
-        year = article.find('.//PubDate/Year')
-        if year is not None and year.text:
-            paper['year'] = year.text
-        
-        # Extract identifiers
-        doi = article.find('.//ArticleId[@IdType="doi"]')
-        if doi is not None and doi.text:
-            paper['doi'] = doi.text
-        
-        pmc = article.find('.//ArticleId[@IdType="pmc"]')
-        if pmc is not None and pmc.text:
-            paper['pmc_id'] = pmc.text
-            paper['pdf_url'] = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmc.text}/pdf/"
-        
-        # Extract keywords
-        for keyword in article.findall('.//Keyword'):
-            if keyword.text:
-                paper['keywords'].append(keyword.text)
-        
-        return paper
     
     async def _search_arxiv(self, query: str, max_results: int) -> List[Dict]:
         """Search arXiv database"""
@@ -229,11 +211,10 @@ class ClaudeCodeSearchService:
             'sortBy': 'relevance'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.arxiv_base, params=params) as response:
-                if response.status == 200:
-                    xml_data = await response.text()
-                    papers = self._parse_arxiv_xml(xml_data)
+        await self._ensure_clients()
+        response = await self._api_client.get(self.arxiv_base, params=params)
+        if response.status_code == 200:
+            papers = self._parse_arxiv_xml(response.text)
         
         return papers
     
@@ -305,28 +286,28 @@ class ClaudeCodeSearchService:
         if self.semantic_scholar_api_key:
             headers['x-api-key'] = self.semantic_scholar_api_key
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(search_url, params=params, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    for item in data.get('data', []):
-                        paper = {
-                            'id': f"s2_{item.get('paperId', '')}",
-                            'source': 'semantic_scholar',
-                            'title': item.get('title', ''),
-                            'abstract': item.get('abstract', ''),
-                            'authors': [author.get('name', '') for author in item.get('authors', [])],
-                            'journal': item.get('venue', ''),
-                            'year': str(item.get('year', '')),
-                            'doi': item.get('doi', ''),
-                            'pdf_url': None
-                        }
-                        
-                        # Check for open access PDF
-                        if item.get('openAccessPdf'):
-                            paper['pdf_url'] = item['openAccessPdf'].get('url')
-                        
-                        papers.append(paper)
+        await self._ensure_clients()
+        response = await self._api_client.get(search_url, params=params, headers=headers)
+        if response.status_code == 200:
+            data = response.json()
+            for item in data.get('data', []):
+                paper = {
+                    'id': f"s2_{item.get('paperId', '')}",
+                    'source': 'semantic_scholar',
+                    'title': item.get('title', ''),
+                    'abstract': item.get('abstract', ''),
+                    'authors': [author.get('name', '') for author in item.get('authors', [])],
+                    'journal': item.get('venue', ''),
+                    'year': str(item.get('year', '')),
+                    'doi': item.get('doi', ''),
+                    'pdf_url': None
+                }
+                
+                # Check for open access PDF
+                if item.get('openAccessPdf'):
+                    paper['pdf_url'] = item['openAccessPdf'].get('url')
+                
+                papers.append(paper)
         
         return papers
     
@@ -361,9 +342,7 @@ class ClaudeCodeSearchService:
         project_id: Optional[str] = None,
         progress_callback: Optional[Callable] = None
     ) -> List[Dict]:
-        """Download PDFs for papers"""
-        downloaded_papers = []
-        
+        """Download PDFs for papers concurrently (bounded per host by the download manager)"""
         # Create project folder if specified
         if project_id:
             project_folder = self.storage_path / f"project_{project_id}"
@@ -371,16 +350,10 @@ class ClaudeCodeSearchService:
             project_folder = self.storage_path / f"search_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         project_folder.mkdir(exist_ok=True)
+        downloaded = 0
         
-        for idx, paper in enumerate(papers):
-            if progress_callback:
-                await progress_callback({
-                    "type": "progress",
-                    "status": "downloading",
-                    "current_paper": paper['title'][:50] + "...",
-                    "papers_downloaded": idx,
-                    "message": f"다운로드 중: {paper['title'][:50]}..."
-                })
+        async def download(paper: Dict) -> Dict:
+            nonlocal downloaded
             
             # Create folder for each paper
             safe_title = re.sub(r'[^\w\s-]', '', paper['title'])[:50]
@@ -389,18 +362,14 @@ class ClaudeCodeSearchService:
             paper_folder.mkdir(exist_ok=True)
             
             # Download PDF if URL is available
-            pdf_path = None
+            paper['pdf_downloaded'] = False
             if paper.get('pdf_url'):
-                pdf_filename = f"{paper['id']}.pdf"
-                pdf_path = paper_folder / pdf_filename
+                pdf_path = paper_folder / f"{paper['id']}.pdf"
+                label = paper['title'][:50] + "..."
                 
-                if await self._download_file(paper['pdf_url'], pdf_path):
+                if await self._download_file(paper['pdf_url'], pdf_path, progress_callback, label):
                     paper['pdf_path'] = str(pdf_path)
                     paper['pdf_downloaded'] = True
-                else:
-                    paper['pdf_downloaded'] = False
-            else:
-                paper['pdf_downloaded'] = False
             
             # Save metadata
             metadata_path = paper_folder / "metadata.json"
@@ -408,23 +377,33 @@ class ClaudeCodeSearchService:
                 json.dump(paper, f, ensure_ascii=False, indent=2)
             
             paper['folder'] = str(paper_folder)
-            downloaded_papers.append(paper)
+            
+            downloaded += 1
+            if progress_callback:
+                await progress_callback({
+                    "type": "progress",
+                    "status": "downloading",
+                    "current_paper": paper['title'][:50] + "...",
+                    "papers_downloaded": downloaded,
+                    "message": f"다운로드 완료 ({downloaded}/{len(papers)}): {paper['title'][:50]}..."
+                })
+            
+            return paper
         
-        return downloaded_papers
+        return list(await asyncio.gather(*(download(paper) for paper in papers)))
     
-    async def _download_file(self, url: str, filepath: Path) -> bool:
-        """Download file from URL"""
+    async def _download_file(self, url: str, filepath: Path,
+                             progress_callback: Optional[Callable] = None,
+                             label: Optional[str] = None) -> bool:
+        """Download file from URL (streamed, resumable, deduplicated by content hash)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        with open(filepath, 'wb') as f:
-                            f.write(content)
-                        return True
+            path = await get_download_manager().download(
+                url, filepath, progress_callback=progress_callback, label=label, magic=PDF_MAGIC
+            )
+            return path is not None
         except Exception as e:
             print(f"Download error for {url}: {e}")
-        
+
         return False
     
     async def translate_papers(
@@ -445,30 +424,23 @@ class ClaudeCodeSearchService:
                 })
             
             try:
-                # Translate title
+                fields = {}
                 if paper.get('title'):
-                    paper['korean_title'] = self.translator.translate(paper['title'])
-                
-                # Translate abstract
+                    fields['korean_title'] = paper['title']
                 if paper.get('abstract'):
-                    # Split long abstracts
-                    abstract_parts = self._split_text(paper['abstract'], 4500)
-                    translated_parts = []
-                    
-                    for part in abstract_parts:
-                        translated = self.translator.translate(part)
-                        translated_parts.append(translated)
-                        await asyncio.sleep(0.5)  # Avoid rate limiting
-                    
-                    paper['korean_abstract'] = '\n'.join(translated_parts)
+                    fields['korean_abstract'] = paper['abstract']
                 
                 # If PDF was downloaded, extract and translate key sections
                 if paper.get('pdf_path') and Path(paper['pdf_path']).exists():
-                    pdf_text = self._extract_pdf_text(Path(paper['pdf_path']))
+                    pdf_text = await self._extract_pdf_text(Path(paper['pdf_path']))
                     if pdf_text:
                         key_sections = self._extract_key_sections(pdf_text)
                         if key_sections:
-                            paper['korean_summary'] = self.translator.translate(key_sections[:1000])
+                            fields['korean_summary'] = key_sections[:1000]
+                
+                # One batched request per paper; cached segments are not re-sent
+                translated = await self.translator.translate_many(list(fields.values()))
+                paper.update(zip(fields, translated))
                 
                 # Save Korean translation
                 if paper.get('folder'):
@@ -481,44 +453,17 @@ class ClaudeCodeSearchService:
             translated_papers.append(paper)
         
         return translated_papers
-    
-    def _split_text(self, text: str, max_length: int) -> List[str]:
-        """Split long text into chunks"""
-        if len(text) <= max_length:
-            return [text]
-        
-        parts = []
-        sentences = text.split('. ')
-        current_part = ""
-        
-        for sentence in sentences:
-            if len(current_part) + len(sentence) + 2 <= max_length:
-                current_part += sentence + ". "
-            else:
-                if current_part:
-                    parts.append(current_part.strip())
-                current_part = sentence + ". "
-        
-        if current_part:
-            parts.append(current_part.strip())
-        
-        return parts
-    
-    def _extract_pdf_text(self, pdf_path: Path) -> str:
-        """Extract text from PDF"""
-        text = ""
-        
+
+    async def _extract_pdf_text(self, pdf_path: Path) -> str:
+        """Extract text from PDF (process pool, cached in a sidecar file)"""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages[:10]:  # First 10 pages only
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            result = await get_pdf_extractor().extract(pdf_path, max_pages=10)  # First 10 pages only
+            return result['text']
         except Exception as e:
             print(f"PDF extraction error: {e}")
-        
-        return text
-    
+
+        return ""
+
     def _extract_key_sections(self, text: str) -> str:
         """Extract key sections from paper text"""
         sections = {
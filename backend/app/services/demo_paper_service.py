@@ -8,15 +8,16 @@ from typing import Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 import json
-from deep_translator import GoogleTranslator
-import PyPDF2
-import pdfplumber
+
+from app.services.paper_catalog import notify_paper_folder
+from app.services.pdf_extractor import format_timing, get_pdf_extractor
+from app.services.translation_service import get_translation_service
 
 class DemoPaperService:
     def __init__(self):
         self.storage_path = Path("/home/drjang00/DevEnvironments/spinalsurgery-research/downloaded_papers")
         self.storage_path.mkdir(exist_ok=True)
-        self.translator = GoogleTranslator(source='en', target='ko')
+        self.translator = get_translation_service()
         
         # 실제 다운로드 가능한 오픈 액세스 논문들
         self.demo_papers = [
@@ -71,7 +72,7 @@ class DemoPaperService:
             # PDF에서 텍스트 추출
             if pdf_path and pdf_path.exists():
                 print("📄 Extracting text from PDF...")
-                full_text = self._extract_text_from_pdf(pdf_path)
+                full_text = await self._extract_text_from_pdf(pdf_path)
                 metadata['full_text_preview'] = full_text[:2000] if full_text else ""
             
             # 한글 번역
@@ -121,20 +122,19 @@ class DemoPaperService:
             
         return None
         
-    def _extract_text_from_pdf(self, pdf_path: Path) -> str:
-        """PDF에서 텍스트 추출"""
+    async def _extract_text_from_pdf(self, pdf_path: Path) -> str:
+        """PDF에서 텍스트 추출 (프로세스 풀, 사이드카 캐시)"""
         text = ""
         
         try:
-            # pdfplumber 사용
-            with pdfplumber.open(pdf_path) as pdf:
-                # 처음 5페이지만 추출 (데모용)
-                for i, page in enumerate(pdf.pages[:5]):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- Page {i+1} ---\n{page_text}\n"
+            # 처음 5페이지만 추출 (데모용)
+            result = await get_pdf_extractor().extract(pdf_path, max_pages=5)
+            for page in result['pages']:
+                page_text = result['text'][page['start']:page['end']]
+                if page_text:
+                    text += f"\n--- Page {page['page']} ---\n{page_text}\n"
                         
-            print(f"📝 Extracted {len(text)} characters from PDF")
+            print(f"📝 Extracted {len(text)} characters from PDF ({format_timing(result)})")
                         
         except Exception as e:
             print(f"❌ PDF extraction error: {e}")
@@ -142,29 +142,21 @@ class DemoPaperService:
         return text.strip()
         
     async def _translate_to_korean(self, metadata: Dict) -> Dict:
-        """한글 번역"""
+        """한글 번역 (제목 / 초록 / 본문 미리보기를 한 번에 묶어서 번역)"""
         korean_data = {}
         
-        try:
-            # 제목 번역
-            korean_data['title'] = self.translator.translate(metadata['title'])
-            print(f"✅ Title translated")
-            
-            # 초록 번역
-            if metadata.get('abstract'):
-                # 초록이 길면 나누어 번역
-                abstract = metadata['abstract']
-                if len(abstract) > 4500:
-                    abstract = abstract[:4500]
-                    
-                korean_data['abstract'] = self.translator.translate(abstract)
-                print(f"✅ Abstract translated")
-                
+        fields = {'title': metadata['title']}
+        if metadata.get('abstract'):
+            # 초록이 길면 앞부분만 번역
+            fields['abstract'] = metadata['abstract'][:4500]
+        if metadata.get('full_text_preview'):
             # 주요 내용 요약 (PDF 텍스트 일부)
-            if metadata.get('full_text_preview'):
-                preview = metadata['full_text_preview'][:1000]
-                korean_data['content_preview'] = self.translator.translate(preview)
-                print(f"✅ Content preview translated")
+            fields['content_preview'] = metadata['full_text_preview'][:1000]
+            
+        try:
+            translated = await self.translator.translate_many(list(fields.values()))
+            korean_data.update(zip(fields, translated))
+            print(f"✅ Translated: {', '.join(fields)}")
                 
         except Exception as e:
             print(f"❌ Translation error: {e}")
@@ -217,6 +209,9 @@ class DemoPaperService:
                 f.write(metadata['korean_translation']['content_preview'][:500] + "...\n")
                 
         print(f"💾 Metadata saved to {folder}")
+        
+        # 논문 카탈로그 색인 갱신
+        notify_paper_folder(folder)
 
 # 싱글톤 인스턴스
 demo_paper_service = DemoPaperService()
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Directory Cache - 파일 브라우저 트리용 디렉터리 목록 / stat 캐시
+- 디렉터리별로 자식 목록(이름, 종류, 크기, 수정 시각)을 한 번만 scandir/stat 하여 보관
+- 디렉터리 mtime이 바뀌면 (자식 추가 / 삭제 / 이름 변경) 다시 읽음
+- 파일 브라우저가 파일 내용을 바꾼 직후에는 invalidate()로 부모 디렉터리 목록을 버림
+- 목록 내용으로 만든 version으로 ETag를 계산하여 바뀌지 않은 하위 트리는 304로 응답
+- 이름 순 정렬 목록에서 커서(마지막으로 받은 이름) 다음부터 페이지 단위로 반환
+"""
+import bisect
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 캐시에 보관할 최대 디렉터리 수 (LRU)
+DIRECTORY_CACHE_SIZE = int(os.getenv("DIRECTORY_CACHE_SIZE", "2048"))
+
+
+class DirectoryListing:
+    """한 디렉터리의 자식 목록 (만들어진 뒤에는 읽기 전용)"""
+
+    def __init__(self, mtime_ns: int, entries: List[Dict]):
+        self.mtime_ns = mtime_ns
+        self.entries = entries
+        self.names = [entry['name'] for entry in entries]
+
+        digest = hashlib.sha1()
+        for entry in entries:
+            digest.update(f"{entry['name']}\0{entry['type']}\0{entry['size']}\0{entry['mtime_ns']}\n"
+                          .encode('utf-8', 'surrogateescape'))
+        self.version = digest.hexdigest()[:16]
+
+    def page(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+        """cursor 다음 이름부터 limit개와 다음 커서 (마지막 페이지면 None)"""
+        start = bisect.bisect_right(self.names, cursor) if cursor else 0
+        end = len(self.entries) if limit is None else min(start + limit, len(self.entries))
+        items = self.entries[start:end]
+        next_cursor = self.names[end - 1] if end < len(self.entries) and items else None
+        return items, next_cursor
+
+
+class DirectoryCache:
+    """root 아래 디렉터리 목록 캐시 (디렉터리 mtime으로 무효화)"""
+
+    def __init__(self, root: Path, max_directories: int = DIRECTORY_CACHE_SIZE):
+        self.root = Path(root)
+        self.max_directories = max_directories
+        self._listings: "OrderedDict[str, DirectoryListing]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _relative(self, path: str) -> str:
+        return str(Path(path).relative_to(self.root))
+
+    def _scan(self, directory: str, mtime_ns: int) -> DirectoryListing:
+        entries = []
+        with os.scandir(directory) as iterator:
+            for item in iterator:
+                try:
+                    stat = item.stat()
+                    is_dir = item.is_dir()
+                except OSError:
+                    continue
+                entries.append({
+                    'name': item.name,
+                    'path': self._relative(item.path),
+                    'type': 'directory' if is_dir else 'file',
+                    'size': None if is_dir else stat.st_size,
+                    'modified': datetime.fromtimestamp(stat.st_mtime),
+                    'mtime_ns': stat.st_mtime_ns,
+                    'extension': None if is_dir else os.path.splitext(item.name)[1],
+                })
+        entries.sort(key=lambda entry: entry['name'])
+        return DirectoryListing(mtime_ns, entries)
+
+    def listing(self, directory) -> DirectoryListing:
+        """디렉터리 목록 (mtime이 그대로면 캐시 사용)"""
+        key = str(directory)
+        mtime_ns = os.stat(key).st_mtime_ns
+
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                self._listings.move_to_end(key)
+                return cached
+
+        listing = self._scan(key, mtime_ns)
+        with self._lock:
+            self._listings[key] = listing
+            self._listings.move_to_end(key)
+            while len(self._listings) > self.max_directories:
+                self._listings.popitem(last=False)
+        return listing
+
+    def subtree_version(self, directory, max_depth: int) -> str:
+        """트리에 포함되는 하위 디렉터리 목록 version을 합친 값 (트리 ETag용)
+
+        깊이 depth(루트 = 0)의 디렉터리는 depth + 1 < max_depth일 때만 자식이 트리에 포함된다.
+        """
+        digest = hashlib.sha1()
+        stack = [(str(directory), 0)]
+        while stack:
+            current, depth = stack.pop()
+            if depth + 1 >= max_depth:
+                continue
+            try:
+                listing = self.listing(current)
+            except OSError:
+                continue
+            digest.update(f"{current}\0{listing.version}\n".encode('utf-8', 'surrogateescape'))
+            stack.extend((os.path.join(current, entry['name']), depth + 1)
+                         for entry in listing.entries if entry['type'] == 'directory')
+        return digest.hexdigest()[:16]
+
+    def invalidate(self, path):
+        """path와 부모 디렉터리, path 아래 디렉터리 목록을 버림 (파일 내용 변경 / 이동 / 삭제 직후)"""
+        key = str(Path(path))
+        parent = str(Path(path).parent)
+        with self._lock:
+            for cached in [k for k in self._listings
+                           if k in (key, parent) or k.startswith(key + os.sep)]:
+                del self._listings[cached]
+
+
+_caches: Dict[str, DirectoryCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_directory_cache(root: Path) -> DirectoryCache:
+    """root별로 공유되는 디렉터리 캐시"""
+    key = str(Path(root))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = DirectoryCache(root)
+            _caches[key] = cache
+        return cache
@@ -0,0 +1,345 @@
+"""
+Download Manager - 논문 PDF 동시 다운로드
+- 공유 연결 풀 (aiohttp, keep-alive) + 호스트별 동시 다운로드 수 제한
+- 청크 단위 스트리밍 저장 (임시 .part 파일 → 완료 후 원자적 rename)
+- 중단된 다운로드는 HTTP Range 요청으로 이어받기
+- 내용 해시(SHA-256) 기반 저장소: 같은 PDF는 한 번만 저장하고 프로젝트 폴더에는 하드링크
+- 진행률 이벤트를 기존 progress_callback(WebSocket) 형식으로 전달
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from sqlite_manager import get_db
+
+PDF_STORE_PATH = Path(os.getenv(
+    "PDF_STORE_PATH", "/home/drjang00/DevEnvironments/spinalsurgery-research/pdf_store"
+))
+
+MAX_CONNECTIONS = int(os.getenv("DOWNLOAD_MAX_CONNECTIONS", "16"))
+MAX_PER_HOST = int(os.getenv("DOWNLOAD_MAX_PER_HOST", "4"))
+
+CHUNK_SIZE = 64 * 1024
+MAX_ATTEMPTS = 3
+
+# 진행률 이벤트 최소 간격 (초)
+PROGRESS_INTERVAL = 0.5
+
+PDF_MAGIC = b"%PDF"
+
+
+class DownloadManager:
+    """내용 해시 저장소를 사용하는 동시 다운로드 관리자
+
+    완성된 파일은 store_path/objects/<해시 앞 2자리>/<해시>에 한 번만 저장되고,
+    요청한 위치(dest)에는 하드링크(다른 파일시스템이면 복사)가 만들어진다.
+    같은 URL을 다시 요청하면 네트워크 없이 저장소에서 바로 연결한다.
+    """
+
+    def __init__(self,
+                 store_path: Path = PDF_STORE_PATH,
+                 max_connections: int = MAX_CONNECTIONS,
+                 max_per_host: int = MAX_PER_HOST,
+                 chunk_size: int = CHUNK_SIZE):
+        self.store_path = Path(store_path)
+        self.objects_path = self.store_path / "objects"
+        self.partial_path = self.store_path / "partial"
+        self.objects_path.mkdir(parents=True, exist_ok=True)
+        self.partial_path.mkdir(parents=True, exist_ok=True)
+
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.chunk_size = chunk_size
+
+        self.db = get_db(str(self.store_path / "downloads.db"))
+        self.db.write(self._create_tables)
+
+        # 이벤트 루프별로 생성되는 객체
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS downloads (
+                        url TEXT PRIMARY KEY,
+                        sha256 TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        content_type TEXT,
+                        downloaded_at REAL NOT NULL
+                    )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_downloads_sha256 ON downloads(sha256)')
+
+    async def _ensure_session(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._session is not None and not self._session.closed:
+            return
+
+        await self.close()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections,
+                                           limit_per_host=self.max_per_host),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+        )
+        self._host_semaphores = {}
+        self._inflight = {}
+        self._loop = loop
+
+    async def close(self):
+        """공유 세션 종료"""
+        session, self._session, self._loop = self._session, None, None
+        try:
+            if session is not None and not session.closed:
+                await session.close()
+        except RuntimeError:
+            # 이미 닫힌 이벤트 루프에 묶인 세션
+            pass
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_path / digest[:2] / digest
+
+    # ---------------------------------------------------------------
+    # 다운로드
+    # ---------------------------------------------------------------
+
+    async def download(self,
+                       url: str,
+                       dest: Path,
+                       progress_callback: Optional[Callable] = None,
+                       label: Optional[str] = None,
+                       magic: Optional[bytes] = None) -> Optional[Path]:
+        """url을 dest에 저장하고 dest 반환, 실패하면 None
+
+        magic을 지정하면 파일 시작 바이트가 다를 때(예: PDF 대신 HTML 안내 페이지)
+        실패로 처리한다. 같은 URL을 동시에 요청하면 한 번만 다운로드한다.
+        """
+        await self._ensure_session()
+        dest = Path(dest)
+
+        digest = await asyncio.to_thread(self._lookup, url)
+        if digest is None:
+            task = self._inflight.get(url)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch(url, progress_callback, label or url, magic))
+                self._inflight[url] = task
+                task.add_done_callback(lambda _: self._inflight.pop(url, None))
+            digest = await asyncio.shield(task)
+            if digest is None:
+                return None
+
+        await asyncio.to_thread(self._link, digest, dest)
+        return dest
+
+    def _lookup(self, url: str) -> Optional[str]:
+        """이미 받은 URL이고 저장소에 파일이 있으면 해시 반환"""
+        row = self.db.query_one('SELECT sha256 FROM downloads WHERE url = ?', (url,))
+        if row and self.object_path(row['sha256']).exists():
+            return row['sha256']
+        return None
+
+    async def _fetch(self, url: str, progress_callback: Optional[Callable],
+                     label: str, magic: Optional[bytes]) -> Optional[str]:
+        """.part 파일로 스트리밍 다운로드 (연결이 끊기면 이어받기로 재시도)"""
+        key = hashlib.sha1(url.encode()).hexdigest()
+        part = self.partial_path / f"{key}.part"
+        meta_path = self.partial_path / f"{key}.json"
+
+        async with self._host_semaphore(url):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                try:
+                    result = await self._fetch_once(url, part, meta_path, progress_callback, label, magic)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"Download error for {url} (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                    continue
+                if result is None:
+                    return None
+                digest, size, content_type = result
+                await asyncio.to_thread(self._commit, url, part, meta_path, digest, size, content_type)
+                return digest
+
+        return None
+
+    async def _fetch_once(self, url: str, part: Path, meta_path: Path,
+                          progress_callback: Optional[Callable], label: str,
+                          magic: Optional[bytes]):
+        offset = part.stat().st_size if part.exists() else 0
+        meta = self._read_meta(meta_path)
+        validator = meta.get("etag") or meta.get("last_modified")
+
+        headers = {}
+        if offset and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        else:
+            offset = 0
+
+        async with self._session.get(url, headers=headers) as response:
+            if response.status == 206:
+                mode = "ab"
+            elif response.status == 200:
+                offset, mode = 0, "wb"
+            elif response.status == 416:
+                # 서버 쪽 파일이 바뀌어 이어받을 수 없음: 처음부터 다시
+                self._discard(part, meta_path)
+                raise aiohttp.ClientPayloadError("range not satisfiable, restarting")
+            else:
+                print(f"Download failed for {url}: HTTP {response.status}")
+                return None
+
+            total = None
+            if response.content_length is not None:
+                total = offset + response.content_length
+
+            self._write_meta(meta_path, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            })
+
+            hasher = hashlib.sha256()
+            if offset:
+                await asyncio.to_thread(self._hash_file, part, hasher)
+
+            received = offset
+            last_event = 0.0
+            checked = offset > 0 or magic is None
+
+            with open(part, mode) as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    if not checked:
+                        if not chunk.startswith(magic[:len(chunk)]):
+                            print(f"Download rejected for {url}: unexpected content "
+                                  f"({response.headers.get('Content-Type', 'unknown')})")
+                            f.close()
+                            self._discard(part, meta_path)
+                            return None
+                        checked = True
+
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    received += len(chunk)
+
+                    now = time.monotonic()
+                    if progress_callback and now - last_event >= PROGRESS_INTERVAL:
+                        last_event = now
+                        await self._emit(progress_callback, url, label, received, total)
+
+            if total is not None and received < total:
+                raise aiohttp.ClientPayloadError(f"incomplete download ({received}/{total} bytes)")
+
+        if progress_callback:
+            await self._emit(progress_callback, url, label, received, total or received)
+
+        return hasher.hexdigest(), received, response.headers.get("Content-Type")
+
+    @staticmethod
+    async def _emit(progress_callback: Callable, url: str, label: str,
+                    received: int, total: Optional[int]):
+        if total:
+            detail = f"{received / 1048576:.1f}/{total / 1048576:.1f}MB"
+        else:
+            detail = f"{received / 1048576:.1f}MB"
+        await progress_callback({
+            "type": "progress",
+            "status": "downloading",
+            "current_paper": label,
+            "url": url,
+            "bytes_downloaded": received,
+            "total_bytes": total,
+            "message": f"다운로드 중: {label} ({detail})"
+        })
+
+    # ---------------------------------------------------------------
+    # 파일 처리 (스레드 풀에서 실행)
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def _hash_file(path: Path, hasher):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(block)
+
+    @staticmethod
+    def _read_meta(meta_path: Path) -> Dict:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: Dict):
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def _discard(part: Path, meta_path: Path):
+        for path in (part, meta_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _commit(self, url: str, part: Path, meta_path: Path, digest: str,
+                size: int, content_type: Optional[str]):
+        """완성된 .part 파일을 저장소로 이동 (같은 내용이 이미 있으면 버림)"""
+        target = self.object_path(digest)
+        if target.exists():
+            part.unlink()
+        else:
+            target.parent.mkdir(exist_ok=True)
+            os.replace(part, target)
+        self._discard(part, meta_path)
+
+        self.db.execute(
+            'INSERT OR REPLACE INTO downloads (url, sha256, size, content_type, downloaded_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (url, digest, size, content_type, time.time())
+        )
+
+    def _link(self, digest: str, dest: Path):
+        """저장소 파일을 dest에 원자적으로 연결"""
+        source = self.object_path(digest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() and os.path.samefile(source, dest):
+            return
+
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.link(source, tmp)
+        except OSError:
+            # 다른 파일시스템 등 하드링크를 만들 수 없는 경우
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, dest)
+
+
+_download_manager: Optional[DownloadManager] = None
+_download_manager_lock = threading.Lock()
+
+
+def get_download_manager() -> DownloadManager:
+    """프로세스 전체에서 공유되는 다운로드 관리자"""
+    global _download_manager
+    with _download_manager_lock:
+        if _download_manager is None:
+            _download_manager = DownloadManager()
+        return _download_manager
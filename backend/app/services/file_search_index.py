@@ -0,0 +1,328 @@
+"""
+File Search Index - 파일 브라우저 검색용 trigram 색인
+- 파일 이름과 텍스트 파일(.txt/.json/.md) 내용을 SQLite FTS5 trigram 색인에 저장
+  (내용은 줄 단위로 저장하여 일치한 줄 번호 / 미리보기를 파일을 열지 않고 반환)
+- 파일 mtime/크기를 비교하여 바뀐 파일만 다시 색인 (백그라운드 주기 동기화)
+- 파일 브라우저의 쓰기 / 업로드 / 이동 / 삭제 직후 update_path() / remove_path()로 즉시 반영
+- 3글자 미만 검색어는 trigram을 쓸 수 없으므로 저장된 줄을 직접 확인 (파일 접근 없음)
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlite_manager import get_db
+
+FILE_SEARCH_INDEX_PATH = os.getenv("FILE_SEARCH_INDEX_PATH", "file_search_index.db")
+FILE_INDEX_SYNC_INTERVAL = float(os.getenv("FILE_INDEX_SYNC_INTERVAL", "30"))
+
+# 내용까지 색인하는 확장자 / 최대 크기
+TEXT_EXTENSIONS = ('.txt', '.json', '.md')
+MAX_INDEXED_FILE_SIZE = 5 * 1024 * 1024
+
+PREVIEW_LENGTH = 100
+
+# trigram 색인을 사용할 수 있는 최소 검색어 길이
+MIN_TRIGRAM_QUERY = 3
+
+
+def _fts_phrase(query: str) -> str:
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class FileSearchIndex:
+    """root 아래 파일의 이름 / 내용 trigram 색인
+
+    files        파일 경로, 크기, mtime, 내용 줄이 저장된 rowid 범위
+    file_names   파일 이름 FTS5 (rowid = files.id)
+    file_lines   내용 줄 FTS5 (file_id, line_no는 색인하지 않는 열)
+
+    한 파일의 줄은 연속된 rowid에 저장되므로 다시 색인할 때 rowid 범위로 바로 지운다.
+    """
+
+    def __init__(self, root: Path, db_path: str = FILE_SEARCH_INDEX_PATH):
+        self.root = Path(root)
+        self.db = get_db(db_path)
+        self.db.write(self._create_tables)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        # 상대 경로 → (mtime, 크기)
+        self._seen: Dict[str, Tuple[float, int]] = {
+            row['path']: (row['mtime'], row['size'])
+            for row in self.db.query('SELECT path, mtime, size FROM files')
+        }
+        # 쓰기 스레드에서만 사용
+        row = self.db.query_one('SELECT COALESCE(MAX(first_line + line_count), 1) AS next FROM files')
+        self._next_line_id = row['next']
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS files (
+                        id INTEGER PRIMARY KEY,
+                        path TEXT NOT NULL UNIQUE,
+                        name TEXT NOT NULL,
+                        extension TEXT,
+                        size INTEGER NOT NULL,
+                        mtime REAL NOT NULL,
+                        first_line INTEGER NOT NULL,
+                        line_count INTEGER NOT NULL,
+                        indexed_at REAL NOT NULL
+                    )''')
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS file_names USING fts5(name, tokenize='trigram')")
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS file_lines "
+                     "USING fts5(text, file_id UNINDEXED, line_no UNINDEXED, tokenize='trigram')")
+
+    # ---------------------------------------------------------------
+    # 색인 갱신
+    # ---------------------------------------------------------------
+
+    def _relative(self, path: Path) -> str:
+        return str(Path(path).relative_to(self.root))
+
+    def _read_lines(self, path: Path, extension: str, size: int) -> List[Tuple[int, str]]:
+        """색인할 (줄 번호, 줄) 목록 - 빈 줄은 제외, 텍스트가 아니면 빈 목록"""
+        if extension not in TEXT_EXTENSIONS or size > MAX_INDEXED_FILE_SIZE:
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return []
+        return [(number, line) for number, line in enumerate(content.split('\n'), 1) if line.strip()]
+
+    def _index_entry(self, path: Path, stat: os.stat_result) -> Tuple:
+        extension = path.suffix
+        lines = self._read_lines(path, extension, stat.st_size)
+        return (self._relative(path), path.name, extension, stat.st_size, stat.st_mtime, lines)
+
+    def _apply(self, conn: sqlite3.Connection, entries: Sequence[Tuple], removed: Sequence[str]):
+        """쓰기 스레드: 파일 색인 추가/교체 및 삭제"""
+        now = time.time()
+        for path in removed:
+            self._delete(conn, conn.execute(
+                'SELECT id, first_line, line_count FROM files WHERE path = ?', (path,)
+            ).fetchone())
+
+        for path, name, extension, size, mtime, lines in entries:
+            old = conn.execute('SELECT id, first_line, line_count FROM files WHERE path = ?',
+                               (path,)).fetchone()
+            self._delete(conn, old)
+
+            first_line = self._next_line_id
+            self._next_line_id += len(lines)
+            cursor = conn.execute(
+                'INSERT INTO files (path, name, extension, size, mtime, first_line, line_count, indexed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, name, extension, size, mtime, first_line, len(lines), now)
+            )
+            file_id = cursor.lastrowid
+            conn.execute('INSERT INTO file_names (rowid, name) VALUES (?, ?)', (file_id, name))
+            conn.executemany(
+                'INSERT INTO file_lines (rowid, text, file_id, line_no) VALUES (?, ?, ?, ?)',
+                [(first_line + offset, line, file_id, number)
+                 for offset, (number, line) in enumerate(lines)]
+            )
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, row):
+        if row is None:
+            return
+        file_id, first_line, line_count = row
+        if line_count:
+            conn.execute('DELETE FROM file_lines WHERE rowid BETWEEN ? AND ?',
+                         (first_line, first_line + line_count - 1))
+        conn.execute('DELETE FROM file_names WHERE rowid = ?', (file_id,))
+        conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def _walk(self, top: Path):
+        """top 아래 모든 파일의 (경로, stat)"""
+        stack = [str(top)]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield Path(entry.path), entry.stat()
+                except OSError:
+                    continue
+
+    def _sync_under(self, top: Path, force: bool = False) -> Dict[str, int]:
+        """top 아래를 mtime/크기로 비교하여 바뀐 파일만 다시 색인 (self._lock 안에서 호출)
+
+        force이면 mtime/크기가 같아도 다시 읽는다 (같은 시각에 같은 크기로 덮어쓴 경우).
+        """
+        prefix = '' if top == self.root else self._relative(top) + os.sep
+        entries, present = [], set()
+
+        if top.is_file():
+            stat = top.stat()
+            files = [(top, stat)]
+            prefix = None
+        else:
+            files = self._walk(top)
+
+        for path, stat in files:
+            relative = self._relative(path)
+            present.add(relative)
+            if not force and self._seen.get(relative) == (stat.st_mtime, stat.st_size):
+                continue
+            entries.append(self._index_entry(path, stat))
+            self._seen[relative] = (stat.st_mtime, stat.st_size)
+
+        removed = []
+        if prefix is not None:
+            removed = [path for path in self._seen if path.startswith(prefix) and path not in present]
+            for path in removed:
+                del self._seen[path]
+
+        if entries or removed:
+            self.db.write(lambda conn: self._apply(conn, entries, removed))
+        return {'indexed': len(entries), 'removed': len(removed)}
+
+    def sync(self) -> Dict[str, int]:
+        """전체 트리 동기화 (파일 내용은 바뀐 파일만 읽음)"""
+        with self._lock:
+            return self._sync_under(self.root)
+
+    def update_path(self, path):
+        """파일/폴더가 생성되거나 수정된 직후 호출"""
+        path = Path(path)
+        with self._lock:
+            if path.exists():
+                self._sync_under(path, force=True)
+
+    def remove_path(self, path):
+        """파일/폴더가 삭제되거나 다른 곳으로 이동된 직후 호출"""
+        relative = self._relative(Path(path))
+        with self._lock:
+            removed = [p for p in self._seen if p == relative or p.startswith(relative + os.sep)]
+            for p in removed:
+                del self._seen[p]
+            if removed:
+                self.db.write(lambda conn: self._apply(conn, [], removed))
+
+    def start_watcher(self, interval: float = FILE_INDEX_SYNC_INTERVAL):
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name="file-search-index", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"File search index sync error: {e}")
+
+    # ---------------------------------------------------------------
+    # 검색
+    # ---------------------------------------------------------------
+
+    def search(self, query: str, path: str = '', extensions: Optional[Sequence[str]] = None,
+               limit: int = 100) -> List[Dict]:
+        """파일 이름 / 내용 부분 문자열 검색
+
+        결과 순서: 이름 일치(이름이 검색어로 시작하는 것, 짧은 이름 우선) →
+        내용 일치(일치한 줄이 많은 파일 우선). 이름이 일치한 파일은 내용 결과에서 제외한다.
+        """
+        needle = query.lower()
+        if not needle:
+            return []
+
+        path_filter, params = '', []
+        if path:
+            path_filter = " AND f.path LIKE ? ESCAPE '\\'"
+            params.append(_like_prefix(path.rstrip('/') + os.sep))
+
+        if len(needle) >= MIN_TRIGRAM_QUERY:
+            name_rows = self.db.query(
+                'SELECT f.path, f.name, f.size FROM file_names JOIN files f ON f.id = file_names.rowid '
+                f'WHERE file_names MATCH ?{path_filter}', [_fts_phrase(query), *params]
+            )
+        else:
+            name_rows = self.db.query(
+                f'SELECT f.path, f.name, f.size FROM files f WHERE instr(lower(f.name), ?) > 0{path_filter}',
+                [needle, *params]
+            )
+
+        name_matches = sorted(
+            (row for row in name_rows if needle in row['name'].lower()),
+            key=lambda row: (not row['name'].lower().startswith(needle), len(row['name']), row['path'])
+        )
+        results = [{
+            'path': row['path'],
+            'name': row['name'],
+            'type': 'filename_match',
+            'size': row['size'],
+        } for row in name_matches[:limit]]
+        if len(results) >= limit:
+            return results
+
+        if len(needle) >= MIN_TRIGRAM_QUERY:
+            line_filter, line_params = 'file_lines MATCH ?', [_fts_phrase(query)]
+        else:
+            line_filter, line_params = 'instr(lower(text), ?) > 0', [needle]
+
+        # MIN(line_no)와 함께 선택한 text는 첫 번째로 일치한 줄 (SQLite 집계 규칙)
+        content_rows = self.db.query(
+            'SELECT f.path, f.name, f.extension, m.line_no, m.text, m.matches FROM ('
+            f'  SELECT file_id, MIN(line_no) AS line_no, text, COUNT(*) AS matches '
+            f'  FROM file_lines WHERE {line_filter} GROUP BY file_id'
+            f') m JOIN files f ON f.id = m.file_id WHERE 1 = 1{path_filter} '
+            'ORDER BY m.matches DESC, f.path',
+            [*line_params, *params]
+        )
+
+        matched_names = {row['path'] for row in name_matches}
+        for row in content_rows:
+            if row['path'] in matched_names:
+                continue
+            if extensions and row['extension'] not in extensions:
+                continue
+            results.append({
+                'path': row['path'],
+                'name': row['name'],
+                'type': 'content_match',
+                'line': row['line_no'],
+                'preview': row['text'].strip()[:PREVIEW_LENGTH],
+                'matches': row['matches'],
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+_indexes: Dict[str, FileSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_search_index(root: Path) -> FileSearchIndex:
+    """root별로 공유되는 색인 (처음 호출 시 동기화 후 주기 동기화 스레드 시작)"""
+    key = str(Path(root))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = FileSearchIndex(root)
+            index.sync()
+            index.start_watcher()
+            _indexes[key] = index
+        return index
@@ -0,0 +1,232 @@
+"""
+File Transfer - 파일 브라우저 업로드 / 다운로드 / 텍스트 창 읽기
+- 업로드: 고정 크기 청크로 같은 디렉터리의 임시 파일에 쓰고 크기 제한 확인 후 os.replace (원자적 교체)
+- 다운로드: HTTP Range(206) / If-Range 지원, 서버가 http.response.zerocopy 확장을
+  지원하면 sendfile로 전송하고 아니면 청크 단위로 읽어 전송
+- 텍스트: 바이트 오프셋 또는 줄 범위로 일부만 읽음 (UTF-8 문자 경계 보정)
+
+어느 경우에도 요청당 메모리 사용량은 파일 크기와 무관하게 청크 크기 정도로 유지된다.
+"""
+import asyncio
+import os
+import tempfile
+from email.utils import formatdate
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+TRANSFER_CHUNK_SIZE = 256 * 1024
+
+# 창 지정 없이 요청한 텍스트 파일의 최대 응답 크기 (넘으면 첫 창만 반환)
+TEXT_WINDOW_SIZE = int(os.getenv("TEXT_WINDOW_SIZE", str(1024 * 1024)))
+MAX_WINDOW_LINES = 10000
+
+
+class UploadTooLarge(Exception):
+    """업로드가 크기 제한을 넘음 (임시 파일은 이미 삭제됨)"""
+
+
+def _copy_upload(source: BinaryIO, target: Path, max_size: int) -> int:
+    """source를 target 옆 임시 파일로 복사한 뒤 target으로 교체, 쓴 바이트 수 반환"""
+    fd, temp_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".part", dir=target.parent)
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = source.read(TRANSFER_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, target)
+        return written
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+async def save_upload(source: BinaryIO, target: Path, max_size: int) -> int:
+    """업로드 파일 객체(UploadFile.file)를 target에 원자적으로 저장"""
+    return await asyncio.to_thread(_copy_upload, source, Path(target), max_size)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """단일 bytes 범위 (start, end 포함) - 범위가 없거나 여러 개면 None, 만족할 수 없으면 ValueError"""
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        # 여러 범위(multipart/byteranges)는 지원하지 않으므로 전체 응답
+        return None
+    start_text, _, end_text = spec.partition('-')
+    try:
+        if not start_text:
+            # 접미사 범위: 마지막 N바이트
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError(header)
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """Range 요청을 지원하는 파일 응답"""
+
+    def __init__(self, path, headers: Dict[str, str], filename: Optional[str] = None,
+                 media_type: str = 'application/octet-stream', inline: bool = False,
+                 stat_result: Optional[os.stat_result] = None):
+        self.path = str(path)
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.body = b''
+
+        stat = stat_result or os.stat(self.path)
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        response_headers = {
+            'accept-ranges': 'bytes',
+            'etag': etag,
+            'last-modified': formatdate(stat.st_mtime, usegmt=True),
+            # 브라우저가 내용을 보고 형식을 추측(예: HTML로 실행)하지 않도록
+            'x-content-type-options': 'nosniff',
+        }
+        if filename:
+            disposition = 'inline' if inline else 'attachment'
+            quoted = quote(filename)
+            if quoted != filename:
+                response_headers['content-disposition'] = f"{disposition}; filename*=utf-8''{quoted}"
+            else:
+                response_headers['content-disposition'] = f'{disposition}; filename="{filename}"'
+
+        self.offset, self.count = 0, size
+        range_header = headers.get('range')
+        if_range = headers.get('if-range')
+        if range_header and (not if_range or if_range == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                byte_range = None
+                self.status_code = 416
+                self.count = 0
+                response_headers['content-range'] = f'bytes */{size}'
+            if byte_range is not None:
+                start, end = byte_range
+                self.status_code = 206
+                self.offset, self.count = start, end - start + 1
+                response_headers['content-range'] = f'bytes {start}-{end}/{size}'
+
+        self.init_headers(response_headers)
+        self.headers['content-length'] = str(self.count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': self.status_code,
+            'headers': self.raw_headers,
+        })
+        if scope.get('method') == 'HEAD' or self.count == 0:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+
+        with open(self.path, 'rb') as f:
+            if 'http.response.zerocopy' in scope.get('extensions', {}):
+                await send({
+                    'type': 'http.response.zerocopy',
+                    'file': f,
+                    'offset': self.offset,
+                    'count': self.count,
+                    'more_body': False,
+                })
+                return
+
+            f.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(TRANSFER_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0:
+                # 전송 중 파일이 줄어든 경우 응답을 끝냄
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+def _utf8_window(data: bytes, at_start: bool, at_end: bool) -> Tuple[str, int, int]:
+    """바이트 창을 UTF-8 문자 경계에 맞춰 디코딩 - (텍스트, 앞에서 버린 바이트, 뒤에서 버린 바이트)"""
+    head = 0
+    if not at_start:
+        # 창이 문자 중간에서 시작하면 이어지는 바이트(10xxxxxx)를 건너뜀
+        while head < len(data) and head < 3 and (data[head] & 0xC0) == 0x80:
+            head += 1
+    tail = 0
+    if not at_end:
+        # 창 끝에서 잘린 다중 바이트 문자는 다음 창으로 넘김
+        for back in range(1, min(4, len(data) - head) + 1):
+            byte = data[-back]
+            if (byte & 0xC0) == 0x80:
+                continue
+            if byte >= 0xC0:
+                expected = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+                if expected > back:
+                    tail = back
+            break
+    text = data[head:len(data) - tail].decode('utf-8', errors='replace')
+    return text, head, tail
+
+
+def read_text_window(path, offset: int = 0, length: int = TEXT_WINDOW_SIZE) -> Dict:
+    """offset부터 length바이트 (문자 경계 보정)와 다음 창의 오프셋"""
+    size = os.path.getsize(path)
+    offset = max(0, min(offset, size))
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    end = offset + len(data)
+    text, head, tail = _utf8_window(data, offset == 0, end >= size)
+    next_offset = end - tail
+    return {
+        'content': text,
+        'offset': offset + head,
+        'next_offset': next_offset if next_offset < size else None,
+        'size': size,
+        'truncated': offset + head > 0 or next_offset < size,
+    }
+
+
+def read_text_lines(path, start_line: int = 1, max_lines: int = MAX_WINDOW_LINES) -> Dict:
+    """start_line(1부터)부터 최대 max_lines줄 (파일 전체를 메모리에 올리지 않음)"""
+    start_line = max(1, start_line)
+    max_lines = max(1, min(max_lines, MAX_WINDOW_LINES))
+    size = os.path.getsize(path)
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        lines = list(islice(f, start_line - 1, start_line - 1 + max_lines + 1))
+    has_more = len(lines) > max_lines
+    lines = lines[:max_lines]
+    return {
+        'content': ''.join(lines),
+        'start_line': start_line,
+        'end_line': start_line + len(lines) - 1,
+        'next_line': start_line + len(lines) if has_more else None,
+        'size': size,
+        'truncated': start_line > 1 or has_more,
+    }
@@ -0,0 +1,301 @@
+"""
+HTTP Response Cache - 학술 API(NCBI, arXiv, Semantic Scholar) 응답 디스크 캐시
+- 정규화된 요청(메서드 + URL + 정렬된 파라미터, api_key 등 제외)을 키로 사용
+- 소스별 TTL (efetch 레코드는 며칠, esearch는 1시간)
+- 만료된 항목은 ETag / Last-Modified로 조건부 재검증
+- 전체 크기 제한을 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- 소스별 hit / miss / revalidated 통계
+
+httpx 전송 계층(CachingTransport)으로 구현되어 cached_async_client()로 만든
+클라이언트는 모두 같은 캐시를 사용한다. 요청 extensions의 'throttle'에
+코루틴 함수를 넘기면 실제 네트워크 요청 직전에만 호출되므로, 캐시 적중은
+NCBI 요청 한도를 소모하지 않는다.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+from sqlite_manager import get_db
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# (소스, 호스트, 경로 접두사, TTL초) - 위에서부터 처음 일치하는 규칙 사용
+CACHE_RULES = (
+    ('ncbi_efetch', 'eutils.ncbi.nlm.nih.gov', '/entrez/eutils/efetch', 7 * DAY),
+    ('ncbi_esearch', 'eutils.ncbi.nlm.nih.gov', '/entrez/eutils/esearch', HOUR),
+    ('ncbi', 'eutils.ncbi.nlm.nih.gov', '/', HOUR),
+    ('arxiv', 'export.arxiv.org', '/', DAY),
+    ('semantic_scholar', 'api.semanticscholar.org', '/', DAY),
+)
+
+# 히스토리 서버(WebEnv) 페이지는 NCBI 쪽에서 몇 시간 뒤 만료되므로 짧게 보관
+HISTORY_TTL = HOUR
+
+# 응답 내용에 영향을 주지 않는 파라미터 (키에서 제외)
+IGNORED_PARAMS = {'api_key', 'tool', 'email'}
+
+# 캐시된 응답에 다시 붙이지 않는 헤더 (본문은 디코딩된 상태로 저장)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'transfer-encoding', 'content-encoding',
+    'content-length', 'set-cookie',
+}
+
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', 'http_cache.db')
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_MB', '512')) * 1024 * 1024
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_DISABLED', '').lower() not in ('1', 'true', 'yes')
+
+# 크기 제한 초과 시 이 비율까지 줄인다 (매 저장마다 삭제가 일어나지 않도록)
+EVICTION_TARGET = 0.9
+
+
+def cache_rule(request: httpx.Request) -> Optional[Tuple[str, int]]:
+    """요청에 해당하는 (소스, TTL), 캐시 대상이 아니면 None"""
+    if request.method not in ('GET', 'POST'):
+        return None
+
+    host = request.url.host.lower()
+    path = request.url.path
+    for source, rule_host, prefix, ttl in CACHE_RULES:
+        if host == rule_host and path.startswith(prefix):
+            return source, ttl
+    return None
+
+
+def _request_params(request: httpx.Request):
+    params = parse_qsl(request.url.query.decode(), keep_blank_values=True)
+    if request.method == 'POST':
+        content_type = request.headers.get('content-type', '')
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            params += parse_qsl(request.content.decode(), keep_blank_values=True)
+        elif request.content:
+            params.append(('__body__', hashlib.sha256(request.content).hexdigest()))
+    return sorted((k, v) for k, v in params if k not in IGNORED_PARAMS)
+
+
+def cache_key(request: httpx.Request) -> str:
+    """정규화된 요청 키 (파라미터 순서 / GET·POST 차이 / 인증 파라미터 무시)"""
+    params = _request_params(request)
+    normalized = f"{request.url.host.lower()}{request.url.path}?{urlencode(params)}"
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class HTTPResponseCache:
+    """SQLite 기반 HTTP 응답 저장소
+
+    읽기는 호출 스레드의 연결을, 쓰기(저장/접근 시각 갱신/삭제)는
+    sqlite_manager의 쓰기 스레드를 사용하며 기다리지 않는다.
+    """
+
+    def __init__(self, db_path: str = HTTP_CACHE_PATH, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.db = get_db(db_path)
+        self.max_bytes = max_bytes
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0})
+        self._stats_lock = threading.Lock()
+
+        self.db.write(self._create_tables)
+        row = self.db.query_one('SELECT COALESCE(SUM(size), 0) AS total FROM http_cache')
+        # 쓰기 스레드에서만 갱신
+        self._total_size = row['total']
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS http_cache (
+                        key TEXT PRIMARY KEY,
+                        source TEXT NOT NULL,
+                        url TEXT,
+                        status INTEGER NOT NULL,
+                        headers TEXT,
+                        body BLOB,
+                        etag TEXT,
+                        last_modified TEXT,
+                        stored_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        size INTEGER NOT NULL
+                    )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access)')
+
+    # ---------------------------------------------------------------
+    # 조회 / 저장
+    # ---------------------------------------------------------------
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        row = self.db.query_one(
+            'SELECT status, headers, body, etag, last_modified, stored_at, expires_at '
+            'FROM http_cache WHERE key = ?', (key,)
+        )
+        return dict(row) if row else None
+
+    def touch(self, key: str, expires_at: Optional[float] = None):
+        """접근 시각 갱신 (재검증 성공 시 만료 시각도 연장)"""
+        now = time.time()
+        if expires_at is None:
+            self.db.execute('UPDATE http_cache SET last_access = ? WHERE key = ?',
+                            (now, key), wait=False)
+        else:
+            self.db.execute('UPDATE http_cache SET last_access = ?, expires_at = ? WHERE key = ?',
+                            (now, expires_at, key), wait=False)
+
+    def store(self, key: str, source: str, url: str, response: httpx.Response,
+              body: bytes, ttl: int):
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        }
+        now = time.time()
+        entry = (
+            key, source, url, response.status_code, json.dumps(headers), body,
+            response.headers.get('etag'), response.headers.get('last-modified'),
+            now, now + ttl, now, len(body),
+        )
+        self.db.write(lambda conn: self._insert(conn, entry), wait=False)
+        self.record(source, 'stored')
+
+    def _insert(self, conn: sqlite3.Connection, entry: Tuple):
+        """쓰기 스레드: 저장 후 크기 제한 초과분 삭제"""
+        old = conn.execute('SELECT size FROM http_cache WHERE key = ?', (entry[0],)).fetchone()
+        conn.execute('INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', entry)
+        self._total_size += entry[-1] - (old[0] if old else 0)
+
+        if self._total_size > self.max_bytes:
+            self._evict(conn, self._total_size - int(self.max_bytes * EVICTION_TARGET))
+
+    def _evict(self, conn: sqlite3.Connection, excess: int):
+        """가장 오래 사용하지 않은 항목부터 excess 바이트 이상 삭제"""
+        victims = []
+        freed = 0
+        for key, size in conn.execute('SELECT key, size FROM http_cache ORDER BY last_access'):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM http_cache WHERE key = ?', victims)
+        self._total_size -= freed
+
+    def clear(self):
+        def run(conn):
+            conn.execute('DELETE FROM http_cache')
+            self._total_size = 0
+        self.db.write(run)
+
+    # ---------------------------------------------------------------
+    # 통계
+    # ---------------------------------------------------------------
+
+    def record(self, source: str, event: str):
+        with self._stats_lock:
+            self._stats[source][event] += 1
+
+    def stats(self) -> Dict:
+        """소스별 hit / miss / revalidated / stored 횟수와 전체 크기"""
+        with self._stats_lock:
+            sources = {source: dict(counts) for source, counts in self._stats.items()}
+        return {'sources': sources, 'size_bytes': self._total_size, 'max_bytes': self.max_bytes}
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """캐시를 거치는 httpx 비동기 전송 계층"""
+
+    def __init__(self, cache: Optional[HTTPResponseCache],
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cache = cache
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        throttle = request.extensions.pop('throttle', None)
+        rule = cache_rule(request) if self.cache is not None else None
+        if rule is None:
+            return await self._send(request, throttle)
+
+        source, ttl = rule
+        if 'WebEnv' in request.url.params or b'WebEnv=' in request.content:
+            ttl = min(ttl, HISTORY_TTL)
+
+        key = cache_key(request)
+        entry = await asyncio.to_thread(self.cache.lookup, key)
+        no_cache = 'no-cache' in request.headers.get('cache-control', '')
+
+        if entry is not None and not no_cache and entry['expires_at'] > time.time():
+            self.cache.record(source, 'hits')
+            self.cache.touch(key)
+            return self._cached_response(request, entry)
+
+        if entry is not None:
+            # 만료된 항목: 검증자가 있으면 조건부 요청
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = await self._send(request, throttle)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.record(source, 'revalidated')
+            self.cache.touch(key, time.time() + ttl)
+            return self._cached_response(request, entry)
+
+        self.cache.record(source, 'misses')
+        if response.status_code != 200 or 'no-store' in response.headers.get('cache-control', ''):
+            return response
+
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        self.cache.store(key, source, str(request.url), response, body, ttl)
+
+        headers = [
+            (name, value) for name, value in response.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=body,
+                              request=request, extensions={'from_cache': False})
+
+    async def _send(self, request: httpx.Request, throttle) -> httpx.Response:
+        if throttle is not None:
+            await throttle()
+        return await self._transport.handle_async_request(request)
+
+    @staticmethod
+    def _cached_response(request: httpx.Request, entry: Dict) -> httpx.Response:
+        return httpx.Response(entry['status'], headers=json.loads(entry['headers']),
+                              content=entry['body'], request=request,
+                              extensions={'from_cache': True})
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+_http_cache: Optional[HTTPResponseCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HTTPResponseCache]:
+    """프로세스 전체에서 공유되는 응답 캐시 (HTTP_CACHE_DISABLED 설정 시 None)"""
+    global _http_cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HTTPResponseCache()
+        return _http_cache
+
+
+def cached_async_client(limits: Optional[httpx.Limits] = None, **kwargs) -> httpx.AsyncClient:
+    """공유 응답 캐시를 사용하는 httpx.AsyncClient
+
+    kwargs는 httpx.AsyncClient에 그대로 전달된다 (timeout, follow_redirects 등).
+    """
+    transport = httpx.AsyncHTTPTransport(limits=limits or httpx.Limits())
+    return httpx.AsyncClient(transport=CachingTransport(get_http_cache(), transport), **kwargs)
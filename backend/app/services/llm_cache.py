@@ -0,0 +1,216 @@
+"""
+LLM Response Cache - 결정적 생성 요청(논문 초안, 동의서, 통계 분석 계획 등)의 응답 디스크 캐시
+- 모델 + 정규화된 프롬프트(들여쓰기 / 줄 끝 공백 / 줄바꿈 정규화) + 시스템 프롬프트 + 샘플링 옵션을 키로 사용
+- SQLite에 저장하며 TTL이 지나면 다시 생성
+- 전체 크기 제한을 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- bypass=True이면 캐시를 읽지 않고 새로 생성한 결과로 덮어씀 ("다시 생성" 버튼)
+- 네임스페이스(기능)별 hit / miss / bypass / stored 통계와 적중률
+
+읽기는 호출 스레드의 연결을, 쓰기는 sqlite_manager의 쓰기 스레드를 사용한다.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import textwrap
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlite_manager import get_db
+
+DAY = 24 * 3600
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_MB', '256')) * 1024 * 1024
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(30 * DAY)))
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_DISABLED', '').lower() not in ('1', 'true', 'yes')
+
+# 크기 제한 초과 시 이 비율까지 줄인다 (매 저장마다 삭제가 일어나지 않도록)
+EVICTION_TARGET = 0.9
+
+
+def normalize_prompt(prompt: Optional[str]) -> str:
+    """의미가 같은 프롬프트가 같은 키가 되도록 정규화
+
+    템플릿 들여쓰기, 줄 끝 공백, 줄바꿈 종류(\\r\\n), 앞뒤 빈 줄, 유니코드 조합 형태 차이를 없앤다.
+    줄 안의 공백과 대소문자는 출력에 영향을 줄 수 있으므로 그대로 둔다.
+    """
+    if not prompt:
+        return ''
+    text = unicodedata.normalize('NFC', prompt).replace('\r\n', '\n').replace('\r', '\n')
+    text = textwrap.dedent(text)
+    return '\n'.join(line.rstrip() for line in text.split('\n')).strip()
+
+
+def cache_key(model: str, prompt: str, options: Optional[Dict] = None,
+              system: Optional[str] = None) -> str:
+    """모델 / 정규화된 프롬프트 / 시스템 프롬프트 / 샘플링 옵션으로 만든 키"""
+    normalized = json.dumps({
+        'model': model,
+        'prompt': normalize_prompt(prompt),
+        'system': normalize_prompt(system),
+        'options': options or {},
+    }, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite 기반 LLM 응답 저장소 (값은 JSON으로 저장)"""
+
+    def __init__(self, db_path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 ttl: int = LLM_CACHE_TTL):
+        self.db = get_db(db_path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'bypassed': 0, 'stored': 0})
+        self._stats_lock = threading.Lock()
+
+        self.db.write(self._create_tables)
+        row = self.db.query_one('SELECT COALESCE(SUM(size), 0) AS total FROM llm_cache')
+        # 쓰기 스레드에서만 갱신
+        self._total_size = row['total']
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        namespace TEXT NOT NULL,
+                        model TEXT,
+                        value TEXT NOT NULL,
+                        stored_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        size INTEGER NOT NULL
+                    )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)')
+
+    # ---------------------------------------------------------------
+    # 조회 / 저장
+    # ---------------------------------------------------------------
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """(적중 여부, 값) - 만료된 항목은 없는 것으로 본다"""
+        row = self.db.query_one('SELECT value, expires_at FROM llm_cache WHERE key = ?', (key,))
+        if row is None or row['expires_at'] <= time.time():
+            return False, None
+        self.db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?',
+                        (time.time(), key), wait=False)
+        return True, json.loads(row['value'])
+
+    def store(self, key: str, namespace: str, model: str, value: Any, ttl: Optional[int] = None):
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        entry = (key, namespace, model, data, now, now + (ttl or self.ttl), now, len(data.encode('utf-8')))
+        self.db.write(lambda conn: self._insert(conn, entry), wait=False)
+        self.record(namespace, 'stored')
+
+    def _insert(self, conn: sqlite3.Connection, entry: Tuple):
+        """쓰기 스레드: 저장 후 크기 제한 초과분 삭제"""
+        old = conn.execute('SELECT size FROM llm_cache WHERE key = ?', (entry[0],)).fetchone()
+        conn.execute('INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)', entry)
+        self._total_size += entry[-1] - (old[0] if old else 0)
+
+        if self._total_size > self.max_bytes:
+            self._evict(conn, self._total_size - int(self.max_bytes * EVICTION_TARGET))
+
+    def _evict(self, conn: sqlite3.Connection, excess: int):
+        """만료된 항목을 먼저, 그다음 가장 오래 사용하지 않은 항목부터 excess 바이트 이상 삭제"""
+        victims = []
+        freed = 0
+        for key, size in conn.execute('SELECT key, size FROM llm_cache '
+                                      'ORDER BY expires_at > ?, last_access', (time.time(),)):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM llm_cache WHERE key = ?', victims)
+        self._total_size -= freed
+
+    def clear(self, namespace: Optional[str] = None):
+        def run(conn):
+            if namespace is None:
+                conn.execute('DELETE FROM llm_cache')
+                self._total_size = 0
+            else:
+                conn.execute('DELETE FROM llm_cache WHERE namespace = ?', (namespace,))
+                self._total_size = conn.execute(
+                    'SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+        self.db.write(run)
+
+    # ---------------------------------------------------------------
+    # 통계
+    # ---------------------------------------------------------------
+
+    def record(self, namespace: str, event: str):
+        with self._stats_lock:
+            self._stats[namespace][event] += 1
+
+    def stats(self) -> Dict:
+        """네임스페이스별 hit / miss / bypassed / stored 횟수, 적중률과 전체 크기"""
+        with self._stats_lock:
+            namespaces = {namespace: dict(counts) for namespace, counts in self._stats.items()}
+        hits = sum(counts['hits'] for counts in namespaces.values())
+        lookups = hits + sum(counts['misses'] for counts in namespaces.values())
+        for counts in namespaces.values():
+            total = counts['hits'] + counts['misses']
+            counts['hit_rate'] = counts['hits'] / total if total else 0.0
+        return {
+            'namespaces': namespaces,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'size_bytes': self._total_size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """프로세스 전체에서 공유되는 LLM 응답 캐시 (LLM_CACHE_DISABLED 설정 시 None)"""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
+
+
+async def cached_generate(namespace: str, model: str, prompt: str,
+                          generate: Callable[[], Awaitable[Any]],
+                          options: Optional[Dict] = None, system: Optional[str] = None,
+                          bypass: bool = False, ttl: Optional[int] = None,
+                          cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+    """캐시에 있으면 저장된 응답을, 없으면 generate()로 생성해 저장한 뒤 반환
+
+    Args:
+        namespace: 통계 / 삭제 단위 (예: "paper_draft")
+        model, prompt, options, system: 캐시 키 구성 요소 (generate()가 실제로 쓰는 값과 같아야 함)
+        generate: 캐시 미스 시 호출할 코루틴 함수 (JSON으로 직렬화 가능한 값 반환)
+        bypass: True이면 캐시를 읽지 않고 새로 생성한 결과로 덮어씀
+        ttl: 항목별 보관 시간 (기본 LLM_CACHE_TTL)
+        cacheable: 결과를 저장할지 판단하는 함수 (오류 응답 제외용, 빈 값은 항상 저장하지 않음)
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return await generate()
+
+    key = cache_key(model, prompt, options, system)
+    if bypass:
+        cache.record(namespace, 'bypassed')
+    else:
+        hit, value = await asyncio.to_thread(cache.lookup, key)
+        if hit:
+            cache.record(namespace, 'hits')
+            return value
+        cache.record(namespace, 'misses')
+
+    value = await generate()
+    if value and (cacheable is None or cacheable(value)):
+        cache.store(key, namespace, model, value, ttl)
+    return value
@@ -0,0 +1,230 @@
+"""
+LLM dispatch: priority scheduling and single-flight for model calls
+
+Sits between the Ollama client and the server:
+- Each model has a fixed number of generation slots. When they are all busy,
+  requests wait in a priority queue, so interactive chat is served ahead of
+  background draft generation and FIFO within the same priority.
+- Identical in-flight requests (same model, prompt and options) share one
+  upstream generation. The first request starts it, later ones replay the
+  tokens produced so far and then follow the live stream. The generation is
+  cancelled only when every waiter has gone away.
+- Queue depth, slot usage, coalesced requests and queue wait times are
+  tracked per model.
+
+All state belongs to one event loop; the Ollama client creates a new
+dispatcher when the loop changes.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Wait times kept per model for percentiles
+WAIT_SAMPLES = 512
+
+
+class _ModelQueue:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiters: List = []  # heap of (priority, seq, future)
+        self.dispatched = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def depth(self) -> int:
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+
+class _FlightCancelled(Exception):
+    """The shared run stopped because it was cancelled (e.g. on shutdown)"""
+
+
+class _Flight:
+    """One upstream generation shared by every identical request"""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, token: Optional[str] = None):
+        if token is not None:
+            self.tokens.append(token)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self) -> AsyncGenerator[str, None]:
+        position = 0
+        while True:
+            while position < len(self.tokens):
+                yield self.tokens[position]
+                position += 1
+            if self.done:
+                if self.cancelled:
+                    raise _FlightCancelled()
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class LLMDispatcher:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._seq = itertools.count()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = _ModelQueue(self.concurrency)
+            self._queues[model] = queue
+        return queue
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[None]:
+        """Hold one of the model's generation slots"""
+        queue = self._queue(model)
+        enqueued = time.monotonic()
+
+        if queue.active < queue.limit and not queue.depth():
+            queue.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(queue.waiters, (priority, next(self._seq), future))
+            queue.max_depth = max(queue.max_depth, queue.depth())
+            try:
+                # _release hands its slot over by resolving the future
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot was handed over just as we were cancelled
+                    self._release(queue)
+                else:
+                    future.cancel()
+                raise
+
+        queue.waits.append(time.monotonic() - enqueued)
+        queue.dispatched += 1
+        try:
+            yield
+        finally:
+            self._release(queue)
+
+    def _release(self, queue: _ModelQueue):
+        while queue.waiters:
+            _, _, future = heapq.heappop(queue.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        queue.active -= 1
+
+    # ------------------------------------------------------------------
+    # Single-flight
+    # ------------------------------------------------------------------
+
+    async def stream(self, key: str, model: str, priority: int,
+                     produce: Callable[[], AsyncIterator[str]]) -> AsyncGenerator[str, None]:
+        """Tokens of produce(), sharing one run among identical concurrent keys
+
+        produce() is started inside a model slot. A request that joins an
+        existing flight keeps the first request's queue position; if it has
+        a higher priority the shared run still waits where it was queued.
+        A run whose last waiter left is cancelled and removed at once, so a
+        later identical request starts a new run instead of joining it.
+        """
+        yielded = restarted = False
+        while True:
+            flight = self._flights.get(key)
+            if flight is None or flight.done:
+                flight = _Flight()
+                self._flights[key] = flight
+                flight.task = asyncio.create_task(self._run(key, flight, model, priority, produce))
+            else:
+                self._queue(model).coalesced += 1
+
+            flight.subscribers += 1
+            try:
+                async for token in flight.follow():
+                    yielded = True
+                    yield token
+                return
+            except _FlightCancelled:
+                # The shared run was cancelled, not this request: start a new
+                # one unless part of the answer was already passed on
+                if yielded or restarted:
+                    raise RuntimeError("LLM generation was cancelled")
+                restarted = True
+            finally:
+                flight.subscribers -= 1
+                if not flight.subscribers and not flight.done:
+                    # Nobody is waiting any more: stop the run and let the
+                    # next identical request start a fresh one
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                    flight.task.cancel()
+
+    async def _run(self, key: str, flight: _Flight, model: str, priority: int,
+                   produce: Callable[[], AsyncIterator[str]]):
+        try:
+            async with self.slot(model, priority):
+                async for token in produce():
+                    flight.publish(token)
+        except asyncio.CancelledError:
+            flight.cancelled = True
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.publish()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Per-model slot usage, queue depth, coalesced requests and wait times (ms)"""
+        models = {}
+        for model, queue in self._queues.items():
+            waits = sorted(queue.waits)
+
+            def percentile(p: float) -> float:
+                if not waits:
+                    return 0.0
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+            models[model] = {
+                'limit': queue.limit,
+                'active': queue.active,
+                'queue_depth': queue.depth(),
+                'max_queue_depth': queue.max_depth,
+                'dispatched': queue.dispatched,
+                'coalesced': queue.coalesced,
+                'wait_ms': {
+                    'p50': percentile(0.5),
+                    'p95': percentile(0.95),
+                    'max': percentile(1.0),
+                },
+            }
+        return {'models': models, 'in_flight': len(self._flights)}
@@ -8,7 +8,9 @@ from typing import Dict, List, Optional
 from datetime import datetime
 import re
 
+from app.services.paper_catalog import notify_paper_folder
 from app.services.paper_downloader_service import PaperDownloaderService
+from app.services.pubmed_harvester import NCBI_API_KEY, PubMedHarvester
 from app.core.database import SessionLocal
 from app.models.research_paper import ResearchPaper
 from sqlalchemy.exc import IntegrityError
@@ -69,7 +71,7 @@ class LumbarFusionDownloader(PaperDownloaderService):
                 
                 # Extract text from PDF
                 if pdf_path and pdf_path.exists():
-                    full_text = self._extract_text_from_pdf(pdf_path)
+                    full_text = await self._extract_text_from_pdf(pdf_path)
                     metadata['full_text'] = full_text
                 else:
                     full_text = metadata.get('abstract', '')
@@ -108,30 +110,9 @@ class LumbarFusionDownloader(PaperDownloaderService):
         
     async def _search_pubmed_sorted(self, query: str, max_results: int) -> List[str]:
         """Search PubMed with date sorting (most recent first)"""
-        search_url = f"{self.base_url}/esearch.fcgi"
-        params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': max_results,
-            'retmode': 'json',
-            'sort': 'date',  # Sort by date
-            'retstart': 0
-        }
-        
-        if self.api_key:
-            params['api_key'] = self.api_key
-            
         try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('esearchresult', {}).get('idlist', [])
-                    else:
-                        print(f"Search error: {response.status}")
-                        text = await response.text()
-                        print(f"Response: {text[:200]}")
+            async with PubMedHarvester(api_key=self.api_key or NCBI_API_KEY) as harvester:
+                return await harvester.search_ids(query, max_results, sort='date')
         except Exception as e:
             print(f"Exception during search: {e}")
         return []
@@ -241,6 +222,9 @@ class LumbarFusionDownloader(PaperDownloaderService):
                 f.write("-" * 40 + "\n")
                 f.write(korean.get('abstract', 'N/A')[:1000] + "...\n")
                 
+        # Update the paper catalog index
+        notify_paper_folder(folder)
+        
     def _save_to_database(self, metadata: Dict, folder: Path, db) -> bool:
         """Save paper to database"""
         try:
@@ -8,14 +8,16 @@ from typing import Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 import json
-from deep_translator import GoogleTranslator
 import uuid
 
+from app.services.paper_catalog import notify_paper_folder
+from app.services.translation_service import get_translation_service
+
 class LumbarFusionPaperService:
     def __init__(self):
         self.storage_path = Path("/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers/lumbar_fusion_2025")
         self.storage_path.mkdir(parents=True, exist_ok=True)
-        self.translator = GoogleTranslator(source='en', target='ko')
+        self.translator = get_translation_service()
         
         # 요추 후외방 유합술 관련 최신 논문들 (2020-2025)
         self.lumbar_fusion_papers = [
@@ -138,10 +140,11 @@ class LumbarFusionPaperService:
         
         # 한글 번역
         try:
-            metadata['korean_translation'] = {
-                'title': self.translator.translate(paper['title']),
-                'abstract': self.translator.translate(paper['abstract'][:500])  # 초록 일부만 번역
-            }
+            title, abstract = await self.translator.translate_many([
+                paper['title'],
+                paper['abstract'][:500]  # 초록 일부만 번역
+            ])
+            metadata['korean_translation'] = {'title': title, 'abstract': abstract}
         except Exception as e:
             print(f"Translation error: {e}")
             metadata['korean_translation'] = None
@@ -174,6 +177,9 @@ PMID: {paper['pmid']}
             with open(paper_folder / 'summary_korean.txt', 'w', encoding='utf-8') as f:
                 f.write(summary_text)
         
+        # 논문 카탈로그 색인 갱신
+        notify_paper_folder(paper_folder)
+        
         return {
             'pmid': paper['pmid'],
             'metadata': metadata,
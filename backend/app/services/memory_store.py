@@ -0,0 +1,368 @@
+"""
+Long-term memory store for the advanced AI assistant
+
+Replaces the single pickled dict that was rewritten on every change:
+- Each user has a partition directory of append-only JSON-lines segments.
+  A write is one appended line; replaying the segments in order rebuilds
+  the partition on first use.
+- An inverted keyword index maps each token to the memories containing it,
+  and memories are kept in recency order, so recall touches only the
+  postings of the query's tokens instead of every stored value.
+- Segments roll over after SEGMENT_RECORDS records. When a sealed segment
+  is mostly overwritten or deleted records it is rewritten with only its
+  live records, one segment at a time.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import pickle
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Records per segment before rolling over to a new one
+SEGMENT_RECORDS = int(os.getenv("MEMORY_SEGMENT_RECORDS", "5000"))
+# Sealed segments with less than this share of live records are compacted
+COMPACT_LIVE_RATIO = 0.5
+# Most recent postings scanned per query token (bounds recall cost for common words)
+MAX_POSTINGS_SCAN = 2000
+
+STOP_WORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "that", "the", "this", "to", "was",
+    "what", "with", "you",
+))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SEGMENT_RE = re.compile(r"^segment-(\d+)\.jsonl$")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stop words"""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+@dataclass
+class MemoryItem:
+    id: int
+    category: str
+    key: str
+    value: Any
+    timestamp: float
+    segment: int
+    tokens: Tuple[str, ...]
+
+    def __str__(self) -> str:
+        return f"{self.category}: {self.value}"
+
+
+class MemoryPartition:
+    """One user's memories: segment files plus in-memory indexes"""
+
+    def __init__(self, directory: str, segment_records: int = SEGMENT_RECORDS):
+        self.directory = directory
+        self.segment_records = segment_records
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._next_id = 0
+        # (category, key) -> item, in recency order (oldest first)
+        self._items: Dict[Tuple[str, str], MemoryItem] = {}
+        # token -> {item id: item}, ids ascending = oldest first
+        self._postings: Dict[str, Dict[int, MemoryItem]] = {}
+        # segment -> (records on disk, live records)
+        self._segment_records: Dict[int, int] = {}
+        self._segment_live: Dict[int, int] = {}
+        self._active = 1
+        self._file = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.jsonl")
+
+    def _segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def _load(self):
+        segments = self._segments()
+        for segment in segments:
+            self._segment_records[segment] = 0
+            self._segment_live[segment] = 0
+            complete = 0
+            with open(self._segment_path(segment), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn last line after a crash
+                        break
+                    complete += len(line)
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    self._segment_records[segment] += 1
+                    self._apply(record, segment)
+                torn = f.seek(0, os.SEEK_END) > complete
+            if torn:
+                # Cut the partial record so the next append starts on its own line
+                os.truncate(self._segment_path(segment), complete)
+        if segments:
+            self._active = segments[-1]
+        self._segment_records.setdefault(self._active, 0)
+        self._segment_live.setdefault(self._active, 0)
+
+    def _apply(self, record: Dict, segment: int):
+        key = (record["c"], record["k"])
+        self._remove(key)
+        if record["op"] == "put":
+            self._insert(key, record["v"], record["t"], segment)
+
+    def _insert(self, key: Tuple[str, str], value: Any, timestamp: float, segment: int):
+        category, name = key
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        tokens = tuple(set(tokenize(f"{category} {name} {text}")))
+        item = MemoryItem(self._next_id, category, name, value, timestamp, segment, tokens)
+        self._next_id += 1
+
+        self._items[key] = item
+        for token in tokens:
+            self._postings.setdefault(token, {})[item.id] = item
+        self._segment_live[segment] = self._segment_live.get(segment, 0) + 1
+
+    def _remove(self, key: Tuple[str, str]) -> Optional[MemoryItem]:
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+        for token in item.tokens:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(item.id, None)
+                if not postings:
+                    del self._postings[token]
+        self._segment_live[item.segment] -= 1
+        return item
+
+    def _append(self, record: Dict):
+        if self._file is None:
+            self._file = open(self._segment_path(self._active), "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        self._segment_records[self._active] += 1
+
+    def _maybe_roll_over(self):
+        """Seal the active segment once it is full (after the index reflects its last record)"""
+        if self._segment_records[self._active] < self.segment_records:
+            return
+        self._file.close()
+        self._file = None
+        self._active += 1
+        self._segment_records[self._active] = 0
+        self._segment_live[self._active] = 0
+        self.compact_step()
+
+    def compact_step(self) -> Optional[int]:
+        """Rewrite the sealed segment with the fewest live records, if it is mostly dead
+
+        Returns the compacted segment number or None. Later segments override
+        earlier ones on replay, so a segment can be rewritten in place; its
+        delete records are kept unless it is the oldest segment, since they
+        may still hide a record in an older one.
+        """
+        with self._lock:
+            candidates = [
+                segment for segment, records in self._segment_records.items()
+                if segment != self._active and records
+                and self._segment_live.get(segment, 0) < records * COMPACT_LIVE_RATIO
+            ]
+            if not candidates:
+                return None
+            segment = min(candidates, key=lambda s: self._segment_live.get(s, 0) / self._segment_records[s])
+            oldest = segment == min(self._segment_records)
+
+            records = []
+            if not oldest:
+                with open(self._segment_path(segment), encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if record["op"] == "del" and (record["c"], record["k"]) not in self._items:
+                            records.append(record)
+            records.extend(
+                {"op": "put", "c": item.category, "k": item.key, "v": item.value, "t": item.timestamp}
+                for item in self._items.values() if item.segment == segment
+            )
+
+            path = self._segment_path(segment)
+            if not records:
+                os.unlink(path)
+                del self._segment_records[segment]
+                self._segment_live.pop(segment, None)
+                return segment
+
+            temp_path = path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+            self._segment_records[segment] = len(records)
+            return segment
+
+    # ------------------------------------------------------------------
+    # Reads / writes
+    # ------------------------------------------------------------------
+
+    def put(self, category: str, key: str, value: Any) -> MemoryItem:
+        """Store or overwrite a memory (one appended record)"""
+        with self._lock:
+            timestamp = time.time()
+            self._append({"op": "put", "c": category, "k": key, "v": value, "t": timestamp})
+            self._remove((category, key))
+            self._insert((category, key), value, timestamp, self._active)
+            self._maybe_roll_over()
+            return self._items[(category, key)]
+
+    def delete(self, category: str, key: str) -> bool:
+        with self._lock:
+            if (category, key) not in self._items:
+                return False
+            self._append({"op": "del", "c": category, "k": key, "t": time.time()})
+            self._remove((category, key))
+            self._maybe_roll_over()
+            return True
+
+    def get(self, category: str, key: str) -> Optional[Any]:
+        item = self._items.get((category, key))
+        return item.value if item else None
+
+    def recall(self, query: str, limit: int = 5) -> List[MemoryItem]:
+        """Memories sharing the most (and rarest) words with query, newest first on ties"""
+        with self._lock:
+            total = len(self._items)
+            scores: Dict[int, float] = {}
+            candidates: Dict[int, MemoryItem] = {}
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                weight = math.log(1 + total / len(postings))
+                for count, item_id in enumerate(reversed(postings)):
+                    if count >= MAX_POSTINGS_SCAN:
+                        break
+                    scores[item_id] = scores.get(item_id, 0.0) + weight
+                    candidates[item_id] = postings[item_id]
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda entry: (entry[1], entry[0]))
+            return [candidates[item_id] for item_id, _ in best]
+
+    def recent(self, limit: int = 10, category: Optional[str] = None) -> List[MemoryItem]:
+        """Most recently written memories"""
+        with self._lock:
+            items = []
+            for item in reversed(self._items.values()):
+                if category is None or item.category == category:
+                    items.append(item)
+                    if len(items) >= limit:
+                        break
+            return items
+
+    def export(self) -> Dict[str, Dict[str, Any]]:
+        """{category: {key: value}} in write order"""
+        with self._lock:
+            exported: Dict[str, Dict[str, Any]] = {}
+            for item in self._items.values():
+                exported.setdefault(item.category, {})[item.key] = item.value
+            return exported
+
+    def clear(self):
+        """Delete every memory and segment of this partition"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for segment in self._segments():
+                os.unlink(self._segment_path(segment))
+            self._items.clear()
+            self._postings.clear()
+            self._active = 1
+            self._segment_records = {1: 0}
+            self._segment_live = {1: 0}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "memories": len(self._items),
+                "tokens": len(self._postings),
+                "segments": {segment: {"records": records, "live": self._segment_live.get(segment, 0)}
+                             for segment, records in sorted(self._segment_records.items())},
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MemoryStore:
+    """Per-user memory partitions under one directory"""
+
+    def __init__(self, directory: str, segment_records: int = SEGMENT_RECORDS):
+        self.directory = directory
+        self.segment_records = segment_records
+        self._partitions: Dict[str, MemoryPartition] = {}
+        self._lock = threading.Lock()
+
+    def _partition_dir(self, user_id: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", user_id)[:40]
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{safe}-{digest}")
+
+    def partition(self, user_id: str) -> MemoryPartition:
+        """The user's partition (loaded from disk on first use)"""
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is None:
+                partition = MemoryPartition(self._partition_dir(user_id), self.segment_records)
+                self._partitions[user_id] = partition
+            return partition
+
+    def import_legacy_pickle(self, path: str, user_id: str):
+        """Move a legacy long_term_memory.pkl dict into a partition, once"""
+        if not os.path.exists(path):
+            return
+        partition = self.partition(user_id)
+        try:
+            with open(path, "rb") as f:
+                legacy = pickle.load(f)
+            if not len(partition):
+                for category, items in legacy.items():
+                    for key, value in items.items():
+                        partition.put(category, str(key), value)
+            os.replace(path, path + ".migrated")
+            print(f"Migrated legacy long-term memory from {path}")
+        except Exception as e:
+            print(f"Failed to migrate legacy long-term memory {path}: {e}")
+
+    def close(self):
+        with self._lock:
+            for partition in self._partitions.values():
+                partition.close()
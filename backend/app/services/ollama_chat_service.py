@@ -1,14 +1,15 @@
 import httpx
 from typing import Dict, List, Optional, AsyncGenerator
-import json
 from datetime import datetime
 import os
 import asyncio
 
+from app.services.ollama_client import ollama_client
+
 class OllamaChatService:
     def __init__(self):
         self.ollama_path = "/home/drjang00/ollama"
-        self.base_url = "http://localhost:11434"
+        self.base_url = ollama_client.base_url
         self.model = "llama2"
         self.ollama_process = None
         self._ensure_ollama_running()
@@ -41,57 +42,33 @@ class OllamaChatService:
     async def chat_stream(self, message: str, context: List[Dict] = None) -> AsyncGenerator[str, None]:
         """Stream chat responses from Ollama"""
         try:
-            async with httpx.AsyncClient() as client:
-                # Prepare the prompt with context
-                prompt = message
-                if context:
-                    conversation = "\n".join([
-                        f"Human: {msg['content']}" if msg['role'] == 'user' else f"Assistant: {msg['content']}"
-                        for msg in context[-5:]
-                    ])
-                    prompt = f"{conversation}\nHuman: {message}\nAssistant:"
-                
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": True
-                    },
-                    timeout=30.0
-                ) as response:
-                    async for line in response.aiter_lines():
-                        if line:
-                            try:
-                                data = json.loads(line)
-                                if "response" in data:
-                                    yield data["response"]
-                                if data.get("done", False):
-                                    break
-                            except json.JSONDecodeError:
-                                continue
+            # Prepare the prompt with context
+            prompt = message
+            if context:
+                conversation = "\n".join([
+                    f"Human: {msg['content']}" if msg['role'] == 'user' else f"Assistant: {msg['content']}"
+                    for msg in context[-5:]
+                ])
+                prompt = f"{conversation}\nHuman: {message}\nAssistant:"
+            
+            async for token in ollama_client.stream_generate(self.model, prompt):
+                yield token
                                 
         except Exception as e:
             yield f"Error: {str(e)}"
     
     async def list_models(self) -> List[str]:
         """List available Ollama models"""
-        # Return mock models for now
-        return ["llama2", "codellama", "mistral", "neural-chat"]
+        try:
+            models = await ollama_client.list_models()
+        except httpx.HTTPError:
+            models = []
+        # Fall back to mock models when Ollama is not running
+        return models or ["llama2", "codellama", "mistral", "neural-chat"]
     
     async def pull_model(self, model_name: str) -> bool:
         """Pull a new model from Ollama"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/api/pull",
-                    json={"name": model_name},
-                    timeout=600.0  # 10 minutes timeout for model download
-                )
-                return response.status_code == 200
-        except:
-            return False
+        return await ollama_client.pull_model(model_name)
     
     def set_model(self, model_name: str):
         """Set the active model"""
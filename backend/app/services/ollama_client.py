@@ -0,0 +1,306 @@
+"""
+Shared Ollama client
+
+One pooled httpx.AsyncClient for every Ollama call in the backend:
+- Connections to the Ollama server are kept alive and reused instead of
+  opening a new client (and TCP connection) per request.
+- Every generate request carries `keep_alive`, so Ollama keeps the model
+  loaded between requests instead of evicting it after its 5 minute default.
+  The value can be set per model (OLLAMA_MODEL_KEEP_ALIVE="llama2:7b=1h,...").
+- warm_up() loads the configured models with an empty prompt at startup so
+  the first chat does not pay the cold load.
+- /api/tags is cached for OLLAMA_TAGS_TTL seconds.
+- Generation goes through an LLMDispatcher (llm_dispatch.py): at most
+  OLLAMA_MODEL_CONCURRENCY generations per model, a priority queue that
+  serves interactive chat before background jobs, and identical in-flight
+  prompts sharing one generation.
+- stream_generate() yields tokens as Ollama produces them.
+- embed() sends a batch of texts in one /api/embed request.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.llm_dispatch import PRIORITY_INTERACTIVE, LLMDispatcher
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_HOST", settings.OLLAMA_BASE_URL)
+# Default keep_alive for generate requests (Ollama duration string or seconds, -1 = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Per-model overrides: "model=duration,model=duration"
+OLLAMA_MODEL_KEEP_ALIVE = os.getenv("OLLAMA_MODEL_KEEP_ALIVE", "")
+# Models loaded at startup (comma separated, only those already pulled)
+OLLAMA_WARM_MODELS = os.getenv("OLLAMA_WARM_MODELS", os.getenv("OLLAMA_MODEL", "mistral:7b"))
+# Concurrent generations per model
+OLLAMA_MODEL_CONCURRENCY = int(os.getenv("OLLAMA_MODEL_CONCURRENCY", "2"))
+# Seconds the /api/tags model list is reused
+OLLAMA_TAGS_TTL = float(os.getenv("OLLAMA_TAGS_TTL", "30"))
+
+# Connection pool
+HTTP_POOL_SIZE = 20
+KEEPALIVE_TIMEOUT = 60
+
+# Generation can pause for a long time between tokens while a model loads
+GENERATE_TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+PULL_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+def _parse_keep_alive(spec: str) -> Dict[str, str]:
+    overrides = {}
+    for item in spec.split(","):
+        model, sep, value = item.strip().rpartition("=")
+        if sep and model and value:
+            overrides[model.strip()] = value.strip()
+    return overrides
+
+
+class OllamaClient:
+    def __init__(self, base_url: str = OLLAMA_BASE_URL,
+                 keep_alive: str = OLLAMA_KEEP_ALIVE,
+                 model_keep_alive: Optional[Dict[str, str]] = None,
+                 concurrency: int = OLLAMA_MODEL_CONCURRENCY,
+                 tags_ttl: float = OLLAMA_TAGS_TTL):
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.model_keep_alive = (model_keep_alive if model_keep_alive is not None
+                                 else _parse_keep_alive(OLLAMA_MODEL_KEEP_ALIVE))
+        self.concurrency = concurrency
+        self.tags_ttl = tags_ttl
+
+        # Created lazily on the running event loop
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[LLMDispatcher] = None
+        self._tags_lock: Optional[asyncio.Lock] = None
+        self._tags: Optional[List[Dict]] = None
+        self._tags_fetched = 0.0
+
+    async def _ensure_client(self) -> httpx.AsyncClient:
+        """Shared client for the current event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._client is not None and not self._client.is_closed:
+            return self._client
+
+        await self.aclose()
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=GENERATE_TIMEOUT,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE,
+                                max_keepalive_connections=HTTP_POOL_SIZE,
+                                keepalive_expiry=KEEPALIVE_TIMEOUT)
+        )
+        self._dispatcher = LLMDispatcher(self.concurrency)
+        self._tags_lock = asyncio.Lock()
+        self._loop = loop
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        client, self._client, self._loop = self._client, None, None
+
+        # Clients bound to a loop that is already closed cannot be closed cleanly
+        try:
+            if client is not None:
+                await client.aclose()
+        except RuntimeError:
+            pass
+
+    def keep_alive_for(self, model: str) -> str:
+        return self.model_keep_alive.get(model, self.keep_alive)
+
+    def _generate_payload(self, model: str, prompt: str, stream: bool,
+                          options: Optional[Dict], system: Optional[str]) -> Dict:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive_for(model)
+        }
+        if options:
+            payload["options"] = options
+        if system:
+            payload["system"] = system
+        return payload
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    async def stream_generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                              system: Optional[str] = None,
+                              priority: int = PRIORITY_INTERACTIVE) -> AsyncGenerator[str, None]:
+        """Yield response tokens as Ollama produces them
+
+        Waits for a model slot in `priority` order (see llm_dispatch) and
+        shares the generation with identical requests already in flight.
+        Raises httpx.HTTPError if Ollama is unreachable or rejects the request.
+        """
+        client = await self._ensure_client()
+        payload = self._generate_payload(model, prompt, True, options, system)
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        async def produce() -> AsyncGenerator[str, None]:
+            async with client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("error"):
+                        raise httpx.HTTPError(f"Ollama error: {data['error']}")
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        break
+
+        async for token in self._dispatcher.stream(key, model, priority, produce):
+            yield token
+
+    async def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                       system: Optional[str] = None,
+                       priority: int = PRIORITY_INTERACTIVE) -> str:
+        """Complete response for a prompt"""
+        return "".join([token async for token in
+                        self.stream_generate(model, prompt, options, system, priority)])
+
+    async def embed(self, model: str, texts: List[str],
+                    priority: int = PRIORITY_INTERACTIVE) -> List[List[float]]:
+        """Embedding vectors for texts in one batched /api/embed request
+
+        Holds one of the model's dispatcher slots for the whole batch. Falls
+        back to one /api/embeddings request per text on Ollama versions
+        without /api/embed.
+        """
+        client = await self._ensure_client()
+        keep_alive = self.keep_alive_for(model)
+        async with self._dispatcher.slot(model, priority):
+            response = await client.post("/api/embed", json={
+                "model": model,
+                "input": texts,
+                "keep_alive": keep_alive
+            })
+            if response.status_code != 404:
+                response.raise_for_status()
+                return response.json()["embeddings"]
+
+            embeddings = []
+            for text in texts:
+                response = await client.post("/api/embeddings", json={
+                    "model": model,
+                    "prompt": text,
+                    "keep_alive": keep_alive
+                })
+                response.raise_for_status()
+                embeddings.append(response.json()["embedding"])
+            return embeddings
+
+    def dispatch_stats(self) -> Dict:
+        """Queue depth, slot usage and wait times per model"""
+        if self._dispatcher is None:
+            return {"models": {}, "in_flight": 0}
+        return self._dispatcher.stats()
+
+    async def warm_up(self, models: Optional[List[str]] = None) -> List[str]:
+        """Load models into memory ahead of the first request
+
+        Only models that are already pulled are loaded. Returns the models
+        that were loaded; failures are logged, never raised.
+        """
+        if models is None:
+            models = [m.strip() for m in OLLAMA_WARM_MODELS.split(",") if m.strip()]
+        if not models:
+            return []
+
+        try:
+            available = set(await self.list_models())
+        except httpx.HTTPError as e:
+            print(f"Ollama warm-up skipped, server unavailable: {e}")
+            return []
+
+        client = await self._ensure_client()
+
+        async def load(model: str) -> Optional[str]:
+            started = time.monotonic()
+            try:
+                # An empty prompt only loads the model
+                response = await client.post("/api/generate", json={
+                    "model": model,
+                    "keep_alive": self.keep_alive_for(model)
+                })
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"Failed to warm up Ollama model {model}: {e}")
+                return None
+            print(f"Ollama model {model} loaded in {time.monotonic() - started:.1f}s")
+            return model
+
+        targets = [model for model in models if model in available]
+        for model in models:
+            if model not in available:
+                print(f"Ollama model {model} is not pulled, skipping warm-up")
+        loaded = await asyncio.gather(*(load(model) for model in targets))
+        return [model for model in loaded if model]
+
+    # ------------------------------------------------------------------
+    # Models
+    # ------------------------------------------------------------------
+
+    async def is_available(self) -> bool:
+        """Whether the Ollama server answers"""
+        client = await self._ensure_client()
+        try:
+            response = await client.get("/api/version", timeout=5.0)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def list_model_details(self, refresh: bool = False) -> List[Dict]:
+        """/api/tags model entries (cached for tags_ttl seconds)"""
+        await self._ensure_client()
+        if not refresh and self._tags is not None and time.monotonic() - self._tags_fetched < self.tags_ttl:
+            return self._tags
+
+        async with self._tags_lock:
+            # Another caller may have refreshed while we waited
+            if not refresh and self._tags is not None and time.monotonic() - self._tags_fetched < self.tags_ttl:
+                return self._tags
+            response = await self._client.get("/api/tags", timeout=10.0)
+            response.raise_for_status()
+            self._tags = response.json().get("models", [])
+            self._tags_fetched = time.monotonic()
+            return self._tags
+
+    async def list_models(self, refresh: bool = False) -> List[str]:
+        """Names of the pulled models (cached for tags_ttl seconds)"""
+        return [model["name"] for model in await self.list_model_details(refresh)]
+
+    def invalidate_models(self):
+        """Drop the cached model list"""
+        self._tags = None
+
+    async def pull_model(self, model: str) -> bool:
+        """Pull a model and wait until the download finishes"""
+        client = await self._ensure_client()
+        try:
+            response = await client.post(
+                "/api/pull",
+                json={"name": model, "stream": False},
+                timeout=PULL_TIMEOUT
+            )
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            print(f"Error pulling Ollama model {model}: {e}")
+            return False
+        finally:
+            self.invalidate_models()
+
+
+ollama_client = OllamaClient()
@@ -0,0 +1,446 @@
+"""
+Paper Catalog - 논문 폴더 색인
+- 다운로드 폴더 / research_papers 하위 폴더의 논문을 SQLite에 색인
+  (PMID, 제목, 연도, 출처, PDF/번역 여부, 파일 경로)
+- 백그라운드 감시 스레드가 폴더 / metadata.json 수정 시각만 확인하여 바뀐 폴더만 다시 읽음
+  (요청마다 모든 metadata.json을 여는 대신 색인 조회)
+- 논문을 저장하는 서비스는 notify_paper_folder()로 즉시 반영 가능
+- add_listener()로 등록한 콜백은 색인이 바뀔 때마다 호출됨 (논문 벡터 색인 동기화 등)
+
+출처별 폴더 구조:
+    folders  <root>/<논문 폴더>/metadata.json (+ PDF, 요약 파일)
+    files    <root>/<분류 폴더>/<번호>_<PMID>_<제목>_<종류>.txt (lumbar_fusion_2year_outcomes)
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlite_manager import get_db
+
+RESEARCH_BASE_DIR = Path(os.getenv(
+    "RESEARCH_BASE_DIR", "/home/drjang00/DevEnvironments/spinalsurgery-research"
+))
+RESEARCH_PAPERS_DIR = RESEARCH_BASE_DIR / "research_papers"
+
+PAPER_CATALOG_PATH = os.getenv("PAPER_CATALOG_PATH", "paper_catalog.db")
+CATALOG_SCAN_INTERVAL = float(os.getenv("PAPER_CATALOG_SCAN_INTERVAL", "5"))
+
+# (출처, 경로, 구조)
+CATALOG_SOURCES = (
+    ("general", RESEARCH_BASE_DIR / "downloaded_papers", "folders"),
+    ("lumbar_fusion", RESEARCH_PAPERS_DIR / "lumbar_fusion_2025", "folders"),
+    ("tfesi", RESEARCH_PAPERS_DIR / "ultrasound_guided_tfesi", "folders"),
+    ("fusion_2year", RESEARCH_PAPERS_DIR / "lumbar_fusion_2year_outcomes", "files"),
+)
+
+# 001_<PMID>_<제목>_abstract.txt / _full_text.txt
+_PAPER_FILE_PATTERN = re.compile(r"^\d+_(?P<pmid>[^_]+)_.*_(?P<kind>abstract|full_text)\.txt$")
+
+_PAPER_COLUMNS = (
+    "folder", "source", "name", "pmid", "pmc_id", "title", "korean_title", "journal",
+    "year", "doi", "authors", "has_pdf", "has_translation", "metadata_path", "pdf_path",
+    "summary_path", "korean_summary_path", "files", "folder_mtime", "metadata_mtime", "indexed_at",
+)
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _first_existing(folder: str, names: Iterable[str], files: List[str]) -> Optional[str]:
+    for name in names:
+        if name in files:
+            return os.path.join(folder, name)
+    return None
+
+
+def _index_paper_folder(source: str, folder: str, folder_mtime: float,
+                        metadata_mtime: float) -> Optional[Tuple]:
+    """논문 폴더 하나를 읽어 papers 행 생성 (metadata.json을 읽을 수 없으면 None)"""
+    metadata_path = os.path.join(folder, "metadata.json")
+    try:
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        files = sorted(os.listdir(folder))
+    except (OSError, ValueError) as e:
+        print(f"Paper catalog: skipping {folder}: {e}")
+        return None
+    if not isinstance(metadata, dict):
+        return None
+
+    pmid = metadata.get("pmid")
+    pmid = str(pmid) if pmid is not None else None
+    pdfs = [name for name in files if name.lower().endswith(".pdf")]
+    pdf_path = _first_existing(folder, [f"{pmid}.pdf"], files) or (
+        os.path.join(folder, pdfs[0]) if pdfs else None
+    )
+
+    translation = metadata.get("korean_translation")
+    korean_title = translation.get("title") if isinstance(translation, dict) else None
+    year = metadata.get("year")
+
+    return (
+        folder, source, os.path.basename(folder), pmid, metadata.get("pmc_id"),
+        metadata.get("title"), korean_title, metadata.get("journal"),
+        str(year) if year is not None else None, metadata.get("doi"),
+        json.dumps(metadata.get("authors") or [], ensure_ascii=False),
+        int(pdf_path is not None), int("korean_translation" in metadata),
+        metadata_path, pdf_path,
+        _first_existing(folder, ["summary.txt"], files),
+        _first_existing(folder, ["summary_korean.txt", "korean_summary.txt"], files),
+        json.dumps(files, ensure_ascii=False),
+        folder_mtime, metadata_mtime, time.time(),
+    )
+
+
+class PaperCatalog:
+    """논문 폴더 색인
+
+    scan()은 폴더 / metadata.json의 수정 시각을 이전 값과 비교하여 바뀐 폴더만
+    다시 읽는다. 마지막으로 본 수정 시각은 DB에도 저장되므로 재시작 후 첫 scan도
+    변경된 폴더만 읽는다. 조회 메서드는 호출 스레드의 읽기 연결을 사용한다.
+    """
+
+    def __init__(self, db_path: str = PAPER_CATALOG_PATH, sources=CATALOG_SOURCES):
+        self.sources = tuple((name, str(path), layout) for name, path, layout in sources)
+        self.db = get_db(db_path)
+        self.db.write(self._create_tables)
+
+        self._scan_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[], None]] = []
+
+        # 폴더 → (폴더 mtime, metadata.json mtime)
+        self._seen: Dict[str, Tuple[float, Optional[float]]] = {
+            row["folder"]: (row["folder_mtime"], row["metadata_mtime"])
+            for row in self.db.query("SELECT folder, folder_mtime, metadata_mtime FROM papers")
+        }
+        # 파일 단위 출처의 분류 폴더 → 폴더 mtime
+        self._seen_dirs: Dict[str, float] = {
+            row["folder"]: row["folder_mtime"]
+            for row in self.db.query("SELECT folder, MAX(folder_mtime) AS folder_mtime "
+                                     "FROM paper_files GROUP BY folder")
+        }
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS papers (
+                        folder TEXT PRIMARY KEY,
+                        source TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        pmid TEXT,
+                        pmc_id TEXT,
+                        title TEXT,
+                        korean_title TEXT,
+                        journal TEXT,
+                        year TEXT,
+                        doi TEXT,
+                        authors TEXT,
+                        has_pdf INTEGER NOT NULL,
+                        has_translation INTEGER NOT NULL,
+                        metadata_path TEXT,
+                        pdf_path TEXT,
+                        summary_path TEXT,
+                        korean_summary_path TEXT,
+                        files TEXT,
+                        folder_mtime REAL NOT NULL,
+                        metadata_mtime REAL,
+                        indexed_at REAL NOT NULL
+                    )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_pmid ON papers(pmid)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_source_year ON papers(source, year)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_name ON papers(name)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_indexed_at ON papers(indexed_at, folder)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS paper_files (
+                        path TEXT PRIMARY KEY,
+                        source TEXT NOT NULL,
+                        folder TEXT NOT NULL,
+                        pmid TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        folder_mtime REAL NOT NULL
+                    )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_paper_files_pmid ON paper_files(pmid, kind)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_paper_files_folder ON paper_files(folder)')
+
+    # ---------------------------------------------------------------
+    # 색인 갱신
+    # ---------------------------------------------------------------
+
+    def scan(self) -> Dict[str, int]:
+        """모든 출처를 확인하여 바뀐 폴더만 다시 색인 (변경 건수 반환)"""
+        with self._scan_lock:
+            upserts, deletes = [], []
+            file_rows, cleared_dirs = [], []
+
+            for source, root, layout in self.sources:
+                if layout == "files":
+                    self._scan_file_source(source, root, file_rows, cleared_dirs)
+                else:
+                    self._scan_folder_source(source, root, upserts, deletes)
+
+            if upserts or deletes or file_rows or cleared_dirs:
+                self.db.write(lambda conn: self._apply(conn, upserts, deletes, file_rows, cleared_dirs))
+                self._notify_listeners()
+            return {"indexed": len(upserts), "removed": len(deletes),
+                    "file_folders": len(cleared_dirs)}
+
+    def _scan_folder_source(self, source: str, root: str, upserts: List, deletes: List):
+        prefix = root + os.sep
+        present = set()
+        try:
+            entries = [entry for entry in os.scandir(root) if entry.is_dir()]
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            folder = entry.path
+            try:
+                folder_mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            metadata_mtime = _mtime(os.path.join(folder, "metadata.json"))
+            if metadata_mtime is None:
+                continue
+            present.add(folder)
+
+            if self._seen.get(folder) == (folder_mtime, metadata_mtime):
+                continue
+            self._seen[folder] = (folder_mtime, metadata_mtime)
+            row = _index_paper_folder(source, folder, folder_mtime, metadata_mtime)
+            if row is None:
+                # 읽을 수 없는 metadata.json: 색인에서 빼고 파일이 바뀔 때까지 다시 읽지 않음
+                deletes.append(folder)
+            else:
+                upserts.append(row)
+
+        for folder in [f for f in self._seen if f.startswith(prefix) and f not in present]:
+            deletes.append(folder)
+            del self._seen[folder]
+
+    def _scan_file_source(self, source: str, root: str, file_rows: List, cleared_dirs: List):
+        prefix = root + os.sep
+        present = set()
+        try:
+            entries = [entry for entry in os.scandir(root) if entry.is_dir()]
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            try:
+                dir_mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            present.add(entry.path)
+            if self._seen_dirs.get(entry.path) == dir_mtime:
+                continue
+
+            cleared_dirs.append(entry.path)
+            self._seen_dirs[entry.path] = dir_mtime
+            for name in os.listdir(entry.path):
+                match = _PAPER_FILE_PATTERN.match(name)
+                if match:
+                    file_rows.append((os.path.join(entry.path, name), source, entry.path,
+                                      match.group("pmid"), match.group("kind"), dir_mtime))
+
+        for folder in [f for f in self._seen_dirs if f.startswith(prefix) and f not in present]:
+            cleared_dirs.append(folder)
+            del self._seen_dirs[folder]
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, upserts: List, deletes: List,
+               file_rows: List, cleared_dirs: List):
+        if upserts:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO papers ({', '.join(_PAPER_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_PAPER_COLUMNS))})", upserts
+            )
+        if deletes:
+            conn.executemany('DELETE FROM papers WHERE folder = ?', [(f,) for f in deletes])
+        if cleared_dirs:
+            conn.executemany('DELETE FROM paper_files WHERE folder = ?', [(d,) for d in cleared_dirs])
+        if file_rows:
+            conn.executemany('INSERT OR REPLACE INTO paper_files VALUES (?, ?, ?, ?, ?, ?)', file_rows)
+
+    def refresh_folder(self, folder):
+        """논문 폴더 하나를 즉시 다시 색인 (저장 직후 호출)"""
+        folder = str(folder)
+        for source, root, layout in self.sources:
+            if layout == "folders" and os.path.dirname(folder) == root:
+                break
+        else:
+            return
+
+        with self._scan_lock:
+            folder_mtime = _mtime(folder)
+            metadata_mtime = _mtime(os.path.join(folder, "metadata.json"))
+            row = None
+            if folder_mtime is not None and metadata_mtime is not None:
+                row = _index_paper_folder(source, folder, folder_mtime, metadata_mtime)
+
+            if row is None:
+                self._seen.pop(folder, None)
+                self.db.write(lambda conn: self._apply(conn, [], [folder], [], []))
+            else:
+                self._seen[folder] = (folder_mtime, metadata_mtime)
+                self.db.write(lambda conn: self._apply(conn, [row], [], [], []))
+        self._notify_listeners()
+
+    def add_listener(self, callback: Callable[[], None]):
+        """색인이 바뀐 뒤 호출할 콜백 등록 (감시 스레드에서 호출될 수 있음)"""
+        self._listeners.append(callback)
+
+    def _notify_listeners(self):
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Paper catalog listener error: {e}")
+
+    def start_watcher(self, interval: float = CATALOG_SCAN_INTERVAL):
+        """interval초마다 scan()하는 백그라운드 스레드 시작"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name="paper-catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Paper catalog scan error: {e}")
+
+    # ---------------------------------------------------------------
+    # 조회
+    # ---------------------------------------------------------------
+
+    @staticmethod
+    def _row_to_paper(row: sqlite3.Row) -> Dict:
+        paper = dict(row)
+        paper["authors"] = json.loads(paper["authors"] or "[]")
+        paper["files"] = json.loads(paper["files"] or "[]")
+        paper["has_pdf"] = bool(paper["has_pdf"])
+        paper["has_translation"] = bool(paper["has_translation"])
+        return paper
+
+    def list_papers(self, sources: Optional[Iterable[str]] = None,
+                    name_prefix: Optional[str] = None) -> List[Dict]:
+        """논문 목록 (연도 내림차순)"""
+        sql = "SELECT * FROM papers"
+        conditions, params = [], []
+        if sources is not None:
+            sources = list(sources)
+            conditions.append(f"source IN ({', '.join('?' * len(sources))})")
+            params.extend(sources)
+        if name_prefix:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append(self._like_prefix(name_prefix))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY year DESC, name"
+        return [self._row_to_paper(row) for row in self.db.query(sql, params)]
+
+    def list_indexed_after(self, indexed_at: float, folder: str = "",
+                           limit: int = 1000) -> List[Dict]:
+        """(indexed_at, folder) 순서로 주어진 위치 이후에 색인된 논문 (증분 동기화용)"""
+        rows = self.db.query(
+            "SELECT * FROM papers WHERE indexed_at > ? OR (indexed_at = ? AND folder > ?) "
+            "ORDER BY indexed_at, folder LIMIT ?", (indexed_at, indexed_at, folder, limit)
+        )
+        return [self._row_to_paper(row) for row in rows]
+
+    def folders(self) -> Set[str]:
+        """색인된 모든 논문 폴더"""
+        return {row["folder"] for row in self.db.query("SELECT folder FROM papers")}
+
+    def find_paper(self, pmid: str, sources: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """PMID(또는 PMID로 시작하는 폴더 이름)로 논문 찾기"""
+        source_list = list(sources) if sources is not None else [s[0] for s in self.sources]
+        source_filter = f"source IN ({', '.join('?' * len(source_list))})"
+        row = self.db.query_one(
+            f"SELECT * FROM papers WHERE pmid = ? AND {source_filter} ORDER BY source, name LIMIT 1",
+            [pmid, *source_list]
+        )
+        if row is None:
+            row = self.db.query_one(
+                f"SELECT * FROM papers WHERE name LIKE ? ESCAPE '\\' AND {source_filter} "
+                f"ORDER BY source, name LIMIT 1",
+                [self._like_prefix(pmid), *source_list]
+            )
+        return self._row_to_paper(row) if row else None
+
+    def get_folder(self, folder) -> Optional[Dict]:
+        row = self.db.query_one("SELECT * FROM papers WHERE folder = ?", (str(folder),))
+        return self._row_to_paper(row) if row else None
+
+    def find_file(self, pmid: str, kind: str, source: Optional[str] = None) -> Optional[str]:
+        """파일 단위 출처에서 PMID의 파일 경로 (kind: abstract / full_text)"""
+        sql = "SELECT path FROM paper_files WHERE pmid = ? AND kind = ?"
+        params = [pmid, kind]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        row = self.db.query_one(sql + " ORDER BY path LIMIT 1", params)
+        return row["path"] if row else None
+
+    def source_stats(self) -> Dict[str, Dict[str, int]]:
+        """출처별 논문 수 / 번역 수"""
+        rows = self.db.query(
+            "SELECT source, COUNT(*) AS papers, SUM(has_translation) AS translations, "
+            "SUM(korean_title IS NOT NULL) AS korean_titles FROM papers GROUP BY source"
+        )
+        return {row["source"]: {"papers": row["papers"], "translations": row["translations"] or 0,
+                                "korean_titles": row["korean_titles"] or 0}
+                for row in rows}
+
+    def source_path(self, source: str) -> Optional[Path]:
+        for name, root, _ in self.sources:
+            if name == source:
+                return Path(root)
+        return None
+
+    @staticmethod
+    def _like_prefix(prefix: str) -> str:
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return escaped + "%"
+
+
+_paper_catalog: Optional[PaperCatalog] = None
+_paper_catalog_lock = threading.Lock()
+
+
+def get_paper_catalog() -> PaperCatalog:
+    """프로세스 전체에서 공유되는 카탈로그 (처음 호출 시 색인 후 감시 스레드 시작)"""
+    global _paper_catalog
+    with _paper_catalog_lock:
+        if _paper_catalog is None:
+            catalog = PaperCatalog()
+            catalog.scan()
+            catalog.start_watcher()
+            _paper_catalog = catalog
+        return _paper_catalog
+
+
+def notify_paper_folder(folder):
+    """논문 폴더가 저장/수정되었음을 알림 (카탈로그를 사용 중인 프로세스에서만 반영)"""
+    catalog = _paper_catalog
+    if catalog is None:
+        return
+    try:
+        catalog.refresh_folder(folder)
+    except Exception as e:
+        print(f"Paper catalog refresh error for {folder}: {e}")
@@ -2,20 +2,21 @@
 Paper Download Service - 실제 논문 다운로드 및 처리
 """
 import os
-import asyncio
-import aiohttp
 import requests
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import xml.etree.ElementTree as ET
-import PyPDF2
-import pdfplumber
-from deep_translator import GoogleTranslator
 import hashlib
 import json
 from pathlib import Path
 import re
 
+from app.services.download_manager import PDF_MAGIC, get_download_manager
+from app.services.paper_catalog import notify_paper_folder
+from app.services.pdf_extractor import format_timing, get_pdf_extractor
+from app.services.pubmed_harvester import NCBI_API_KEY, PubMedHarvester
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+from app.services.translation_service import get_translation_service
+
 class PaperDownloaderService:
     def __init__(self):
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
@@ -26,8 +27,8 @@ class PaperDownloaderService:
         self.storage_path = Path("/home/drjang00/DevEnvironments/spinalsurgery-research/downloaded_papers")
         self.storage_path.mkdir(exist_ok=True)
         
-        # 번역기
-        self.translator = GoogleTranslator(source='en', target='ko')
+        # 번역기 (세그먼트 캐시 + 묶음 번역)
+        self.translator = get_translation_service()
         
         # API 키 (필요시)
         self.api_key = os.getenv("PUBMED_API_KEY", "")
@@ -67,7 +68,7 @@ class PaperDownloaderService:
             
             # PDF에서 텍스트 추출
             if pdf_path and pdf_path.exists():
-                full_text = self._extract_text_from_pdf(pdf_path)
+                full_text = await self._extract_text_from_pdf(pdf_path)
                 metadata['full_text'] = full_text
             else:
                 # PDF가 없으면 abstract만 사용
@@ -97,110 +98,47 @@ class PaperDownloaderService:
         return results
         
     async def _search_pubmed(self, query: str, max_results: int) -> List[str]:
-        """PubMed 검색"""
-        search_url = f"{self.base_url}/esearch.fcgi"
-        params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': max_results,
-            'retmode': 'json'
-        }
-        
-        if self.api_key:
-            params['api_key'] = self.api_key
-            
+        """PubMed 검색 (공유 NCBI 속도 제한 적용)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('esearchresult', {}).get('idlist', [])
-                    else:
-                        print(f"Search error: {response.status}")
-                        text = await response.text()
-                        print(f"Response: {text[:200]}")
+            async with PubMedHarvester(api_key=self.api_key or NCBI_API_KEY) as harvester:
+                return await harvester.search_ids(query, max_results)
         except Exception as e:
             print(f"Exception during search: {e}")
         return []
         
     async def _fetch_paper_metadata(self, pmid: str) -> Optional[Dict]:
-        """논문 메타데이터 가져오기"""
-        fetch_url = f"{self.base_url}/efetch.fcgi"
-        params = {
-            'db': 'pubmed',
-            'id': pmid,
-            'rettype': 'abstract',
-            'retmode': 'xml'
-        }
+        """논문 메타데이터 가져오기 (응답 캐시 / 공유 NCBI 속도 제한 적용)"""
+        def parse(xml_data: bytes) -> Dict:
+            return self._parse_pubmed_xml(xml_data, pmid)
         
-        if self.api_key:
-            params['api_key'] = self.api_key
-            
-        async with aiohttp.ClientSession() as session:
-            async with session.get(fetch_url, params=params) as response:
-                if response.status == 200:
-                    xml_data = await response.text()
-                    return self._parse_pubmed_xml(xml_data, pmid)
-        return None
+        metadata = None
+        try:
+            async with PubMedHarvester(api_key=self.api_key or NCBI_API_KEY) as harvester:
+                async for page in harvester.fetch_ids([pmid], parse_page=parse):
+                    metadata = page or None
+        except Exception as e:
+            print(f"Exception during fetch: {e}")
+        return metadata
         
     def _parse_pubmed_xml(self, xml_data: str, pmid: str) -> Dict:
         """PubMed XML 파싱"""
-        root = ET.fromstring(xml_data)
-        article = root.find('.//PubmedArticle')
-        
-        if not article:
-            return {}
-            
-        metadata = {'pmid': pmid}
-        
-        # Title
-        title = article.find('.//ArticleTitle')
-        metadata['title'] = title.text if title is not None else 'Unknown Title'
-        
-        # Abstract
-        abstract_texts = []
-        for abstract in article.findall('.//AbstractText'):
-            if abstract.text:
-                label = abstract.get('Label', '')
-                if label:
-                    abstract_texts.append(f"{label}: {abstract.text}")
-                else:
-                    abstract_texts.append(abstract.text)
-        metadata['abstract'] = '\n\n'.join(abstract_texts)
-        
-        # Authors
-        authors = []
-        for author in article.findall('.//Author'):
-            last_name = author.find('LastName')
-            fore_name = author.find('ForeName')
-            if last_name is not None and fore_name is not None:
-                authors.append(f"{fore_name.text} {last_name.text}")
-        metadata['authors'] = authors
-        
-        # Journal
-        journal = article.find('.//Journal/Title')
-        metadata['journal'] = journal.text if journal is not None else ''
-        
-        # Year
-        year = article.find('.//PubDate/Year')
-        metadata['year'] = year.text if year is not None else ''
-        
-        # DOI
-        doi = article.find('.//ArticleId[@IdType="doi"]')
-        metadata['doi'] = doi.text if doi is not None else ''
-        
-        # PMC ID
-        pmc = article.find('.//ArticleId[@IdType="pmc"]')
-        metadata['pmc_id'] = pmc.text if pmc is not None else ''
-        
-        # Keywords
-        keywords = []
-        for keyword in article.findall('.//Keyword'):
-            if keyword.text:
-                keywords.append(keyword.text)
-        metadata['keywords'] = keywords
-        
-        return metadata
+        for record in iter_pubmed_articles(xml_data):
+            return {
+                'pmid': pmid,
+                'title': record['title'] or 'Unknown Title',
+                'abstract': record['abstract'],
+                'authors': record['author_names'],
+                'journal': record['journal'],
+                'year': record['year'],
+                'doi': record['doi'],
+                'pmc_id': record['pmc_id'],
+                'keywords': record['keywords'],
+                'mesh_terms': [term['descriptor'] for term in record['mesh_terms']],
+                'affiliations': list(dict.fromkeys(
+                    affiliation for author in record['authors'] for affiliation in author['affiliations']
+                ))
+            }
+        return {}
         
     def _create_paper_folder(self, metadata: Dict) -> Path:
         """논문별 폴더 생성"""
@@ -240,108 +178,47 @@ class PaperDownloaderService:
         return None
         
     async def _download_file(self, url: str, filepath: Path) -> bool:
-        """파일 다운로드"""
+        """파일 다운로드 (스트리밍 저장, 이어받기, 내용 해시 중복 제거)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        with open(filepath, 'wb') as f:
-                            f.write(content)
-                        return True
+            path = await get_download_manager().download(url, filepath, magic=PDF_MAGIC)
+            return path is not None
         except Exception as e:
             print(f"Download error: {e}")
         return False
         
-    def _extract_text_from_pdf(self, pdf_path: Path) -> str:
-        """PDF에서 텍스트 추출"""
-        text = ""
-        
+    async def _extract_text_from_pdf(self, pdf_path: Path) -> str:
+        """PDF에서 텍스트 추출 (프로세스 풀, 사이드카 캐시)"""
         try:
-            # pdfplumber 사용 (더 정확한 텍스트 추출)
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                        
-            if not text.strip():
-                # PyPDF2로 재시도
-                with open(pdf_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                        
+            result = await get_pdf_extractor().extract(pdf_path)
+            print(f"📝 Extracted {format_timing(result)}")
+            return result['text'].strip()
         except Exception as e:
             print(f"PDF extraction error: {e}")
-            
-        return text.strip()
+            return ""
         
     async def _translate_to_korean(self, metadata: Dict, full_text: str) -> Dict:
-        """한글 번역"""
+        """한글 번역 (제목 / 초록 / 주요 내용을 한 번에 묶어서 번역)"""
         korean_data = {}
         
-        try:
-            # 제목 번역
-            if metadata.get('title'):
-                korean_data['title'] = self.translator.translate(metadata['title'])
-                
-            # 초록 번역
-            if metadata.get('abstract'):
-                # 긴 텍스트는 나누어 번역
-                abstract_parts = self._split_text(metadata['abstract'], 4500)
-                translated_parts = []
-                
-                for part in abstract_parts:
-                    translated = self.translator.translate(part)
-                    translated_parts.append(translated)
-                    await asyncio.sleep(0.5)  # API 제한 회피
-                    
-                korean_data['abstract'] = '\n'.join(translated_parts)
-                
-            # 전체 텍스트 번역 (요약본)
-            if full_text:
-                # 전체 텍스트는 너무 길 수 있으므로 주요 부분만 번역
-                summary = self._extract_key_sections(full_text)
+        fields = {}
+        if metadata.get('title'):
+            fields['title'] = metadata['title']
+        if metadata.get('abstract'):
+            fields['abstract'] = metadata['abstract']
+        if full_text:
+            # 전체 텍스트는 너무 길 수 있으므로 주요 부분만 번역
+            summary = self._extract_key_sections(full_text)
+            if summary:
+                fields['summary'] = summary
                 
-                if summary:
-                    summary_parts = self._split_text(summary, 4500)
-                    translated_summary = []
-                    
-                    for part in summary_parts:
-                        translated = self.translator.translate(part)
-                        translated_summary.append(translated)
-                        await asyncio.sleep(0.5)
-                        
-                    korean_data['summary'] = '\n'.join(translated_summary)
-                    
+        try:
+            translated = await self.translator.translate_many(list(fields.values()))
+            korean_data.update(zip(fields, translated))
         except Exception as e:
             print(f"Translation error: {e}")
             
         return korean_data
         
-    def _split_text(self, text: str, max_length: int) -> List[str]:
-        """긴 텍스트를 적절한 길이로 분할"""
-        if len(text) <= max_length:
-            return [text]
-            
-        parts = []
-        sentences = text.split('. ')
-        current_part = ""
-        
-        for sentence in sentences:
-            if len(current_part) + len(sentence) + 2 <= max_length:
-                current_part += sentence + ". "
-            else:
-                if current_part:
-                    parts.append(current_part.strip())
-                current_part = sentence + ". "
-                
-        if current_part:
-            parts.append(current_part.strip())
-            
-        return parts
-        
     def _extract_key_sections(self, full_text: str) -> str:
         """전체 텍스트에서 주요 섹션 추출"""
         # 주요 섹션 패턴
@@ -397,7 +274,10 @@ class PaperDownloaderService:
                 
                 if 'summary' in korean:
                     f.write(f"주요 내용 요약:\n{korean['summary']}\n")
-                    
+            
+        # 논문 카탈로그 색인 갱신
+        notify_paper_folder(folder)
+        
     def _create_summary(self, metadata: Dict, folder: Path) -> Dict:
         """논문 요약 생성"""
         summary = {
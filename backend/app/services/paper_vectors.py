@@ -0,0 +1,379 @@
+"""
+Paper Vectors - 유사 논문 검색용 임베딩 색인 동기화 / 검색
+- 출처: research_papers 테이블(ResearchPaper), 논문 카탈로그(paper_catalog.db),
+  논문 검색 결과(searched_papers)
+- 출처마다 마지막으로 반영한 위치(수정 시각, ID) 이후의 행만 페이지 단위로 읽고,
+  내용 해시가 바뀐 논문만 EMBED_BATCH_SIZE개씩 한 번의 Ollama 요청으로 임베딩
+  (임베딩은 백그라운드 우선순위로 실행되어 채팅을 막지 않음)
+- 출처에서 사라진 논문은 색인에서도 삭제
+- 백그라운드 작업이 PAPER_VECTOR_SYNC_INTERVAL초마다, 그리고 카탈로그에 논문이
+  저장되는 즉시 동기화
+- 질의 임베딩은 최근 QUERY_CACHE_SIZE개를 메모리에 보관
+"""
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+from sqlalchemy import and_, func, or_, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.research_paper import ResearchPaper
+from app.services.llm_dispatch import PRIORITY_BACKGROUND
+from app.services.ollama_client import ollama_client
+from app.services.paper_catalog import get_paper_catalog
+from app.services.vector_index import VectorIndex, get_vector_index
+from sqlite_manager import DEFAULT_DB_PATH, get_db
+
+EMBED_MODEL = os.getenv("PAPER_EMBED_MODEL", "nomic-embed-text")
+EMBED_BATCH_SIZE = int(os.getenv("PAPER_EMBED_BATCH_SIZE", "32"))
+# 주기적 동기화 간격 (초, 0이면 자동 동기화 끔)
+SYNC_INTERVAL = float(os.getenv("PAPER_VECTOR_SYNC_INTERVAL", "300"))
+# searched_papers 테이블이 있는 DB (paper_search_service와 같은 파일)
+SEARCHED_PAPERS_DB = os.getenv("SEARCHED_PAPERS_DB", DEFAULT_DB_PATH)
+
+# 출처에서 한 번에 읽는 행 수
+SYNC_PAGE_SIZE = 500
+# 임베딩하는 본문 최대 길이
+EMBED_TEXT_CHARS = 4000
+QUERY_CACHE_SIZE = 256
+# 카탈로그 변경 알림을 모으는 시간 (연속 저장을 한 번에 동기화)
+NOTIFY_DELAY = 2.0
+
+SOURCE_RESEARCH = "research_paper"
+SOURCE_CATALOG = "catalog"
+SOURCE_SEARCHED = "searched"
+SOURCES = (SOURCE_RESEARCH, SOURCE_CATALOG, SOURCE_SEARCHED)
+
+# (문서 ID, 임베딩할 본문, 메타데이터)
+Document = Tuple[str, str, Dict]
+
+
+def paper_text(title: Optional[str], abstract: Optional[str] = None,
+               keywords: Optional[Iterable[str]] = None, journal: Optional[str] = None) -> str:
+    """임베딩할 논문 본문 (제목 / 초록 / 키워드 / 저널)"""
+    parts = [title or ""]
+    if abstract:
+        parts.append(abstract)
+    if keywords:
+        parts.append("Keywords: " + ", ".join(str(keyword) for keyword in keywords))
+    if journal:
+        parts.append(f"Journal: {journal}")
+    return "\n".join(part.strip() for part in parts if part)[:EMBED_TEXT_CHARS]
+
+
+def _read_text(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(EMBED_TEXT_CHARS)
+    except OSError:
+        return None
+
+
+def _dedupe_key(metadata: Dict) -> str:
+    """같은 논문이 여러 출처에 있을 때 한 번만 보여주기 위한 키"""
+    if metadata.get("pmid"):
+        return f"pmid:{metadata['pmid']}"
+    if metadata.get("doi"):
+        return f"doi:{str(metadata['doi']).lower()}"
+    return "title:" + " ".join(str(metadata.get("title") or "").lower().split())
+
+
+class PaperVectorService:
+    """세 출처의 논문을 VectorIndex에 증분 반영하고 유사 논문을 검색"""
+
+    def __init__(self, index: Optional[VectorIndex] = None, model: str = EMBED_MODEL,
+                 batch_size: int = EMBED_BATCH_SIZE):
+        self._index = index
+        self.model = model
+        self.batch_size = batch_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_sync: Dict = {}
+
+    @property
+    def index(self) -> VectorIndex:
+        if self._index is None:
+            self._index = get_vector_index()
+        return self._index
+
+    # ---------------------------------------------------------------
+    # 임베딩
+    # ---------------------------------------------------------------
+
+    async def _embed(self, texts: List[str], priority: int = PRIORITY_BACKGROUND) -> List[List[float]]:
+        return await ollama_client.embed(self.model, texts, priority=priority)
+
+    async def _embed_query(self, text: str) -> List[float]:
+        vector = self._query_cache.get(text)
+        if vector is None:
+            vector = (await ollama_client.embed(self.model, [text]))[0]
+            self._query_cache[text] = vector
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        else:
+            self._query_cache.move_to_end(text)
+        return vector
+
+    async def upsert_documents(self, source: str, documents: List[Document]) -> int:
+        """내용이 바뀐 문서만 임베딩하여 저장 (저장 건수 반환)"""
+        index = self.index
+        pending = []
+        for doc_id, text, metadata in documents:
+            if not text.strip():
+                continue
+            content_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            if index.model == self.model and index.content_hash(doc_id) == content_hash:
+                continue
+            pending.append((doc_id, text, metadata, content_hash))
+
+        stored = 0
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            vectors = await self._embed([text for _, text, _, _ in batch])
+            items = [(doc_id, source, content_hash, vector, metadata)
+                     for (doc_id, _, metadata, content_hash), vector in zip(batch, vectors)]
+            stored += await asyncio.to_thread(index.upsert, self.model, items)
+        return stored
+
+    # ---------------------------------------------------------------
+    # 출처별 읽기: (문서 목록, 다음 위치) / 현재 문서 ID 전체
+    # ---------------------------------------------------------------
+
+    async def _fetch_research(self, position: Optional[List]) -> Tuple[List[Document], Optional[List]]:
+        stamp = func.coalesce(ResearchPaper.updated_at, ResearchPaper.created_at)
+        query = select(ResearchPaper, stamp.label("stamp")).order_by(stamp, ResearchPaper.id)
+        if position:
+            after = datetime.fromisoformat(position[0])
+            query = query.where(or_(stamp > after, and_(stamp == after, ResearchPaper.id > position[1])))
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query.limit(SYNC_PAGE_SIZE))).all()
+        if not rows:
+            return [], None
+
+        documents = []
+        for paper, _ in rows:
+            documents.append((f"{SOURCE_RESEARCH}:{paper.id}", paper_text(
+                paper.title, paper.abstract, paper.keywords, paper.journal
+            ), {
+                "paper_id": paper.id, "pmid": paper.pmid, "doi": paper.doi, "title": paper.title,
+                "journal": paper.journal, "year": paper.year, "authors": paper.authors or [],
+                "fusion_type": paper.fusion_type, "study_type": paper.study_type,
+            }))
+        last_paper, last_stamp = rows[-1]
+        return documents, [last_stamp.isoformat(), last_paper.id]
+
+    async def _research_ids(self) -> Set[str]:
+        async with AsyncSessionLocal() as db:
+            ids = (await db.execute(select(ResearchPaper.id))).scalars().all()
+        return {f"{SOURCE_RESEARCH}:{paper_id}" for paper_id in ids}
+
+    def _fetch_catalog(self, position: Optional[List]) -> Tuple[List[Document], Optional[List]]:
+        indexed_at, folder = position or (0.0, "")
+        papers = get_paper_catalog().list_indexed_after(indexed_at, folder, SYNC_PAGE_SIZE)
+        if not papers:
+            return [], None
+
+        documents = []
+        for paper in papers:
+            title = paper["title"] or paper["name"]
+            if paper["korean_title"]:
+                title = f"{title}\n{paper['korean_title']}"
+            documents.append((f"{SOURCE_CATALOG}:{paper['folder']}", paper_text(
+                title, _read_text(paper["summary_path"]), journal=paper["journal"]
+            ), {
+                "folder": paper["folder"], "catalog_source": paper["source"], "pmid": paper["pmid"],
+                "doi": paper["doi"], "title": paper["title"] or paper["name"],
+                "korean_title": paper["korean_title"], "journal": paper["journal"],
+                "year": paper["year"], "authors": paper["authors"], "has_pdf": paper["has_pdf"],
+            }))
+        return documents, [papers[-1]["indexed_at"], papers[-1]["folder"]]
+
+    def _catalog_ids(self) -> Set[str]:
+        return {f"{SOURCE_CATALOG}:{folder}" for folder in get_paper_catalog().folders()}
+
+    def _searched_db(self):
+        db = get_db(SEARCHED_PAPERS_DB)
+        exists = db.query_one("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'searched_papers'")
+        return db if exists else None
+
+    def _fetch_searched(self, position: Optional[List]) -> Tuple[List[Document], Optional[List]]:
+        db = self._searched_db()
+        if db is None:
+            return [], None
+        created_at, paper_id = position or ("", "")
+        rows = db.query(
+            "SELECT * FROM searched_papers WHERE created_at > ? OR (created_at = ? AND id > ?) "
+            "ORDER BY created_at, id LIMIT ?", (created_at, created_at, paper_id, SYNC_PAGE_SIZE)
+        )
+        if not rows:
+            return [], None
+
+        documents = []
+        for row in rows:
+            try:
+                keywords = json.loads(row["keywords"] or "[]")
+            except ValueError:
+                keywords = []
+            documents.append((f"{SOURCE_SEARCHED}:{row['id']}", paper_text(
+                row["title"], row["abstract"], keywords, row["journal_name"]
+            ), {
+                "searched_paper_id": row["id"], "session_id": row["session_id"], "pmid": row["pmid"],
+                "doi": row["doi"], "title": row["title"], "journal": row["journal_name"],
+                "year": row["publication_year"], "authors": row["authors"], "url": row["url"],
+            }))
+        return documents, [rows[-1]["created_at"] or "", rows[-1]["id"]]
+
+    def _searched_ids(self) -> Set[str]:
+        db = self._searched_db()
+        if db is None:
+            return set()
+        return {f"{SOURCE_SEARCHED}:{row['id']}" for row in db.query("SELECT id FROM searched_papers")}
+
+    # ---------------------------------------------------------------
+    # 동기화
+    # ---------------------------------------------------------------
+
+    async def _sync_source(self, source: str, fetch, current_ids) -> Dict[str, int]:
+        index = self.index
+        position_key = f"position:{source}"
+        position = index.get_meta(position_key)
+        position = json.loads(position) if position else None
+        stored = read = 0
+
+        while True:
+            documents, next_position = await fetch(position)
+            if not documents:
+                break
+            read += len(documents)
+            stored += await self.upsert_documents(source, documents)
+            # 임베딩이 실패하면 위치를 옮기지 않으므로 다음 동기화에서 이 페이지부터 다시 읽음
+            position = next_position
+            await asyncio.to_thread(index.set_meta, position_key, json.dumps(position))
+
+        stale = set(await asyncio.to_thread(index.doc_ids, source)) - await current_ids()
+        removed = await asyncio.to_thread(index.delete, stale) if stale else 0
+        return {"read": read, "embedded": stored, "removed": removed}
+
+    async def sync(self) -> Dict:
+        """세 출처의 변경분을 색인에 반영 (동시에 하나만 실행)"""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            index = self.index
+            if index.model and index.model != self.model:
+                # 임베딩 모델이 바뀌면 모든 논문을 다시 임베딩
+                print(f"Paper vectors: embedding model changed ({index.model} -> {self.model}), rebuilding")
+                await asyncio.to_thread(index.reset)
+
+            results = {}
+            for source, fetch, current_ids in (
+                (SOURCE_RESEARCH, self._fetch_research, self._research_ids),
+                (SOURCE_CATALOG, lambda position: asyncio.to_thread(self._fetch_catalog, position),
+                 lambda: asyncio.to_thread(self._catalog_ids)),
+                (SOURCE_SEARCHED, lambda position: asyncio.to_thread(self._fetch_searched, position),
+                 lambda: asyncio.to_thread(self._searched_ids)),
+            ):
+                try:
+                    results[source] = await self._sync_source(source, fetch, current_ids)
+                except httpx.HTTPError as e:
+                    # Ollama를 사용할 수 없으면 나머지 출처도 임베딩할 수 없음
+                    results[source] = {"error": f"embedding failed: {e}"}
+                    break
+                except Exception as e:
+                    print(f"Paper vectors: {source} sync error: {e}")
+                    results[source] = {"error": str(e)}
+
+            if index.needs_training():
+                await asyncio.to_thread(index.train)
+            self._last_sync = {"finished_at": datetime.utcnow().isoformat(), "sources": results}
+            return results
+
+    def notify(self):
+        """논문이 저장되었음을 알림 (어느 스레드에서든 호출 가능, 곧 동기화)"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(wakeup.set)
+
+    async def _sync_loop(self):
+        # 첫 카탈로그 스캔은 느릴 수 있으므로 작업 스레드에서
+        catalog = await asyncio.to_thread(get_paper_catalog)
+        catalog.add_listener(self.notify)
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Paper vectors: sync error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), SYNC_INTERVAL)
+                await asyncio.sleep(NOTIFY_DELAY)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        """백그라운드 동기화 시작 (PAPER_VECTOR_SYNC_INTERVAL=0이면 시작하지 않음)"""
+        if SYNC_INTERVAL <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        self._loop = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._index is not None:
+            self._index.close()
+
+    # ---------------------------------------------------------------
+    # 검색
+    # ---------------------------------------------------------------
+
+    async def search(self, text: str, limit: int = 10,
+                     sources: Optional[Iterable[str]] = None) -> List[Dict]:
+        """본문과 가장 비슷한 논문 (여러 출처에 있는 같은 논문은 가장 높은 점수 하나만)
+
+        Raises httpx.HTTPError if the query cannot be embedded.
+        """
+        index = self.index
+        if not len(index):
+            return []
+        vector = await self._embed_query(text)
+        sources = list(sources) if sources is not None else None
+        # 중복 제거 후에도 limit개가 남도록 여유 있게 찾음
+        hits = await asyncio.to_thread(index.search, vector, limit * 3, sources)
+        metadata = await asyncio.to_thread(index.metadata, [doc_id for doc_id, _ in hits])
+
+        results, seen = [], set()
+        for doc_id, score in hits:
+            paper = metadata.get(doc_id, {})
+            key = _dedupe_key(paper)
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append({"id": doc_id, "similarity_score": round(score, 4), "metadata": paper})
+            if len(results) >= limit:
+                break
+        return results
+
+    def stats(self) -> Dict:
+        return {"model": self.model, "index": self.index.stats(), "last_sync": self._last_sync}
+
+
+paper_vectors = PaperVectorService()
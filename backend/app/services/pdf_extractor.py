@@ -0,0 +1,234 @@
+"""
+PDF Text Extractor - 프로세스 풀 기반 PDF 텍스트 추출
+- pdfplumber로 추출하고, 텍스트가 없는 페이지는 PyPDF2로 재시도
+- 큰 PDF는 페이지 구간으로 나누어 여러 프로세스에서 동시에 처리
+- 추출 결과(텍스트 + 페이지별 오프셋/소요 시간)를 PDF 옆 사이드카 파일에 저장하여
+  파일 해시/수정 시각이 같으면 다시 추출하지 않음
+- 이벤트 루프는 결과를 기다리기만 하므로 대량 수집 중에도 API가 응답 가능
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 한 작업이 처리하는 페이지 수 (이보다 긴 PDF는 여러 프로세스로 나누어 처리)
+PAGES_PER_TASK = 4
+
+SIDECAR_SUFFIX = ".text.json"
+SIDECAR_VERSION = 1
+
+
+# ---------------------------------------------------------------
+# 워커 프로세스에서 실행되는 함수
+# ---------------------------------------------------------------
+
+def _count_pages(path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pages(path: str, first: int, last: int) -> List[Tuple[int, str, float, str]]:
+    """first ~ last-1 페이지 추출: (페이지 번호, 텍스트, 소요 시간, 사용 엔진) 목록"""
+    import pdfplumber
+
+    results = []
+    fallback = None
+    with pdfplumber.open(path) as pdf:
+        for index in range(first, last):
+            started = time.perf_counter()
+            engine = "pdfplumber"
+            try:
+                text = pdf.pages[index].extract_text() or ""
+            except Exception:
+                text = ""
+
+            if not text.strip():
+                # 텍스트 레이어를 pdfplumber가 읽지 못하는 경우 PyPDF2로 재시도
+                try:
+                    if fallback is None:
+                        import PyPDF2
+                        fallback = PyPDF2.PdfReader(path)
+                    text = fallback.pages[index].extract_text() or ""
+                    engine = "PyPDF2"
+                except Exception:
+                    text = ""
+
+            results.append((index + 1, text, time.perf_counter() - started, engine))
+    return results
+
+
+# ---------------------------------------------------------------
+# 사이드카 캐시
+# ---------------------------------------------------------------
+
+def _file_hash(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _sidecar_path(path: Path) -> Path:
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def _load_sidecar(path: Path, pages_needed: Optional[int]) -> Optional[Dict]:
+    """유효한 사이드카가 있으면 반환 (수정 시각/크기가 다르면 해시로 재확인)"""
+    sidecar = _sidecar_path(path)
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get("version") != SIDECAR_VERSION:
+        return None
+    if pages_needed is None:
+        if cached["pages_extracted"] < cached["page_count"]:
+            return None
+    elif cached["pages_extracted"] < min(pages_needed, cached["page_count"]):
+        return None
+
+    stat = path.stat()
+    if cached["mtime"] != stat.st_mtime or cached["size"] != stat.st_size:
+        if cached["sha256"] != _file_hash(path):
+            return None
+        # 내용은 같고 시각만 바뀐 경우 (복사/하드링크 등)
+        cached["mtime"], cached["size"] = stat.st_mtime, stat.st_size
+        _write_sidecar(path, cached)
+    return cached
+
+
+def _write_sidecar(path: Path, data: Dict):
+    sidecar = _sidecar_path(path)
+    tmp = sidecar.with_name(f".{sidecar.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        print(f"PDF sidecar write error for {path}: {e}")
+
+
+def _slice_result(cached: Dict, max_pages: Optional[int], elapsed: float, from_cache: bool) -> Dict:
+    pages = cached["pages"] if max_pages is None else cached["pages"][:max_pages]
+    end = pages[-1]["end"] if pages else 0
+    return {
+        "text": cached["text"][:end],
+        "pages": pages,
+        "page_count": cached["page_count"],
+        "seconds": elapsed,
+        "cached": from_cache,
+    }
+
+
+class PDFTextExtractor:
+    """프로세스 풀 PDF 텍스트 추출기
+
+    extract() 결과:
+        text        페이지 텍스트를 '\\n'으로 이은 전체 텍스트
+        pages       [{'page', 'start', 'end', 'seconds', 'engine'}] (text 내 오프셋)
+        page_count  문서 전체 페이지 수
+        seconds     이번 호출의 소요 시간
+        cached      사이드카에서 읽었는지 여부
+    """
+
+    def __init__(self, max_workers: int = PDF_EXTRACT_WORKERS, pages_per_task: int = PAGES_PER_TASK):
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def extract(self, pdf_path, max_pages: Optional[int] = None) -> Dict:
+        """PDF 텍스트 추출 (max_pages: 앞에서부터 추출할 최대 페이지 수)"""
+        started = time.perf_counter()
+        path = Path(pdf_path)
+
+        cached = await asyncio.to_thread(_load_sidecar, path, max_pages)
+        if cached is not None:
+            return _slice_result(cached, max_pages, time.perf_counter() - started, True)
+
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+
+        page_count = await loop.run_in_executor(pool, _count_pages, str(path))
+        pages_to_read = page_count if max_pages is None else min(max_pages, page_count)
+
+        tasks = [
+            loop.run_in_executor(pool, _extract_pages, str(path), first,
+                                 min(first + self.pages_per_task, pages_to_read))
+            for first in range(0, pages_to_read, self.pages_per_task)
+        ]
+        chunks = await asyncio.gather(*tasks)
+
+        texts, pages, offset = [], [], 0
+        for page_no, text, seconds, engine in (page for chunk in chunks for page in chunk):
+            if texts:
+                offset += 1  # 페이지 구분 '\n'
+            texts.append(text)
+            pages.append({"page": page_no, "start": offset, "end": offset + len(text),
+                          "seconds": round(seconds, 4), "engine": engine})
+            offset += len(text)
+
+        stat = path.stat()
+        result = {
+            "version": SIDECAR_VERSION,
+            "sha256": await asyncio.to_thread(_file_hash, path),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "page_count": page_count,
+            "pages_extracted": pages_to_read,
+            "text": "\n".join(texts),
+            "pages": pages,
+        }
+        await asyncio.to_thread(_write_sidecar, path, result)
+
+        return _slice_result(result, max_pages, time.perf_counter() - started, False)
+
+
+def format_timing(result: Dict) -> str:
+    """페이지별 소요 시간 요약 문자열"""
+    pages = result["pages"]
+    if result["cached"]:
+        return f"{len(pages)} pages in {result['seconds']:.2f}s (cached)"
+    if not pages:
+        return f"0 pages in {result['seconds']:.2f}s"
+    slowest = max(pages, key=lambda page: page["seconds"])
+    total = sum(page["seconds"] for page in pages)
+    return (f"{len(pages)} pages in {result['seconds']:.2f}s "
+            f"(page avg {total / len(pages):.2f}s, slowest p{slowest['page']} {slowest['seconds']:.2f}s)")
+
+
+_pdf_extractor: Optional[PDFTextExtractor] = None
+_pdf_extractor_lock = threading.Lock()
+
+
+def get_pdf_extractor() -> PDFTextExtractor:
+    """프로세스 전체에서 공유되는 추출기"""
+    global _pdf_extractor
+    with _pdf_extractor_lock:
+        if _pdf_extractor is None:
+            _pdf_extractor = PDFTextExtractor()
+        return _pdf_extractor
@@ -0,0 +1,304 @@
+"""
+PubMed Harvester - E-utilities 히스토리 서버(WebEnv) 기반 비동기 대량 수집
+- esearch(usehistory=y) 한 번으로 WebEnv/query_key 확보
+- efetch를 200~500건 단위로 가져오며, 다음 페이지 요청과 XML 파싱을 겹쳐 실행
+- 고정 sleep 대신 NCBI 한도에 맞춘 적응형 토큰 버킷 (429/503 시 감속, 성공 시 회복)
+"""
+import asyncio
+import os
+import threading
+import time
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from app.services.http_cache import cached_async_client
+from app.services.pubmed_xml_parser import parse_pubmed_articles
+
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+NCBI_API_KEY = os.getenv("NCBI_API_KEY") or os.getenv("PUBMED_API_KEY", "")
+NCBI_EMAIL = os.getenv("NCBI_EMAIL", "research@spinalsurgery.com")
+NCBI_TOOL = "spinalsurgery-research"
+
+# NCBI 허용 한도: 초당 3회, API 키 사용 시 10회
+NCBI_RATE_LIMIT = 10.0 if NCBI_API_KEY else 3.0
+
+DEFAULT_BATCH_SIZE = 200
+MAX_BATCH_SIZE = 500
+MAX_RETRIES = 5
+
+
+class AdaptiveRateLimiter:
+    """적응형 토큰 버킷
+
+    429/503 응답을 받으면 속도를 절반으로 줄이고 Retry-After 만큼 다음 요청을
+    미루며, 성공할 때마다 원래 한도까지 조금씩 회복한다 (AIMD).
+    스레드 안전하므로 여러 워커 스레드와 이벤트 루프가 하나를 공유할 수 있다.
+    """
+
+    def __init__(self, rate: float, min_rate: float = 0.5, recovery: float = 0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """요청 한 건을 예약하고 기다려야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(1.0, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """동기 코드용 대기"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """비동기 코드용 대기"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """한도 초과 응답: 감속 후 retry_after 동안 새 요청 보류"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            delay = retry_after if retry_after else 1.0 / self.rate
+            self._tokens = min(self._tokens, 0.0) - delay * self.rate
+
+    def reward(self):
+        """성공 응답: 원래 한도까지 점진적으로 회복"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery)
+
+
+_ncbi_rate_limiter = AdaptiveRateLimiter(NCBI_RATE_LIMIT)
+
+
+def get_ncbi_rate_limiter() -> AdaptiveRateLimiter:
+    """프로세스 전체에서 공유되는 NCBI 요청 속도 제한기"""
+    return _ncbi_rate_limiter
+
+
+class PubMedHarvester:
+    """비동기 PubMed 수집기
+
+    사용 예:
+        async with PubMedHarvester() as harvester:
+            history = await harvester.search(query)
+            async for records in harvester.fetch(history, max_records=5000):
+                ...
+
+    parse_page는 efetch 응답(bytes)을 받아 레코드 목록을 반환하는 함수이며
+    (기본값: pubmed_xml_parser의 정규화 레코드),
+    스레드 풀에서 실행되어 다음 페이지 다운로드와 동시에 진행된다.
+    """
+
+    def __init__(self,
+                 api_key: str = NCBI_API_KEY,
+                 email: str = NCBI_EMAIL,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 prefetch: int = 2,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 timeout: float = 60.0,
+                 client: Optional[httpx.AsyncClient] = None):
+        self.api_key = api_key
+        self.email = email
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.prefetch = max(1, prefetch)
+        self.rate_limiter = rate_limiter or get_ncbi_rate_limiter()
+        self.timeout = timeout
+        # 외부에서 받은 클라이언트는 호출자가 수명을 관리 (keep-alive 연결 재사용)
+        # 속도 제한이 적용되려면 http_cache.cached_async_client()로 만든 클라이언트여야 한다
+        self._shared_client = client
+        self._client: Optional[httpx.AsyncClient] = client
+
+    async def __aenter__(self):
+        if self._shared_client is None:
+            self._client = cached_async_client(timeout=self.timeout, follow_redirects=True)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._shared_client is None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, endpoint: str, params: Dict, post: bool = False) -> httpx.Response:
+        """속도 제한과 재시도를 적용한 E-utilities 요청
+
+        속도 제한은 전송 계층에서 실제 네트워크 요청 직전에만 적용되므로
+        응답 캐시 적중은 NCBI 한도를 소모하지 않는다.
+        """
+        url = f"{EUTILS_BASE_URL}/{endpoint}"
+        params = dict(params, tool=NCBI_TOOL, email=self.email)
+        if self.api_key:
+            params['api_key'] = self.api_key
+
+        last_error = None
+        for _ in range(MAX_RETRIES):
+            extensions = {'throttle': self.rate_limiter.acquire_async}
+            try:
+                if post:
+                    response = await self._client.post(url, data=params, extensions=extensions)
+                else:
+                    response = await self._client.get(url, params=params, extensions=extensions)
+            except httpx.TransportError as e:
+                last_error = e
+                self.rate_limiter.penalize()
+                continue
+
+            if response.status_code in (429, 503):
+                # NCBI 한도 초과 또는 일시적 과부하
+                last_error = httpx.HTTPStatusError(
+                    f"NCBI {endpoint} returned {response.status_code}",
+                    request=response.request, response=response
+                )
+                self.rate_limiter.penalize(self._retry_after(response))
+                continue
+
+            response.raise_for_status()
+            if not response.extensions.get('from_cache'):
+                self.rate_limiter.reward()
+            return response
+
+        raise last_error
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        try:
+            return float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            return None
+
+    async def search(self, query: str, sort: str = 'relevance',
+                     retmax: int = 0, retstart: int = 0) -> Dict:
+        """esearch (usehistory=y): 전체 건수, WebEnv/query_key, retmax개의 PMID 반환"""
+        params = {
+            'db': 'pubmed',
+            'term': query,
+            'usehistory': 'y',
+            'retmode': 'json',
+            'retmax': retmax,
+            'retstart': retstart,
+        }
+        if sort:
+            params['sort'] = sort
+
+        response = await self._request('esearch.fcgi', params)
+        result = response.json().get('esearchresult', {})
+
+        return {
+            'count': int(result.get('count', 0)),
+            'webenv': result.get('webenv'),
+            'query_key': result.get('querykey'),
+            'ids': result.get('idlist', []),
+        }
+
+    async def search_ids(self, query: str, max_results: int, sort: str = 'relevance') -> List[str]:
+        """검색어에 해당하는 PMID 목록"""
+        history = await self.search(query, sort=sort, retmax=max_results)
+        return history['ids']
+
+    async def fetch(self, history: Dict, start: int = 0,
+                    max_records: Optional[int] = None,
+                    parse_page: Callable = parse_pubmed_articles) -> AsyncIterator[List]:
+        """히스토리 서버에서 start부터 max_records건을 페이지 단위로 수집"""
+        end = history['count']
+        if max_records is not None:
+            end = min(end, start + max_records)
+        if start >= end or not history.get('webenv'):
+            return
+
+        fetchers = [
+            partial(self._efetch_history_page, history, retstart, min(self.batch_size, end - retstart))
+            for retstart in range(start, end, self.batch_size)
+        ]
+        async for records in self._pipeline(fetchers, parse_page):
+            yield records
+
+    async def fetch_ids(self, pmids: List[str],
+                        parse_page: Callable = parse_pubmed_articles) -> AsyncIterator[List]:
+        """PMID 목록을 batch_size 단위 efetch(POST)로 수집"""
+        fetchers = [
+            partial(self._efetch_id_page, pmids[i:i + self.batch_size])
+            for i in range(0, len(pmids), self.batch_size)
+        ]
+        async for records in self._pipeline(fetchers, parse_page):
+            yield records
+
+    async def collect(self, query: str, max_records: int, start: int = 0,
+                      sort: str = 'relevance',
+                      parse_page: Callable = parse_pubmed_articles) -> Dict:
+        """검색 + 전체 수집을 한 번에 수행"""
+        history = await self.search(query, sort=sort)
+        records = []
+        async for page in self.fetch(history, start, max_records, parse_page):
+            records.extend(page)
+        return {'count': history['count'], 'history': history, 'records': records}
+
+    async def _efetch_history_page(self, history: Dict, retstart: int, retmax: int) -> bytes:
+        response = await self._request('efetch.fcgi', {
+            'db': 'pubmed',
+            'WebEnv': history['webenv'],
+            'query_key': history['query_key'],
+            'retstart': retstart,
+            'retmax': retmax,
+            'retmode': 'xml',
+        })
+        return response.content
+
+    async def _efetch_id_page(self, pmids: List[str]) -> bytes:
+        response = await self._request('efetch.fcgi', {
+            'db': 'pubmed',
+            'id': ','.join(pmids),
+            'retmode': 'xml',
+        }, post=True)
+        return response.content
+
+    async def _pipeline(self, fetchers: List[Callable], parse_page: Callable) -> AsyncIterator[List]:
+        """생산자/소비자 파이프라인
+
+        fetchers는 페이지 bytes를 반환하는 코루틴 함수 목록이다.
+        생산자는 페이지 요청을 순서대로 태스크로 띄워 크기 제한 큐에 넣고,
+        소비자는 순서대로 결과를 기다려 스레드 풀에서 파싱한다.
+        큐가 가득 차면 생산자가 멈추므로 메모리에 쌓이는 페이지 수가 제한된다.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+
+        async def produce():
+            for fetcher in fetchers:
+                task = asyncio.ensure_future(fetcher())
+                try:
+                    await queue.put(task)
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                task = await queue.get()
+                if task is None:
+                    break
+                page = await task
+                yield await loop.run_in_executor(None, parse_page, page)
+        finally:
+            producer.cancel()
+            while not queue.empty():
+                task = queue.get_nowait()
+                if task is not None:
+                    task.cancel()
@@ -1,18 +1,18 @@
-import httpx
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional
-import asyncio
+from typing import List, Dict
 from datetime import datetime
 import os
 import json
 import re
 from urllib.parse import quote
 
+from app.services.pubmed_harvester import NCBI_API_KEY, PubMedHarvester
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+
 class PubMedSearchService:
     def __init__(self):
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
         self.email = "research@spinalsurgery.com"  # Required by NCBI
-        self.api_key = None  # Optional: can improve rate limits
+        self.api_key = NCBI_API_KEY or None  # Optional: can improve rate limits
         self.results_dir = "/home/drjang00/DevEnvironments/spinalsurgery-research/research_papers"
         
     async def search_plif_papers(self, 
@@ -32,152 +32,59 @@ class PubMedSearchService:
         query = " AND ".join(search_terms)
         print(f"Search query: {query}")
         
-        # Search PubMed
-        search_results = await self._search_pubmed(query, max_results)
-        
-        # Get detailed information for each paper
-        papers = []
-        if search_results:
-            paper_details = await self._fetch_paper_details(search_results)
-            papers = paper_details
+        # Search PubMed via the history server and fetch records in large batches
+        async with self._harvester() as harvester:
+            result = await harvester.collect(query, max_results, parse_page=self._parse_page)
             
-        return papers
+        print(f"Total results found: {result['count']}")
+        return result['records']
+    
+    def _harvester(self) -> PubMedHarvester:
+        """Harvester sharing the process-wide NCBI rate limiter"""
+        return PubMedHarvester(api_key=self.api_key or "", email=self.email)
+    
+    def _parse_page(self, xml_data: bytes) -> List[Dict]:
+        """Parse one efetch page (runs in the harvester's thread pool)"""
+        return [self._parse_article(record) for record in iter_pubmed_articles(xml_data)]
     
     async def _search_pubmed(self, query: str, max_results: int) -> List[str]:
         """Search PubMed and return list of PMIDs"""
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            params = {
-                'db': 'pubmed',
-                'term': query,
-                'retmax': max_results,
-                'retmode': 'json',
-                'email': self.email
-            }
+        async with self._harvester() as harvester:
+            id_list = await harvester.search_ids(query, max_results)
             
-            if self.api_key:
-                params['api_key'] = self.api_key
-                
-            response = await client.get(f"{self.base_url}/esearch.fcgi", params=params)
-            
-            print(f"Search URL: {response.url}")
-            print(f"Response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                result = data.get('esearchresult', {})
-                count = result.get('count', '0')
-                print(f"Total results found: {count}")
-                id_list = result.get('idlist', [])
-                print(f"Retrieved {len(id_list)} PMIDs")
-                return id_list
-            
-        return []
+        print(f"Retrieved {len(id_list)} PMIDs")
+        return id_list
     
     async def _fetch_paper_details(self, pmids: List[str]) -> List[Dict]:
         """Fetch detailed information for each PMID"""
         papers = []
         
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            # Fetch in batches of 20
-            for i in range(0, len(pmids), 20):
-                batch = pmids[i:i+20]
-                
-                params = {
-                    'db': 'pubmed',
-                    'id': ','.join(batch),
-                    'retmode': 'xml',
-                    'email': self.email
-                }
-                
-                if self.api_key:
-                    params['api_key'] = self.api_key
-                    
-                response = await client.get(f"{self.base_url}/efetch.fcgi", params=params)
-                
-                if response.status_code == 200:
-                    # Parse XML response
-                    root = ET.fromstring(response.text)
-                    
-                    for article in root.findall('.//PubmedArticle'):
-                        paper = self._parse_article(article)
-                        if paper:
-                            papers.append(paper)
-                            
-                # Be nice to NCBI servers
-                await asyncio.sleep(0.5)
+        async with self._harvester() as harvester:
+            async for page in harvester.fetch_ids(pmids, parse_page=self._parse_page):
+                papers.extend(page)
                 
         return papers
     
-    def _parse_article(self, article_elem) -> Optional[Dict]:
-        """Parse article XML element"""
-        try:
-            # Extract basic information
-            pmid = article_elem.find('.//PMID').text
-            
-            article = article_elem.find('.//Article')
-            title = article.find('.//ArticleTitle').text
-            
-            # Abstract
-            abstract_elem = article.find('.//Abstract')
-            abstract = ""
-            if abstract_elem is not None:
-                abstract_texts = []
-                for abstract_text in abstract_elem.findall('.//AbstractText'):
-                    label = abstract_text.get('Label', '')
-                    text = abstract_text.text or ''
-                    if label:
-                        abstract_texts.append(f"{label}: {text}")
-                    else:
-                        abstract_texts.append(text)
-                abstract = '\n'.join(abstract_texts)
-            
-            # Authors
-            authors = []
-            for author in article.findall('.//Author'):
-                last_name = author.find('.//LastName')
-                fore_name = author.find('.//ForeName')
-                if last_name is not None:
-                    name = last_name.text
-                    if fore_name is not None:
-                        name = f"{fore_name.text} {name}"
-                    authors.append(name)
-            
-            # Journal info
-            journal = article.find('.//Journal')
-            journal_title = journal.find('.//Title').text if journal.find('.//Title') is not None else ""
-            
-            pub_date_elem = journal.find('.//PubDate')
-            year = pub_date_elem.find('.//Year').text if pub_date_elem.find('.//Year') is not None else ""
-            
-            # DOI
-            doi = None
-            for article_id in article_elem.findall('.//ArticleId'):
-                if article_id.get('IdType') == 'doi':
-                    doi = article_id.text
-                    break
-            
-            # Check if PMC full text is available
-            pmc_id = None
-            for article_id in article_elem.findall('.//ArticleId'):
-                if article_id.get('IdType') == 'pmc':
-                    pmc_id = article_id.text
-                    break
-            
-            return {
-                'pmid': pmid,
-                'title': title,
-                'abstract': abstract,
-                'authors': authors,
-                'journal': journal_title,
-                'year': year,
-                'doi': doi,
-                'pmc_id': pmc_id,
-                'has_full_text': pmc_id is not None
-            }
-            
-        except Exception as e:
-            print(f"Error parsing article: {e}")
-            return None
+    def _parse_article(self, record: Dict) -> Dict:
+        """Convert a normalized PubMed record to the metadata format saved by this service"""
+        abstract = '\n'.join(
+            f"{section['label']}: {section['text']}" if section['label'] else section['text']
+            for section in record['abstract_sections']
+        )
+        
+        return {
+            'pmid': record['pmid'],
+            'title': record['title'],
+            'abstract': abstract,
+            'authors': record['author_names'],
+            'journal': record['journal'],
+            'year': record['year'],
+            'doi': record['doi'] or None,
+            'pmc_id': record['pmc_id'] or None,
+            'has_full_text': bool(record['pmc_id']),
+            'keywords': record['keywords'],
+            'mesh_terms': [term['descriptor'] for term in record['mesh_terms']]
+        }
     
     async def download_and_save_papers(self, search_folder: str = "plif_2year_outcomes"):
         """Search, download and save papers"""
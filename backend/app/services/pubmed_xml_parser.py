@@ -0,0 +1,166 @@
+"""
+PubMed XML Parser - efetch(PubmedArticleSet) 스트리밍 파서
+- xml.etree.ElementTree.iterparse로 논문 단위 처리 후 즉시 요소 해제 (메모리 일정)
+- 모든 서비스가 같은 정규화된 레코드를 사용하도록 단일 구현 제공
+"""
+import io
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Union
+
+XmlSource = Union[bytes, str, io.IOBase]
+
+_YEAR_RE = re.compile(r'(\d{4})')
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    """하위 태그(<i>, <sup> 등)를 포함한 전체 텍스트"""
+    if elem is None:
+        return ''
+    return ''.join(elem.itertext()).strip()
+
+
+def _abstract_sections(article: ET.Element) -> List[Dict]:
+    sections = []
+    for abstract_text in article.iterfind('Abstract/AbstractText'):
+        text = _text(abstract_text)
+        if not text:
+            continue
+        sections.append({
+            'label': abstract_text.get('Label', ''),
+            'category': abstract_text.get('NlmCategory', ''),
+            'text': text,
+        })
+    return sections
+
+
+def _authors(article: ET.Element) -> List[Dict]:
+    authors = []
+    for author in article.iterfind('AuthorList/Author'):
+        last_name = author.findtext('LastName', '')
+        fore_name = author.findtext('ForeName', '')
+        collective = _text(author.find('CollectiveName'))
+        if not (last_name or collective):
+            continue
+        authors.append({
+            'last_name': last_name,
+            'fore_name': fore_name,
+            'initials': author.findtext('Initials', ''),
+            'collective_name': collective,
+            'name': f"{fore_name} {last_name}".strip() if last_name else collective,
+            'affiliations': [
+                _text(affiliation) for affiliation in author.iterfind('AffiliationInfo/Affiliation')
+            ],
+        })
+    return authors
+
+
+def _year(journal_issue: Optional[ET.Element], article: ET.Element) -> str:
+    if journal_issue is not None:
+        pub_date = journal_issue.find('PubDate')
+        if pub_date is not None:
+            year = pub_date.findtext('Year')
+            if year:
+                return year
+            match = _YEAR_RE.search(pub_date.findtext('MedlineDate', ''))
+            if match:
+                return match.group(1)
+    article_date = article.find('ArticleDate/Year')
+    return article_date.text if article_date is not None and article_date.text else ''
+
+
+def parse_article_element(element: ET.Element) -> Optional[Dict]:
+    """PubmedArticle 요소 하나를 정규화된 레코드로 변환"""
+    citation = element.find('MedlineCitation')
+    if citation is None:
+        return None
+    article = citation.find('Article')
+    if article is None:
+        return None
+
+    pmid = citation.findtext('PMID', '')
+
+    # 논문 자체의 식별자 (ReferenceList 안의 참고문헌 ID는 제외)
+    ids = {}
+    for article_id in element.iterfind('PubmedData/ArticleIdList/ArticleId'):
+        id_type = article_id.get('IdType')
+        if id_type and article_id.text and id_type not in ids:
+            ids[id_type] = article_id.text.strip()
+    if 'doi' not in ids:
+        for location in article.iterfind('ELocationID'):
+            if location.get('EIdType') == 'doi' and location.text:
+                ids['doi'] = location.text.strip()
+                break
+
+    sections = _abstract_sections(article)
+    abstract = '\n\n'.join(
+        f"{section['label']}: {section['text']}" if section['label'] else section['text']
+        for section in sections
+    )
+
+    authors = _authors(article)
+
+    journal = article.find('Journal')
+    journal_issue = journal.find('JournalIssue') if journal is not None else None
+
+    mesh_terms = []
+    for heading in citation.iterfind('MeshHeadingList/MeshHeading'):
+        descriptor = heading.find('DescriptorName')
+        if descriptor is None or not descriptor.text:
+            continue
+        mesh_terms.append({
+            'descriptor': descriptor.text,
+            'ui': descriptor.get('UI', ''),
+            'major': descriptor.get('MajorTopicYN') == 'Y',
+            'qualifiers': [q.text for q in heading.iterfind('QualifierName') if q.text],
+        })
+
+    return {
+        'pmid': pmid,
+        'doi': ids.get('doi', ''),
+        'pmc_id': ids.get('pmc', ''),
+        'title': _text(article.find('ArticleTitle')),
+        'abstract': abstract,
+        'abstract_sections': sections,
+        'authors': authors,
+        'author_names': [author['name'] for author in authors],
+        'journal': _text(journal.find('Title')) if journal is not None else '',
+        'journal_abbreviation': journal.findtext('ISOAbbreviation', '') if journal is not None else '',
+        'volume': journal_issue.findtext('Volume', '') if journal_issue is not None else '',
+        'issue': journal_issue.findtext('Issue', '') if journal_issue is not None else '',
+        'pages': article.findtext('Pagination/MedlinePgn', ''),
+        'year': _year(journal_issue, article),
+        'language': article.findtext('Language', ''),
+        'publication_types': [_text(pt) for pt in article.iterfind('PublicationTypeList/PublicationType')],
+        'mesh_terms': mesh_terms,
+        'keywords': [_text(kw) for kw in citation.iterfind('KeywordList/Keyword') if _text(kw)],
+    }
+
+
+def iter_pubmed_articles(source: XmlSource) -> Iterator[Dict]:
+    """PubmedArticleSet XML을 스트리밍으로 파싱하여 레코드를 하나씩 반환
+
+    source는 bytes, str, 파일 객체 또는 파일 경로(str, '<'로 시작하지 않는 경우)이다.
+    처리한 논문 요소는 바로 비우므로 파일 크기와 무관하게
+    한 번에 논문 하나 분량의 트리만 메모리에 유지된다.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    elif isinstance(source, str) and source.lstrip().startswith('<'):
+        source = io.BytesIO(source.encode('utf-8'))
+
+    for _, elem in ET.iterparse(source, events=('end',)):
+        if elem.tag == 'PubmedArticle':
+            record = parse_article_element(elem)
+            if record:
+                yield record
+        elif elem.tag != 'PubmedBookArticle':
+            continue
+
+        # 처리가 끝난 논문의 하위 트리 해제 (루트에는 빈 요소만 남음)
+        elem.clear()
+
+
+def parse_pubmed_articles(source: XmlSource) -> List[Dict]:
+    """efetch 응답 전체를 레코드 목록으로 변환"""
+    return list(iter_pubmed_articles(source))
@@ -17,6 +17,11 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from scholarly import scholarly
 import pubmed_parser as pp
 
+from app.services.llm_cache import cached_generate
+
+PAPER_STRUCTURE_MODEL = "claude-3-opus-20240229"
+PAPER_STRUCTURE_OPTIONS = {"max_tokens": 2000, "temperature": 0.7}
+
 class ResearchAIService:
     def __init__(self):
         self.claude_client = anthropic.Anthropic(
@@ -44,7 +49,9 @@ class ResearchAIService:
         await self._organize_documents(project_path, documents)
         
         # 4. Generate paper structure using Claude
-        paper_structure = await self._generate_paper_structure(research_data, documents)
+        paper_structure = await self._generate_paper_structure(
+            research_data, documents, bypass_cache=research_data.get('bypass_cache', False)
+        )
         
         # 5. Generate mock data
         mock_data = await self._generate_mock_data(research_data, paper_structure)
@@ -223,8 +230,9 @@ Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         with open(lit_path / "summary.json", "w", encoding="utf-8") as f:
             json.dump(summary, f, indent=2, ensure_ascii=False)
     
-    async def _generate_paper_structure(self, research_data: Dict[str, Any], documents: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate paper structure using Claude"""
+    async def _generate_paper_structure(self, research_data: Dict[str, Any], documents: List[Dict[str, Any]],
+                                        bypass_cache: bool = False) -> Dict[str, Any]:
+        """Generate paper structure using Claude (identical prompts reuse the cached response)"""
         
         # Prepare context from documents
         doc_summaries = []
@@ -253,16 +261,23 @@ Generate a detailed paper structure including:
 
 Provide the structure in JSON format with sections and subsections."""
 
-        try:
+        async def generate():
             response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=2000,
-                temperature=0.7,
-                messages=[{"role": "user", "content": prompt}]
+                model=PAPER_STRUCTURE_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                **PAPER_STRUCTURE_OPTIONS
+            )
+            return response.content[0].text
+
+        try:
+            structure_text = await cached_generate(
+                "paper_structure",
+                PAPER_STRUCTURE_MODEL,
+                prompt,
+                generate,
+                options=PAPER_STRUCTURE_OPTIONS,
+                bypass=bypass_cache
             )
-            
-            # Parse Claude's response
-            structure_text = response.content[0].text
             
             # Try to extract JSON from response
             import re
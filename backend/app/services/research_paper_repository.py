@@ -0,0 +1,213 @@
+"""
+Research Paper Repository - papers_metadata.json 메모리 색인
+- 파일을 한 번만 읽고, 수정 시각(mtime/크기)이 바뀌었을 때만 다시 읽음
+- fusion_type / year / has_full_text 보조 색인
+- 제목 / 초록 / 저자 / 키워드를 미리 소문자로 바꾼 토큰 색인 (search_query)
+- 필터는 색인 집합의 교집합으로 계산하므로 비용이 전체 논문 수가 아니라 결과 수에 비례
+"""
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.services.paper_catalog import RESEARCH_PAPERS_DIR
+
+PAPERS_METADATA_PATH = str(RESEARCH_PAPERS_DIR / "lumbar_fusion_2year_outcomes" / "papers_metadata.json")
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# 부분 단어 검색 결과를 기억해 둘 토큰 수
+TOKEN_MEMO_SIZE = 1024
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(_TOKEN_PATTERN.findall(text))
+
+
+class _PaperIndex:
+    """한 버전의 papers_metadata.json에 대한 색인 (만들어진 뒤에는 읽기 전용)"""
+
+    def __init__(self, papers: List[Dict]):
+        self.papers = papers
+        self.by_pmid: Dict[str, int] = {}
+        self.by_fusion_type: Dict[str, List[int]] = defaultdict(list)
+        self.by_year: Dict[str, List[int]] = defaultdict(list)
+        self.by_full_text: Dict[bool, List[int]] = defaultdict(list)
+        self.by_token: Dict[str, Set[int]] = defaultdict(set)
+        # 검색 결과 확인용: 논문별 소문자 검색 대상 (제목, 초록, 저자 목록, 키워드 목록)
+        self.search_fields: List[Tuple[str, str, List[str], List[str]]] = []
+
+        for position, paper in enumerate(papers):
+            self.by_pmid.setdefault(paper['pmid'], position)
+            self.by_fusion_type[paper['fusion_type'].lower()].append(position)
+            self.by_year[paper['year']].append(position)
+            self.by_full_text[bool(paper['has_full_text'])].append(position)
+
+            fields = (
+                paper['title'].lower(),
+                paper['abstract'].lower(),
+                [author.lower() for author in paper['authors']],
+                [keyword.lower() for keyword in paper.get('keywords', [])],
+            )
+            self.search_fields.append(fields)
+            for token in _tokens(' '.join([fields[0], fields[1], *fields[2], *fields[3]])):
+                self.by_token[token].add(position)
+
+        self._token_memo: Dict[str, Set[int]] = {}
+
+        self.fusion_types = sorted({paper['fusion_type'] for paper in papers})
+        self.years = sorted(self.by_year, reverse=True)
+
+    def _search_candidates(self, query: str) -> Optional[Set[int]]:
+        """search_query를 포함할 수 있는 논문 후보 (토큰이 없는 검색어면 None)
+
+        검색어의 각 토큰은 논문의 어떤 단어에 부분 문자열로 포함되어야 하므로,
+        토큰별 후보의 교집합은 실제 결과를 모두 포함한다.
+        """
+        candidates = None
+        # 가장 긴 토큰부터: 일치하는 어휘가 가장 적을 가능성이 높음
+        for token in sorted(set(_TOKEN_PATTERN.findall(query)), key=len, reverse=True):
+            matching = self._token_matches(token)
+            candidates = set(matching) if candidates is None else candidates & matching
+            if not candidates:
+                break
+        return candidates
+
+    def _token_matches(self, token: str) -> Set[int]:
+        """token을 부분 문자열로 포함하는 어휘의 논문 (예: 'fusi' → 'fusion'), 어휘만 훑고 결과는 기억"""
+        matching = self._token_memo.get(token)
+        if matching is None:
+            matching = set()
+            for word, positions in self.by_token.items():
+                if token in word:
+                    matching |= positions
+            if len(self._token_memo) >= TOKEN_MEMO_SIZE:
+                self._token_memo.clear()
+            self._token_memo[token] = matching
+        return matching
+
+    def _matches(self, position: int, query: str) -> bool:
+        title, abstract, authors, keywords = self.search_fields[position]
+        return (query in title or query in abstract or
+                any(query in author for author in authors) or
+                any(query in keyword for keyword in keywords))
+
+    def filter(self, fusion_type: Optional[str] = None, year: Optional[str] = None,
+               has_full_text: Optional[bool] = None,
+               search_query: Optional[str] = None, stop: Optional[int] = None) -> Sequence[int]:
+        """조건에 맞는 논문 위치 (원래 파일 순서, stop개를 찾으면 중단)"""
+        sets: List[Set[int]] = []
+
+        if fusion_type:
+            needle = fusion_type.lower()
+            matching = set()
+            for key, positions in self.by_fusion_type.items():
+                if needle in key:
+                    matching.update(positions)
+            sets.append(matching)
+
+        if year:
+            sets.append(set(self.by_year.get(year, ())))
+
+        if has_full_text is not None:
+            sets.append(set(self.by_full_text.get(has_full_text, ())))
+
+        query = search_query.lower() if search_query else None
+        if query:
+            candidates = self._search_candidates(query)
+            if candidates is not None:
+                sets.append(candidates)
+
+        if sets:
+            sets.sort(key=len)
+            result = sorted(sets[0].intersection(*sets[1:]))
+        else:
+            # 필터가 없으면 이미 파일 순서인 range를 그대로 사용 (전체 목록을 만들지 않음)
+            result = range(len(self.papers))
+
+        if not query:
+            return result if stop is None else result[:stop]
+
+        # 후보만 앞에서부터 부분 문자열 확인 (미리 소문자로 바꾼 필드 사용)
+        matched = []
+        for position in result:
+            if self._matches(position, query):
+                matched.append(position)
+                if stop is not None and len(matched) >= stop:
+                    break
+        return matched
+
+
+class ResearchPaperRepository:
+    """papers_metadata.json 저장소
+
+    조회할 때마다 파일의 mtime/크기만 확인하고, 바뀌었으면 다시 읽어 색인을 새로 만든다.
+    반환되는 논문은 복사본이므로 호출자가 수정해도 색인에는 영향이 없다.
+    """
+
+    def __init__(self, metadata_path: str = PAPERS_METADATA_PATH):
+        self.metadata_path = metadata_path
+        self._index: Optional[_PaperIndex] = None
+        self._signature: Optional[Tuple[float, int]] = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[_PaperIndex]:
+        try:
+            stat = os.stat(self.metadata_path)
+        except OSError:
+            return None
+
+        signature = (stat.st_mtime, stat.st_size)
+        index = self._index
+        if index is not None and self._signature == signature:
+            return index
+
+        with self._lock:
+            if self._index is None or self._signature != signature:
+                with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                    papers = json.load(f)
+                self._index = _PaperIndex(papers)
+                self._signature = signature
+            return self._index
+
+    def exists(self) -> bool:
+        return self._current() is not None
+
+    def query(self, skip: int = 0, limit: int = 20, fusion_type: Optional[str] = None,
+              year: Optional[str] = None, has_full_text: Optional[bool] = None,
+              search_query: Optional[str] = None) -> Optional[List[Dict]]:
+        """필터 + 페이지 (파일이 없으면 None)"""
+        index = self._current()
+        if index is None:
+            return None
+        positions = index.filter(fusion_type, year, has_full_text, search_query, stop=skip + limit)
+        return [dict(index.papers[position]) for position in positions[skip:skip + limit]]
+
+    def get(self, pmid: str) -> Optional[Dict]:
+        index = self._current()
+        if index is None or pmid not in index.by_pmid:
+            return None
+        return dict(index.papers[index.by_pmid[pmid]])
+
+    def fusion_types(self) -> List[str]:
+        index = self._current()
+        return list(index.fusion_types) if index else []
+
+    def years(self) -> List[str]:
+        index = self._current()
+        return list(index.years) if index else []
+
+
+_research_paper_repository: Optional[ResearchPaperRepository] = None
+_research_paper_repository_lock = threading.Lock()
+
+
+def get_research_paper_repository() -> ResearchPaperRepository:
+    """프로세스 전체에서 공유되는 저장소"""
+    global _research_paper_repository
+    with _research_paper_repository_lock:
+        if _research_paper_repository is None:
+            _research_paper_repository = ResearchPaperRepository()
+        return _research_paper_repository
@@ -7,6 +7,9 @@ from playwright.async_api import async_playwright
 import re
 import json
 
+from app.services.pubmed_harvester import PubMedHarvester
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+
 
 class ScraperService:
     def __init__(self):
@@ -39,59 +42,30 @@ class ScraperService:
         return all_results[:limit]
     
     async def _search_pubmed(self, query: str, limit: int) -> List[Dict]:
-        """Search papers from PubMed"""
-        results = []
-        
-        async with httpx.AsyncClient() as client:
-            # Search for papers
-            search_url = f"{self.pubmed_base}/?term={query}&size={limit}&format=json"
-            response = await client.get(search_url)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Parse search results
-                articles = soup.find_all('article', class_='full-docsum')
-                
-                for article in articles[:limit]:
-                    paper = self._parse_pubmed_article(article)
-                    if paper:
-                        results.append(paper)
-                        
-        return results
+        """Search papers from PubMed (E-utilities instead of scraping the HTML result page)"""
+        async with PubMedHarvester() as harvester:
+            result = await harvester.collect(query, limit, parse_page=self._parse_pubmed_page)
+        return result['records']
     
-    def _parse_pubmed_article(self, article) -> Optional[Dict]:
-        """Parse PubMed article element"""
-        try:
-            title_elem = article.find('a', class_='docsum-title')
-            title = title_elem.text.strip() if title_elem else ""
-            
-            authors_elem = article.find('span', class_='docsum-authors')
-            authors = authors_elem.text.strip() if authors_elem else ""
-            
-            journal_elem = article.find('span', class_='docsum-journal-citation')
-            journal = journal_elem.text.strip() if journal_elem else ""
-            
-            pmid_elem = article.find('span', class_='docsum-pmid')
-            pmid = pmid_elem.text.strip() if pmid_elem else ""
-            
-            # Extract year from journal citation
-            year_match = re.search(r'(\d{4})', journal)
-            year = int(year_match.group(1)) if year_match else None
-            
-            return {
-                "title": title,
-                "authors": [a.strip() for a in authors.split(',')],
-                "journal": journal,
-                "pmid": pmid,
-                "year": year,
-                "source": "PubMed",
-                "url": f"{self.pubmed_base}/{pmid}",
-                "scraped_at": datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            print(f"Error parsing PubMed article: {e}")
-            return None
+    def _parse_pubmed_page(self, xml_data: bytes) -> List[Dict]:
+        """Parse one efetch page"""
+        return [self._parse_pubmed_article(record) for record in iter_pubmed_articles(xml_data)]
+    
+    def _parse_pubmed_article(self, record: Dict) -> Dict:
+        """Convert a normalized PubMed record to a search result"""
+        pmid = record['pmid']
+        year = record['year']
+        return {
+            "title": record['title'],
+            "authors": record['author_names'],
+            "journal": record['journal'],
+            "pmid": pmid,
+            "doi": record['doi'],
+            "year": int(year) if year.isdigit() else None,
+            "source": "PubMed",
+            "url": f"{self.pubmed_base}/{pmid}",
+            "scraped_at": datetime.utcnow().isoformat()
+        }
     
     async def _search_google_scholar(self, query: str, limit: int) -> List[Dict]:
         """Search papers from Google Scholar using Playwright"""
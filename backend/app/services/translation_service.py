@@ -0,0 +1,296 @@
+"""
+Translation Service - 영문 → 한글 번역 단계
+- 텍스트를 문장 단위 세그먼트로 나누고, 세그먼트별 번역 결과를 SQLite에 영구 캐시
+  (키: 문장 해시 + 언어 쌍 + 백엔드 이름)
+- 캐시에 없는 세그먼트만 모아 요청당 최대 글자 수까지 묶어서 번역
+- 번역 요청은 스레드 풀에서 실행하고 동시 요청 수를 제한하여 이벤트 루프를 막지 않음
+- 백엔드 교체 가능 (기본 Google, TRANSLATION_BACKEND=identity 등으로 오프라인 대체)
+
+같은 논문을 다시 받으면 제목/초록/요약이 모두 캐시에서 바로 채워진다.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlite_manager import get_db
+
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH', 'translation_cache.db')
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'google')
+TRANSLATION_CONCURRENCY = int(os.getenv('TRANSLATION_CONCURRENCY', '2'))
+
+# Google 번역 요청 한 번의 글자 수 한도(5000)보다 약간 작게
+MAX_REQUEST_CHARS = 4500
+
+# 문장 경계(. ! ? 뒤 공백) 또는 줄바꿈에서 나눔 - 구분자는 그대로 보존
+_SEGMENT_PATTERN = re.compile(r'((?<=[.!?])\s+|\s*\n\s*)')
+
+
+# ---------------------------------------------------------------
+# 백엔드
+# ---------------------------------------------------------------
+
+class TranslationBackend:
+    """번역 백엔드 인터페이스
+
+    translate_batch()는 스레드 풀에서 호출되며, 입력과 같은 길이/순서의
+    번역 목록을 반환해야 한다. 각 세그먼트에는 줄바꿈이 없다.
+    """
+
+    name = 'base'
+    max_request_chars = MAX_REQUEST_CHARS
+
+    def translate_batch(self, segments: List[str], source: str, target: str) -> List[str]:
+        raise NotImplementedError
+
+
+class GoogleTranslateBackend(TranslationBackend):
+    """deep_translator의 GoogleTranslator 사용
+
+    여러 세그먼트를 줄바꿈으로 이어 한 번에 요청하고 결과를 줄 단위로 다시 나눈다.
+    줄 수가 맞지 않으면 해당 묶음만 세그먼트별로 다시 요청한다.
+    """
+
+    name = 'google'
+
+    def __init__(self):
+        self._translators: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def _translator(self, source: str, target: str):
+        from deep_translator import GoogleTranslator
+
+        with self._lock:
+            translator = self._translators.get((source, target))
+            if translator is None:
+                translator = GoogleTranslator(source=source, target=target)
+                self._translators[(source, target)] = translator
+            return translator
+
+    def translate_batch(self, segments: List[str], source: str, target: str) -> List[str]:
+        translator = self._translator(source, target)
+        if len(segments) == 1:
+            return [translator.translate(segments[0]) or '']
+
+        lines = (translator.translate('\n'.join(segments)) or '').split('\n')
+        if len(lines) == len(segments):
+            return [line.strip() for line in lines]
+        return [translator.translate(segment) or '' for segment in segments]
+
+
+class IdentityBackend(TranslationBackend):
+    """원문을 그대로 반환 (오프라인 / 테스트용)"""
+
+    name = 'identity'
+
+    def translate_batch(self, segments: List[str], source: str, target: str) -> List[str]:
+        return list(segments)
+
+
+_backend_factories: Dict[str, Callable[[], TranslationBackend]] = {
+    'google': GoogleTranslateBackend,
+    'identity': IdentityBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[[], TranslationBackend]):
+    """번역 백엔드 등록 (예: 로컬 번역 모델)"""
+    _backend_factories[name] = factory
+
+
+def create_backend(name: str = TRANSLATION_BACKEND) -> TranslationBackend:
+    factory = _backend_factories.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown translation backend: {name}")
+    return factory()
+
+
+# ---------------------------------------------------------------
+# 세그먼트 처리
+# ---------------------------------------------------------------
+
+def split_segments(text: str, max_chars: int = MAX_REQUEST_CHARS) -> List[str]:
+    """텍스트를 [세그먼트, 구분자, 세그먼트, ...] 형태로 분할
+
+    짝수 위치가 번역 대상, 홀수 위치는 원래 공백/줄바꿈이다.
+    max_chars보다 긴 문장은 공백 기준으로 다시 나눈다.
+    """
+    parts = _SEGMENT_PATTERN.split(text)
+    result = []
+    for index, part in enumerate(parts):
+        if index % 2 or len(part) <= max_chars:
+            result.append(part)
+            continue
+
+        pieces, current = [], ''
+        for word in part.split(' '):
+            if current and len(current) + len(word) + 1 > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        pieces.append(current)
+        for piece_index, piece in enumerate(pieces):
+            if piece_index:
+                result.append(' ')
+            result.append(piece)
+    return result
+
+
+def segment_key(segment: str, source: str, target: str, backend: str) -> str:
+    return hashlib.sha256(f"{backend}\0{source}\0{target}\0{segment}".encode('utf-8')).hexdigest()
+
+
+def _batches(segments: Sequence[str], max_chars: int) -> List[List[str]]:
+    """요청당 글자 수 한도 안에서 세그먼트 묶기"""
+    batches, current, size = [], [], 0
+    for segment in segments:
+        if current and size + len(segment) + 1 > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(segment)
+        size += len(segment) + 1
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TranslationService:
+    """세그먼트 캐시 + 묶음 번역
+
+    translate(text) / translate_many(texts)는 코루틴이며, 캐시 조회/저장과
+    백엔드 호출은 모두 스레드에서 실행된다.
+    """
+
+    def __init__(self,
+                 backend: Optional[TranslationBackend] = None,
+                 source: str = 'en',
+                 target: str = 'ko',
+                 db_path: str = TRANSLATION_CACHE_PATH,
+                 concurrency: int = TRANSLATION_CONCURRENCY):
+        self.backend = backend or create_backend()
+        self.source = source
+        self.target = target
+        self.concurrency = max(1, concurrency)
+
+        self.db = get_db(db_path)
+        self.db.write(self._create_tables)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                            thread_name_prefix='translator')
+        self._stats = {'segments': 0, 'cache_hits': 0, 'requests': 0}
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS translations (
+                        key TEXT PRIMARY KEY,
+                        backend TEXT NOT NULL,
+                        source_lang TEXT NOT NULL,
+                        target_lang TEXT NOT NULL,
+                        source_text TEXT NOT NULL,
+                        translated_text TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )''')
+
+    async def translate(self, text: str) -> str:
+        """단일 텍스트 번역"""
+        return (await self.translate_many([text]))[0]
+
+    async def translate_many(self, texts: Sequence[str]) -> List[str]:
+        """여러 텍스트를 한 번에 번역 (세그먼트 중복 제거 후 캐시에 없는 것만 요청)"""
+        split_texts = [split_segments(text or '', self.backend.max_request_chars) for text in texts]
+
+        keys: Dict[str, str] = {}
+        for parts in split_texts:
+            for segment in parts[::2]:
+                if segment.strip() and segment not in keys:
+                    keys[segment] = segment_key(segment, self.source, self.target, self.backend.name)
+
+        translated = await asyncio.to_thread(self._lookup, keys)
+        missing = [segment for segment in keys if segment not in translated]
+
+        with self._stats_lock:
+            self._stats['segments'] += len(keys)
+            self._stats['cache_hits'] += len(keys) - len(missing)
+
+        if missing:
+            translated.update(await self._translate_missing(missing, keys))
+
+        results = []
+        for parts in split_texts:
+            results.append(''.join(
+                translated.get(part, part) if index % 2 == 0 else part
+                for index, part in enumerate(parts)
+            ))
+        return results
+
+    def _lookup(self, keys: Dict[str, str]) -> Dict[str, str]:
+        by_key = {key: segment for segment, key in keys.items()}
+        found = {}
+        key_list = list(by_key)
+        # SQLite 파라미터 개수 제한을 넘지 않도록 나누어 조회
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            rows = self.db.query(
+                f"SELECT key, translated_text FROM translations "
+                f"WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for row in rows:
+                found[by_key[row['key']]] = row['translated_text']
+        return found
+
+    async def _translate_missing(self, missing: List[str], keys: Dict[str, str]) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        batches = _batches(missing, self.backend.max_request_chars)
+
+        outcomes = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, self.backend.translate_batch,
+                                 batch, self.source, self.target)
+            for batch in batches
+        ], return_exceptions=True)
+
+        translated, rows, error = {}, [], None
+        now = time.time()
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, BaseException):
+                error = error or outcome
+                continue
+            for segment, result in zip(batch, outcome):
+                translated[segment] = result
+                rows.append((keys[segment], self.backend.name, self.source, self.target,
+                             segment, result, now))
+
+        with self._stats_lock:
+            self._stats['requests'] += len(batches)
+
+        if rows:
+            self.db.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                rows, wait=False)
+        if error is not None:
+            # 성공한 묶음은 캐시에 남기고 호출자에게 실패를 알림
+            raise error
+        return translated
+
+    def stats(self) -> Dict:
+        """세그먼트 / 캐시 적중 / 백엔드 요청 횟수"""
+        with self._stats_lock:
+            return dict(self._stats, backend=self.backend.name)
+
+
+_translation_service: Optional[TranslationService] = None
+_translation_service_lock = threading.Lock()
+
+
+def get_translation_service() -> TranslationService:
+    """프로세스 전체에서 공유되는 en → ko 번역 서비스"""
+    global _translation_service
+    with _translation_service_lock:
+        if _translation_service is None:
+            _translation_service = TranslationService()
+        return _translation_service
@@ -0,0 +1,451 @@
+"""
+Vector Index - 디스크에 저장되는 임베딩 벡터 색인 (유사 논문 검색용)
+- 벡터는 L2 정규화 후 float32(또는 float16) 행렬 파일에 저장하고 np.memmap으로 열어
+  시작 시 전체를 읽어 들이지 않음 (용량이 부족하면 두 배로 늘림)
+- 문서 ID ↔ 행 번호, 출처, 내용 해시, 메타데이터는 SQLite에 저장
+  (내용 해시가 같으면 다시 임베딩하지 않음, 삭제된 행은 재사용)
+- 벡터 수가 IVF_MIN_VECTORS 미만이면 전체 행렬과 내적 (brute force),
+  이상이면 k-means 중심(√N개)으로 나눈 IVF 목록 중 가까운 IVF_NPROBE개만 검색
+- IVF 중심은 벡터 수가 학습 시점의 두 배가 되면 다시 학습하며,
+  그 사이 추가된 벡터는 가장 가까운 중심의 목록에 넣음
+
+쓰기 순서: 행렬에 쓰고 flush한 뒤 SQLite에 행 번호를 기록하므로, 중간에 중단되어도
+SQLite에 기록된 행은 항상 완전한 벡터를 가리킨다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sqlite_manager import get_db
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_index")
+# 행렬 저장 형식 (float16은 float32의 절반 크기이고 코사인 유사도 오차는 1e-3 수준이지만,
+# 검색할 때마다 float32로 변환하므로 brute force 검색이 몇 배 느려짐)
+VECTOR_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")
+# 이 수 이상이면 IVF로 검색
+IVF_MIN_VECTORS = int(os.getenv("VECTOR_IVF_MIN_VECTORS", "20000"))
+# 검색 시 확인하는 IVF 목록 수
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+IVF_TRAIN_ITERATIONS = 10
+# k-means 학습에 쓰는 최대 표본 수
+IVF_TRAIN_SAMPLE = 50000
+
+# 처음 만드는 행렬의 행 수
+INITIAL_CAPACITY = 1024
+# brute force / 목록 배정 시 한 번에 계산하는 행 수
+SCAN_CHUNK_ROWS = 16384
+
+
+def normalize(vectors) -> np.ndarray:
+    """행 단위 L2 정규화 (float32, 영벡터는 그대로)"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """ID가 있는 벡터의 영속 색인 (코사인 유사도 검색)
+
+    모든 공개 메서드는 스레드 안전하다. 계산이 무거운 train()은 잠금 밖에서
+    학습하고 결과를 반영할 때만 잠근다.
+    """
+
+    def __init__(self, directory: str = VECTOR_INDEX_DIR, dtype: str = VECTOR_DTYPE,
+                 ivf_min_vectors: int = IVF_MIN_VECTORS, nprobe: int = IVF_NPROBE):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.db = get_db(os.path.join(directory, "vectors.db"))
+        self.db.write(self._create_tables)
+
+        self._lock = threading.RLock()
+        self._train_lock = threading.Lock()
+        self._load(dtype)
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''CREATE TABLE IF NOT EXISTS vector_ids (
+                        doc_id TEXT PRIMARY KEY,
+                        row INTEGER NOT NULL UNIQUE,
+                        source TEXT NOT NULL,
+                        content_hash TEXT NOT NULL,
+                        ivf_list INTEGER NOT NULL DEFAULT -1,
+                        metadata TEXT,
+                        updated_at REAL NOT NULL
+                    )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_vector_ids_source ON vector_ids(source)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS vector_meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    )''')
+
+    # ---------------------------------------------------------------
+    # 파일 / 상태
+    # ---------------------------------------------------------------
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f16" if self.dtype == np.float16 else "vectors.f32")
+
+    @property
+    def _centroids_path(self) -> str:
+        return os.path.join(self.directory, "ivf_centroids.npy")
+
+    def _load(self, dtype: str):
+        meta = {row["key"]: row["value"] for row in self.db.query("SELECT key, value FROM vector_meta")}
+        self.model: Optional[str] = meta.get("model")
+        self.dim = int(meta.get("dim") or 0)
+        self.dtype = np.dtype(meta.get("dtype") or dtype)
+        self._capacity = int(meta.get("capacity") or 0)
+        self._trained_count = int(meta.get("ivf_trained_count") or 0)
+
+        self._matrix: Optional[np.memmap] = None
+        if self.dim and self._capacity and os.path.exists(self._matrix_path):
+            self._matrix = np.memmap(self._matrix_path, dtype=self.dtype, mode="r+",
+                                     shape=(self._capacity, self.dim))
+        else:
+            self._capacity = 0
+
+        # 행 단위 상태 (capacity 길이 배열)
+        self._valid = np.zeros(self._capacity, dtype=bool)
+        self._source_codes = np.full(self._capacity, -1, dtype=np.int16)
+        self._lists = np.full(self._capacity, -1, dtype=np.int32)
+        self._sources: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._row_docs: Dict[int, str] = {}
+        self._hashes: Dict[str, str] = {}
+
+        for row in self.db.query("SELECT doc_id, row, source, content_hash, ivf_list FROM vector_ids"):
+            if row["row"] >= self._capacity:
+                continue
+            self._set_row(row["doc_id"], row["row"], row["source"], row["content_hash"])
+            self._lists[row["row"]] = row["ivf_list"]
+        self._size = max(self._row_docs) + 1 if self._row_docs else 0
+        self._free = sorted(set(range(self._size)) - set(self._row_docs), reverse=True)
+
+        self._centroids: Optional[np.ndarray] = None
+        if self._trained_count and os.path.exists(self._centroids_path):
+            self._centroids = np.load(self._centroids_path)
+        self._list_order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        # train() 도중 쓰인 행 (학습 결과 반영 시 다시 배정)
+        self._written_during_training: Optional[set] = None
+
+    def _set_row(self, doc_id: str, row: int, source: str, content_hash: str):
+        code = self._sources.setdefault(source, len(self._sources))
+        self._rows[doc_id] = row
+        self._row_docs[row] = doc_id
+        self._hashes[doc_id] = content_hash
+        self._valid[row] = True
+        self._source_codes[row] = code
+
+    def _save_meta(self, **values):
+        self.db.executemany("INSERT OR REPLACE INTO vector_meta VALUES (?, ?)",
+                            [(key, str(value)) for key, value in values.items()])
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """색인과 함께 저장되는 값 (동기화 위치 등, reset() 시 함께 삭제)"""
+        row = self.db.query_one("SELECT value FROM vector_meta WHERE key = ?", (key,))
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str):
+        self._save_meta(**{key: value})
+
+    def _grow(self, needed: int):
+        """행렬 파일을 needed 행 이상으로 확장 (두 배씩)"""
+        capacity = max(self._capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._matrix = np.memmap(self._matrix_path, dtype=self.dtype, mode="r+",
+                                 shape=(capacity, self.dim))
+
+        extra = capacity - self._capacity
+        self._valid = np.concatenate([self._valid, np.zeros(extra, dtype=bool)])
+        self._source_codes = np.concatenate([self._source_codes, np.full(extra, -1, dtype=np.int16)])
+        self._lists = np.concatenate([self._lists, np.full(extra, -1, dtype=np.int32)])
+        self._capacity = capacity
+        self._save_meta(capacity=capacity)
+
+    def reset(self, model: Optional[str] = None, dim: int = 0):
+        """모든 벡터 삭제 (임베딩 모델이 바뀌었을 때)"""
+        with self._lock:
+            self._matrix = None
+            for path in (self._matrix_path, self._centroids_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+            def run(conn):
+                conn.execute("DELETE FROM vector_ids")
+                conn.execute("DELETE FROM vector_meta")
+            self.db.write(run)
+            if model:
+                self._save_meta(model=model, dim=dim, dtype=self.dtype.name)
+            self._load(self.dtype.name)
+
+    # ---------------------------------------------------------------
+    # 쓰기
+    # ---------------------------------------------------------------
+
+    def content_hash(self, doc_id: str) -> Optional[str]:
+        return self._hashes.get(doc_id)
+
+    def doc_ids(self, source: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if source is None:
+                return list(self._rows)
+            code = self._sources.get(source)
+            return [doc_id for doc_id, row in self._rows.items() if self._source_codes[row] == code]
+
+    def upsert(self, model: str, items: Sequence[Tuple[str, str, str, Sequence[float], Dict]]) -> int:
+        """(문서 ID, 출처, 내용 해시, 벡터, 메타데이터) 목록 저장 (저장 건수 반환)
+
+        모델이나 차원이 저장된 색인과 다르면 색인을 비우고 새로 만든다.
+        """
+        if not items:
+            return 0
+        vectors = normalize([item[3] for item in items])
+        with self._lock:
+            if self.model != model or self.dim != vectors.shape[1]:
+                if self.model:
+                    print(f"Vector index: embedding model changed ({self.model}/{self.dim} -> "
+                          f"{model}/{vectors.shape[1]}), rebuilding")
+                self.reset(model, vectors.shape[1])
+
+            rows = []
+            for doc_id, *_ in items:
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = self._free.pop() if self._free else self._size
+                    self._size = max(self._size, row + 1)
+                rows.append(row)
+            self._grow(self._size)
+
+            rows = np.asarray(rows)
+            self._matrix[rows] = vectors.astype(self.dtype)
+            self._matrix.flush()
+
+            lists = self._assign(vectors) if self._centroids is not None else np.full(len(rows), -1)
+            now = time.time()
+            records = []
+            for (doc_id, source, content_hash, _, metadata), row, ivf_list in zip(items, rows, lists):
+                self._set_row(doc_id, int(row), source, content_hash)
+                self._lists[row] = ivf_list
+                records.append((doc_id, int(row), source, content_hash, int(ivf_list),
+                                json.dumps(metadata or {}, ensure_ascii=False, default=str), now))
+            if self._written_during_training is not None:
+                self._written_during_training.update(int(row) for row in rows)
+            self._list_order = None
+
+            self.db.executemany("INSERT OR REPLACE INTO vector_ids VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+            return len(records)
+
+    def delete(self, doc_ids: Iterable[str]) -> int:
+        with self._lock:
+            removed = []
+            for doc_id in doc_ids:
+                row = self._rows.pop(doc_id, None)
+                if row is None:
+                    continue
+                del self._row_docs[row]
+                self._hashes.pop(doc_id, None)
+                self._valid[row] = False
+                self._source_codes[row] = -1
+                self._lists[row] = -1
+                self._free.append(row)
+                removed.append((doc_id,))
+            if removed:
+                self._list_order = None
+                self.db.executemany("DELETE FROM vector_ids WHERE doc_id = ?", removed)
+            return len(removed)
+
+    # ---------------------------------------------------------------
+    # IVF
+    # ---------------------------------------------------------------
+
+    def _assign(self, vectors: np.ndarray, centroids: Optional[np.ndarray] = None) -> np.ndarray:
+        """가장 가까운 중심 번호 (정규화된 float32 벡터)"""
+        centroids = self._centroids if centroids is None else centroids
+        return np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+    def needs_training(self) -> bool:
+        count = len(self._rows)
+        return count >= self.ivf_min_vectors and (
+            self._centroids is None or count >= 2 * self._trained_count)
+
+    def train(self, force: bool = False) -> bool:
+        """k-means로 IVF 중심을 학습하고 모든 벡터를 목록에 배정 (학습했으면 True)"""
+        with self._train_lock:
+            with self._lock:
+                if not (force and self._rows) and not self.needs_training():
+                    return False
+                rows = np.flatnonzero(self._valid[:self._size])
+                matrix = self._matrix
+                self._written_during_training = set()
+
+            try:
+                nlist = max(1, int(np.sqrt(len(rows))))
+                rng = np.random.default_rng(0)
+                sample = np.sort(rng.choice(rows, min(len(rows), IVF_TRAIN_SAMPLE), replace=False))
+                data = np.asarray(matrix[sample], dtype=np.float32)
+                centroids = data[rng.choice(len(data), nlist, replace=False)]
+                for _ in range(IVF_TRAIN_ITERATIONS):
+                    labels = self._assign(data, centroids)
+                    counts = np.bincount(labels, minlength=nlist)
+                    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                    filled = counts > 0
+                    sums = np.empty_like(centroids)
+                    sums[filled] = np.add.reduceat(data[np.argsort(labels, kind="stable")], starts[filled])
+                    # 빈 목록은 임의의 표본으로 다시 시작
+                    sums[~filled] = data[rng.choice(len(data), int((~filled).sum()))]
+                    centroids = normalize(sums)
+
+                lists = np.empty(len(rows), dtype=np.int32)
+                for start in range(0, len(rows), SCAN_CHUNK_ROWS):
+                    chunk = rows[start:start + SCAN_CHUNK_ROWS]
+                    lists[start:start + len(chunk)] = self._assign(
+                        np.asarray(matrix[chunk], dtype=np.float32), centroids)
+            except Exception:
+                with self._lock:
+                    self._written_during_training = None
+                raise
+
+            with self._lock:
+                written = self._written_during_training
+                self._written_during_training = None
+                self._lists[rows] = lists
+                if written:
+                    rewritten = np.asarray(sorted(written))
+                    self._lists[rewritten] = self._assign(
+                        np.asarray(self._matrix[rewritten], dtype=np.float32), centroids)
+                self._lists[~self._valid] = -1
+                self._centroids = centroids
+                self._trained_count = len(self._rows)
+                self._list_order = None
+
+                temp_path = self._centroids_path + ".tmp.npy"
+                np.save(temp_path, centroids)
+                os.replace(temp_path, self._centroids_path)
+                assigned = [(int(self._lists[row]), doc_id) for row, doc_id in self._row_docs.items()]
+
+            self.db.executemany("UPDATE vector_ids SET ivf_list = ? WHERE doc_id = ?", assigned)
+            self._save_meta(ivf_trained_count=self._trained_count)
+            print(f"Vector index: trained {nlist} IVF lists on {len(rows)} vectors")
+            return True
+
+    def _ensure_lists(self):
+        """목록 번호 순으로 정렬한 행 번호와 목록별 시작 위치"""
+        if self._list_order is None:
+            lists = self._lists[:self._size]
+            order = np.argsort(lists, kind="stable")
+            self._list_order = order
+            self._list_offsets = np.searchsorted(lists[order], np.arange(len(self._centroids) + 1))
+
+    # ---------------------------------------------------------------
+    # 검색
+    # ---------------------------------------------------------------
+
+    def search(self, vector: Sequence[float], k: int = 10,
+               sources: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """코사인 유사도가 높은 순서로 (문서 ID, 유사도) 최대 k개"""
+        query = normalize(vector)[0]
+        with self._lock:
+            if not self._rows or query.shape[0] != self.dim:
+                return []
+            allowed = None
+            if sources is not None:
+                allowed = [self._sources[s] for s in sources if s in self._sources]
+                if not allowed:
+                    return []
+
+            if self._centroids is not None and len(self._rows) >= self.ivf_min_vectors:
+                self._ensure_lists()
+                probes = np.argsort(self._centroids @ query)[::-1][:self.nprobe]
+                candidates = np.concatenate([
+                    self._list_order[self._list_offsets[p]:self._list_offsets[p + 1]] for p in probes
+                ])
+                # 아직 배정되지 않은 행(학습 중 추가)도 포함
+                candidates = np.concatenate([candidates, self._list_order[:self._list_offsets[0]]])
+            else:
+                candidates = np.arange(self._size)
+
+            mask = self._valid[candidates]
+            if allowed is not None:
+                mask &= np.isin(self._source_codes[candidates], allowed)
+            candidates = candidates[mask]
+            if not len(candidates):
+                return []
+
+            if len(candidates) == self._size:
+                scores = np.concatenate([
+                    np.asarray(self._matrix[start:start + SCAN_CHUNK_ROWS], dtype=np.float32) @ query
+                    for start in range(0, self._size, SCAN_CHUNK_ROWS)
+                ])
+            else:
+                candidates.sort()
+                scores = np.asarray(self._matrix[candidates], dtype=np.float32) @ query
+
+            k = min(k, len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._row_docs[int(candidates[i])], float(scores[i])) for i in top]
+
+    def metadata(self, doc_ids: Sequence[str]) -> Dict[str, Dict]:
+        if not doc_ids:
+            return {}
+        rows = self.db.query(
+            f"SELECT doc_id, source, metadata FROM vector_ids "
+            f"WHERE doc_id IN ({', '.join('?' * len(doc_ids))})", list(doc_ids)
+        )
+        return {row["doc_id"]: {**json.loads(row["metadata"] or "{}"), "source": row["source"]}
+                for row in rows}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "vectors": len(self._rows),
+                "capacity": self._capacity,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "model": self.model,
+                "sources": {source: int(np.count_nonzero(self._source_codes[:self._size] == code))
+                            for source, code in self._sources.items()},
+                "ivf_lists": len(self._centroids) if self._centroids is not None else 0,
+                "ivf_active": self._centroids is not None and len(self._rows) >= self.ivf_min_vectors,
+                "matrix_bytes": self._capacity * self.dim * self.dtype.itemsize,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+
+
+_vector_index: Optional[VectorIndex] = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """프로세스 전체에서 공유되는 논문 벡터 색인"""
+    global _vector_index
+    with _vector_index_lock:
+        if _vector_index is None:
+            _vector_index = VectorIndex()
+        return _vector_index
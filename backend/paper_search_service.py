@@ -12,20 +12,25 @@ import os
 import sqlite3
 import uuid
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
-import time
+import asyncio
 from typing import List, Dict, Optional
 import re
+from app.services.pubmed_harvester import PubMedHarvester
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+from sqlite_manager import get_db
 
 class PaperSearchService:
     def __init__(self, db_path='spinalsurgery_research.db'):
         self.db_path = db_path
+        self.db = get_db(db_path)
         self.init_search_tables()
         
     def init_search_tables(self):
         """논문 검색 관련 테이블 생성"""
-        conn = sqlite3.connect(self.db_path)
+        self.db.write(self._create_search_tables)
+    
+    def _create_search_tables(self, conn: sqlite3.Connection):
+        """쓰기 스레드에서 실행되는 테이블 생성"""
         c = conn.cursor()
         
         # 논문 검색 사이트 정보
@@ -79,11 +84,13 @@ class PaperSearchService:
             FOREIGN KEY (source_site_id) REFERENCES search_sites (id)
         )''')
         
+        # 중복 체크 및 세션별 조회용 인덱스
+        c.execute('CREATE INDEX IF NOT EXISTS idx_searched_papers_session ON searched_papers (session_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_searched_papers_doi ON searched_papers (doi)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_searched_papers_pmid ON searched_papers (pmid)')
+        
         # 기본 검색 사이트 추가
         self._insert_default_sites(c)
-        
-        conn.commit()
-        conn.close()
     
     def _insert_default_sites(self, cursor):
         """기본 논문 검색 사이트 추가"""
@@ -149,85 +156,40 @@ class PaperSearchService:
     
     def get_search_sites(self) -> List[Dict]:
         """검색 가능한 사이트 목록 반환"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute('SELECT * FROM search_sites ORDER BY name')
-        sites = [dict(row) for row in c.fetchall()]
-        
-        conn.close()
+        sites = [dict(row) for row in self.db.query('SELECT * FROM search_sites ORDER BY name')]
         return sites
     
     def create_search_session(self, project_id: str, query: str, site_ids: List[str]) -> str:
         """새 검색 세션 생성"""
         session_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''INSERT INTO search_sessions 
-                    (id, project_id, search_query, search_sites, status, started_at)
-                    VALUES (?, ?, ?, ?, ?, ?)''',
-                 (session_id, project_id, query, json.dumps(site_ids), 'in_progress', 
-                  datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        self.db.execute('''INSERT INTO search_sessions 
+                           (id, project_id, search_query, search_sites, status, started_at)
+                           VALUES (?, ?, ?, ?, ?, ?)''',
+                        (session_id, project_id, query, json.dumps(site_ids), 'in_progress', 
+                         datetime.now().isoformat()))
         
         return session_id
     
-    def search_pubmed(self, query: str, session_id: str, max_results: int = 100, start: int = 0) -> Dict:
-        """PubMed 검색 (페이지네이션 지원)"""
+    def search_pubmed(self, query: str, session_id: str, max_results: int = 100, start: int = 0,
+                      history: Optional[Dict] = None) -> Dict:
+        """PubMed 검색 (페이지네이션 지원)
+        
+        히스토리 서버(WebEnv)를 사용하므로 이전 결과의 history를 넘기면
+        esearch 없이 start 위치부터 이어서 가져온다.
+        """
         results = []
         total_count = 0
         
-        # PubMed E-utilities API 사용
-        search_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-        params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': min(max_results, 500),  # PubMed API 최대 500
-            'retstart': start,
-            'retmode': 'json',
-            'sort': 'relevance'
-        }
-        
         try:
-            response = requests.get(search_url, params=params)
-            data = response.json()
+            history, results = asyncio.run(
+                self._harvest_pubmed(query, max_results, start, history)
+            )
+            total_count = history['count']
             
-            search_result = data.get('esearchresult', {})
-            id_list = search_result.get('idlist', [])
-            total_count = int(search_result.get('count', 0))
-            
-            if id_list:
-                # 배치로 상세 정보 가져오기 (한 번에 최대 20개)
-                batch_size = 20
-                for i in range(0, len(id_list), batch_size):
-                    batch_ids = id_list[i:i + batch_size]
-                    
-                    fetch_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-                    fetch_params = {
-                        'db': 'pubmed',
-                        'id': ','.join(batch_ids),
-                        'retmode': 'xml'
-                    }
-                    
-                    fetch_response = requests.get(fetch_url, params=fetch_params)
-                    
-                    # XML 파싱
-                    soup = BeautifulSoup(fetch_response.text, 'xml')
-                    articles = soup.find_all('PubmedArticle')
-                    
-                    for article in articles:
-                        paper = self._parse_pubmed_article(article)
-                        paper['session_id'] = session_id
-                        paper['source_site_id'] = 'pubmed'
-                        results.append(paper)
-                    
-                    # API 제한 회피를 위한 짧은 대기
-                    time.sleep(0.5)
+            for paper in results:
+                paper['session_id'] = session_id
+                paper['source_site_id'] = 'pubmed'
                     
         except Exception as e:
             print(f"PubMed 검색 오류: {e}")
@@ -236,101 +198,65 @@ class PaperSearchService:
             'papers': results,
             'total_count': total_count,
             'fetched_count': len(results),
-            'has_more': total_count > (start + len(results))
+            'has_more': total_count > (start + len(results)),
+            'history': history
         }
     
-    def _parse_pubmed_article(self, article) -> Dict:
-        """PubMed 논문 정보 파싱"""
+    async def _harvest_pubmed(self, query: str, max_results: int, start: int,
+                              history: Optional[Dict]):
+        """비동기 수집기로 esearch(usehistory) + efetch 배치 실행"""
+        async with PubMedHarvester() as harvester:
+            if not history:
+                history = await harvester.search(query)
+            
+            papers = []
+            async for page in harvester.fetch(history, start, max_results, self.parse_pubmed_page):
+                papers.extend(page)
+        
+        return history, papers
+    
+    def parse_pubmed_page(self, xml_data: bytes) -> List[Dict]:
+        """efetch 응답 한 페이지 파싱 (수집기 스레드 풀에서 실행)"""
+        return [self._parse_pubmed_article(record) for record in iter_pubmed_articles(xml_data)]
+    
+    def _parse_pubmed_article(self, record: Dict) -> Dict:
+        """정규화된 PubMed 레코드를 searched_papers 형식으로 변환"""
+        pmid = record['pmid']
+        year = record['year']
+        
         paper = {
             'id': str(uuid.uuid4()),
-            'title': '',
-            'authors': '',
-            'abstract': '',
-            'journal_name': '',
-            'publication_year': None,
-            'doi': '',
-            'pmid': '',
-            'url': '',
+            'title': record['title'],
+            'authors': '; '.join(
+                f"{author['last_name']} {author['fore_name']}"
+                for author in record['authors'] if author['last_name'] and author['fore_name']
+            ),
+            'abstract': ' '.join(
+                f"{section['label']}: {section['text']}" if section['label'] else section['text']
+                for section in record['abstract_sections']
+            ),
+            'journal_name': record['journal'],
+            'publication_year': int(year) if year.isdigit() else None,
+            'doi': record['doi'],
+            'pmid': pmid,
+            'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else '',
             'access_type': 'abstract_only',
-            'keywords': []
+            'keywords': json.dumps(record['keywords'])
         }
         
-        # Title
-        title_elem = article.find('ArticleTitle')
-        if title_elem:
-            paper['title'] = title_elem.text
-        
-        # Authors
-        authors = []
-        author_list = article.find('AuthorList')
-        if author_list:
-            for author in author_list.find_all('Author'):
-                last_name = author.find('LastName')
-                fore_name = author.find('ForeName')
-                if last_name and fore_name:
-                    authors.append(f"{last_name.text} {fore_name.text}")
-        paper['authors'] = '; '.join(authors)
-        
-        # Abstract
-        abstract_elem = article.find('Abstract')
-        if abstract_elem:
-            abstract_texts = []
-            for text in abstract_elem.find_all('AbstractText'):
-                label = text.get('Label', '')
-                content = text.text
-                if label:
-                    abstract_texts.append(f"{label}: {content}")
-                else:
-                    abstract_texts.append(content)
-            paper['abstract'] = ' '.join(abstract_texts)
-        
-        # Journal
-        journal = article.find('Journal')
-        if journal:
-            title = journal.find('Title')
-            if title:
-                paper['journal_name'] = title.text
-        
-        # Year
-        pub_date = article.find('PubDate')
-        if pub_date:
-            year = pub_date.find('Year')
-            if year:
-                paper['publication_year'] = int(year.text)
-        
-        # PMID
-        pmid = article.find('PMID')
-        if pmid:
-            paper['pmid'] = pmid.text
-            paper['url'] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid.text}/"
-        
-        # DOI
-        article_ids = article.find_all('ArticleId')
-        for aid in article_ids:
-            if aid.get('IdType') == 'doi':
-                paper['doi'] = aid.text
-                break
-        
-        # Keywords
-        keywords = []
-        keyword_list = article.find('KeywordList')
-        if keyword_list:
-            for keyword in keyword_list.find_all('Keyword'):
-                keywords.append(keyword.text)
-        paper['keywords'] = json.dumps(keywords)
-        
         # Check PMC availability
-        for aid in article_ids:
-            if aid.get('IdType') == 'pmc':
-                paper['access_type'] = 'fulltext_available'
-                paper['fulltext_url'] = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{aid.text}/"
-                break
+        if record['pmc_id']:
+            paper['access_type'] = 'fulltext_available'
+            paper['fulltext_url'] = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{record['pmc_id']}/"
         
         return paper
     
     def save_search_results(self, session_id: str, papers: List[Dict]):
         """검색 결과 저장"""
-        conn = sqlite3.connect(self.db_path)
+        self.db.write(lambda conn: self._insert_search_results(conn, session_id, papers))
+    
+    def _insert_search_results(self, conn: sqlite3.Connection, session_id: str, papers: List[Dict]):
+        """쓰기 스레드에서 실행되는 검색 결과 저장"""
         c = conn.cursor()
         
         abstract_count = 0
@@ -361,30 +287,19 @@ class PaperSearchService:
                     WHERE id = ?''',
                  (len(papers), abstract_count, fulltext_count, 'completed',
                   datetime.now().isoformat(), session_id))
-        
-        conn.commit()
-        conn.close()
     
     def generate_result_report(self, session_id: str, project_id: str) -> str:
         """검색 결과 보고서 생성 및 파일 저장"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
         # 세션 정보
-        c.execute('SELECT * FROM search_sessions WHERE id = ?', (session_id,))
-        session = dict(c.fetchone())
+        session = dict(self.db.query_one('SELECT * FROM search_sessions WHERE id = ?', (session_id,)))
         
         # 프로젝트 정보
-        c.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
-        project = dict(c.fetchone())
+        project = dict(self.db.query_one('SELECT * FROM projects WHERE id = ?', (project_id,)))
         
         # 검색된 논문들
-        c.execute('''SELECT * FROM searched_papers WHERE session_id = ? 
-                    ORDER BY access_type DESC, publication_year DESC''', (session_id,))
-        papers = [dict(row) for row in c.fetchall()]
-        
-        conn.close()
+        papers = [dict(row) for row in self.db.query('''SELECT * FROM searched_papers WHERE session_id = ? 
+                                                         ORDER BY access_type DESC, publication_year DESC''',
+                                                      (session_id,))]
         
         # 보고서 생성
         report = f"""# 논문 검색 결과 보고서
@@ -452,12 +367,8 @@ class PaperSearchService:
             f.write(report)
         
         # 세션에 파일 경로 저장
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('UPDATE search_sessions SET result_file_path = ? WHERE id = ?',
-                 (filepath, session_id))
-        conn.commit()
-        conn.close()
+        self.db.execute('UPDATE search_sessions SET result_file_path = ? WHERE id = ?',
+                        (filepath, session_id))
         
         return filepath
     
@@ -471,8 +382,8 @@ class PaperSearchService:
         # 각 사이트별 검색
         for site_id in site_ids:
             if site_id == 'pubmed':
-                papers = self.search_pubmed(query, session_id)
-                all_papers.extend(papers)
+                result = self.search_pubmed(query, session_id)
+                all_papers.extend(result['papers'])
             # TODO: 다른 사이트 검색 구현
         
         # 결과 저장
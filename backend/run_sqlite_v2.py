@@ -4,7 +4,6 @@
 논문 검색 기능 추가
 """
 
-import sqlite3
 import json
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
@@ -14,16 +13,18 @@ from datetime import datetime
 import sys
 import os
 
-# paper_search_service 임포트
+# 로컬 서비스 모듈 임포트
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from paper_search_service import PaperSearchService
 from search_engine import SearchEngine
 from ai_service import AIService
+from sqlite_manager import get_db
 import asyncio
 
 # SQLite 데이터베이스 초기화
 def init_db():
-    conn = sqlite3.connect('spinalsurgery_research.db')
+    get_db().write(_create_tables)
+
+def _create_tables(conn):
     c = conn.cursor()
     
     # Users 테이블
@@ -108,9 +109,6 @@ def init_db():
                  VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
               ('2', '서울대학교 의학도서관', 'institution', 1, 'http://medlib.snu.ac.kr',
                'medlib@snu.ac.kr', '02-740-8045', '서울특별시 종로구 대학로 103'))
-    
-    conn.commit()
-    conn.close()
 
 class APIHandler(BaseHTTPRequestHandler):
     search_engine = None  # 클래스 변수로 검색 엔진 공유
@@ -132,9 +130,8 @@ class APIHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
-        conn = sqlite3.connect('spinalsurgery_research.db')
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        # 스레드별 재사용 연결 (요청마다 새로 열지 않음)
+        c = get_db().connection().cursor()
         
         try:
             if path == '/api/v1/users/me':
@@ -174,8 +171,7 @@ class APIHandler(BaseHTTPRequestHandler):
             
             elif path == '/api/v1/papers/search-sites':
                 # 논문 검색 사이트 목록
-                search_service = PaperSearchService()
-                sites = search_service.get_search_sites()
+                sites = self.search_engine.search_service.get_search_sites()
                 self._set_headers()
                 self.wfile.write(json.dumps(sites).encode())
             
@@ -232,7 +228,7 @@ class APIHandler(BaseHTTPRequestHandler):
                 self.wfile.write(json.dumps({"error": "Not found"}).encode())
                 
         finally:
-            conn.close()
+            c.close()
     
     def do_POST(self):
         content_length = int(self.headers.get('Content-Length', 0))
@@ -253,16 +249,12 @@ class APIHandler(BaseHTTPRequestHandler):
         elif path == '/api/v1/projects':
             try:
                 data = json.loads(post_data)
-                conn = sqlite3.connect('spinalsurgery_research.db')
-                c = conn.cursor()
                 
                 project_id = str(uuid.uuid4())
-                c.execute('''INSERT INTO projects (id, user_id, title, field, keywords, description, status)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                         (project_id, 'test-user-id', data.get('title'), data.get('field'),
-                          json.dumps(data.get('keywords', [])), data.get('description'), 'draft'))
-                conn.commit()
-                conn.close()
+                get_db().execute('''INSERT INTO projects (id, user_id, title, field, keywords, description, status)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                                 (project_id, 'test-user-id', data.get('title'), data.get('field'),
+                                  json.dumps(data.get('keywords', [])), data.get('description'), 'draft'))
                 
                 self._set_headers(201)
                 response = {
@@ -290,9 +282,10 @@ class APIHandler(BaseHTTPRequestHandler):
                 query = data.get('query')
                 site_ids = data.get('site_ids', ['pubmed'])
                 target_count = data.get('target_count', 100)
+                priority = data.get('priority', 0)
                 
                 # 대량 논문 검색 시작
-                job_id = self.search_engine.start_search(project_id, query, site_ids, target_count)
+                job_id = self.search_engine.start_search(project_id, query, site_ids, target_count, priority)
                 
                 self._set_headers()
                 response = {
@@ -332,13 +325,7 @@ class APIHandler(BaseHTTPRequestHandler):
                 data = json.loads(post_data)
                 
                 # 프로젝트 정보 조회
-                conn = sqlite3.connect('spinalsurgery_research.db')
-                conn.row_factory = sqlite3.Row
-                c = conn.cursor()
-                
-                c.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
-                project = dict(c.fetchone())
-                conn.close()
+                project = dict(get_db().query_one('SELECT * FROM projects WHERE id = ?', (project_id,)))
                 
                 # 검색어 생성 (영어로 변환)
                 keywords = json.loads(project['keywords'])
@@ -370,7 +357,8 @@ class APIHandler(BaseHTTPRequestHandler):
                         project_id, 
                         query, 
                         data.get('site_ids', ['pubmed', 'pmc']),
-                        target_count=data.get('target_count', 100)
+                        target_count=data.get('target_count', 100),
+                        priority=data.get('priority', 0)
                     )
                     
                     self._set_headers()
@@ -466,7 +454,8 @@ class APIHandler(BaseHTTPRequestHandler):
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
                 result = loop.run_until_complete(
-                    self.ai_service.analyze_documents(project_id, document_paths, analysis_type, model)
+                    self.ai_service.analyze_documents(project_id, document_paths, analysis_type, model,
+                                                      bypass_cache=data.get('bypass_cache', False))
                 )
                 
                 self._set_headers()
@@ -491,7 +480,8 @@ class APIHandler(BaseHTTPRequestHandler):
                 asyncio.set_event_loop(loop)
                 result = loop.run_until_complete(
                     self.ai_service.generate_paper_draft(
-                        project_id, title, keywords, outline, references, model
+                        project_id, title, keywords, outline, references, model,
+                        bypass_cache=data.get('bypass_cache', False)
                     )
                 )
                 
@@ -511,7 +501,6 @@ def run(port=8000):
     init_db()
     
     # 논문 검색 서비스 초기화
-    search_service = PaperSearchService()
     search_engine = SearchEngine()
     
     # AI 서비스 초기화
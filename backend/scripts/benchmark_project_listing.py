@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+프로젝트 목록 조회 회귀 벤치마크
+- 벤치마크 전용 사용자에게 프로젝트 N개, 프로젝트마다 논문 / 환자 10,000건씩 생성
+- 기존 방식(selectinload로 관계 행을 모두 읽고 len())과 COUNT 서브쿼리 방식의
+  처리 시간 / 최대 메모리 비교, 두 방식의 개수가 같은지 확인
+- --max-ms를 넘으면 종료 코드 1 (CI 회귀 확인용)
+- 끝나면 생성한 데이터 삭제
+
+PostgreSQL 전용 (모델이 UUID / ARRAY / JSONB 타입 사용)
+
+사용법:
+    DATABASE_URL=postgresql+asyncpg://... python scripts/benchmark_project_listing.py \\
+        [--projects 5] [--papers 10000] [--patients 10000] [--max-ms 200]
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import selectinload
+
+from app.api.v1.endpoints.projects import _project_query
+from app.core.database import AsyncSessionLocal, engine
+from app.models.collaborator import Collaborator
+from app.models.paper import Paper
+from app.models.patient import Patient
+from app.models.project import ResearchProject
+from app.models.user import User, UserRole
+
+INSERT_BATCH = 2000
+
+
+async def seed(user_id, projects: int, papers: int, patients: int, collaborators: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User).values(
+            id=user_id, email=f"benchmark-{user_id}@example.com", password_hash="-",
+            name="Benchmark", role=UserRole.RESEARCHER
+        ))
+        for p in range(projects):
+            project_id = uuid.uuid4()
+            await db.execute(insert(ResearchProject).values(
+                id=project_id, user_id=user_id, title=f"Benchmark project {p}", field="spine"
+            ))
+            for model, count, row in (
+                (Paper, papers, lambda i: {"id": uuid.uuid4(), "project_id": project_id,
+                                           "title": f"Paper {i}", "abstract": "lumbar fusion " * 40}),
+                (Patient, patients, lambda i: {"id": uuid.uuid4(), "project_id": project_id,
+                                               "patient_code": f"P{i:06d}", "age": 40 + i % 40}),
+                (Collaborator, collaborators, lambda i: {"id": uuid.uuid4(), "project_id": project_id,
+                                                         "name": f"Collaborator {i}"}),
+            ):
+                for start in range(0, count, INSERT_BATCH):
+                    await db.execute(insert(model), [row(i) for i in range(start, min(start + INSERT_BATCH, count))])
+        await db.commit()
+
+
+async def cleanup(user_id):
+    async with AsyncSessionLocal() as db:
+        project_ids = select(ResearchProject.id).where(ResearchProject.user_id == user_id)
+        # papers.project_id는 ON DELETE SET NULL이므로 직접 삭제
+        await db.execute(delete(Paper).where(Paper.project_id.in_(project_ids)))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+async def list_eager(user_id):
+    """기존 read_projects 방식"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ResearchProject)
+            .where(ResearchProject.user_id == user_id)
+            .options(
+                selectinload(ResearchProject.papers),
+                selectinload(ResearchProject.patients),
+                selectinload(ResearchProject.collaborators)
+            )
+        )
+        return {
+            project.id: (len(project.papers), len(project.patients), len(project.collaborators))
+            for project in result.scalars().all()
+        }
+
+
+async def list_counts(user_id):
+    """COUNT 서브쿼리 방식 (include 없음)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(_project_query([]).where(ResearchProject.user_id == user_id))
+        return {
+            row[0].id: (row.papers_count, row.patients_count, row.collaborators_count)
+            for row in result.all()
+        }
+
+
+async def measure(name: str, fn, user_id):
+    await fn(user_id)  # 워밍업
+
+    start = time.perf_counter()
+    counts = await fn(user_id)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    await fn(user_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<18} {len(counts):>4} projects  {elapsed * 1000:9.1f} ms  peak {peak / 1024 / 1024:8.1f} MB")
+    return counts, elapsed
+
+
+async def run(args) -> int:
+    user_id = uuid.uuid4()
+    print(f"Seeding {args.projects} projects x ({args.papers} papers, {args.patients} patients)...")
+    await seed(user_id, args.projects, args.papers, args.patients, args.collaborators)
+    try:
+        print("-" * 80)
+        eager_counts, eager_time = await measure('selectinload', list_eager, user_id)
+        count_counts, count_time = await measure('count subquery', list_counts, user_id)
+        print("-" * 80)
+        print(f"Speedup: {eager_time / count_time:.1f}x")
+
+        if eager_counts != count_counts:
+            print("FAIL: counts differ between the two methods")
+            return 1
+        if args.max_ms and count_time * 1000 > args.max_ms:
+            print(f"FAIL: count subquery listing took {count_time * 1000:.1f} ms (> {args.max_ms} ms)")
+            return 1
+        return 0
+    finally:
+        await cleanup(user_id)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=5)
+    parser.add_argument('--papers', type=int, default=10000)
+    parser.add_argument('--patients', type=int, default=10000)
+    parser.add_argument('--collaborators', type=int, default=20)
+    parser.add_argument('--max-ms', type=float, default=None, help='COUNT 방식 목록 조회 허용 시간 (ms)')
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+PubMed XML 파서 마이크로 벤치마크
+- 10,000건짜리 efetch 형식 fixture 파일을 생성 (이미 있으면 재사용)
+- 스트리밍 iterparse 파서와 기존 BeautifulSoup('xml') 방식의 처리 시간 / 최대 메모리 비교
+
+사용법:
+    python scripts/benchmark_pubmed_parser.py [--articles 10000] [--fixture /tmp/pubmed_10k.xml]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+
+WORDS = (
+    "lumbar interbody fusion spine surgery outcome cohort patients radiographic "
+    "degenerative spondylolisthesis decompression cage pedicle screw follow-up "
+    "pain disability index complication revision segment adjacent minimally invasive"
+).split()
+
+SECTIONS = ("BACKGROUND", "METHODS", "RESULTS", "CONCLUSIONS")
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def _article_xml(rng: random.Random, pmid: int) -> str:
+    authors = ''.join(
+        f"<Author ValidYN=\"Y\"><LastName>Author{pmid % 97 + i}</LastName>"
+        f"<ForeName>Name {i}</ForeName><Initials>N</Initials>"
+        f"<AffiliationInfo><Affiliation>Department of Orthopaedic Surgery, "
+        f"Hospital {rng.randint(1, 50)}, Seoul, Korea.</Affiliation></AffiliationInfo></Author>"
+        for i in range(rng.randint(3, 8))
+    )
+    abstract = ''.join(
+        f"<AbstractText Label=\"{label}\" NlmCategory=\"{label}\">"
+        f"{escape(_sentence(rng, 40))} <i>in vivo</i> {escape(_sentence(rng, 20))}</AbstractText>"
+        for label in SECTIONS
+    )
+    mesh = ''.join(
+        f"<MeshHeading><DescriptorName UI=\"D{rng.randint(100000, 999999)}\" MajorTopicYN=\"N\">"
+        f"{rng.choice(WORDS).title()}</DescriptorName>"
+        f"<QualifierName UI=\"Q000000\" MajorTopicYN=\"N\">surgery</QualifierName></MeshHeading>"
+        for _ in range(rng.randint(4, 10))
+    )
+    keywords = ''.join(
+        f"<Keyword MajorTopicYN=\"N\">{rng.choice(WORDS)}</Keyword>" for _ in range(5)
+    )
+    year = rng.randint(2000, 2025)
+    references = ''.join(
+        f"<Reference><Citation>Reference {i}.</Citation><ArticleIdList>"
+        f"<ArticleId IdType=\"pubmed\">{rng.randint(1, 9999999)}</ArticleId></ArticleIdList></Reference>"
+        for i in range(rng.randint(10, 30))
+    )
+    return (
+        "<PubmedArticle><MedlineCitation Status=\"MEDLINE\" Owner=\"NLM\">"
+        f"<PMID Version=\"1\">{pmid}</PMID><Article PubModel=\"Print\">"
+        "<Journal><ISSN IssnType=\"Electronic\">1528-1159</ISSN><JournalIssue CitedMedium=\"Internet\">"
+        f"<Volume>{rng.randint(1, 50)}</Volume><Issue>{rng.randint(1, 24)}</Issue>"
+        f"<PubDate><Year>{year}</Year><Month>Jan</Month></PubDate></JournalIssue>"
+        "<Title>Spine</Title><ISOAbbreviation>Spine (Phila Pa 1976)</ISOAbbreviation></Journal>"
+        f"<ArticleTitle>{escape(_sentence(rng, 14))}</ArticleTitle>"
+        f"<Pagination><MedlinePgn>{rng.randint(1, 900)}-{rng.randint(901, 999)}</MedlinePgn></Pagination>"
+        f"<Abstract>{abstract}</Abstract><AuthorList CompleteYN=\"Y\">{authors}</AuthorList>"
+        "<Language>eng</Language><PublicationTypeList>"
+        "<PublicationType UI=\"D016428\">Journal Article</PublicationType></PublicationTypeList>"
+        f"</Article><MeshHeadingList>{mesh}</MeshHeadingList>"
+        f"<KeywordList Owner=\"NOTNLM\">{keywords}</KeywordList></MedlineCitation>"
+        "<PubmedData><ArticleIdList>"
+        f"<ArticleId IdType=\"pubmed\">{pmid}</ArticleId>"
+        f"<ArticleId IdType=\"doi\">10.1097/BRS.{pmid:07d}</ArticleId>"
+        + (f"<ArticleId IdType=\"pmc\">PMC{pmid}</ArticleId>" if pmid % 3 == 0 else "")
+        + f"</ArticleIdList><ReferenceList>{references}</ReferenceList></PubmedData></PubmedArticle>\n"
+    )
+
+
+def build_fixture(path: Path, articles: int, seed: int = 42):
+    """efetch 응답 형식의 fixture 파일 생성"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" ?>\n<PubmedArticleSet>\n')
+        for i in range(articles):
+            f.write(_article_xml(rng, 30000000 + i))
+        f.write('</PubmedArticleSet>\n')
+
+
+def run_iterparse(path: Path) -> int:
+    count = 0
+    with open(path, 'rb') as f:
+        for _ in iter_pubmed_articles(f):
+            count += 1
+    return count
+
+
+def run_beautifulsoup(path: Path) -> int:
+    """기존 PaperSearchService 방식: 페이지 전체를 BeautifulSoup 트리로 만든 뒤 find/find_all"""
+    from bs4 import BeautifulSoup
+
+    with open(path, 'rb') as f:
+        soup = BeautifulSoup(f.read(), 'xml')
+
+    count = 0
+    for article in soup.find_all('PubmedArticle'):
+        article.find('ArticleTitle')
+        article.find('AuthorList').find_all('Author')
+        article.find('Abstract').find_all('AbstractText')
+        article.find('PubDate')
+        article.find('PMID')
+        article.find_all('ArticleId')
+        article.find('KeywordList').find_all('Keyword')
+        count += 1
+    return count
+
+
+def measure(name: str, fn, path: Path):
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<16} {count:>7} articles  {elapsed:8.2f}s  "
+          f"{count / elapsed:9.0f} articles/s  peak {peak / 1024 / 1024:8.1f} MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=10000)
+    parser.add_argument('--fixture', type=Path,
+                        default=Path(tempfile.gettempdir()) / 'pubmed_benchmark_10k.xml')
+    parser.add_argument('--skip-bs4', action='store_true', help='BeautifulSoup 비교 생략')
+    args = parser.parse_args()
+
+    if not args.fixture.exists():
+        print(f"Generating fixture: {args.fixture} ({args.articles} articles)")
+        build_fixture(args.fixture, args.articles)
+    print(f"Fixture: {args.fixture} ({os.path.getsize(args.fixture) / 1024 / 1024:.1f} MB)")
+    print("-" * 80)
+
+    iterparse_time = measure('iterparse', run_iterparse, args.fixture)
+
+    if not args.skip_bs4:
+        try:
+            bs4_time = measure('BeautifulSoup', run_beautifulsoup, args.fixture)
+        except ImportError as e:
+            print(f"BeautifulSoup 비교 생략: {e}")
+        else:
+            print("-" * 80)
+            print(f"Speedup: {bs4_time / iterparse_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
 """
 향상된 논문 검색 엔진
 - 대량 검색 (100+ 논문)
-- 백그라운드 작업
+- 백그라운드 작업 (멀티 워커 스케줄러, 재시작 시 작업 복구)
 - 검색 상태 관리
 - 논문 색인
 """
@@ -12,28 +12,39 @@ import os
 import sqlite3
 import uuid
 from datetime import datetime
-import threading
-import queue
-import time
 from typing import List, Dict, Optional
 from paper_search_service import PaperSearchService
+from search_scheduler import SearchScheduler, JobControl, get_source_limiter
+from sqlite_manager import get_db
 import hashlib
+import re
+
+# 한 번에 슬롯을 점유하고 수집하는 최대 논문 수 (수집기 내부에서는 200건씩 efetch)
+HARVEST_CHUNK_SIZE = 500
 
 class SearchEngine:
-    def __init__(self, db_path='spinalsurgery_research.db'):
+    def __init__(self, db_path='spinalsurgery_research.db', num_workers: Optional[int] = None):
         self.db_path = db_path
+        self.db = get_db(db_path)
         self.search_service = PaperSearchService(db_path)
-        self.search_queue = queue.Queue()
         self.active_searches = {}
         self._init_search_tables()
         
-        # 백그라운드 워커 시작
-        self.worker_thread = threading.Thread(target=self._search_worker, daemon=True)
-        self.worker_thread.start()
+        # 백그라운드 워커 풀 시작
+        if num_workers is None:
+            self.scheduler = SearchScheduler(self._execute_search)
+        else:
+            self.scheduler = SearchScheduler(self._execute_search, num_workers)
+        
+        # 이전 실행에서 끝나지 않은 작업 복구
+        self._recover_jobs()
     
     def _init_search_tables(self):
         """검색 엔진 관련 테이블 초기화"""
-        conn = sqlite3.connect(self.db_path)
+        self.db.write(self._create_search_tables)
+    
+    def _create_search_tables(self, conn: sqlite3.Connection):
+        """쓰기 스레드에서 실행되는 테이블 생성"""
         c = conn.cursor()
         
         # 검색 작업 상태 테이블
@@ -49,20 +60,48 @@ class SearchEngine:
             FOREIGN KEY (session_id) REFERENCES search_sessions (id)
         )''')
         
-        # 논문 색인 테이블 (전문 검색용)
-        c.execute('''CREATE TABLE IF NOT EXISTS paper_index (
-            paper_id TEXT PRIMARY KEY,
-            title_tokens TEXT,
-            abstract_tokens TEXT,
-            author_tokens TEXT,
-            keyword_tokens TEXT,
-            year INTEGER,
-            citation_count INTEGER DEFAULT 0,
-            relevance_score REAL DEFAULT 0.0,
-            indexed_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (paper_id) REFERENCES searched_papers (id)
+        # 기존 DB 마이그레이션: 작업 우선순위 컬럼
+        c.execute('PRAGMA table_info(search_jobs)')
+        if 'priority' not in [row[1] for row in c.fetchall()]:
+            c.execute('ALTER TABLE search_jobs ADD COLUMN priority INTEGER DEFAULT 0')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_search_jobs_status ON search_jobs (status)')
+        
+        # 논문 전문 검색 색인 (FTS5, searched_papers 외부 콘텐츠 테이블)
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'paper_fts'")
+        fts_exists = c.fetchone() is not None
+        
+        c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS paper_fts USING fts5(
+            title, abstract, authors, keywords,
+            content='searched_papers',
+            content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
         )''')
         
+        # searched_papers 변경 시 색인 자동 동기화
+        c.execute('''CREATE TRIGGER IF NOT EXISTS searched_papers_fts_ai
+            AFTER INSERT ON searched_papers BEGIN
+                INSERT INTO paper_fts (rowid, title, abstract, authors, keywords)
+                VALUES (new.rowid, new.title, new.abstract, new.authors, new.keywords);
+            END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS searched_papers_fts_ad
+            AFTER DELETE ON searched_papers BEGIN
+                INSERT INTO paper_fts (paper_fts, rowid, title, abstract, authors, keywords)
+                VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.keywords);
+            END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS searched_papers_fts_au
+            AFTER UPDATE ON searched_papers BEGIN
+                INSERT INTO paper_fts (paper_fts, rowid, title, abstract, authors, keywords)
+                VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.keywords);
+                INSERT INTO paper_fts (rowid, title, abstract, authors, keywords)
+                VALUES (new.rowid, new.title, new.abstract, new.authors, new.keywords);
+            END''')
+        
+        # 기존 DB: 이미 저장된 논문으로 색인 재구성, 이전 LIKE 기반 토큰 색인 제거
+        if not fts_exists:
+            c.execute("INSERT INTO paper_fts (paper_fts) VALUES ('rebuild')")
+        c.execute('DROP TABLE IF EXISTS paper_index')
+        
         # 검색 통계 테이블
         c.execute('''CREATE TABLE IF NOT EXISTS search_stats (
             id TEXT PRIMARY KEY,
@@ -74,118 +113,139 @@ class SearchEngine:
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (session_id) REFERENCES search_sessions (id)
         )''')
-        
-        conn.commit()
-        conn.close()
     
     def start_search(self, project_id: str, query: str, site_ids: List[str], 
-                    target_count: int = 100) -> str:
-        """새로운 검색 작업 시작"""
+                    target_count: int = 100, priority: int = 0) -> str:
+        """새로운 검색 작업 시작 (priority가 클수록 먼저 실행)"""
         # 검색 세션 생성
         session_id = self.search_service.create_search_session(project_id, query, site_ids)
         
         # 검색 작업 생성
         job_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''INSERT INTO search_jobs (id, session_id, status, total_expected)
-                    VALUES (?, ?, ?, ?)''',
-                 (job_id, session_id, 'pending', target_count))
-        conn.commit()
-        conn.close()
+        self.db.execute('''INSERT INTO search_jobs (id, session_id, status, total_expected, priority)
+                           VALUES (?, ?, ?, ?, ?)''',
+                        (job_id, session_id, 'pending', target_count, priority))
         
-        # 검색 작업을 큐에 추가
+        # 검색 작업을 스케줄러에 등록
         search_task = {
             'job_id': job_id,
             'session_id': session_id,
             'project_id': project_id,
             'query': query,
             'site_ids': site_ids,
-            'target_count': target_count
+            'target_count': target_count,
+            'start': 0
         }
         
-        self.active_searches[job_id] = search_task
-        self.search_queue.put(search_task)
+        self._submit(search_task, priority)
         
         return job_id
     
-    def _search_worker(self):
-        """백그라운드 검색 워커"""
-        while True:
-            try:
-                task = self.search_queue.get(timeout=1)
-                self._execute_search(task)
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Search worker error: {e}")
+    def _submit(self, task: Dict, priority: int = 0):
+        """작업을 활성 목록과 스케줄러에 등록"""
+        self.active_searches[task['job_id']] = task
+        self.scheduler.submit(task, priority)
     
-    def _execute_search(self, task: Dict):
-        """실제 검색 실행"""
+    def _task_from_row(self, job_data) -> Dict:
+        """search_jobs + search_sessions 조회 결과로 작업 복원 (저장된 진행률부터 재개)"""
+        return {
+            'job_id': job_data['id'],
+            'session_id': job_data['session_id'],
+            'project_id': job_data['project_id'],
+            'query': job_data['search_query'],
+            'site_ids': json.loads(job_data['search_sites']),
+            'target_count': job_data['total_expected'],
+            'start': job_data['progress'] or 0
+        }
+    
+    def _recover_jobs(self):
+        """대기 중이거나 실행 중이던 작업을 다시 스케줄러에 등록"""
+        rows = self.db.query('''SELECT j.*, s.project_id, s.search_query, s.search_sites
+                                FROM search_jobs j
+                                JOIN search_sessions s ON j.session_id = s.id
+                                WHERE j.status IN ('pending', 'running')
+                                ORDER BY j.created_at''')
+        for row in rows:
+            self._submit(self._task_from_row(row), row['priority'] or 0)
+    
+    def _execute_search(self, task: Dict, control: JobControl) -> Optional[Dict]:
+        """실제 검색 실행 (워커 스레드)
+        
+        일시정지되면 저장된 진행률부터 이어서 실행할 작업을 반환하고
+        워커를 반납한다 (스케줄러가 보류 후 재개 시 다시 큐에 등록).
+        """
         job_id = task['job_id']
         session_id = task['session_id']
         query = task['query']
         site_ids = task['site_ids']
         target_count = task['target_count']
         
+        # 취소된 작업은 바로 종료, 워커에 배정되는 사이 일시정지된 작업은 반납
+        if control.cancelled:
+            self.active_searches.pop(job_id, None)
+            return None
+        if control.paused:
+            return task
+        
         # 상태 업데이트: running
         self._update_job_status(job_id, 'running')
         
-        all_papers = []
-        total_fetched = 0
+        # 저장된 논문 수 = 다음 페이지 시작 위치 (재시작 시 이어서 검색)
+        total_fetched = task.get('start', 0)
+        paused_task = None
         
         try:
             for site_id in site_ids:
                 if site_id == 'pubmed':
                     # PubMed에서 대량 검색
-                    start = 0
+                    limiter = get_source_limiter(site_id)
+                    start = total_fetched
+                    history = None
                     while total_fetched < target_count:
-                        # 작업 상태 확인
-                        status = self._get_job_status(job_id)
-                        if status == 'paused':
-                            time.sleep(1)
-                            continue
-                        elif status == 'cancelled':
+                        # 취소되면 중단, 일시정지되면 여기까지의 진행률로 반납
+                        if control.cancelled:
+                            break
+                        if control.paused:
+                            paused_task = dict(task, start=total_fetched)
                             break
                         
-                        # 검색 실행
-                        result = self.search_service.search_pubmed(
-                            query, session_id, 
-                            max_results=min(100, target_count - total_fetched),
-                            start=start
-                        )
+                        # 검색 실행 (소스별 동시 실행 수 제한, WebEnv 재사용)
+                        with limiter.slot():
+                            result = self.search_service.search_pubmed(
+                                query, session_id, 
+                                max_results=min(HARVEST_CHUNK_SIZE, target_count - total_fetched),
+                                start=start,
+                                history=history
+                            )
                         
+                        history = result['history']
                         papers = result['papers']
                         if not papers:
                             break
                         
-                        all_papers.extend(papers)
+                        # 페이지 단위 저장 후 진행 상황 갱신 (쓰기 큐에서 순서 보장)
+                        self._save_papers_batch(session_id, papers)
                         total_fetched += len(papers)
-                        
-                        # 진행 상황 업데이트
                         self._update_job_progress(job_id, total_fetched)
                         
-                        # 배치 저장
-                        if len(all_papers) >= 20:
-                            self._save_papers_batch(session_id, all_papers)
-                            all_papers = []
-                        
                         # 더 이상 결과가 없으면 중단
                         if not result['has_more']:
                             break
                         
                         start += len(papers)
-                        time.sleep(1)  # API 제한 회피
+                
+                if paused_task:
+                    break
                 
                 # TODO: 다른 검색 사이트 구현
             
-            # 남은 논문 저장
-            if all_papers:
-                self._save_papers_batch(session_id, all_papers)
+            if paused_task:
+                self.active_searches[job_id] = paused_task
+                return paused_task
             
-            # 논문 색인화
-            self._index_session_papers(session_id)
+            if control.cancelled:
+                return None
             
             # 보고서 생성
             report_path = self.search_service.generate_result_report(session_id, task['project_id'])
@@ -198,13 +258,18 @@ class SearchEngine:
             self._update_job_status(job_id, 'failed', str(e))
         
         finally:
-            # 활성 검색에서 제거
-            if job_id in self.active_searches:
-                del self.active_searches[job_id]
+            # 활성 검색에서 제거 (일시정지로 반납한 작업은 유지)
+            if paused_task is None:
+                self.active_searches.pop(job_id, None)
+        
+        return None
     
     def _save_papers_batch(self, session_id: str, papers: List[Dict]):
         """논문 배치 저장"""
-        conn = sqlite3.connect(self.db_path)
+        self.db.write(lambda conn: self._insert_papers(conn, session_id, papers))
+    
+    def _insert_papers(self, conn: sqlite3.Connection, session_id: str, papers: List[Dict]):
+        """쓰기 스레드에서 실행되는 논문 저장 (중복 제외)"""
         c = conn.cursor()
         
         for paper in papers:
@@ -230,191 +295,132 @@ class SearchEngine:
                       paper['pmid'], paper['url'], paper['access_type'],
                       paper.get('fulltext_url', ''), paper['keywords'],
                       datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
-    def _index_session_papers(self, session_id: str):
-        """세션의 논문들을 색인화"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute('SELECT * FROM searched_papers WHERE session_id = ?', (session_id,))
-        papers = c.fetchall()
-        
-        for paper in papers:
-            # 토큰화 (간단한 구현)
-            title_tokens = self._tokenize(paper['title'])
-            abstract_tokens = self._tokenize(paper['abstract'] or '')
-            author_tokens = self._tokenize(paper['authors'] or '')
-            keyword_tokens = paper['keywords'] or '[]'
-            
-            # 색인 저장
-            c.execute('''INSERT OR REPLACE INTO paper_index 
-                        (paper_id, title_tokens, abstract_tokens, author_tokens, 
-                         keyword_tokens, year, indexed_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                     (paper['id'], title_tokens, abstract_tokens, author_tokens,
-                      keyword_tokens, paper['publication_year'],
-                      datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
-    def _tokenize(self, text: str) -> str:
-        """텍스트 토큰화 (검색용)"""
-        if not text:
-            return ''
-        # 소문자 변환, 특수문자 제거, 공백으로 분리
-        tokens = text.lower().replace(',', ' ').replace('.', ' ').replace('-', ' ').split()
-        return ' '.join(tokens)
     
     def _update_job_status(self, job_id: str, status: str, error_message: str = None):
         """작업 상태 업데이트"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
         if error_message:
-            c.execute('''UPDATE search_jobs 
-                        SET status = ?, error_message = ?, updated_at = ?
-                        WHERE id = ?''',
-                     (status, error_message, datetime.now().isoformat(), job_id))
+            self.db.execute('''UPDATE search_jobs 
+                               SET status = ?, error_message = ?, updated_at = ?
+                               WHERE id = ?''',
+                            (status, error_message, datetime.now().isoformat(), job_id))
         else:
-            c.execute('''UPDATE search_jobs 
-                        SET status = ?, updated_at = ?
-                        WHERE id = ?''',
-                     (status, datetime.now().isoformat(), job_id))
-        
-        conn.commit()
-        conn.close()
+            self.db.execute('''UPDATE search_jobs 
+                               SET status = ?, updated_at = ?
+                               WHERE id = ?''',
+                            (status, datetime.now().isoformat(), job_id))
     
     def _update_job_progress(self, job_id: str, progress: int):
-        """작업 진행 상황 업데이트"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''UPDATE search_jobs 
-                    SET progress = ?, updated_at = ?
-                    WHERE id = ?''',
-                 (progress, datetime.now().isoformat(), job_id))
-        
-        conn.commit()
-        conn.close()
+        """작업 진행 상황 업데이트 (커밋을 기다리지 않음, 쓰기 큐에서 배치 처리)"""
+        self.db.execute('''UPDATE search_jobs 
+                           SET progress = ?, updated_at = ?
+                           WHERE id = ?''',
+                        (progress, datetime.now().isoformat(), job_id),
+                        wait=False)
     
     def _get_job_status(self, job_id: str) -> str:
         """작업 상태 조회"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('SELECT status FROM search_jobs WHERE id = ?', (job_id,))
-        result = c.fetchone()
-        
-        conn.close()
+        result = self.db.query_one('SELECT status FROM search_jobs WHERE id = ?', (job_id,))
         
         return result[0] if result else 'unknown'
     
     def pause_search(self, job_id: str):
         """검색 일시정지"""
         self._update_job_status(job_id, 'paused')
+        self.scheduler.pause(job_id)
     
     def resume_search(self, job_id: str):
         """검색 재개"""
-        if job_id in self.active_searches:
+        if job_id in self.active_searches and self.scheduler.resume(job_id):
             self._update_job_status(job_id, 'running')
         else:
             # 재시작이 필요한 경우
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            
-            c.execute('''SELECT j.*, s.project_id, s.search_query, s.search_sites
-                        FROM search_jobs j
-                        JOIN search_sessions s ON j.session_id = s.id
-                        WHERE j.id = ?''', (job_id,))
-            
-            job_data = c.fetchone()
-            conn.close()
+            job_data = self.db.query_one('''SELECT j.*, s.project_id, s.search_query, s.search_sites
+                                           FROM search_jobs j
+                                           JOIN search_sessions s ON j.session_id = s.id
+                                           WHERE j.id = ?''', (job_id,))
             
             if job_data and job_data['status'] == 'paused':
-                task = {
-                    'job_id': job_id,
-                    'session_id': job_data['session_id'],
-                    'project_id': job_data['project_id'],
-                    'query': job_data['search_query'],
-                    'site_ids': json.loads(job_data['search_sites']),
-                    'target_count': job_data['total_expected']
-                }
-                
-                self.active_searches[job_id] = task
-                self.search_queue.put(task)
+                self._update_job_status(job_id, 'pending')
+                self._submit(self._task_from_row(job_data), job_data['priority'] or 0)
     
     def cancel_search(self, job_id: str):
         """검색 취소"""
         self._update_job_status(job_id, 'cancelled')
+        self.scheduler.cancel(job_id)
     
     def get_job_info(self, job_id: str) -> Dict:
         """작업 정보 조회"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        c.execute('''SELECT j.*, s.search_query, s.total_results, s.abstract_count, s.fulltext_count
-                    FROM search_jobs j
-                    LEFT JOIN search_sessions s ON j.session_id = s.id
-                    WHERE j.id = ?''', (job_id,))
-        
-        result = c.fetchone()
-        conn.close()
+        result = self.db.query_one('''SELECT j.*, s.search_query, s.total_results, s.abstract_count, s.fulltext_count
+                                      FROM search_jobs j
+                                      LEFT JOIN search_sessions s ON j.session_id = s.id
+                                      WHERE j.id = ?''', (job_id,))
         
         if result:
             return dict(result)
         return None
     
-    def search_in_papers(self, query: str, project_id: str = None) -> List[Dict]:
-        """저장된 논문에서 검색"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+    def _build_fts_query(self, query: str) -> str:
+        """사용자 검색어를 FTS5 MATCH 구문으로 변환
+        
+        - "lumbar fusion" : 구문(phrase) 검색
+        - fusi*           : 접두어(prefix) 검색
+        - A OR B          : 논리합 (기본은 AND)
+        그 외 특수문자는 모두 따옴표로 감싸 FTS5 문법 오류를 방지
+        """
+        terms = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+            if phrase:
+                if re.search(r'\w', phrase):
+                    terms.append('"' + phrase + '"')
+                continue
+            
+            if word == 'OR':
+                if terms and terms[-1] != 'OR':
+                    terms.append('OR')
+                continue
+            
+            word = word.replace('"', '')
+            prefix = word.endswith('*')
+            word = word.rstrip('*')
+            if not re.search(r'\w', word):
+                continue
+            terms.append('"' + word + '"' + ('*' if prefix else ''))
         
-        # 쿼리 토큰화
-        query_tokens = self._tokenize(query)
+        if terms and terms[-1] == 'OR':
+            terms.pop()
         
-        # 검색 쿼리 구성
-        sql = '''SELECT DISTINCT p.*, 
-                (CASE 
-                    WHEN p.title LIKE ? THEN 10
-                    WHEN i.title_tokens LIKE ? THEN 8
-                    WHEN i.abstract_tokens LIKE ? THEN 5
-                    WHEN i.author_tokens LIKE ? THEN 3
-                    ELSE 1
-                END) as relevance
-                FROM searched_papers p
-                LEFT JOIN paper_index i ON p.id = i.paper_id
-                WHERE 1=1'''
+        return ' '.join(terms)
+    
+    def search_in_papers(self, query: str, project_id: str = None) -> List[Dict]:
+        """저장된 논문에서 검색 (FTS5 + BM25 순위)"""
+        match_query = self._build_fts_query(query)
+        if not match_query:
+            return []
         
-        params = [f'%{query}%', f'%{query_tokens}%', f'%{query_tokens}%', f'%{query_tokens}%']
+        # BM25 가중치: 제목 > 초록 > 저자 > 키워드 (값이 작을수록 관련도 높음)
+        sql = '''SELECT p.*, -bm25(paper_fts, 10.0, 5.0, 3.0, 1.0) as relevance
+                FROM paper_fts
+                JOIN searched_papers p ON p.rowid = paper_fts.rowid
+                WHERE paper_fts MATCH ?'''
+        
+        params = [match_query]
         
         if project_id:
             sql += ' AND p.session_id IN (SELECT id FROM search_sessions WHERE project_id = ?)'
             params.append(project_id)
         
-        sql += ''' AND (p.title LIKE ? OR p.abstract LIKE ? OR p.authors LIKE ?
-                   OR i.title_tokens LIKE ? OR i.abstract_tokens LIKE ? OR i.author_tokens LIKE ?)
-                ORDER BY relevance DESC, p.publication_year DESC
+        sql += '''
+                ORDER BY bm25(paper_fts, 10.0, 5.0, 3.0, 1.0), p.publication_year DESC
                 LIMIT 100'''
         
-        params.extend([f'%{query}%', f'%{query}%', f'%{query}%',
-                      f'%{query_tokens}%', f'%{query_tokens}%', f'%{query_tokens}%'])
-        
-        c.execute(sql, params)
-        results = [dict(row) for row in c.fetchall()]
-        
-        conn.close()
+        try:
+            results = [dict(row) for row in self.db.query(sql, params)]
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search error: {e}")
+            results = []
         
         return results
 
-
 if __name__ == '__main__':
     # 테스트
     engine = SearchEngine()
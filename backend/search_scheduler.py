@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+검색 작업 스케줄러
+- 설정 가능한 워커 풀 (SEARCH_WORKERS)
+- 프로젝트별 공정 분배 + 우선순위
+- 검색 소스별 동시 실행 수 / 요청 속도 제한 (NCBI: 초당 3회, API 키 사용 시 10회)
+- 일시정지/취소는 메모리 이벤트로 처리 (DB 폴링 없음)
+- 일시정지된 작업은 워커를 반납하고 보류되었다가 재개 시 다시 큐에 등록
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.pubmed_harvester import NCBI_RATE_LIMIT, get_ncbi_rate_limiter
+
+DEFAULT_SEARCH_WORKERS = int(os.getenv('SEARCH_WORKERS', '4'))
+
+# 소스 그룹별 (최대 동시 실행 수, 초당 요청 수)
+# pubmed와 pmc는 같은 E-utilities 한도를 공유하며, 요청 속도는 PubMed 수집기와
+# 같은 적응형 토큰 버킷으로 제한한다
+SOURCE_LIMITS = {
+    'ncbi': (2, NCBI_RATE_LIMIT),
+    'default': (2, 1.0),
+}
+
+SOURCE_GROUPS = {
+    'pubmed': 'ncbi',
+    'pmc': 'ncbi',
+}
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷 (초당 rate개, 최대 capacity개 누적)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """토큰 하나를 예약하고 사용 가능해질 때까지 기다려야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """토큰을 얻을 때까지 대기"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SourceLimiter:
+    """검색 소스의 동시 실행 수와 요청 속도 제한"""
+
+    def __init__(self, max_concurrent: int, rate: float, bucket=None):
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.bucket = bucket or TokenBucket(rate)
+
+    @contextmanager
+    def slot(self):
+        """동시 실행 슬롯 점유"""
+        with self.semaphore:
+            yield
+
+    def throttle(self):
+        """요청 한 건 전에 호출 (속도 제한)"""
+        self.bucket.acquire()
+
+
+_source_limiters: Dict[str, SourceLimiter] = {}
+_source_limiters_lock = threading.Lock()
+
+
+def get_source_limiter(site_id: str) -> SourceLimiter:
+    """프로세스 전체에서 공유되는 소스별 제한기 반환"""
+    group = SOURCE_GROUPS.get(site_id, site_id)
+    with _source_limiters_lock:
+        limiter = _source_limiters.get(group)
+        if limiter is None:
+            max_concurrent, rate = SOURCE_LIMITS.get(group, SOURCE_LIMITS['default'])
+            bucket = get_ncbi_rate_limiter() if group == 'ncbi' else None
+            limiter = SourceLimiter(max_concurrent, rate, bucket)
+            _source_limiters[group] = limiter
+        return limiter
+
+
+class JobControl:
+    """실행 중인 검색 작업의 일시정지/취소 신호"""
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # 취소된 작업은 일시정지 상태로 보지 않음
+
+
+class SearchScheduler:
+    """프로젝트별 공정 분배 검색 작업 스케줄러
+
+    프로젝트마다 우선순위 힙을 두고, 가장 높은 우선순위의 작업을 가진
+    프로젝트들 중 가장 오래 전에 처리된 프로젝트의 작업을 먼저 꺼낸다.
+    따라서 한 프로젝트의 대량 검색이 다른 프로젝트의 검색을 막지 않는다.
+
+    run_job은 일시정지로 중단되면 이어서 실행할 작업(task)을 반환한다.
+    워커는 그 작업을 보류 목록에 두고 바로 다음 작업을 처리하며,
+    resume()/cancel() 시 보류된 작업을 다시 큐에 넣는다.
+    """
+
+    def __init__(self, run_job: Callable[[Dict, JobControl], Optional[Dict]],
+                 num_workers: int = DEFAULT_SEARCH_WORKERS):
+        self._run_job = run_job
+        self._cond = threading.Condition()
+        self._project_queues: Dict[str, List[Tuple[int, int, Dict]]] = {}
+        self._last_served: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._served = itertools.count()
+        self._controls: Dict[str, JobControl] = {}
+        # 일시정지되어 워커를 반납한 작업: job_id -> (-priority, task)
+        self._parked: Dict[str, Tuple[int, Dict]] = {}
+
+        self.workers = []
+        for i in range(max(1, num_workers)):
+            worker = threading.Thread(target=self._worker, name=f'search-worker-{i}', daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, task: Dict, priority: int = 0) -> JobControl:
+        """작업 등록 (priority가 클수록 먼저 실행)"""
+        with self._cond:
+            control = self._controls.get(task['job_id'])
+            if control is None:
+                control = JobControl()
+                self._controls[task['job_id']] = control
+            self._enqueue(-priority, task)
+
+        return control
+
+    def _enqueue(self, neg_priority: int, task: Dict):
+        """프로젝트 큐에 작업 추가 (self._cond 보유 상태에서 호출)"""
+        queue = self._project_queues.setdefault(task['project_id'], [])
+        heapq.heappush(queue, (neg_priority, next(self._seq), task))
+        self._cond.notify()
+
+    def pause(self, job_id: str) -> bool:
+        """작업 일시정지 (실행 중인 작업은 다음 확인 지점에서 워커를 반납)"""
+        with self._cond:
+            control = self._controls.get(job_id)
+            if control is None:
+                return False
+            control.pause()
+            return True
+
+    def resume(self, job_id: str) -> bool:
+        """작업 재개, 보류된 작업은 다시 큐에 등록. 스케줄러가 모르는 작업이면 False"""
+        with self._cond:
+            control = self._controls.get(job_id)
+            if control is None:
+                return False
+            control.resume()
+            parked = self._parked.pop(job_id, None)
+            if parked:
+                self._enqueue(*parked)
+            return True
+
+    def cancel(self, job_id: str) -> bool:
+        """작업 취소, 보류된 작업은 큐에 넣어 워커가 정리하도록 함"""
+        with self._cond:
+            control = self._controls.get(job_id)
+            if control is None:
+                return False
+            control.cancel()
+            parked = self._parked.pop(job_id, None)
+            if parked:
+                self._enqueue(*parked)
+            return True
+
+    def control(self, job_id: str) -> Optional[JobControl]:
+        """대기 중이거나 실행 중인 작업의 제어 객체"""
+        with self._cond:
+            return self._controls.get(job_id)
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(len(queue) for queue in self._project_queues.values())
+
+    def _next_task(self) -> Tuple[int, Dict]:
+        """다음 실행할 작업과 (-priority) 선택 (self._cond 보유 상태에서 호출)"""
+        best_key, best_project = None, None
+        for project_id, queue in self._project_queues.items():
+            key = (queue[0][0], self._last_served.get(project_id, -1))
+            if best_key is None or key < best_key:
+                best_key, best_project = key, project_id
+
+        queue = self._project_queues[best_project]
+        neg_priority, _, task = heapq.heappop(queue)
+        if not queue:
+            del self._project_queues[best_project]
+        self._last_served[best_project] = next(self._served)
+        return neg_priority, task
+
+    def _worker(self):
+        """워커 스레드: 작업을 꺼내 실행"""
+        while True:
+            with self._cond:
+                while True:
+                    while not self._project_queues:
+                        self._cond.wait()
+                    neg_priority, task = self._next_task()
+                    control = self._controls[task['job_id']]
+                    if not control.paused:
+                        break
+                    # 대기 중에 일시정지된 작업은 실행하지 않고 보류
+                    self._parked[task['job_id']] = (neg_priority, task)
+
+            paused_task = None
+            try:
+                paused_task = self._run_job(task, control)
+            except Exception as e:
+                print(f"Search worker error: {e}")
+            finally:
+                with self._cond:
+                    if paused_task is None:
+                        self._controls.pop(task['job_id'], None)
+                    elif control.paused:
+                        self._parked[task['job_id']] = (neg_priority, paused_task)
+                    else:
+                        # 중단 직후 재개/취소된 작업은 바로 다시 큐에 등록
+                        self._enqueue(neg_priority, paused_task)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+SQLite 연결 관리자
+- 스레드별 재사용 연결 (읽기 전용)
+- WAL 저널 모드 / synchronous=NORMAL / mmap 설정
+- 준비된 문장(prepared statement) 캐시 재사용
+- 단일 쓰기 스레드 큐: 작은 쓰기 작업을 하나의 트랜잭션으로 묶어 처리
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_DB_PATH = 'spinalsurgery_research.db'
+
+# 연결마다 적용되는 PRAGMA
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',  # 256MB
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+)
+
+# 연결당 준비된 문장 캐시 크기 (sqlite3 모듈 기본값은 128)
+STATEMENT_CACHE_SIZE = 256
+
+# 쓰기 스레드가 한 트랜잭션에 묶어 처리하는 최대 작업 수
+MAX_WRITE_BATCH = 200
+
+
+class SQLiteConnectionManager:
+    """하나의 SQLite 파일에 대한 공유 연결 관리자
+
+    읽기는 `query()` / `query_one()` 또는 `connection()`이 반환하는 스레드별
+    연결을 사용하고, 쓰기는 모두 `execute()` / `executemany()` / `write()`를
+    통해 단일 쓰기 스레드로 보낸다. 쓰기 스레드는 큐에 쌓인 작업을 모아
+    하나의 트랜잭션으로 커밋하며, 작업마다 SAVEPOINT를 두어 한 작업의
+    실패가 같은 배치의 다른 작업에 영향을 주지 않는다.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_queue = queue.Queue()
+        self._closed = False
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name=f'sqlite-writer:{os.path.basename(db_path)}', daemon=True
+        )
+        self._writer_thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """PRAGMA가 적용된 새 연결 생성 (autocommit 모드)"""
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    # ---------------------------------------------------------------
+    # 읽기
+    # ---------------------------------------------------------------
+
+    def connection(self) -> sqlite3.Connection:
+        """현재 스레드의 재사용 연결 반환
+
+        autocommit 모드이므로 SELECT 외의 작업에는 사용하지 않는다.
+        커서는 사용 후 닫아야 다음 조회에서 최신 스냅샷을 읽는다.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def query(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        """SELECT 실행 후 전체 결과 반환"""
+        cursor = self.connection().execute(sql, params)
+        try:
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        """SELECT 실행 후 첫 번째 행 반환"""
+        cursor = self.connection().execute(sql, params)
+        try:
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+    # ---------------------------------------------------------------
+    # 쓰기
+    # ---------------------------------------------------------------
+
+    def write(self, fn: Callable[[sqlite3.Connection], Any], wait: bool = True) -> Any:
+        """쓰기 스레드에서 fn(conn) 실행
+
+        wait=True이면 커밋될 때까지 기다린 뒤 fn의 반환값을 돌려주고,
+        wait=False이면 큐에 넣고 바로 반환한다 (진행률 갱신 등 작은 업데이트용).
+        """
+        if threading.current_thread() is self._writer_thread:
+            # 쓰기 작업 안에서 다시 호출된 경우 현재 트랜잭션에서 바로 실행
+            return fn(self._writer_conn)
+
+        if self._closed:
+            raise RuntimeError(f'Connection manager for {self.db_path} is closed')
+
+        future = Future() if wait else None
+        self._write_queue.put((fn, future))
+        return future.result() if future else None
+
+    def execute(self, sql: str, params: Sequence = (), wait: bool = True) -> Optional[int]:
+        """단일 쓰기 문장 실행, 영향받은 행 수 반환"""
+        return self.write(lambda conn: conn.execute(sql, params).rowcount, wait=wait)
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence], wait: bool = True) -> Optional[int]:
+        """같은 쓰기 문장을 여러 파라미터로 실행"""
+        seq_of_params = list(seq_of_params)
+        return self.write(lambda conn: conn.executemany(sql, seq_of_params).rowcount, wait=wait)
+
+    def flush(self):
+        """지금까지 큐에 들어간 모든 쓰기가 커밋될 때까지 대기"""
+        if not self._closed:
+            self.write(lambda conn: None)
+
+    def _writer_loop(self):
+        """쓰기 전용 스레드: 큐의 작업을 배치 단위로 커밋"""
+        self._writer_conn = self._connect()
+        stop = False
+
+        while not stop:
+            job = self._write_queue.get()
+            if job is None:
+                break
+
+            batch = [job]
+            while len(batch) < MAX_WRITE_BATCH:
+                try:
+                    job = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+
+            self._run_batch(batch)
+
+        self._writer_conn.close()
+
+    def _run_batch(self, batch: List):
+        """작업 배치를 하나의 트랜잭션으로 실행"""
+        conn = self._writer_conn
+        outcomes = []
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in batch:
+                conn.execute('SAVEPOINT write_job')
+                try:
+                    result = fn(conn)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write_job')
+                    conn.execute('RELEASE write_job')
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute('RELEASE write_job')
+                    outcomes.append((future, result, None))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            outcomes = [(future, None, e) for _, future in batch]
+
+        for future, result, error in outcomes:
+            if future is None:
+                if error is not None:
+                    print(f"SQLite background write error: {error}")
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """남은 쓰기를 모두 커밋하고 쓰기 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_queue.put(None)
+        self._writer_thread.join()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_managers: Dict[str, SQLiteConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_db(db_path: str = DEFAULT_DB_PATH) -> SQLiteConnectionManager:
+    """DB 파일별 공유 연결 관리자 반환"""
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None or manager._closed:
+            manager = SQLiteConnectionManager(db_path)
+            _managers[key] = manager
+        return manager
+
+
+@atexit.register
+def close_all():
+    """프로세스 종료 시 대기 중인 쓰기 커밋"""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
@@ -29,6 +29,18 @@ interface FileNode {
   extension?: string;
 }
 
+interface DirectoryPage {
+  path: string;
+  items: FileNode[];
+  next_cursor: string | null;
+  total: number;
+}
+
+interface LoadedChildren {
+  items: FileNode[];
+  nextCursor: string | null;
+}
+
 interface FileTreeProps {
   rootPath?: string;
   selectedPath?: string;
@@ -57,14 +69,19 @@ const TreeNode: React.FC<{
   level: number;
   selectedPath?: string;
   expandedPaths: Set<string>;
+  loadedChildren: Record<string, LoadedChildren>;
   onToggle: (path: string) => void;
+  onLoadMore: (path: string) => void;
   onSelect: (path: string, node: FileNode) => void;
   onContextMenu: (e: React.MouseEvent, node: FileNode) => void;
-}> = ({ node, level, selectedPath, expandedPaths, onToggle, onSelect, onContextMenu }) => {
+}> = ({ node, level, selectedPath, expandedPaths, loadedChildren, onToggle, onLoadMore, onSelect, onContextMenu }) => {
   const isExpanded = expandedPaths.has(node.path);
   const isSelected = selectedPath === node.path;
   const isDirectory = node.type === 'directory';
-  const hasChildren = node.children && node.children.length > 0;
+  // Children are fetched one page at a time when the directory is expanded
+  const loaded = loadedChildren[node.path];
+  const children = loaded ? loaded.items : node.children || [];
+  const hasChildren = children.length > 0;
 
   return (
     <div>
@@ -113,18 +130,29 @@ const TreeNode: React.FC<{
       
       {isDirectory && isExpanded && hasChildren && (
         <div>
-          {node.children!.map((child) => (
+          {children.map((child) => (
             <TreeNode
               key={child.path}
               node={child}
               level={level + 1}
               selectedPath={selectedPath}
               expandedPaths={expandedPaths}
+              loadedChildren={loadedChildren}
               onToggle={onToggle}
+              onLoadMore={onLoadMore}
               onSelect={onSelect}
               onContextMenu={onContextMenu}
             />
           ))}
+          {loaded?.nextCursor && (
+            <button
+              onClick={() => onLoadMore(node.path)}
+              className="text-xs text-vscode-text-dim hover:text-vscode-text px-2 py-1"
+              style={{ paddingLeft: `${(level + 1) * 16 + 28}px` }}
+            >
+              Load more...
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -143,6 +171,7 @@ export const FileTree: React.FC<FileTreeProps> = ({
 }) => {
   const [treeData, setTreeData] = useState<FileNode | null>(null);
   const [expandedPaths, setExpandedPaths] = useState<Set<string>>(new Set());
+  const [loadedChildren, setLoadedChildren] = useState<Record<string, LoadedChildren>>({});
   const [loading, setLoading] = useState(true);
   const [contextMenuNode, setContextMenuNode] = useState<FileNode | null>(null);
   const [contextMenuPosition, setContextMenuPosition] = useState({ x: 0, y: 0 });
@@ -151,10 +180,27 @@ export const FileTree: React.FC<FileTreeProps> = ({
     fetchTree();
   }, [rootPath]);
 
+  const fetchChildren = async (path: string, cursor: string | null = null) => {
+    const params = new URLSearchParams({ path });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`/api/v1/file-browser/tree/children?${params}`);
+    if (!response.ok) throw new Error('Failed to fetch directory');
+    const page: DirectoryPage = await response.json();
+    setLoadedChildren((prev) => ({
+      ...prev,
+      [path]: {
+        items: cursor && prev[path] ? [...prev[path].items, ...page.items] : page.items,
+        nextCursor: page.next_cursor,
+      },
+    }));
+  };
+
   const fetchTree = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`/api/v1/file-browser/tree?path=${encodeURIComponent(rootPath)}`);
+      setLoadedChildren({});
+      // Only the root node; directories are expanded lazily
+      const response = await fetch(`/api/v1/file-browser/tree?path=${encodeURIComponent(rootPath)}&depth=1`);
       if (!response.ok) throw new Error('Failed to fetch tree');
       const data = await response.json();
       setTreeData(data);
@@ -162,6 +208,7 @@ export const FileTree: React.FC<FileTreeProps> = ({
       // Auto-expand root
       if (data.type === 'directory') {
         setExpandedPaths(new Set([data.path]));
+        await fetchChildren(data.path);
       }
     } catch (error) {
       console.error('Error fetching tree:', error);
@@ -171,6 +218,9 @@ export const FileTree: React.FC<FileTreeProps> = ({
   };
 
   const handleToggle = (path: string) => {
+    if (!expandedPaths.has(path) && !loadedChildren[path]) {
+      fetchChildren(path).catch((error) => console.error('Error fetching directory:', error));
+    }
     setExpandedPaths((prev) => {
       const next = new Set(prev);
       if (next.has(path)) {
@@ -182,6 +232,13 @@ export const FileTree: React.FC<FileTreeProps> = ({
     });
   };
 
+  const handleLoadMore = (path: string) => {
+    const loaded = loadedChildren[path];
+    if (loaded?.nextCursor) {
+      fetchChildren(path, loaded.nextCursor).catch((error) => console.error('Error fetching directory:', error));
+    }
+  };
+
   const handleContextMenu = (e: React.MouseEvent, node: FileNode) => {
     e.preventDefault();
     setContextMenuPosition({ x: e.clientX, y: e.clientY });
@@ -225,7 +282,9 @@ export const FileTree: React.FC<FileTreeProps> = ({
           level={0}
           selectedPath={selectedPath}
           expandedPaths={expandedPaths}
+          loadedChildren={loadedChildren}
           onToggle={handleToggle}
+          onLoadMore={handleLoadMore}
           onSelect={onSelectFile}
           onContextMenu={handleContextMenu}
         />
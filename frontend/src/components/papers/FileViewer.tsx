@@ -15,6 +15,10 @@ interface FileContent {
   type: 'text' | 'json' | 'pdf' | 'binary';
   content?: string | any;
   path?: string;
+  // Set when only a window of a large text file was returned
+  truncated?: boolean;
+  next_offset?: number | null;
+  size?: number;
 }
 
 export const FileViewer: React.FC<FileViewerProps> = ({
@@ -58,6 +62,24 @@ export const FileViewer: React.FC<FileViewerProps> = ({
     }
   };
 
+  const loadMore = async () => {
+    if (!fileContent?.next_offset) return;
+    try {
+      const response = await fetch(
+        `/api/v1/file-browser/content?path=${encodeURIComponent(filePath)}&offset=${fileContent.next_offset}`
+      );
+      if (!response.ok) throw new Error('Failed to fetch file content');
+      const data: FileContent = await response.json();
+      setFileContent({
+        ...fileContent,
+        content: (fileContent.content as string) + (data.content as string),
+        next_offset: data.next_offset,
+      });
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to load file');
+    }
+  };
+
   const handleSave = async () => {
     if (!onSave || !isDirty) return;
     
@@ -112,16 +134,11 @@ export const FileViewer: React.FC<FileViewerProps> = ({
     switch (fileContent.type) {
       case 'pdf':
         return (
-          <div className="flex flex-col items-center justify-center h-64 text-vscode-text-dim">
-            <p className="mb-4">PDF Preview not available</p>
-            <button 
-              className="vscode-button-secondary flex items-center"
-              onClick={() => window.open(`/api/v1/file-browser/download?path=${encodeURIComponent(filePath)}`, '_blank')}
-            >
-              <Download className="w-4 h-4 mr-2" />
-              Download PDF
-            </button>
-          </div>
+          <iframe
+            src={`/api/v1/file-browser/download?path=${encodeURIComponent(filePath)}&inline=true`}
+            className="w-full h-full min-h-[600px] border-0"
+            title={fileName}
+          />
         );
 
       case 'binary':
@@ -161,6 +178,13 @@ export const FileViewer: React.FC<FileViewerProps> = ({
                 ? JSON.stringify(fileContent.content, null, 2)
                 : fileContent.content}
             </pre>
+            {fileContent.next_offset != null && (
+              <div className="px-4 pb-4">
+                <button className="vscode-button-secondary" onClick={loadMore}>
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         );
 
@@ -169,7 +193,8 @@ export const FileViewer: React.FC<FileViewerProps> = ({
     }
   };
 
-  const canEdit = fileContent && ['text', 'json'].includes(fileContent.type);
+  // Partially loaded files cannot be edited without dropping the rest of the file
+  const canEdit = fileContent && ['text', 'json'].includes(fileContent.type) && !fileContent.truncated;
 
   return (
     <div className="flex flex-col h-full bg-vscode-bg-light rounded-lg shadow-sm border border-vscode-border">
@@ -3,143 +3,98 @@
 PubMed 검색 도구 - 척추 수술 관련 논문 검색
 """
 
-import requests
-import xml.etree.ElementTree as ET
+import asyncio
+import os
+import sys
 from typing import List, Dict
 import json
 from datetime import datetime
 
+# 백엔드의 PubMed 수집기 사용 (히스토리 서버 + NCBI 속도 제한)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from app.services.pubmed_harvester import PubMedHarvester
+from app.services.pubmed_xml_parser import iter_pubmed_articles
+
+
 class PubMedSearcher:
-    def __init__(self):
-        self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
-        self.search_url = self.base_url + "esearch.fcgi"
-        self.fetch_url = self.base_url + "efetch.fcgi"
-    
-    def search(self, query: str, max_results: int = 20, 
-               start_year: int = None, end_year: int = None) -> List[str]:
-        """PubMed 검색 수행"""
-        # 날짜 필터 추가
+    def _date_filter(self, query: str, start_year: int = None, end_year: int = None) -> str:
+        """날짜 필터 추가"""
         if start_year or end_year:
             current_year = datetime.now().year
             start = start_year or 1900
             end = end_year or current_year
             query += f" AND {start}:{end}[dp]"
+        return query
+    
+    def search(self, query: str, max_results: int = 20, 
+               start_year: int = None, end_year: int = None) -> List[str]:
+        """PubMed 검색 수행"""
+        query = self._date_filter(query, start_year, end_year)
         
-        params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': max_results,
-            'retmode': 'xml',
-            'sort': 'relevance'
-        }
-        
-        response = requests.get(self.search_url, params=params)
-        if response.status_code != 200:
-            return []
+        async def run():
+            async with PubMedHarvester() as harvester:
+                return await harvester.search_ids(query, max_results)
         
-        # XML 파싱
-        root = ET.fromstring(response.text)
-        id_list = root.find('IdList')
-        if id_list is None:
+        try:
+            return asyncio.run(run())
+        except Exception as e:
+            print(f"Search error: {e}")
             return []
-        
-        return [id_elem.text for id_elem in id_list.findall('Id')]
     
     def fetch_details(self, pmids: List[str]) -> List[Dict]:
         """PMID로 상세 정보 가져오기"""
         if not pmids:
             return []
         
-        params = {
-            'db': 'pubmed',
-            'id': ','.join(pmids),
-            'retmode': 'xml',
-            'rettype': 'abstract'
-        }
+        async def run():
+            articles = []
+            async with PubMedHarvester() as harvester:
+                async for page in harvester.fetch_ids(pmids, parse_page=self._parse_page):
+                    articles.extend(page)
+            return articles
         
-        response = requests.get(self.fetch_url, params=params)
-        if response.status_code != 200:
+        try:
+            return asyncio.run(run())
+        except Exception as e:
+            print(f"Fetch error: {e}")
             return []
+    
+    def harvest(self, query: str, max_results: int = 20,
+                start_year: int = None, end_year: int = None) -> List[Dict]:
+        """검색 + 상세 정보 수집 (WebEnv 사용, 대량 수집용)"""
+        query = self._date_filter(query, start_year, end_year)
         
-        # XML 파싱
-        root = ET.fromstring(response.text)
-        articles = []
-        
-        for article in root.findall('.//PubmedArticle'):
-            article_data = self._parse_article(article)
-            if article_data:
-                articles.append(article_data)
+        async def run():
+            async with PubMedHarvester() as harvester:
+                result = await harvester.collect(query, max_results, parse_page=self._parse_page)
+            return result['records']
         
-        return articles
-    
-    def _parse_article(self, article_elem) -> Dict:
-        """논문 정보 파싱"""
         try:
-            medline = article_elem.find('.//MedlineCitation')
-            article = medline.find('.//Article')
-            
-            # 기본 정보
-            pmid = medline.find('.//PMID').text
-            
-            # 제목
-            title_elem = article.find('.//ArticleTitle')
-            title = title_elem.text if title_elem is not None else ''
-            
-            # 초록
-            abstract_elem = article.find('.//Abstract/AbstractText')
-            abstract = abstract_elem.text if abstract_elem is not None else ''
-            
-            # 저자
-            authors = []
-            for author in article.findall('.//Author'):
-                last_name = author.find('.//LastName')
-                fore_name = author.find('.//ForeName')
-                if last_name is not None:
-                    name = last_name.text
-                    if fore_name is not None:
-                        name = f"{fore_name.text} {name}"
-                    authors.append(name)
-            
-            # 저널 정보
-            journal = article.find('.//Journal')
-            journal_title = ''
-            if journal is not None:
-                title_elem = journal.find('.//Title')
-                journal_title = title_elem.text if title_elem is not None else ''
-            
-            # 출판 정보
-            pub_date = article.find('.//Journal/JournalIssue/PubDate')
-            year = ''
-            if pub_date is not None:
-                year_elem = pub_date.find('.//Year')
-                year = year_elem.text if year_elem is not None else ''
-            
-            # 볼륨, 이슈, 페이지
-            volume_elem = article.find('.//Journal/JournalIssue/Volume')
-            volume = volume_elem.text if volume_elem is not None else ''
-            
-            issue_elem = article.find('.//Journal/JournalIssue/Issue')
-            issue = issue_elem.text if issue_elem is not None else ''
-            
-            pagination = article.find('.//Pagination/MedlinePgn')
-            pages = pagination.text if pagination is not None else ''
-            
-            return {
-                'pmid': pmid,
-                'title': title,
-                'abstract': abstract,
-                'authors': authors,
-                'journal': journal_title,
-                'year': year,
-                'volume': volume,
-                'issue': issue,
-                'pages': pages,
-                'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-            }
-        
+            return asyncio.run(run())
         except Exception as e:
-            print(f"Error parsing article: {e}")
-            return None
+            print(f"Harvest error: {e}")
+            return []
+    
+    def _parse_page(self, xml_data: bytes) -> List[Dict]:
+        """efetch 응답 한 페이지 파싱"""
+        return [self._parse_article(record) for record in iter_pubmed_articles(xml_data)]
+    
+    def _parse_article(self, record: Dict) -> Dict:
+        """정규화된 PubMed 레코드를 참고문헌 형식으로 변환"""
+        pmid = record['pmid']
+        return {
+            'pmid': pmid,
+            'title': record['title'],
+            'abstract': record['abstract'],
+            'authors': record['author_names'],
+            'journal': record['journal'],
+            'year': record['year'],
+            'volume': record['volume'],
+            'issue': record['issue'],
+            'pages': record['pages'],
+            'doi': record['doi'],
+            'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+        }
     
     def search_spinal_surgery(self, specific_terms: str = "", 
                             max_results: int = 20,
@@ -155,8 +110,7 @@ class PubMedSearcher:
         current_year = datetime.now().year
         start_year = current_year - recent_years
         
-        pmids = self.search(query, max_results, start_year, current_year)
-        return self.fetch_details(pmids)
+        return self.harvest(query, max_results, start_year, current_year)
 
 
 # CLI 인터페이스
@@ -2,11 +2,14 @@
 """Test the Advanced AI System"""
 
 import asyncio
+import pickle
 import sys
 import os
+import tempfile
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
-from app.services.advanced_ollama_service import advanced_ollama_service
+from app.services.advanced_ollama_service import SHARED_MEMORY_PARTITION, advanced_ollama_service
+from app.services.memory_store import MemoryStore
 
 async def test_ai():
     print("🧪 Testing Advanced AI System...")
@@ -54,6 +57,26 @@ async def test_ai():
         print(response, end='', flush=True)
     print("\n")
     
+    # Test 8: Memories migrated from the legacy pickle are recalled for a real user
+    print("\n8️⃣ Testing legacy memory recall:")
+    original_store = advanced_ollama_service.memory_store
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "long_term_memory.pkl")
+        with open(legacy_path, "wb") as f:
+            pickle.dump({"facts": {"legacy": "Pedicle screw loosening rate was 12% in the 2019 cohort"}}, f)
+        advanced_ollama_service.memory_store = MemoryStore(os.path.join(tmp, "long_term"))
+        advanced_ollama_service.memory_store.import_legacy_pickle(legacy_path, SHARED_MEMORY_PARTITION)
+        try:
+            output = ""
+            async for response in advanced_ollama_service.process_message("/recall pedicle screw loosening", user_id="42"):
+                output += response
+                print(response, end='', flush=True)
+            assert "Pedicle screw loosening rate was 12%" in output, "migrated memory was not recalled"
+        finally:
+            advanced_ollama_service.memory_store.close()
+            advanced_ollama_service.memory_store = original_store
+    print("\n")
+    
     print("=" * 50)
     print("✅ All tests completed!")
 
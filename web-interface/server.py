@@ -9,12 +9,19 @@ import subprocess
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
 
 app = Flask(__name__, static_folder='.')
 CORS(app)
 
 # Ollama API 엔드포인트
-OLLAMA_API = "http://localhost:11434"
+OLLAMA_API = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# 요청 사이에 모델을 메모리에 유지하는 시간 (Ollama 기본값은 5분)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Ollama 연결을 재사용하는 공유 세션 (요청마다 새 TCP 연결을 열지 않음)
+ollama_session = requests.Session()
+ollama_session.mount(OLLAMA_API, HTTPAdapter(pool_connections=4, pool_maxsize=16))
 
 @app.route('/')
 def index():
@@ -98,22 +105,34 @@ def use_claude_cli(message):
 def use_ollama(message, model='mistral'):
     """Ollama API를 사용하여 응답 생성"""
     try:
-        # Ollama generate API 호출
-        response = requests.post(
+        # Ollama generate API 스트리밍 호출 - 타임아웃은 토큰 사이 간격에 적용되므로
+        # 긴 응답도 중간에 끊기지 않음
+        with ollama_session.post(
             f"{OLLAMA_API}/api/generate",
             json={
                 "model": model,
                 "prompt": message,
-                "stream": False
+                "stream": True,
+                "keep_alive": OLLAMA_KEEP_ALIVE
             },
-            timeout=30
-        )
+            timeout=(5, 30),
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                return f"Ollama 오류: HTTP {response.status_code}"
+            
+            parts = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('error'):
+                    return f"Ollama 오류: {data['error']}"
+                parts.append(data.get('response', ''))
+                if data.get('done'):
+                    break
         
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('response', '응답을 생성할 수 없습니다.')
-        else:
-            return f"Ollama 오류: HTTP {response.status_code}"
+        return ''.join(parts) or '응답을 생성할 수 없습니다.'
     
     except requests.exceptions.ConnectionError:
         return "Ollama 서버에 연결할 수 없습니다. 'ollama serve'를 실행하세요."
@@ -137,7 +156,7 @@ def check_claude_cli():
 def check_ollama():
     """Ollama 서버 상태 확인"""
     try:
-        response = requests.get(f"{OLLAMA_API}/api/tags", timeout=2)
+        response = ollama_session.get(f"{OLLAMA_API}/api/tags", timeout=2)
         return response.status_code == 200
     except:
         return False